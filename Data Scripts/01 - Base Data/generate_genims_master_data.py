@@ -14,9 +14,10 @@ from pathlib import Path
 # Add scripts dir to path for importing registry
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 from data_registry import get_registry  # type: ignore
+from scale_factor import scaled  # type: ignore
 
-# Configuration
-NUM_FACTORIES = 4
+# Configuration (GENIMS_SCALE_FACTOR grows the plant; lines, machines, sensors and staff follow the factories)
+NUM_FACTORIES = scaled(4)
 LINES_PER_FACTORY = (4, 6)  # min, max
 MACHINES_PER_LINE = (8, 15)
 SENSORS_PER_MACHINE = (5, 10)
@@ -247,10 +248,12 @@ class DataGenerator:
         """Generate factory master data"""
         print("Generating factories...")
         for i in range(NUM_FACTORIES):
-            location = FACTORY_LOCATIONS[i]
+            # Past the reference sites, locations repeat as numbered sister plants
+            location = FACTORY_LOCATIONS[i % len(FACTORY_LOCATIONS)]
+            site = i // len(FACTORY_LOCATIONS)
             factory = {
                 "factory_id": self.generate_id("factory", i + 1),
-                "factory_name": f"{location['city']} Auto Parts Manufacturing Plant",
+                "factory_name": f"{location['city']} Auto Parts Manufacturing Plant" + (f" {site + 1}" if site else ""),
                 "country": location["country"],
                 "city": location["city"],
                 "region": location["region"],
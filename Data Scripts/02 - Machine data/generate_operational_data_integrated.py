@@ -6,15 +6,18 @@ OPTIMIZED: Internal async/parallel processing for maximum performance
 """
 
 import json
-import pickle
 import random
 import os
+import sys
 from datetime import datetime, timedelta
 from typing import Dict, List
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import threading
 import multiprocessing
 
+import numpy as np
+
+MACHINES_PER_RUN_CHUNK = 10  # Machines per production-run / SCADA chunk
+
 class OperationsDataGenerator:
     """Generate operations data using master registry with ULTRA OPTIMIZED parallel processing"""
     
@@ -26,20 +29,22 @@ class OperationsDataGenerator:
         master_dir = project_root / "01 - Base Data"
         
         print("Loading master registry...")
-        registry_file = master_dir / 'genims_master_registry.pkl'
         master_json_file = master_dir / 'genims_master_data.json'
         
-        if not registry_file.exists():
-            raise FileNotFoundError(f"Master registry not found: {registry_file}")
         if not master_json_file.exists():
             raise FileNotFoundError(f"Master data JSON not found: {master_json_file}")
         
-        with open(registry_file, 'rb') as f:
-            self.registry = pickle.load(f)
+        # Memory-mapped registry snapshot (rebuilt from the master JSON only when stale)
+        sys.path.insert(0, str(project_root.parent / 'scripts'))
+        from data_registry import get_registry
+        from id_allocator import get_allocator
+        from columnar_store import load_dataset
+        from table_writer import open_table_writer
+        from chunk_executor import ChunkExecutor, chunk_seed
+        self.registry = get_registry(project_root.parent)
         
         # Get references from master data
-        with open(master_json_file, 'r') as f:
-            master_data = json.load(f)
+        master_data = load_dataset(master_json_file)
         
         self.factories = {f['factory_id']: f for f in master_data['factories']}
         self.products = {p['product_id']: p for p in master_data['products']}
@@ -64,139 +69,57 @@ class OperationsDataGenerator:
         
         # Thread safety and parallel processing configuration
         self.data_lock = threading.Lock()
-        self.counters = self.registry['id_counters'].copy()
+        
+        # GENERATOR_OUTPUT=ndjson|tsv: large tables stream to shard files as chunks are produced
+        # instead of being held for one JSON dump at the end (json = unchanged behaviour)
+        self.output_file = Path(__file__).parent / 'genims_operational_data.json'
+        self.writer = open_table_writer(self.output_file)
+        self.counters = self.registry.next_ids()
+        
+        # Contiguous ID ranges per ID type (ID_ALLOCATOR), reserved in chunk order as chunk results
+        # merge, so runs sharing the store never collide. Only the run coordinator
+        # (ID_ALLOCATOR_RESET, set by full_setup) restarts the ID spaces at the registry counters
+        self.ids = get_allocator(project_root.parent, 'operational')
+        if os.getenv('ID_ALLOCATOR_RESET', 'false').lower() == 'true':
+            for id_type in ('sensor_data', 'scada', 'RUN', 'MEVT'):
+                self.ids.reset(id_type, self.counters.get(id_type, 1))
         
         # Enable ULTRA-FAST parallel processing by default (overriding environment)
         self.parallel_enabled = True  # Always enable for maximum performance
         self.worker_count = min(8, max(2, multiprocessing.cpu_count() - 1))  # Use 2-8 workers optimally
         self.batch_size = int(os.getenv('BATCH_SIZE', '150000'))
+        self.sensor_samples = int(os.getenv('SENSOR_SAMPLES_PER_SENSOR', '100'))
+        
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.worker_count)
+        self.rng = np.random.default_rng(chunk_seed(self.chunks.seed, 'sensor_data', 0))
         
         print(f"🚀 ULTRA-FAST PARALLEL MODE: {self.worker_count} workers, batch_size={self.batch_size}")
+        print(f"   Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
         print(f"   CPU cores available: {multiprocessing.cpu_count()}, Using {self.worker_count} for generation")
     
-    def get_next_id(self, prefix: str) -> str:
-        """Get next ID (thread-safe)"""
-        with self.data_lock:
-            if prefix not in self.counters:
-                self.counters[prefix] = 1
-            id_val = self.counters[prefix]
-            self.counters[prefix] += 1
-            return f"{prefix}-{id_val:06d}"
+    def emit(self, table: str, records: List[dict]):
+        """Hand finished records to the shard writer, or keep them for the JSON dump"""
+        if self.writer is not None:
+            self.writer.write(table, records)
+        else:
+            with self.data_lock:
+                self.data[table].extend(records)
     
-    def _generate_sensor_data_chunk(self, sensor_chunk: List[dict], chunk_id: int, start_id: int) -> List[dict]:
-        """Generate sensor data for a chunk of sensors (parallel worker method)"""
-        chunk_data = []
-        
-        # REALISTIC sensor ranges based on industrial manufacturing equipment
-        sensor_ranges = {
-            'temperature': (35, 75),      # Motor/bearing operating range: 35-75°C
-            'vibration': (0.5, 8),        # ISO 10816: 0.5-8 mm/s normal, >8 alarm
-            'pressure': (4, 8),           # Hydraulic systems: 4-8 bar normal
-            'current': (5, 40),           # Motor current: 5-40A depending on load
-            'voltage': (210, 230),        # Single phase supply: ±10% of 220V
-            'flow': (10, 80),             # Flow rate: 10-80 L/min typical
-            'speed': (300, 2500),         # RPM varies by spindle type
-            'torque': (10, 80)            # Torque load: 10-80 Nm typical
-        }
-        
-        end_time = datetime.now()
-        start_time = end_time - timedelta(days=14)
-        local_id = start_id
-        
-        for sensor in sensor_chunk:
-            sensor_type = sensor['sensor_type']
-            min_val, max_val = sensor_ranges.get(sensor_type, (10, 100))
-            
-            for _ in range(100):  # Exactly 100 records per sensor
-                timestamp = start_time + timedelta(seconds=random.randint(0, int((end_time-start_time).total_seconds())))
-                
-                # Normal distribution around midpoint (realistic)
-                midpoint = (min_val + max_val) / 2
-                sigma = (max_val - min_val) / 8
-                measurement_value = random.gauss(midpoint, sigma)
-                measurement_value = max(min_val * 0.95, min(max_val * 1.05, measurement_value))
-                measurement_value = round(measurement_value, 4)
-                
-                # Most readings should be normal (98%), rare anomalies (2%)
-                is_anomaly = random.random() < 0.02
-                if is_anomaly:
-                    measurement_value = round(random.uniform(max_val * 1.1, max_val * 1.3), 4)
-                    anomaly_score = round(random.uniform(0.85, 1.0), 4)
-                else:
-                    anomaly_score = round(random.uniform(0, 0.2), 4)
-                
-                record = {
-                    'sensor_data_id': local_id,
-                    'sensor_id': sensor['sensor_id'],
-                    'machine_id': sensor['machine_id'],
-                    'line_id': sensor['line_id'],
-                    'factory_id': sensor['factory_id'],
-                    'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    'measurement_value': measurement_value,
-                    'measurement_unit': random.choice(['°C', 'mm/s', 'bar', 'A', 'V', 'L/min', 'rpm', 'Nm']),
-                    'status': 'critical' if is_anomaly else ('warning' if random.random() < 0.05 else 'normal'),
-                    'quality': 'bad' if is_anomaly else ('uncertain' if random.random() < 0.05 else 'good'),
-                    'is_below_warning': measurement_value < min_val * 0.95,
-                    'is_above_warning': measurement_value > max_val * 1.05,
-                    'is_below_critical': measurement_value < min_val * 0.90,
-                    'is_above_critical': measurement_value > max_val * 1.10,
-                    'min_value_1min': round(measurement_value - random.uniform(0.5, 2), 4),
-                    'max_value_1min': round(measurement_value + random.uniform(0.5, 2), 4),
-                    'avg_value_1min': round(measurement_value + random.uniform(-0.5, 0.5), 4),
-                    'std_dev_1min': round(random.uniform(0.05, 0.5), 4),
-                    'is_anomaly': is_anomaly,
-                    'anomaly_score': anomaly_score,
-                    'data_source': random.choice(['IoT', 'Edge', 'Gateway']),
-                    'protocol': random.choice(['OPC-UA', 'Modbus', 'MQTT']),
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                chunk_data.append(record)
-                local_id += 1
-        
-        return chunk_data
+    def emit_columns(self, table: str, columns: Dict):
+        """emit() for column arrays: rows are only built here, at the output boundary (or never, for TSV)"""
+        if self.writer is not None:
+            self.writer.write_columns(table, columns)
+        else:
+            from sensor_engine import records
+            self.emit(table, records(columns))
     
-    def generate_sensor_data(self):
-        """Generate sensor measurements with PARALLEL processing (159,900 records optimized)"""
-        print("Generating sensor data with PARALLEL processing (159,900 records)...")
-        
-        if not self.parallel_enabled or len(self.sensors) < 100:
-            return self._generate_sensor_data_sequential()
-        
-        # Parallel processing for large datasets
-        chunk_size = max(50, len(self.sensors) // self.worker_count)  # At least 50 sensors per chunk
-        sensor_chunks = [self.sensors[i:i + chunk_size] for i in range(0, len(self.sensors), chunk_size)]
-        
-        print(f"  🚀 Processing {len(sensor_chunks)} sensor chunks with {self.worker_count} workers...")
-        
-        all_sensor_data = []
-        start_id = 1
-        
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            # Submit chunk processing tasks
-            futures = {
-                executor.submit(self._generate_sensor_data_chunk, chunk, chunk_id, start_id + chunk_id * chunk_size * 100): chunk_id 
-                for chunk_id, chunk in enumerate(sensor_chunks)
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_data = future.result()
-                    all_sensor_data.extend(chunk_data)
-                    print(f"    ✓ Sensor chunk {chunk_id + 1}/{len(sensor_chunks)} completed ({len(chunk_data)} records)")
-                except Exception as e:
-                    print(f"    ✗ Sensor chunk {chunk_id + 1} failed: {e}")
-        
-        # Store results
-        with self.data_lock:
-            self.data['sensor_data'].extend(all_sensor_data)
-        
-        print(f"✓ Generated {len(self.data['sensor_data'])} sensor data records via PARALLEL processing")
+    def table_rows(self, table: str) -> int:
+        return len(self.data[table]) + (self.writer.rows(table) if self.writer is not None else 0)
     
-    def _generate_sensor_data_sequential(self):
-        """Fallback sequential sensor data generation"""
-        print("Generating sensor data (sequential fallback)...")
+    def get_next_id(self, prefix: str) -> str:
+        """Get next ID from this process's reserved block (thread- and process-safe)"""
+        return f"{prefix}-{self.ids.next_id(prefix, floor=self.counters.get(prefix, 1)):06d}"
     
     def generate_production_lines(self):
         """Generate production lines (tied to factories)"""
@@ -263,257 +186,39 @@ class OperationsDataGenerator:
         print(f"✓ Generated {len(self.sensors)} sensors")
     
     def generate_sensor_data(self):
-        """Generate sensor measurements aligned with IoT daemon output (159,900 records)"""
-        print("Generating sensor data (aligned with IoT daemon: 159,900 records)...")
-        
-        # REALISTIC sensor ranges based on industrial manufacturing equipment
-        # These are actual ranges from ISO/IEC standards for manufacturing
-        sensor_ranges = {
-            'temperature': (35, 75),      # Motor/bearing operating range: 35-75°C
-            'vibration': (0.5, 8),        # ISO 10816: 0.5-8 mm/s normal, >8 alarm
-            'pressure': (4, 8),           # Hydraulic systems: 4-8 bar normal
-            'current': (5, 40),           # Motor current: 5-40A depending on load
-            'voltage': (210, 230),        # Single phase supply: ±10% of 220V
-            'flow': (10, 80),             # Flow rate: 10-80 L/min typical
-            'speed': (300, 2500),         # RPM varies by spindle type
-            'torque': (10, 80)            # Torque load: 10-80 Nm typical
-        }
+        """Generate sensor measurements aligned with IoT daemon output (159,900 records at 100 per sensor)"""
+        from sensor_engine import generate_sensor_block
+        from history_slice import as_of
         
-        end_time = datetime.now()
-        start_time = end_time - timedelta(days=14)
-        sensor_data_id = 1
+        samples = self.sensor_samples
+        print(f"Generating sensor data (vectorized: {samples:,d} readings x {len(self.sensors):,d} sensors)...")
         
-        # Generate exactly 100 records per sensor to match IoT daemon (1599 sensors * 100 = 159,900)
-        for sensor in self.sensors:
-            sensor_type = sensor['sensor_type']
-            min_val, max_val = sensor_ranges.get(sensor_type, (10, 100))
-            
-            for _ in range(100):  # Exactly 100 records per sensor for 14-day period
-                timestamp = start_time + timedelta(seconds=random.randint(0, int((end_time-start_time).total_seconds())))
-                
-                # Normal distribution around midpoint (realistic)
-                midpoint = (min_val + max_val) / 2
-                sigma = (max_val - min_val) / 8  # Tighter distribution, 98% within range
-                measurement_value = random.gauss(midpoint, sigma)
-                # Clamp strictly to range
-                measurement_value = max(min_val * 0.95, min(max_val * 1.05, measurement_value))
-                measurement_value = round(measurement_value, 4)
-                
-                # Most readings should be normal (80%), rare anomalies (20%)
-                is_anomaly = random.random() < 0.02  # Only 2% true anomalies
-                if is_anomaly:
-                    # Force out-of-range anomaly
-                    measurement_value = round(random.uniform(max_val * 1.1, max_val * 1.3), 4)
-                    anomaly_score = round(random.uniform(0.85, 1.0), 4)
-                else:
-                    anomaly_score = round(random.uniform(0, 0.2), 4)
-                
-                record = {
-                    'sensor_data_id': sensor_data_id,
-                    'sensor_id': sensor['sensor_id'],
-                    'machine_id': sensor['machine_id'],
-                    'line_id': sensor['line_id'],
-                    'factory_id': sensor['factory_id'],
-                    'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    'measurement_value': measurement_value,
-                    'measurement_unit': random.choice(['°C', 'mm/s', 'bar', 'A', 'V', 'L/min', 'rpm', 'Nm']),
-                    'status': 'critical' if is_anomaly else ('warning' if random.random() < 0.05 else 'normal'),
-                    'quality': 'bad' if is_anomaly else ('uncertain' if random.random() < 0.05 else 'good'),
-                    'is_below_warning': measurement_value < min_val * 0.95,
-                    'is_above_warning': measurement_value > max_val * 1.05,
-                    'is_below_critical': measurement_value < min_val * 0.90,
-                    'is_above_critical': measurement_value > max_val * 1.10,
-                    'min_value_1min': round(measurement_value - random.uniform(0.5, 2), 4),
-                    'max_value_1min': round(measurement_value + random.uniform(0.5, 2), 4),
-                    'avg_value_1min': round(measurement_value + random.uniform(-0.5, 0.5), 4),
-                    'std_dev_1min': round(random.uniform(0.05, 0.5), 4),
-                    'is_anomaly': is_anomaly,
-                    'anomaly_score': anomaly_score,
-                    'data_source': random.choice(['IoT', 'Edge', 'Gateway']),
-                    'protocol': random.choice(['OPC-UA', 'Modbus', 'MQTT']),
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                self.data['sensor_data'].append(record)
-                sensor_data_id += 1
+        end_time = as_of()  # GENERATOR_AS_OF pins the window, with the seed the readings repeat
+        start_time = end_time - timedelta(days=14)
         
-        print(f"✓ Generated {len(self.data['sensor_data'])} sensor data records")
+        # Whole blocks of sensors are drawn as NumPy columns, sized so one block is ~batch_size rows;
+        # sensors with more than batch_size readings are split into several blocks of samples
+        per_block = max(1, min(samples, self.batch_size))
+        block_sensors = max(1, self.batch_size // per_block)
+        for pos in range(0, len(self.sensors), block_sensors):
+            block = self.sensors[pos:pos + block_sensors]
+            for done in range(0, samples, per_block):
+                n = min(per_block, samples - done)
+                first_id, _ = self.ids.reserve('sensor_data', len(block) * n)
+                self.emit_columns('sensor_data', generate_sensor_block(block, n, start_time, end_time, first_id, self.rng))
+        
+        print(f"✓ Generated {self.table_rows('sensor_data')} sensor data records")
     
-    def _generate_scada_data_chunk(self, machine_chunk: List[dict], chunk_id: int, start_id: int, machine_faults_by_id: dict) -> List[dict]:
-        """Generate SCADA data for a chunk of machines (parallel worker method)"""
+    def _generate_scada_data_chunk(self, machine_chunk: List[dict], end_time: datetime,
+                                   machine_faults_by_id: dict) -> List[dict]:
+        """Generate SCADA data for a chunk of machines (chunk worker: RNGs seeded per chunk, IDs set on merge)"""
         chunk_data = []
-        
-        end_time = datetime.now()
         start_time = end_time - timedelta(days=14)
-        local_id = start_id
+        created_at = end_time.strftime('%Y-%m-%d %H:%M:%S')
         
-        # Generate exactly 336 records per machine to match SCADA daemon
         for machine in machine_chunk:
             machine_faults = machine_faults_by_id.get(machine['machine_id'], [])
             
-            for _ in range(336):  # Exactly 336 records per machine for 14-day period
-                timestamp = start_time + timedelta(seconds=random.randint(0, int((end_time-start_time).total_seconds())))
-                actual_cycle = round(random.uniform(15, 45), 2)
-                
-                # REALISTIC machine state distribution
-                machine_state = random.choices(
-                    ['running', 'idle', 'setup', 'stopped', 'maintenance', 'fault'],
-                    weights=[0.82, 0.10, 0.04, 0.01, 0.02, 0.01]
-                )[0]
-                has_fault = machine_state in ['fault', 'maintenance']
-                
-                # Realistic availability: 95-99%
-                if machine_state == 'running':
-                    availability = round(random.gauss(97, 1.5), 2)
-                    availability = max(95, min(99, availability))
-                else:
-                    availability = round(random.uniform(70, 95), 2)
-                
-                # Smart fault code/description linking
-                fault_code = None
-                fault_description = None
-                
-                if has_fault:
-                    if machine_faults and random.random() < 0.70:
-                        # Try to link to a nearby fault record
-                        selected_fault = random.choice(machine_faults)
-                        fault_code = selected_fault.get('fault_code', f"ERR-{random.randint(100, 999)}")
-                        fault_description = selected_fault.get('fault_description', 'System fault detected')
-                    else:
-                        # Generate new fault code
-                        fault_code = f"ERR-{random.randint(100, 999)}"
-                        fault_description = random.choice([
-                            'Bearing temperature high',
-                            'Spindle misalignment detected',
-                            'Lubrication pressure low',
-                            'Motor overcurrent condition',
-                            'Tool wear threshold exceeded',
-                            'Conveyor jam detected'
-                        ])
-                
-                # Calculate realistic OEE
-                perf_pct = round(random.gauss(94, 2), 2)
-                perf_pct = max(90, min(98, perf_pct))
-                qual_pct = round(random.gauss(97, 1.5), 2)
-                qual_pct = max(95, min(99, qual_pct))
-                calculated_oee = round((availability * perf_pct * qual_pct) / 10000, 2)
-                
-                record = {
-                    'scada_id': local_id,
-                    'machine_id': machine['machine_id'],
-                    'line_id': machine['line_id'],
-                    'factory_id': machine['factory_id'],
-                    'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    'machine_state': machine_state,
-                    'operation_mode': random.choice(['auto', 'manual', 'test']),
-                    'fault_code': fault_code,
-                    'fault_description': fault_description,
-                    'parts_produced_cumulative': random.randint(10000, 100000),
-                    'parts_produced_shift': random.randint(100, 1000),
-                    'parts_rejected_shift': random.randint(0, 50),
-                    'target_cycle_time_seconds': 30,
-                    'actual_cycle_time_seconds': actual_cycle,
-                    'availability_percentage': availability,
-                    'performance_percentage': perf_pct,
-                    'quality_percentage': qual_pct,
-                    'oee_percentage': calculated_oee,
-                    'spindle_speed_rpm': random.randint(500, 5000),
-                    'feed_rate_mm_min': round(random.uniform(50, 500), 2),
-                    'tool_number': random.randint(1, 20),
-                    'program_number': f"PROG-{random.randint(1000, 9999)}",
-                    'power_consumption_kw': round(random.uniform(5, 50), 2),
-                    'energy_consumed_kwh': round(random.uniform(10, 500), 4),
-                    'temperature_setpoint_c': round(random.uniform(20, 80), 2),
-                    'temperature_actual_c': round(random.uniform(20, 85), 2),
-                    'pressure_setpoint_bar': round(random.uniform(5, 10), 2),
-                    'pressure_actual_bar': round(random.uniform(5, 11), 2),
-                    'downtime_seconds_shift': random.randint(0, 3600),
-                    'last_fault_timestamp': (timestamp - timedelta(hours=random.randint(1, 48))).strftime('%Y-%m-%d %H:%M:%S') if (has_fault or random.random() < 0.50) else None,
-                    'uptime_seconds_shift': random.randint(3600, 28800),
-                    'active_alarms': random.randint(0, 5),
-                    'alarm_codes': ','.join([f"ALM-{random.randint(100, 999)}" for _ in range(random.randint(1, 4))]) if random.random() < 0.75 else None,
-                    'warning_codes': ','.join([f"WRN-{random.randint(100, 999)}" for _ in range(random.randint(1, 3))]) if random.random() < 0.70 else None,
-                    'shift_id': random.choice([s['shift_id'] for s in self.shifts]) if self.shifts else f"SHF-{random.randint(1, 3):03d}",
-                    'operator_id': random.choice(list(self.employees.keys())),
-                    'data_source': 'PLC',
-                    'data_quality': random.choice(['good', 'uncertain', 'bad']),
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                chunk_data.append(record)
-                local_id += 1
-        
-        return chunk_data
-    
-    def generate_scada_data(self):
-        """Generate SCADA machine data with PARALLEL processing (70,896 records optimized)"""
-        print("Generating SCADA data with PARALLEL processing (70,896 records)...")
-        
-        # Build machine-indexed fault list for fast lookup
-        machine_faults_by_id = {}
-        for fault in self.data.get('machine_faults', []):
-            mid = fault['machine_id']
-            if mid not in machine_faults_by_id:
-                machine_faults_by_id[mid] = []
-            machine_faults_by_id[mid].append(fault)
-        
-        if not self.parallel_enabled or len(self.machines) < 20:
-            return self._generate_scada_data_sequential(machine_faults_by_id)
-        
-        # Parallel processing for large datasets
-        chunk_size = max(10, len(self.machines) // self.worker_count)  # At least 10 machines per chunk
-        machine_chunks = [self.machines[i:i + chunk_size] for i in range(0, len(self.machines), chunk_size)]
-        
-        print(f"  🚀 Processing {len(machine_chunks)} machine chunks with {self.worker_count} workers...")
-        
-        all_scada_data = []
-        start_id = 1
-        
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            # Submit chunk processing tasks
-            futures = {
-                executor.submit(self._generate_scada_data_chunk, chunk, chunk_id, start_id + chunk_id * chunk_size * 336, machine_faults_by_id): chunk_id 
-                for chunk_id, chunk in enumerate(machine_chunks)
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_data = future.result()
-                    all_scada_data.extend(chunk_data)
-                    print(f"    ✓ SCADA chunk {chunk_id + 1}/{len(machine_chunks)} completed ({len(chunk_data)} records)")
-                except Exception as e:
-                    print(f"    ✗ SCADA chunk {chunk_id + 1} failed: {e}")
-        
-        # Store results
-        with self.data_lock:
-            self.data['scada_machine_data'].extend(all_scada_data)
-        
-        print(f"✓ Generated {len(self.data['scada_machine_data'])} SCADA records via PARALLEL processing")
-    
-    def _generate_scada_data_sequential(self, machine_faults_by_id: dict):
-        """Fallback sequential SCADA data generation"""
-        print("Generating SCADA data (sequential fallback)...")
-    
-    def generate_scada_data(self):
-        """Generate SCADA machine data aligned with daemon output (70,896 records)"""
-        print("Generating SCADA data (aligned with SCADA daemon: 70,896 records)...")
-        
-        end_time = datetime.now()
-        start_time = end_time - timedelta(days=14)
-        scada_id = 1  # Track BIGSERIAL primary key
-        
-        # Build machine-indexed fault list for fast lookup
-        machine_faults_by_id = {}
-        for fault in self.data.get('machine_faults', []):
-            mid = fault['machine_id']
-            if mid not in machine_faults_by_id:
-                machine_faults_by_id[mid] = []
-            machine_faults_by_id[mid].append(fault)
-        
-        # Generate exactly 336 records per machine to match SCADA daemon (211 machines * 336 = 70,896)
-        for machine in self.machines:
-            machine_faults = machine_faults_by_id.get(machine['machine_id'], [])
-            
             # Exactly 336 records per machine for 14-day period (24 records per day)
             for _ in range(336):
                 timestamp = start_time + timedelta(seconds=random.randint(0, int((end_time-start_time).total_seconds())))
@@ -583,7 +288,7 @@ class OperationsDataGenerator:
                 calculated_oee = round((availability * perf_pct * qual_pct) / 10000, 2)
                 
                 record = {
-                    'scada_id': scada_id,  # BIGSERIAL primary key
+                    'scada_id': None,  # BIGSERIAL primary key, assigned when the chunk is merged
                     'machine_id': machine['machine_id'],
                     'line_id': machine['line_id'],
                     'factory_id': machine['factory_id'],
@@ -617,25 +322,54 @@ class OperationsDataGenerator:
                     'active_alarms': random.randint(0, 5),
                     'alarm_codes': ','.join([f"ALM-{random.randint(100, 999)}" for _ in range(random.randint(1, 4))]) if random.random() < 0.75 else None,
                     'warning_codes': ','.join([f"WRN-{random.randint(100, 999)}" for _ in range(random.randint(1, 3))]) if random.random() < 0.70 else None,
-                    'shift_id': random.choice([s['shift_id'] for s in self.shifts]),
+                    'shift_id': random.choice([s['shift_id'] for s in self.shifts]) if self.shifts else f"SHF-{random.randint(1, 3):03d}",
                     'operator_id': random.choice(list(self.employees.keys())),
                     'data_source': 'PLC',
                     'data_quality': random.choice(['good', 'uncertain', 'bad']),
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'created_at': created_at
                 }
-                self.data['scada_machine_data'].append(record)
-                scada_id += 1
+                chunk_data.append(record)
+        
+        return chunk_data
+    
+    def generate_scada_data(self):
+        """Generate SCADA machine data aligned with daemon output (336 records per machine, 70,896 for 211)"""
+        from history_slice import as_of
+        
+        print("Generating SCADA data (aligned with SCADA daemon: 336 records per machine)...")
+        
+        end_time = as_of()  # GENERATOR_AS_OF pins the window, with the seed the records repeat
+        
+        # Build machine-indexed fault list for fast lookup
+        machine_faults_by_id = {}
+        for fault in self.data.get('machine_faults', []):
+            mid = fault['machine_id']
+            if mid not in machine_faults_by_id:
+                machine_faults_by_id[mid] = []
+            machine_faults_by_id[mid].append(fault)
         
-        print(f"✓ Generated {len(self.data['scada_machine_data'])} SCADA records")
+        # Fixed-size machine chunks (independent of the worker count), each seeded by ChunkExecutor
+        chunk_size = MACHINES_PER_RUN_CHUNK
+        machine_chunks = [self.machines[i:i + chunk_size] for i in range(0, len(self.machines), chunk_size)]
+        chunk_args = [(chunk, end_time, {m['machine_id']: machine_faults_by_id.get(m['machine_id'], []) for m in chunk})
+                      for chunk in machine_chunks]
+        for chunk_id, chunk_data in self.chunks.run(self._generate_scada_data_chunk, chunk_args, 'scada_machine_data'):
+            # One scada range per chunk, reserved in chunk order
+            start_id, _ = self.ids.reserve('scada', len(chunk_data), floor=self.counters.get('scada', 1))
+            for offset, record in enumerate(chunk_data):
+                record['scada_id'] = start_id + offset
+            self.emit('scada_machine_data', chunk_data)
+            print(f"    ✓ SCADA chunk {chunk_id + 1}/{len(machine_chunks)} completed ({len(chunk_data)} records)")
+        
+        print(f"✓ Generated {self.table_rows('scada_machine_data')} SCADA records")
     
-    def _generate_production_runs_chunk(self, machines_chunk: List[dict], chunk_id: int, start_id: int) -> List[dict]:
+    def _generate_production_runs_chunk(self, machines_chunk: List[dict], chunk_id: int,
+                                        end_time: datetime) -> List[dict]:
         """Generate production runs for a chunk of machines (parallel worker method)"""
         chunk_data = []
-        local_id = start_id
         product_list = list(self.products.keys())
         
-        # Generate runs over 180-day period
-        end_time = datetime.now()
+        # Generate runs over the 180-day period ending at end_time
         start_time = end_time - timedelta(days=180)
         
         for machine in machines_chunk:
@@ -686,7 +420,7 @@ class OperationsDataGenerator:
                 previous_product_id = random.choice(product_list) if run_num > 0 else selected_product_id
                 
                 run = {
-                    'run_id': self.get_next_id('RUN'),
+                    'run_id': None,  # Assigned from a reserved range when the chunk is merged
                     'line_id': machine['line_id'],  # From machines table which has line_id
                     'factory_id': machine['factory_id'],
                     'product_id': selected_product_id,
@@ -719,12 +453,12 @@ class OperationsDataGenerator:
                     'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 }
                 chunk_data.append(run)
-                local_id += 1
         
         return chunk_data
     
     def generate_production_runs(self):
         """Generate production run data with PARALLEL processing"""
+        from history_slice import as_of
         print("Generating production run data with PARALLEL processing...")
         
         # Generate production runs directly from machines (not from production_orders)
@@ -735,31 +469,22 @@ class OperationsDataGenerator:
         if not self.parallel_enabled or len(self.machines) < 20:
             return self._generate_production_runs_sequential(self.machines)
         
-        # Parallel processing for large datasets
-        chunk_size = max(5, len(self.machines) // self.worker_count)  # At least 5 machines per chunk
+        # Parallel processing for large datasets (fixed-size machine chunks, independent of the worker count)
+        chunk_size = MACHINES_PER_RUN_CHUNK
         machine_chunks = [self.machines[i:i + chunk_size] for i in range(0, len(self.machines), chunk_size)]
         
         print(f"  🚀 Processing {len(machine_chunks)} machine chunks with {self.worker_count} workers...")
         
         all_production_runs = []
-        start_id = 1
-        
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            # Submit chunk processing tasks
-            futures = {
-                executor.submit(self._generate_production_runs_chunk, chunk, chunk_id, start_id + chunk_id * chunk_size * 10): chunk_id  # Avg 10 runs per machine
-                for chunk_id, chunk in enumerate(machine_chunks)
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_data = future.result()
-                    all_production_runs.extend(chunk_data)
-                    print(f"    ✓ Production runs chunk {chunk_id + 1}/{len(machine_chunks)} completed ({len(chunk_data)} records)")
-                except Exception as e:
-                    print(f"    ✗ Production runs chunk {chunk_id + 1} failed: {e}")
+        end_time = as_of()  # Same window end in every chunk, pinned by GENERATOR_AS_OF
+        chunk_args = [(chunk, chunk_id, end_time) for chunk_id, chunk in enumerate(machine_chunks)]
+        for chunk_id, chunk_data in self.chunks.run(self._generate_production_runs_chunk, chunk_args, 'production_runs'):
+            # One RUN range per chunk, reserved in chunk order (run count is only known after generation)
+            start_id, _ = self.ids.reserve('RUN', len(chunk_data), floor=self.counters.get('RUN', 1))
+            for offset, run in enumerate(chunk_data):
+                run['run_id'] = f"RUN-{start_id + offset:06d}"
+            all_production_runs.extend(chunk_data)
+            print(f"    ✓ Production runs chunk {chunk_id + 1}/{len(machine_chunks)} completed ({len(chunk_data)} records)")
         
         # Store results
         with self.data_lock:
@@ -769,6 +494,7 @@ class OperationsDataGenerator:
     
     def _generate_production_runs_sequential(self, machines: List[dict]):
         """Fallback sequential production runs generation"""
+        from history_slice import as_of
         print("Generating production runs (sequential fallback)...")
         """Generate production runs over 180-day period directly from machines"""
         print("Generating production runs (180-day period)...")
@@ -776,7 +502,7 @@ class OperationsDataGenerator:
         product_list = list(self.products.keys())
         
         # Align with MES: 180-day period
-        end_time = datetime.now()
+        end_time = as_of()
         start_time = end_time - timedelta(days=180)
         
         for machine in machines:
@@ -861,13 +587,14 @@ class OperationsDataGenerator:
     
     def generate_machine_faults(self):
         """Generate machine faults over 180-day period to align with MES"""
+        from history_slice import as_of
         print("Generating machine faults (180-day period)...")
         
         employee_list = list(self.employees.keys())
         fault_id = 1
         
         # Align with MES: 180-day period
-        end_time = datetime.now()
+        end_time = as_of()
         start_time = end_time - timedelta(days=180)
         
         for machine in self.machines:
@@ -1012,6 +739,7 @@ class OperationsDataGenerator:
     
     def generate_maintenance_events(self):
         """Generate maintenance events - realistic distribution"""
+        from history_slice import as_of
         print("Generating maintenance events...")
         
         employee_list = list(self.employees.keys())
@@ -1029,7 +757,7 @@ class OperationsDataGenerator:
             num_events = random.randint(24, 36)
             
             # Align with MES: 180-day period 
-            end_time = datetime.now()
+            end_time = as_of()
             start_time = end_time - timedelta(days=180)
             
             for idx in range(num_events):
@@ -1140,7 +868,7 @@ class OperationsDataGenerator:
         self.generate_maintenance_events()  # Then maintenance can reference faults
         self.generate_sensor_health()
         
-        total_records = sum(len(v) for v in self.data.values())
+        total_records = sum(self.table_rows(table) for table in self.data)
         print(f"\n✓ Generated {total_records:,d} records across {len(self.data)} tables")
         
         return self.data
@@ -1154,6 +882,15 @@ class OperationsDataGenerator:
             output_dir = Path(__file__).parent
             filepath = str(output_dir / filepath)
         
+        if self.writer is not None:
+            # Streamed tables are already on disk; the rest are written now and the manifest published
+            print(f"\nWriting remaining operational tables as {self.writer.fmt} shards...")
+            for table, records in self.data.items():
+                self.writer.write(table, records)
+            self.writer.close()
+            print(f"✓ Saved shards to {self.writer.shard_dir} (manifest: {self.writer.data_file})")
+            return
+        
         print(f"\nSaving operational data to {filepath}...")
         with open(filepath, 'w') as f:
             json.dump(self.data, f, indent=2)
@@ -31,6 +31,10 @@ except ImportError:
     POSTGRES_AVAILABLE = False
     print("WARNING: psycopg2 not installed")
 
+# Scale factor (GENIMS_SCALE_FACTOR) for daily record targets
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled  # type: ignore
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -41,7 +45,7 @@ except ImportError:
 SENSOR_SAMPLING_INTERVAL = int(os.getenv('IOT_SAMPLING_INTERVAL', '10'))
 BATCH_SIZE = int(os.getenv('IOT_BATCH_SIZE', '5000'))  # Larger batch for sensor volume
 RECORDS_PER_CYCLE = int(os.getenv('IOT_RECORDS_PER_CYCLE', '2000'))  # More records per cycle
-TOTAL_RECORDS = int(os.getenv('IOT_TOTAL_RECORDS', '159900'))  # 1599 sensors * 100 samples = 14 days
+TOTAL_RECORDS = int(os.getenv('IOT_TOTAL_RECORDS', str(scaled(159900))))  # 1599 sensors * 100 samples = 14 days
 
 # PostgreSQL configuration - from Azure Cloud via config.env
 PG_HOST = os.getenv('POSTGRES_HOST', 'localhost')
@@ -12,8 +12,10 @@ import json
 import random
 import signal
 import logging
+import io
 from datetime import datetime, timedelta
-from typing import Dict, List
+
+import numpy as np
 
 # Load environment variables from parent directory config
 from dotenv import load_dotenv
@@ -21,6 +23,13 @@ env_file = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'confi
 if os.path.exists(env_file):
     load_dotenv(env_file)
 
+# Vectorized SCADA engine and COPY text formatting live with the shared scripts
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled  # type: ignore
+from scada_engine import ScadaEngine, SCADA_COLUMNS, FAULT_TYPES
+from chunk_executor import chunk_seed, run_seed
+from table_writer import tsv_lines
+
 # Optional dependencies
 try:
     import psycopg2
@@ -50,7 +59,7 @@ PG_SSL_MODE = os.getenv('PG_SSL_MODE', 'require')  # Azure requires SSL
 SCADA_SAMPLING_INTERVAL = int(os.getenv('SCADA_SAMPLING_INTERVAL', '60'))
 BATCH_SIZE = int(os.getenv('SCADA_BATCH_SIZE', '2000'))
 RECORDS_PER_CYCLE = int(os.getenv('SCADA_RECORDS_PER_CYCLE', '500'))  # Larger cycles for efficiency
-TOTAL_RECORDS = int(os.getenv('SCADA_TOTAL_RECORDS', '70896'))  # 211 machines * 336 records = 14 days
+TOTAL_RECORDS = int(os.getenv('SCADA_TOTAL_RECORDS', str(scaled(70896))))  # 211 machines * 336 records = 14 days
 
 # Logging
 logging.basicConfig(
@@ -85,190 +94,6 @@ signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
 
-class MachineSimulator:
-    """Simulates realistic machine operational behavior"""
-    
-    MACHINE_STATES = ['running', 'idle', 'stopped', 'fault', 'maintenance', 'setup']
-    
-    def __init__(self, machine: Dict, operators: List[Dict], shifts: List[Dict]):
-        self.machine = machine
-        self.machine_id = machine['machine_id']
-        self.line_id = machine['line_id']
-        self.factory_id = machine['factory_id']
-        self.plant_id = machine.get('plant_id', machine.get('factory_id', 'PLANT-001'))
-        self.machine_type = machine['machine_type']
-        self.operators = operators
-        self.shifts = shifts
-        
-        # State
-        self.current_state = 'running'
-        self.parts_produced_cumulative = random.randint(100000, 500000)
-        self.parts_produced_shift = 0
-        self.parts_rejected_shift = 0
-        self.downtime_seconds_shift = 0
-        self.uptime_seconds_shift = 0
-        self.current_tool = random.randint(1, 12)
-        self.tool_usage_cycles = 0
-        
-        # Fault simulation
-        self.fault_active = False
-        self.fault_start_time = None
-        self.fault_duration = 0
-        self.fault_code = None
-        self.fault_description = None
-        
-        # Performance baseline
-        self.target_cycle_time = 3600 / machine.get('design_capacity_units_per_hour', 60)
-        self.rated_power = machine.get('power_rating_kw', 50)
-    
-    def inject_fault(self, fault_code: str, fault_description: str, duration_seconds=300):
-        """Inject a fault condition"""
-        self.fault_active = True
-        self.fault_start_time = datetime.now()  # Will be set in main loop with simulated time
-        self.fault_duration = duration_seconds
-        self.fault_code = fault_code
-        self.fault_description = fault_description
-        self.current_state = 'fault'
-        logger.info(f"Fault injected: {self.machine_id} - {fault_code}: {fault_description}")
-    
-    def clear_fault(self):
-        """Clear fault condition"""
-        if self.fault_active:
-            self.fault_active = False
-            self.current_state = 'running'
-            logger.info(f"Fault cleared: {self.machine_id}")
-    
-    def get_current_shift(self, simulated_timestamp) -> Dict:
-        """Get current shift based on simulated time"""
-        current_hour = simulated_timestamp.hour
-        day_of_week = simulated_timestamp.strftime('%a').lower()
-        
-        for shift in self.shifts:
-            if self.factory_id != shift['factory_id']:
-                continue
-            
-            days = shift['days_of_week'].split(',')
-            if day_of_week not in days:
-                continue
-            
-            start_hour = int(shift['start_time'].split(':')[0])
-            end_hour = int(shift['end_time'].split(':')[0])
-            
-            if start_hour <= current_hour < end_hour:
-                return shift
-        
-        # Default
-        return next((s for s in self.shifts if s['shift_code'] == 'G'), self.shifts[0])
-    
-    def determine_state(self, simulated_timestamp) -> str:
-        """Determine machine state based on simulated time and conditions"""
-        if self.fault_active and self.fault_start_time is not None:
-            elapsed = (simulated_timestamp - self.fault_start_time).total_seconds()
-            if elapsed > self.fault_duration:
-                self.clear_fault()
-                return 'running'
-            return 'fault'
-        
-        hour = simulated_timestamp.hour
-        
-        # Night maintenance window (2-6 AM)
-        if 2 <= hour < 6:
-            return random.choices(['idle', 'maintenance'], weights=[0.7, 0.3])[0]
-        
-        # Normal operations - mostly running
-        return random.choices(
-            ['running', 'idle', 'setup'],
-            weights=[0.88, 0.10, 0.02]
-        )[0]
-    
-    def get_reading(self, timestamp_seconds_into_sim, sim_base_time):
-        """Generate reading for given absolute timestamp"""
-        current_ts = sim_base_time + timedelta(seconds=timestamp_seconds_into_sim)
-        hour = current_ts.hour
-        
-        # Check fault
-        fault_detected = False
-        fault_code = None
-        fault_desc = None
-        
-        if self.fault_active and hasattr(self, 'fault_start_offset'):
-            fault_start = self.fault_start_offset
-            fault_end = self.fault_start_offset + 3600  # 1 hour duration
-            
-            if fault_start <= timestamp_seconds_into_sim <= fault_end:
-                fault_detected = True
-                fault_code = self.fault_code
-                fault_desc = self.fault_description
-        
-        # Determine state
-        if fault_detected:
-            operating_state = 'fault'
-        elif 2 <= hour < 6:  # Night maintenance
-            operating_state = random.choice(['idle', 'maintenance', 'idle'])
-        else:
-            operating_state = random.choices(['running', 'idle', 'setup'], weights=[0.88, 0.10, 0.02])[0]
-        
-        # Calculate metrics
-        is_producing = operating_state == 'running'
-        
-        if is_producing:
-            cycle_time = self.target_cycle_time * random.uniform(0.95, 1.10)
-            parts = int(SCADA_SAMPLING_INTERVAL / cycle_time)
-            availability = 1.0
-        else:
-            cycle_time = 0
-            parts = 0
-            availability = 0.0
-        
-        performance = 0.95 if is_producing else 0.0
-        quality = 0.98
-        oee = availability * performance * quality
-        
-        # Shift info
-        shift = next((s for s in self.shifts if not (2 <= hour < 6)), self.shifts[0])
-        
-        return {
-            'machine_id': self.machine_id,
-            'line_id': self.line_id,
-            'factory_id': self.factory_id,
-            'timestamp': current_ts,
-            'machine_state': operating_state,
-            'operation_mode': 'auto',
-            'fault_code': fault_code,
-            'fault_description': fault_desc,
-            'parts_produced_cumulative': random.randint(10000, 500000),
-            'parts_produced_shift': random.randint(0, 100),
-            'parts_rejected_shift': random.randint(0, 5),
-            'target_cycle_time_seconds': int(self.target_cycle_time),
-            'actual_cycle_time_seconds': 3600 if is_producing else None,
-            'availability_percentage': round(availability * 100, 2),
-            'performance_percentage': round(performance * 100, 2),
-            'quality_percentage': round(quality * 100, 2),
-            'oee_percentage': round(oee * 100, 2),
-            'spindle_speed_rpm': random.randint(1000, 4000) if is_producing else None,
-            'feed_rate_mm_min': round(random.uniform(100, 500), 2) if is_producing else None,
-            'tool_number': self.current_tool,
-            'program_number': f"NC{random.randint(1000, 9999)}" if is_producing else None,
-            'power_consumption_kw': round(random.uniform(30, 80), 2) if is_producing else round(random.uniform(5, 15), 2),
-            'energy_consumed_kwh': round(random.uniform(1000, 50000), 2),
-            'temperature_setpoint_c': round(random.uniform(40, 70), 2),
-            'temperature_actual_c': round(random.uniform(35, 75), 2),
-            'pressure_setpoint_bar': round(random.uniform(100, 150), 2),
-            'pressure_actual_bar': round(random.uniform(95, 155), 2),
-            'downtime_seconds_shift': 0 if is_producing else SCADA_SAMPLING_INTERVAL,
-            'last_fault_timestamp': current_ts if fault_detected else None,
-            'uptime_seconds_shift': SCADA_SAMPLING_INTERVAL if is_producing else 0,
-            'active_alarms': 1 if fault_detected else 0,
-            'alarm_codes': fault_code if fault_detected else None,
-            'warning_codes': None,
-            'shift_id': shift['shift_id'],
-            'operator_id': shift.get('operator_id'),
-            'data_source': 'PLC',
-            'data_quality': 'good',
-            'created_at': datetime.now()
-        }
-
-
 def initialize_postgres():
     """Initialize PostgreSQL connection"""
     global pg_connection
@@ -495,36 +320,25 @@ def main():
         return 1
     
     machines = master_data['machines']
-    employees = master_data['employees']
     shifts = master_data['shifts']
     
     logger.info(f"Loaded {len(machines):,} machines")
     
-    # Create simulators
-    simulators = [MachineSimulator(machine, employees, shifts) for machine in machines]
-    logger.info(f"Created {len(simulators):,} machine simulators")
+    # One Markov state engine for the whole fleet (all machines step together), seeded from GENERATOR_SEED
+    engine = ScadaEngine(machines, shifts, SCADA_SAMPLING_INTERVAL,
+                         rng=np.random.default_rng(chunk_seed(run_seed(), 'scada_machine_data', 0)))
+    logger.info(f"Created SCADA engine for {len(machines):,} machines ({SCADA_SAMPLING_INTERVAL}s samples)")
     
     # Query database for max timestamp to ensure no overlaps (true APPEND mode)
     sim_base_time = get_max_scada_timestamp()
     logger.info(f"Using base timestamp: {sim_base_time}")
     
     # Inject faults (3% of machines)
-    num_faults = int(len(simulators) * 0.03)
-    fault_machines = random.sample(simulators, num_faults)
-    
-    fault_types = [
-        ('BEAR-001', 'Bearing degradation'),
-        ('THERM-001', 'Motor thermal overload'),
-        ('HYD-001', 'Hydraulic pressure loss'),
-        ('TOOL-001', 'Tool wear detected')
-    ]
-    
-    for sim in fault_machines:
-        fault_code, fault_desc = random.choice(fault_types)
-        sim.fault_code = fault_code
-        sim.fault_description = fault_desc
-        sim.fault_active = True
-        sim.fault_start_offset = random.randint(1000, 10000)  # seconds into sim
+    num_faults = int(len(machines) * 0.03)
+    for machine_idx in random.sample(range(len(machines)), num_faults):
+        fault_code, fault_desc = random.choice(FAULT_TYPES)
+        fault_start = sim_base_time + timedelta(seconds=random.randint(1000, 10000))
+        engine.inject_fault(machine_idx, fault_code, fault_desc, fault_start, 3600)
     
     logger.info(f"✓ Injected {num_faults} fault conditions")
     logger.info(f"Target records: {TOTAL_RECORDS:,}")
@@ -538,23 +352,28 @@ def main():
     logger.info("GENERATING ALL DATA IN MEMORY...")
     logger.info("="*80)
     
-    # Generate ALL records in memory
-    all_records = []
-    records_per_machine = TOTAL_RECORDS // len(simulators)
-    remainder = TOTAL_RECORDS % len(simulators)
-    
-    for machine_idx, sim in enumerate(simulators):
-        num_records = records_per_machine + (1 if machine_idx < remainder else 0)
-        
-        for record_idx in range(num_records):
-            timestamp_offset = record_idx * SCADA_SAMPLING_INTERVAL
-            reading = sim.get_reading(timestamp_offset, sim_base_time)
-            all_records.append(reading)
-        
-        if (machine_idx + 1) % 50 == 0:
-            logger.info(f"  Generated {machine_idx + 1:,} / {len(simulators):,} machine streams")
-    
-    logger.info(f"✓ Generated {len(all_records):,} total records in memory")
+    # Generate ALL records in memory as column blocks of up to one plant-day each
+    records_per_machine = TOTAL_RECORDS // len(machines)
+    remainder = TOTAL_RECORDS % len(machines)
+    counts = records_per_machine + (np.arange(len(machines)) < remainder)
+    total_steps = int(counts.max()) if len(machines) else 0
+    block_steps = max(1, 86400 // SCADA_SAMPLING_INTERVAL)
+    
+    blocks = []
+    total_generated = 0
+    for first_step in range(0, total_steps, block_steps):
+        steps = min(block_steps, total_steps - first_step)
+        block_start = sim_base_time + timedelta(seconds=first_step * SCADA_SAMPLING_INTERVAL)
+        columns = engine.simulate(block_start, steps)
+        # Rows are machine by machine; machines past the remainder stop one sample early
+        keep = ((first_step + np.arange(steps))[None, :] < counts[:, None]).ravel()
+        if not keep.all():
+            columns = {c: values[keep] for c, values in columns.items()}
+        blocks.append(columns)
+        total_generated += int(keep.sum())
+        logger.info(f"  Generated {first_step + steps:,} / {total_steps:,} samples per machine")
+    
+    logger.info(f"✓ Generated {total_generated:,} total records in memory")
     
     # Bulk dump to PostgreSQL
     logger.info("="*80)
@@ -578,48 +397,29 @@ def main():
             # Disable FK checks
             cursor.execute("SET CONSTRAINTS ALL DEFERRED;")
             
-            insert_sql = """
-                INSERT INTO scada_machine_data (
-                    machine_id, line_id, factory_id, timestamp, machine_state, operation_mode,
-                    fault_code, fault_description, parts_produced_cumulative, parts_produced_shift,
-                    parts_rejected_shift, target_cycle_time_seconds, actual_cycle_time_seconds,
-                    availability_percentage, performance_percentage, quality_percentage, oee_percentage,
-                    spindle_speed_rpm, feed_rate_mm_min, tool_number, program_number,
-                    power_consumption_kw, energy_consumed_kwh, temperature_setpoint_c, temperature_actual_c,
-                    pressure_setpoint_bar, pressure_actual_bar, downtime_seconds_shift, last_fault_timestamp,
-                    uptime_seconds_shift, active_alarms, alarm_codes, warning_codes,
-                    shift_id, operator_id, data_source, data_quality, created_at
-                ) VALUES (
-                    %(machine_id)s, %(line_id)s, %(factory_id)s, %(timestamp)s, %(machine_state)s, %(operation_mode)s,
-                    %(fault_code)s, %(fault_description)s, %(parts_produced_cumulative)s, %(parts_produced_shift)s,
-                    %(parts_rejected_shift)s, %(target_cycle_time_seconds)s, %(actual_cycle_time_seconds)s,
-                    %(availability_percentage)s, %(performance_percentage)s, %(quality_percentage)s, %(oee_percentage)s,
-                    %(spindle_speed_rpm)s, %(feed_rate_mm_min)s, %(tool_number)s, %(program_number)s,
-                    %(power_consumption_kw)s, %(energy_consumed_kwh)s, %(temperature_setpoint_c)s, %(temperature_actual_c)s,
-                    %(pressure_setpoint_bar)s, %(pressure_actual_bar)s, %(downtime_seconds_shift)s, %(last_fault_timestamp)s,
-                    %(uptime_seconds_shift)s, %(active_alarms)s, %(alarm_codes)s, %(warning_codes)s,
-                    %(shift_id)s, %(operator_id)s, %(data_source)s, %(data_quality)s, %(created_at)s
-                )
-            """
+            # Columns go straight to COPY text; no per-reading dict is ever built
+            copy_sql = f"COPY scada_machine_data ({', '.join(SCADA_COLUMNS)}) FROM STDIN"
             
-            logger.info(f"Inserting {len(all_records):,} records in batches of {BATCH_SIZE:,}...")
+            logger.info(f"Copying {total_generated:,} records in batches of {BATCH_SIZE:,}...")
             
             inserted_count = 0
-            for i in range(0, len(all_records), BATCH_SIZE):
-                batch = all_records[i:i+BATCH_SIZE]
-                try:
-                    execute_batch(cursor, insert_sql, batch, page_size=1000)
-                    conn.commit()
-                    inserted_count += len(batch)
-                    logger.info(f"  Flushed {inserted_count:,} / {len(all_records):,} records")
-                except psycopg2.IntegrityError as e:
-                    logger.warning(f"Integrity error: {str(e)[:80]}... - Skipping batch")
-                    conn.rollback()
-                    continue
-                except Exception as e:
-                    logger.error(f"Batch error: {e}")
-                    conn.rollback()
-                    continue
+            for columns in blocks:
+                block_rows = len(columns['machine_id'])
+                for i in range(0, block_rows, BATCH_SIZE):
+                    end = min(i + BATCH_SIZE, block_rows)
+                    try:
+                        cursor.copy_expert(copy_sql, io.StringIO(tsv_lines(columns, i, end)))
+                        conn.commit()
+                        inserted_count += end - i
+                        logger.info(f"  Flushed {inserted_count:,} / {total_generated:,} records")
+                    except psycopg2.IntegrityError as e:
+                        logger.warning(f"Integrity error: {str(e)[:80]}... - Skipping batch")
+                        conn.rollback()
+                        continue
+                    except Exception as e:
+                        logger.error(f"Batch error: {e}")
+                        conn.rollback()
+                        continue
             
             cursor.close()
             conn.close()
@@ -634,7 +434,7 @@ def main():
             return 1
     
     elapsed = time.time() - start_time
-    rate = len(all_records) / elapsed if elapsed > 0 else 0
+    rate = total_generated / elapsed if elapsed > 0 else 0
     
     # Get final count after insertion
     count_after = get_scada_data_count()
@@ -642,7 +442,7 @@ def main():
     logger.info("="*80)
     logger.info("GENERATION COMPLETE")
     logger.info(f"  Total time: {elapsed:.1f} seconds")
-    logger.info(f"  Records generated: {len(all_records):,}")
+    logger.info(f"  Records generated: {total_generated:,}")
     logger.info(f"  Generation rate: {rate:,.0f} records/sec")
     
     if count_before is not None and count_after is not None:
@@ -13,24 +13,48 @@ import sys
 from pathlib import Path
 import threading
 import multiprocessing
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 from generator_helper import get_helper  # type: ignore
+from columnar_store import load_dataset
+from scale_factor import history_days, scaled_range
+from chunk_executor import ChunkExecutor, chunk_days, day_windows, id_blocks, spans
+from history_slice import as_of, write_slice
+from table_writer import TableSink
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
-DAYS_OF_HISTORY = 180
-WORK_ORDERS_PER_DAY = (240, 360)  # ~4-6 orders per line per day (60 lines * 4-6 = 240-360)
+DAYS_OF_HISTORY = history_days(180)
+WORK_ORDERS_PER_DAY = scaled_range((240, 360))  # ~4-6 orders per line per day (60 lines * 4-6 = 240-360)
 OPERATIONS_PER_ORDER = (3, 8)  # Routing steps (increased complexity)
 MATERIALS_PER_ORDER = (4, 12)  # BOM items (more components per product)
 INSPECTIONS_PER_ORDER = (2, 5)  # Quality checkpoints (more rigorous QA)
-LABOR_ENTRIES_PER_DAY = (8000, 15000)  # Time entries (~0.8-1.4 per employee - reasonable)
-DOWNTIME_EVENTS_PER_DAY = (15, 25)  # ~0.25-0.42 events per line per day (realistic)
-CHANGEOVERS_PER_DAY = (30, 50)  # ~0.5-0.8 changeovers per line per day (realistic)
+LABOR_ENTRIES_PER_DAY = scaled_range((8000, 15000))  # Time entries (~0.8-1.4 per employee - reasonable)
+DOWNTIME_EVENTS_PER_DAY = scaled_range((15, 25))  # ~0.25-0.42 events per line per day (realistic)
+CHANGEOVERS_PER_DAY = scaled_range((30, 50))  # ~0.5-0.8 changeovers per line per day (realistic)
+
+# IDs one work-order day chunk may mint per counter (scale 1, 10-day chunks; ChunkExecutor reserves the ranges)
+WORK_ORDER_CHUNK_IDS = {
+    'work_order': 10000, 'operation': 50000, 'material_transaction': 100000, 'inspection': 20000,
+    'defect': 50000, 'labor': 200000, 'downtime': 10000, 'changeover': 10000, 'ebr': 10000, 'schedule': 20000,
+}
+
+# Day-partitioned tables for history slices (chunk table -> {table: date column or (key, parent table)})
+SLICE_PARTITIONS = {
+    'work_orders': {
+        'work_orders': 'planned_start_date',
+        'work_order_operations': ('work_order_id', 'work_orders'),
+        'material_transactions': ('work_order_id', 'work_orders'),
+        'quality_inspections': ('work_order_id', 'work_orders'),
+        'defects': ('work_order_id', 'work_orders'),
+        'labor_transactions': ('work_order_id', 'work_orders'),
+        'production_schedule': ('work_order_id', 'work_orders'),
+        'electronic_batch_records': ('work_order_id', 'work_orders'),
+    },
+}
 
 # Quality rates
 FIRST_PASS_YIELD_RANGE = (92, 99.5)  # %
@@ -55,16 +79,15 @@ CONSUMABLES = [
 
 
 class MESDataGenerator:
-    def __init__(self, master_data_file=None):
-        """Initialize with master data and registry"""
+    def __init__(self, master_data_file=None, output_file=None):
+        """Initialize with master data and registry (output_file: JSON data file / shard manifest to write)"""
         from pathlib import Path
         
         if master_data_file is None:
             master_data_file = Path(__file__).parent.parent / "01 - Base Data" / "genims_master_data.json"
         
         print(f"Loading master data from {master_data_file}...")
-        with open(master_data_file, 'r') as f:
-            self.master_data = json.load(f)
+        self.master_data = load_dataset(master_data_file)
         
         # Load helper for FK validation
         self.helper = get_helper()
@@ -113,7 +136,16 @@ class MESDataGenerator:
         # Thread safety for parallel processing
         self.data_lock = threading.Lock()
         
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.worker_count)
+        
+        # GENERATOR_OUTPUT=ndjson|tsv: work-order tables stream to shards chunk by chunk instead of being
+        # held until to_json (history slices keep theirs for the slice file)
+        self.output = TableSink(output_file, stream=not self.chunks.window)
+        self.status_counts = {}
+        
         print(f"🚀 ULTRA-FAST MES PARALLEL MODE: {self.worker_count} workers, batch_size={self.batch_size}")
+        print(f"   Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
         print(f"   CPU cores available: {multiprocessing.cpu_count()}, Using {self.worker_count} for generation")
         
         print(f"Loaded: {len(self.products)} products, {len(self.employees)} employees")
@@ -210,69 +242,32 @@ class MESDataGenerator:
         if not self.parallel_enabled or days < 20:
             return self._generate_work_orders_sequential(start_date, days, valid_line_ids, valid_product_ids, valid_employee_ids)
         
-        # Parallel processing for large datasets
-        chunk_size = max(5, days // self.worker_count)  # At least 5 days per chunk
-        day_chunks = [(i, min(chunk_size, days - i)) for i in range(0, days, chunk_size)]
+        # Parallel processing for large datasets (fixed-size day chunks, independent of the worker count)
+        day_chunks = spans(days, chunk_days())
         
         print(f"  🚀 Processing {len(day_chunks)} day chunks with {self.worker_count} workers...")
         
-        all_work_orders = []
-        all_work_order_operations = []
-        all_material_transactions = []
-        all_quality_inspections = []
-        all_defects = []
-        all_labor_transactions = []
-        all_downtime_events = []
-        all_changeover_events = []
-        all_electronic_batch_records = []
-        all_production_schedule = []
-        
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            # Submit chunk processing tasks
-            futures = {
-                executor.submit(self._generate_work_orders_chunk, 
-                    start_date + timedelta(days=start_day), 
-                    chunk_days, 
-                    chunk_id,
-                    valid_line_ids, valid_product_ids, valid_employee_ids): chunk_id 
-                for chunk_id, (start_day, chunk_days) in enumerate(day_chunks)
-            }
+        chunk_args = [(start_date + timedelta(days=start_day), chunk_days_count, chunk_id,
+                       valid_line_ids, valid_product_ids, valid_employee_ids)
+                      for chunk_id, (start_day, chunk_days_count) in enumerate(day_chunks)]
+        # Every chunk mints from its own reserved range per counter; minting past it fails the run
+        self.chunk_ids = dict.fromkeys(WORK_ORDER_CHUNK_IDS, 1)
+        for chunk_id, chunk_results in self.chunks.run(self._generate_work_orders_chunk, chunk_args, 'work_orders',
+                                                       counters=self.chunk_ids, id_ranges=id_blocks(WORK_ORDER_CHUNK_IDS),
+                                                       days=day_windows(start_date, day_chunks)):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            for wo in chunk_results['work_orders']:
+                self.status_counts[wo['status']] = self.status_counts.get(wo['status'], 0) + 1
+            for table in ('work_orders', 'work_order_operations', 'material_transactions', 'quality_inspections',
+                          'defects', 'labor_transactions', 'electronic_batch_records', 'production_schedule'):
+                self.output.emit(table, chunk_results[table], getattr(self, table))
+            with self.data_lock:
+                self.downtime_events.extend(chunk_results['downtime_events'])
+                self.changeover_events.extend(chunk_results['changeover_events'])
             
-            # Collect results as they complete
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_results = future.result()
-                    
-                    all_work_orders.extend(chunk_results['work_orders'])
-                    all_work_order_operations.extend(chunk_results['work_order_operations'])
-                    all_material_transactions.extend(chunk_results['material_transactions'])
-                    all_quality_inspections.extend(chunk_results['quality_inspections'])
-                    all_defects.extend(chunk_results['defects'])
-                    all_labor_transactions.extend(chunk_results['labor_transactions'])
-                    all_downtime_events.extend(chunk_results['downtime_events'])
-                    all_changeover_events.extend(chunk_results['changeover_events'])
-                    all_electronic_batch_records.extend(chunk_results['electronic_batch_records'])
-                    all_production_schedule.extend(chunk_results['production_schedule'])
-                    
-                    print(f"    ✓ Work orders chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['work_orders'])} orders)")
-                except Exception as e:
-                    print(f"    ✗ Work orders chunk {chunk_id + 1} failed: {e}")
-        
-        # Store results with thread safety
-        with self.data_lock:
-            self.work_orders.extend(all_work_orders)
-            self.work_order_operations.extend(all_work_order_operations)
-            self.material_transactions.extend(all_material_transactions)
-            self.quality_inspections.extend(all_quality_inspections)
-            self.defects.extend(all_defects)
-            self.labor_transactions.extend(all_labor_transactions)
-            self.downtime_events.extend(all_downtime_events)
-            self.changeover_events.extend(all_changeover_events)
-            self.electronic_batch_records.extend(all_electronic_batch_records)
-            self.production_schedule.extend(all_production_schedule)
-        
-        print(f"✓ Generated {len(self.work_orders):,} work orders via PARALLEL processing")
+            print(f"    ✓ Work orders chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['work_orders'])} orders)")
+        
+        print(f"✓ Generated {self.output.rows('work_orders', self.work_orders):,} work orders via PARALLEL processing")
     
     def _generate_work_orders_chunk(self, start_date: datetime, days: int, chunk_id: int, 
                                   valid_line_ids: List[str], valid_product_ids: List[str], valid_employee_ids: List[str]) -> Dict:
@@ -290,19 +285,21 @@ class MESDataGenerator:
         chunk_electronic_batch_records = []
         chunk_production_schedule = []
         
-        # Local counters to avoid collision
-        local_wo_counter = chunk_id * 10000 + 1
-        local_op_counter = chunk_id * 50000 + 1
-        local_mat_counter = chunk_id * 100000 + 1
-        local_insp_counter = chunk_id * 20000 + 1
-        local_defect_counter = chunk_id * 50000 + 1
-        local_labor_counter = chunk_id * 200000 + 1
-        local_downtime_counter = chunk_id * 10000 + 1
-        local_changeover_counter = chunk_id * 10000 + 1
-        local_ebr_counter = chunk_id * 10000 + 1
-        local_schedule_counter = chunk_id * 20000 + 1
+        # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+        ids = self.chunk_ids
+        local_wo_counter = ids['work_order']
+        local_op_counter = ids['operation']
+        local_mat_counter = ids['material_transaction']
+        local_insp_counter = ids['inspection']
+        local_defect_counter = ids['defect']
+        local_labor_counter = ids['labor']
+        local_downtime_counter = ids['downtime']
+        local_changeover_counter = ids['changeover']
+        local_ebr_counter = ids['ebr']
+        local_schedule_counter = ids['schedule']
         
         current_date = start_date
+        window_end = as_of()  # Order age (and so status) counts back from GENERATOR_AS_OF, not the wall clock
         
         for day in range(days):
             num_orders = random.randint(*WORK_ORDERS_PER_DAY)
@@ -343,7 +340,7 @@ class MESDataGenerator:
                 planned_end = planned_start + timedelta(minutes=total_minutes)
                 
                 # Execution status (past orders are mostly completed)
-                days_from_now = (datetime.now() - current_date).days
+                days_from_now = (window_end - current_date).days
                 if days_from_now > 2:
                     # Old orders - mostly completed
                     status = random.choices(
@@ -520,6 +517,12 @@ class MESDataGenerator:
             
             current_date += timedelta(days=1)
         
+        # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+        ids.update(work_order=local_wo_counter, operation=local_op_counter, material_transaction=local_mat_counter,
+                   inspection=local_insp_counter, defect=local_defect_counter, labor=local_labor_counter,
+                   downtime=local_downtime_counter, changeover=local_changeover_counter, ebr=local_ebr_counter,
+                   schedule=local_schedule_counter)
+        
         # Return all chunk data
         return {
             'work_orders': chunk_work_orders,
@@ -558,7 +561,7 @@ class MESDataGenerator:
         if work_order['rejected_quantity'] > 0 or work_order['scrapped_quantity'] > 0:
             num_defects = random.randint(1, 3)
             for i in range(num_defects):
-                detected_dt = datetime.strptime(work_order['actual_end_time'], '%Y-%m-%d %H:%M:%S') if work_order['actual_end_time'] else datetime.now()
+                detected_dt = datetime.strptime(work_order['actual_end_time'], '%Y-%m-%d %H:%M:%S') if work_order['actual_end_time'] else as_of()
                 defect = {
                     'defect_id': f"DEF-{str(start_counter + i).zfill(6)}",
                     'work_order_id': work_order['work_order_id'],
@@ -693,6 +696,7 @@ class MESDataGenerator:
                 }
                 
                 self.work_orders.append(work_order)
+                self.status_counts['completed'] = self.status_counts.get('completed', 0) + 1
                 self.wo_counter += 1
             
             current_date += timedelta(days=1)
@@ -741,7 +745,7 @@ class MESDataGenerator:
                 planned_end = planned_start + timedelta(minutes=total_minutes)
                 
                 # Execution status (past orders are mostly completed)
-                days_from_now = (datetime.now() - current_date).days
+                days_from_now = (as_of() - current_date).days
                 if days_from_now > 2:
                     # Old orders - mostly completed
                     status = random.choices(
@@ -1622,12 +1626,12 @@ class MESDataGenerator:
     
     def generate_all_data(self):
         """Generate all MES historical data"""
-        start_date = datetime.now() - timedelta(days=DAYS_OF_HISTORY)
+        start_date = as_of() - timedelta(days=DAYS_OF_HISTORY)
         
         print(f"\n{'='*80}")
         print(f"Generating {DAYS_OF_HISTORY} days of MES historical data")
         print(f"Start: {start_date.strftime('%Y-%m-%d')}")
-        print(f"End: {datetime.now().strftime('%Y-%m-%d')}")
+        print(f"End: {as_of().strftime('%Y-%m-%d')}")
         print(f"{'='*80}\n")
         
         # Generate master data first
@@ -1646,28 +1650,29 @@ class MESDataGenerator:
     
     def _print_summary(self):
         """Print generation summary"""
+        rows = self.output.rows
         print(f"\nMES Data Summary:")
-        print(f"  Work Orders: {len(self.work_orders):,}")
-        print(f"  Operations: {len(self.work_order_operations):,}")
-        print(f"  Material Transactions: {len(self.material_transactions):,}")
-        print(f"  Quality Inspections: {len(self.quality_inspections):,}")
-        print(f"  Defects: {len(self.defects):,}")
-        print(f"  Labor Transactions: {len(self.labor_transactions):,}")
-        print(f"  Production Schedule: {len(self.production_schedule):,}")
-        print(f"  Electronic Batch Records: {len(self.electronic_batch_records):,}")
-        
-        # Status breakdown
-        status_counts = {}
-        for wo in self.work_orders:
-            status = wo['status']
-            status_counts[status] = status_counts.get(status, 0) + 1
-        
+        print(f"  Work Orders: {rows('work_orders', self.work_orders):,}")
+        print(f"  Operations: {rows('work_order_operations', self.work_order_operations):,}")
+        print(f"  Material Transactions: {rows('material_transactions', self.material_transactions):,}")
+        print(f"  Quality Inspections: {rows('quality_inspections', self.quality_inspections):,}")
+        print(f"  Defects: {rows('defects', self.defects):,}")
+        print(f"  Labor Transactions: {rows('labor_transactions', self.labor_transactions):,}")
+        print(f"  Production Schedule: {rows('production_schedule', self.production_schedule):,}")
+        print(f"  Electronic Batch Records: {rows('electronic_batch_records', self.electronic_batch_records):,}")
+        
+        # Status breakdown (counted as chunks are merged - streamed work orders are not kept)
         print(f"\n  Work Order Status:")
-        for status, count in sorted(status_counts.items()):
+        for status, count in sorted(self.status_counts.items()):
             print(f"    {status}: {count}")
     
     def to_sql_inserts(self, output_file='mes_historical_data_inserts.sql'):
         """Generate SQL INSERT statements"""
+        if self.chunks.window:
+            return  # History slices only write their day-partitioned tables (to_json)
+        if self.output.streaming:
+            print(f"\n⊘ SQL INSERT export skipped: tables were streamed to {self.output.writer.fmt} shards")
+            return
         print(f"\nGenerating SQL INSERT statements to {output_file}...")
         
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -1753,7 +1758,7 @@ class MESDataGenerator:
         print(f"SQL INSERT statements written to {output_file}")
     
     def to_json(self, output_file='mes_historical_data.json'):
-        """Export data to JSON with all schema tables"""
+        """Export data to JSON with all schema tables (or publish the streamed shards + manifest at output_file)"""
         print(f"\nExporting data to JSON: {output_file}...")
         
         # Generate missing tables
@@ -1773,6 +1778,15 @@ class MESDataGenerator:
             'downtime_events': downtime_events
         }
         
+        if self.chunks.window:
+            write_slice(output_file, data, SLICE_PARTITIONS, self.chunks.covered)
+            return
+        
+        shard_dir = self.output.close(data)
+        if shard_dir is not None:
+            print(f"Data exported to {shard_dir} (manifest: {output_file})")
+            return
+        
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2)
         
@@ -1863,16 +1877,17 @@ if __name__ == "__main__":
     # Load master data from the same folder structure
     master_data_file = script_dir.parent / "01 - Base Data" / "genims_master_data.json"
     
-    # Generate MES historical data
-    generator = MESDataGenerator(str(master_data_file))
+    # Export to JSON (in same folder as script) - use correct genims name
+    json_file = script_dir / "genims_mes_data.json"
+    
+    # Generate MES historical data (shard output streams to json_file's shards while generating)
+    generator = MESDataGenerator(str(master_data_file), output_file=json_file)
     generator.generate_all_data()
     
     # Export to SQL (in same folder as script)
     sql_file = script_dir / "mes_historical_data_inserts.sql"
     generator.to_sql_inserts(str(sql_file))
     
-    # Export to JSON (in same folder as script) - use correct genims name
-    json_file = script_dir / "genims_mes_data.json"
     generator.to_json(str(json_file))
     
     print("\n" + "="*80)
@@ -30,6 +30,10 @@ except ImportError:
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# Scale factor (GENIMS_SCALE_FACTOR) for daily record targets
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled  # type: ignore
+
 # ============================================================================
 # CONFIGURATION - Environment Variables with Defaults
 # ============================================================================
@@ -47,7 +51,7 @@ PG_SSL_MODE = os.getenv('PG_SSL_MODE', 'require')
 MES_ENABLED = os.getenv('MES_ENABLED', 'true').lower() == 'true'
 MES_RECORDS_PER_CYCLE = int(os.getenv('MES_RECORDS_PER_CYCLE', '200'))
 MES_BATCH_SIZE = int(os.getenv('MES_BATCH_SIZE', '5000'))  # Large batches for fast insertion
-MES_TOTAL_RECORDS = int(os.getenv('MES_TOTAL_RECORDS', '2880'))  # 1 day of production data (was 28800 = 100 days!)
+MES_TOTAL_RECORDS = int(os.getenv('MES_TOTAL_RECORDS', str(scaled(2880))))  # 1 day of production data (was 28800 = 100 days!)
 BATCH_SIZE = MES_BATCH_SIZE  # For backward compatibility
 
 # Production Rates (per hour) - Aligned with Base Data (211 machines, ~60 lines)
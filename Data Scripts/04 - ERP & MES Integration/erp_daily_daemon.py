@@ -29,6 +29,10 @@ except ImportError:
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# Scale factor (GENIMS_SCALE_FACTOR) for daily record targets
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled_range  # type: ignore
+
 # ============================================================================
 # CONFIGURATION - Environment Variables with Defaults
 # ============================================================================
@@ -50,9 +54,9 @@ RUN_TIME_HOUR = int(os.getenv('ERP_RUN_TIME_HOUR', '2'))  # 2 AM daily run
 # ERP Business Volume Configuration - Aligned with Historical Data
 # Enterprise scale: 150-300 sales orders/day across 4 factories (~38-75 per factory)
 # Daemon generates subset for real-time operations (30-40% coverage)
-SALES_ORDERS_PER_DAY = (45, 120)  # 30-40% of historical 150-300 for continuous ops
-PURCHASE_ORDERS_PER_DAY = (25, 65)  # 30-40% of historical 80-160, aligned with sales
-GOODS_RECEIPTS_PER_DAY = (30, 80)   # Slightly higher than PO to account for multi-line receipts
+SALES_ORDERS_PER_DAY = scaled_range((45, 120))  # 30-40% of historical 150-300 for continuous ops
+PURCHASE_ORDERS_PER_DAY = scaled_range((25, 65))  # 30-40% of historical 80-160, aligned with sales
+GOODS_RECEIPTS_PER_DAY = scaled_range((30, 80))   # Slightly higher than PO to account for multi-line receipts
 NEW_MATERIALS_PER_WEEK = (0, 2)
 
 # MRP Configuration
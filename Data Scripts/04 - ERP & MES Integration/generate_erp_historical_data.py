@@ -8,43 +8,57 @@ Ultra-Fast Parallel Processing Implementation
 import random
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple
 import sys
 from pathlib import Path
 import threading
 import multiprocessing
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 from generator_helper import get_helper  # type: ignore
+from columnar_store import load_dataset, select_columns
+from scale_factor import history_days, scaled_range
+from chunk_executor import ChunkExecutor, chunk_days, day_windows, id_blocks, spans
+from history_slice import as_of, write_slice
+from table_writer import TableSink
 
 # Configuration
-DAYS_OF_HISTORY = 180
+DAYS_OF_HISTORY = history_days(180)
 MATERIALS_TO_CREATE = 800  # Expanded material catalog for enterprise manufacturing
 SUPPLIERS_TO_CREATE = 120  # More suppliers for complex supply chain
-SALES_ORDERS_PER_DAY = (150, 300)  # Enterprise sales volume (37-75 orders per factory)
-PURCHASE_ORDERS_PER_DAY = (40, 100)  # Adjusted for 1.5-7.5 sales:purchase ratio (realistic range)
+SALES_ORDERS_PER_DAY = scaled_range((150, 300))  # Enterprise sales volume (37-75 orders per factory)
+PURCHASE_ORDERS_PER_DAY = scaled_range((40, 100))  # Adjusted for 1.5-7.5 sales:purchase ratio (realistic range)
+PRODUCTION_ORDER_CHUNK = 500  # Sales orders per production-order chunk
+
+# IDs one order day chunk may mint per counter (scale 1, 10-day chunks; ChunkExecutor reserves the ranges)
+SALES_ORDER_CHUNK_IDS = {'sales_order': 10000, 'sales_order_line': 50000}
+PURCHASE_ORDER_CHUNK_IDS = {'purchase_order': 10000, 'purchase_order_line': 30000}
+
+# Day-partitioned tables for history slices (chunk table -> {table: date column or (key, parent table)})
+SLICE_PARTITIONS = {
+    'sales_orders': {'sales_orders': 'order_date', 'sales_order_lines': ('sales_order_id', 'sales_orders')},
+    'purchase_orders': {'purchase_orders': 'po_date',
+                        'purchase_order_lines': ('purchase_order_id', 'purchase_orders')},
+}
 
 class ERPDataGenerator:
-    def __init__(self, master_data_file=None):
-        """Initialize with master data and registry"""
+    def __init__(self, master_data_file=None, output_file=None):
+        """Initialize with master data and registry (output_file: JSON data file / shard manifest to write)"""
         from pathlib import Path
         
         if master_data_file is None:
             master_data_file = Path(__file__).parent.parent / "01 - Base Data" / "genims_master_data.json"
         
         print(f"Loading master data from {master_data_file}...")
-        with open(master_data_file, 'r') as f:
-            self.master_data = json.load(f)
+        self.master_data = load_dataset(master_data_file)
         
         # Load MES data for work order linking
         mes_data_file = Path(__file__).parent.parent / "03 - MES Data" / "genims_mes_data.json"
         self.mes_data = {}
         if mes_data_file.exists():
             print(f"Loading MES data from {mes_data_file}...")
-            with open(mes_data_file, 'r') as f:
-                self.mes_data = json.load(f)
+            self.mes_data = load_dataset(mes_data_file)
         
         # Load helper for FK validation
         self.helper = get_helper()
@@ -53,7 +67,7 @@ class ERPDataGenerator:
         self.products = self.master_data['products']
         self.customers = self.master_data['customers']
         self.factories = self.master_data['factories']
-        self.work_orders = self.mes_data.get('work_orders', [])
+        self.work_orders = select_columns(self.mes_data, 'work_orders', ['work_order_id'])
         
         # ERP data
         self.materials = []
@@ -74,6 +88,7 @@ class ERPDataGenerator:
             'supplier': 1,
             'bom': 1,
             'prod_order': 1,
+            'prod_order_number': 1,
             'sales_order': 1,
             'po': 1,
             'inv_trans': 1
@@ -87,7 +102,15 @@ class ERPDataGenerator:
         # Thread safety for parallel processing
         self.data_lock = threading.Lock()
         
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.worker_count)
+        
+        # GENERATOR_OUTPUT=ndjson|tsv: sales and production orders stream to shards chunk by chunk (production
+        # orders read the sales orders back from them); purchase orders stay in memory (goods receipts read them)
+        self.output = TableSink(output_file, stream=not self.chunks.window)
+        
         print(f"🚀 ULTRA-FAST ERP PARALLEL MODE: {self.worker_count} workers, batch_size={self.batch_size}")
+        print(f"   Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
         print(f"   CPU cores available: {multiprocessing.cpu_count()}, Using {self.worker_count} for generation")
         
         print(f"Loaded: {len(self.products)} products, {len(self.customers)} customers")
@@ -116,7 +139,7 @@ class ERPDataGenerator:
         self.registry.register_master_ids('bom', self.boms)
         
         # Transactional data
-        start_date = datetime.now() - timedelta(days=DAYS_OF_HISTORY)
+        start_date = as_of() - timedelta(days=DAYS_OF_HISTORY)
         self.generate_sales_orders(start_date, DAYS_OF_HISTORY)
         self.generate_production_orders()
         self.generate_purchase_orders(start_date, DAYS_OF_HISTORY)
@@ -530,44 +553,26 @@ class ERPDataGenerator:
         if not self.parallel_enabled or days < 20:
             return self._generate_sales_orders_sequential(start_date, days, valid_customer_ids, valid_product_ids)
         
-        # Parallel processing for large datasets  
-        chunk_size = max(5, days // self.worker_count)  # At least 5 days per chunk
-        day_chunks = [(i, min(chunk_size, days - i)) for i in range(0, days, chunk_size)]
+        # Parallel processing for large datasets (fixed-size day chunks, independent of the worker count)
+        day_chunks = spans(days, chunk_days())
         
         print(f"  🚀 Processing {len(day_chunks)} day chunks with {self.worker_count} workers...")
         
-        all_sales_orders = []
-        all_sales_order_lines = []
-        
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            # Submit chunk processing tasks
-            futures = {
-                executor.submit(self._generate_sales_orders_chunk, 
-                    start_date + timedelta(days=start_day), 
-                    chunk_days, 
-                    chunk_id,
-                    valid_customer_ids, valid_product_ids): chunk_id 
-                for chunk_id, (start_day, chunk_days) in enumerate(day_chunks)
-            }
+        chunk_args = [(start_date + timedelta(days=start_day), chunk_days_count, chunk_id,
+                       valid_customer_ids, valid_product_ids)
+                      for chunk_id, (start_day, chunk_days_count) in enumerate(day_chunks)]
+        # Every chunk mints from its own reserved range per counter; minting past it fails the run
+        self.chunk_ids = dict.fromkeys(SALES_ORDER_CHUNK_IDS, 1)
+        for chunk_id, chunk_results in self.chunks.run(self._generate_sales_orders_chunk, chunk_args, 'sales_orders',
+                                                       counters=self.chunk_ids, id_ranges=id_blocks(SALES_ORDER_CHUNK_IDS),
+                                                       days=day_windows(start_date, day_chunks)):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            self.output.emit('sales_orders', chunk_results['sales_orders'], self.sales_orders)
+            self.output.emit('sales_order_lines', chunk_results['sales_order_lines'], self.sales_order_lines)
             
-            # Collect results as they complete
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_results = future.result()
-                    all_sales_orders.extend(chunk_results['sales_orders'])
-                    all_sales_order_lines.extend(chunk_results['sales_order_lines'])
-                    
-                    print(f"    ✓ Sales orders chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['sales_orders'])} orders)")
-                except Exception as e:
-                    print(f"    ✗ Sales orders chunk {chunk_id + 1} failed: {e}")
+            print(f"    ✓ Sales orders chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['sales_orders'])} orders)")
         
-        # Store results with thread safety
-        with self.data_lock:
-            self.sales_orders.extend(all_sales_orders)
-            self.sales_order_lines.extend(all_sales_order_lines)
-        
-        print(f"✓ Generated {len(self.sales_orders):,} sales orders via PARALLEL processing")
+        print(f"✓ Generated {self.output.rows('sales_orders', self.sales_orders):,} sales orders via PARALLEL processing")
     
     def _generate_sales_orders_chunk(self, start_date: datetime, days: int, chunk_id: int,
                                    valid_customer_ids: List[str], valid_product_ids: List[str]) -> Dict:
@@ -576,11 +581,13 @@ class ERPDataGenerator:
         chunk_sales_orders = []
         chunk_sales_order_lines = []
         
-        # Local counters to avoid collision
-        local_so_counter = chunk_id * 10000 + 1
-        local_line_counter = chunk_id * 50000 + 1
+        # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+        ids = self.chunk_ids
+        local_so_counter = ids['sales_order']
+        local_line_counter = ids['sales_order_line']
         
         current_date = start_date
+        window_end = as_of()  # Order age (and so status) counts back from GENERATOR_AS_OF, not the wall clock
         
         for day in range(days):
             num_orders = random.randint(*SALES_ORDERS_PER_DAY)
@@ -599,7 +606,7 @@ class ERPDataGenerator:
                     'order_type': 'standard',
                     'currency': 'INR',
                     'requested_delivery_date': (order_date + timedelta(days=random.randint(7, 30))).strftime('%Y-%m-%d'),
-                    'order_status': 'open' if (datetime.now() - order_date).days < 15 else random.choice(['delivered', 'closed']),
+                    'order_status': 'open' if (window_end - order_date).days < 15 else random.choice(['delivered', 'closed']),
                     'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                     'total_net_value': 0,
                     'total_value': 0
@@ -643,6 +650,8 @@ class ERPDataGenerator:
             
             current_date += timedelta(days=1)
         
+        # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+        ids.update(sales_order=local_so_counter, sales_order_line=local_line_counter)
         return {
             'sales_orders': chunk_sales_orders,
             'sales_order_lines': chunk_sales_order_lines
@@ -667,49 +676,57 @@ class ERPDataGenerator:
         
         print(f"✓ Generated {len(self.sales_orders)} sales orders (sequential)")
     
+    def _sales_order_chunks(self) -> Iterator[Tuple[List[Dict], List[Dict]]]:
+        """
+        (sales orders, their lines) in PRODUCTION_ORDER_CHUNK-order chunks, read back from the shards when
+        streaming: each order's lines follow the order sequence, so both tables are read in one pass
+        """
+        lines = self.output.records('sales_order_lines', self.sales_order_lines)
+        line = next(lines, None)
+        for orders in self.output.chunks('sales_orders', self.sales_orders, PRODUCTION_ORDER_CHUNK):
+            order_ids = {so['sales_order_id'] for so in orders}
+            chunk_lines = []
+            while line is not None and line['sales_order_id'] in order_ids:
+                chunk_lines.append(line)
+                line = next(lines, None)
+            yield orders, chunk_lines
+    
     def generate_production_orders(self):
         """Generate production orders from sales orders with PARALLEL processing"""
         print("Generating production orders with PARALLEL processing...")
         
-        if not self.parallel_enabled or len(self.sales_orders) < 1000:
+        sales_order_count = self.output.rows('sales_orders', self.sales_orders)
+        if not self.parallel_enabled or sales_order_count < 1000:
             return self._generate_production_orders_sequential()
         
-        # Parallel processing for large datasets
-        chunk_size = max(100, len(self.sales_orders) // self.worker_count)
-        order_chunks = [self.sales_orders[i:i + chunk_size] for i in range(0, len(self.sales_orders), chunk_size)]
+        # Parallel processing for large datasets (fixed-size order chunks, independent of the worker count);
+        # each chunk's orders are only read back when it is submitted
+        chunk_count = len(spans(sales_order_count, PRODUCTION_ORDER_CHUNK))
         
-        print(f"  🚀 Processing {len(order_chunks)} sales order chunks with {self.worker_count} workers...")
+        print(f"  🚀 Processing {chunk_count} sales order chunks with {self.worker_count} workers...")
         
-        all_production_orders = []
+        chunk_args = ((orders, lines, chunk_id) for chunk_id, (orders, lines) in enumerate(self._sales_order_chunks()))
+        # Each chunk mints PROD ids from its own reserved block of the shared counter
+        id_ranges = {'prod_order': PRODUCTION_ORDER_CHUNK * 10, 'prod_order_number': PRODUCTION_ORDER_CHUNK * 100}
+        for chunk_id, chunk_orders in self.chunks.run(self._generate_production_orders_chunk, chunk_args, 'production_orders',
+                                                      counters=self.counters, id_ranges=id_ranges, count=chunk_count):
+            self.output.emit('production_orders', chunk_orders, self.production_orders)
+            print(f"    ✓ Production orders chunk {chunk_id + 1}/{chunk_count} completed ({len(chunk_orders)} orders)")
         
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            futures = {
-                executor.submit(self._generate_production_orders_chunk, chunk, chunk_id): chunk_id 
-                for chunk_id, chunk in enumerate(order_chunks)
-            }
-            
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_orders = future.result()
-                    all_production_orders.extend(chunk_orders)
-                    print(f"    ✓ Production orders chunk {chunk_id + 1}/{len(order_chunks)} completed ({len(chunk_orders)} orders)")
-                except Exception as e:
-                    print(f"    ✗ Production orders chunk {chunk_id + 1} failed: {e}")
-        
-        with self.data_lock:
-            self.production_orders.extend(all_production_orders)
-        
-        print(f"✓ Generated {len(self.production_orders):,} production orders via PARALLEL processing")
+        print(f"✓ Generated {self.output.rows('production_orders', self.production_orders):,} production orders via PARALLEL processing")
     
-    def _generate_production_orders_chunk(self, sales_orders_chunk: List[Dict], chunk_id: int) -> List[Dict]:
-        """Generate production orders for a chunk of sales orders (parallel worker method)"""
+    def _generate_production_orders_chunk(self, sales_orders_chunk: List[Dict], sales_order_lines: List[Dict],
+                                          chunk_id: int) -> List[Dict]:
+        """Generate production orders for a chunk of sales orders and their lines (parallel worker method)"""
         chunk_production_orders = []
         available_work_orders = list(self.work_orders)
-        local_counter = chunk_id * 50000 + 1
+        local_counter = self.counters['prod_order_number']  # Start of this chunk's reserved range
+        lines_by_order = {}
+        for line in sales_order_lines:
+            lines_by_order.setdefault(line['sales_order_id'], []).append(line)
         
         for so in sales_orders_chunk:
-            so_lines = [l for l in self.sales_order_lines if l['sales_order_id'] == so['sales_order_id']]
+            so_lines = lines_by_order.get(so['sales_order_id'], [])
             
             for line in so_lines:
                 scheduled_start = datetime.strptime(so['order_date'], '%Y-%m-%d') + timedelta(days=random.randint(1, 5))
@@ -768,6 +785,7 @@ class ERPDataGenerator:
                 chunk_production_orders.append(prod_order)
                 local_counter += 1
         
+        self.counters['prod_order_number'] = local_counter
         return chunk_production_orders
     
     def _generate_production_orders_sequential(self):
@@ -776,23 +794,24 @@ class ERPDataGenerator:
         
         available_work_orders = list(self.work_orders)
         
-        for so in self.sales_orders:
-            so_lines = [l for l in self.sales_order_lines if l['sales_order_id'] == so['sales_order_id']]
-            
-            for line in so_lines:
-                scheduled_start = datetime.strptime(so['order_date'], '%Y-%m-%d') + timedelta(days=random.randint(1, 5))
-                scheduled_end = scheduled_start + timedelta(days=random.randint(7, 21))
+        for orders, lines in self._sales_order_chunks():
+            for so in orders:
+                so_lines = [l for l in lines if l['sales_order_id'] == so['sales_order_id']]
                 
-                prod_order = {
-                    'production_order_id': self.generate_id('PROD', 'prod_order'),
-                    'sales_order_id': so['sales_order_id'],
-                    'product_id': line['product_id'],
-                    'order_quantity': line['quantity'],
-                    'order_status': 'completed' if random.random() < 0.8 else 'planned',
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                
-                self.production_orders.append(prod_order)
+                for line in so_lines:
+                    scheduled_start = datetime.strptime(so['order_date'], '%Y-%m-%d') + timedelta(days=random.randint(1, 5))
+                    scheduled_end = scheduled_start + timedelta(days=random.randint(7, 21))
+                    
+                    prod_order = {
+                        'production_order_id': self.generate_id('PROD', 'prod_order'),
+                        'sales_order_id': so['sales_order_id'],
+                        'product_id': line['product_id'],
+                        'order_quantity': line['quantity'],
+                        'order_status': 'completed' if random.random() < 0.8 else 'planned',
+                        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    }
+                    
+                    self.production_orders.append(prod_order)
         
         print(f"✓ Generated {len(self.production_orders)} production orders (sequential)")
     
@@ -811,35 +830,25 @@ class ERPDataGenerator:
         if not self.parallel_enabled or days < 20:
             return self._generate_purchase_orders_sequential(start_date, days, purchasable_materials)
         
-        # Parallel processing for large datasets  
-        chunk_size = max(5, days // self.worker_count)
-        day_chunks = [(i, min(chunk_size, days - i)) for i in range(0, days, chunk_size)]
+        # Parallel processing for large datasets (fixed-size day chunks, independent of the worker count)
+        day_chunks = spans(days, chunk_days())
         
         print(f"  🚀 Processing {len(day_chunks)} day chunks with {self.worker_count} workers...")
         
         all_purchase_orders = []
         all_purchase_order_lines = []
         
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            futures = {
-                executor.submit(self._generate_purchase_orders_chunk, 
-                    start_date + timedelta(days=start_day), 
-                    chunk_days, 
-                    chunk_id,
-                    purchasable_materials): chunk_id 
-                for chunk_id, (start_day, chunk_days) in enumerate(day_chunks)
-            }
+        chunk_args = [(start_date + timedelta(days=start_day), chunk_days_count, chunk_id, purchasable_materials)
+                      for chunk_id, (start_day, chunk_days_count) in enumerate(day_chunks)]
+        # Every chunk mints from its own reserved range per counter; minting past it fails the run
+        self.chunk_ids = dict.fromkeys(PURCHASE_ORDER_CHUNK_IDS, 1)
+        for chunk_id, chunk_results in self.chunks.run(self._generate_purchase_orders_chunk, chunk_args, 'purchase_orders',
+                                                       counters=self.chunk_ids, id_ranges=id_blocks(PURCHASE_ORDER_CHUNK_IDS),
+                                                       days=day_windows(start_date, day_chunks)):
+            all_purchase_orders.extend(chunk_results['purchase_orders'])
+            all_purchase_order_lines.extend(chunk_results['purchase_order_lines'])
             
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_results = future.result()
-                    all_purchase_orders.extend(chunk_results['purchase_orders'])
-                    all_purchase_order_lines.extend(chunk_results['purchase_order_lines'])
-                    
-                    print(f"    ✓ Purchase orders chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['purchase_orders'])} orders)")
-                except Exception as e:
-                    print(f"    ✗ Purchase orders chunk {chunk_id + 1} failed: {e}")
+            print(f"    ✓ Purchase orders chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['purchase_orders'])} orders)")
         
         # Store results with thread safety
         with self.data_lock:
@@ -855,10 +864,13 @@ class ERPDataGenerator:
         chunk_purchase_orders = []
         chunk_purchase_order_lines = []
         
-        local_po_counter = chunk_id * 10000 + 1
-        local_line_counter = chunk_id * 30000 + 1
+        # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+        ids = self.chunk_ids
+        local_po_counter = ids['purchase_order']
+        local_line_counter = ids['purchase_order_line']
         
         current_date = start_date
+        window_end = as_of()  # Order age (and so status) counts back from GENERATOR_AS_OF, not the wall clock
         
         for day in range(days):
             num_pos = random.randint(*PURCHASE_ORDERS_PER_DAY)
@@ -874,7 +886,7 @@ class ERPDataGenerator:
                     'po_date': po_date.strftime('%Y-%m-%d'),
                     'po_type': 'standard',
                     'currency': 'INR',
-                    'po_status': 'released' if (datetime.now() - po_date).days > 7 else 'created',
+                    'po_status': 'released' if (window_end - po_date).days > 7 else 'created',
                     'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                     'total_value': 0
                 }
@@ -916,6 +928,8 @@ class ERPDataGenerator:
             
             current_date += timedelta(days=1)
         
+        # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+        ids.update(purchase_order=local_po_counter, purchase_order_line=local_line_counter)
         return {
             'purchase_orders': chunk_purchase_orders,
             'purchase_order_lines': chunk_purchase_order_lines
@@ -967,8 +981,10 @@ class ERPDataGenerator:
         chunk_purchase_orders = []
         chunk_purchase_order_lines = []
         
-        local_po_counter = chunk_id * 10000 + 1
-        local_line_counter = chunk_id * 30000 + 1
+        # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+        ids = self.chunk_ids
+        local_po_counter = ids['purchase_order']
+        local_line_counter = ids['purchase_order_line']
         
         current_date = start_date
         
@@ -986,7 +1002,7 @@ class ERPDataGenerator:
                     'po_date': po_date.strftime('%Y-%m-%d'),
                     'po_type': 'standard',
                     'currency': 'INR',
-                    'po_status': 'released' if (datetime.now() - po_date).days > 7 else 'created',
+                    'po_status': 'released' if (as_of() - po_date).days > 7 else 'created',
                     'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                     'total_value': 0
                 }
@@ -1028,6 +1044,8 @@ class ERPDataGenerator:
             
             current_date += timedelta(days=1)
         
+        # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+        ids.update(purchase_order=local_po_counter, purchase_order_line=local_line_counter)
         return {
             'purchase_orders': chunk_purchase_orders,
             'purchase_order_lines': chunk_purchase_order_lines
@@ -1076,13 +1094,16 @@ class ERPDataGenerator:
         print(f"  Materials: {len(self.materials)}")
         print(f"  Suppliers: {len(self.suppliers)}")
         print(f"  BOMs: {len(self.boms)} ({len(self.bom_components)} components)")
-        print(f"  Sales Orders: {len(self.sales_orders)} ({len(self.sales_order_lines)} lines)")
-        print(f"  Production Orders: {len(self.production_orders)}")
+        print(f"  Sales Orders: {self.output.rows('sales_orders', self.sales_orders)} "
+              f"({self.output.rows('sales_order_lines', self.sales_order_lines)} lines)")
+        print(f"  Production Orders: {self.output.rows('production_orders', self.production_orders)}")
         print(f"  Purchase Orders: {len(self.purchase_orders)} ({len(self.purchase_order_lines)} lines)")
         print(f"  Inventory Balances: {len(self.inventory_balances)}")
     
     def to_sql_inserts(self, output_file='erp_historical_data_inserts.sql'):
         """Generate SQL INSERT statements"""
+        if self.chunks.window:
+            return  # History slices only write their day-partitioned tables (to_json)
         print(f"\nGenerating SQL INSERT statements...")
         
         def format_value(v):
@@ -1115,7 +1136,7 @@ class ERPDataGenerator:
         print(f"SQL sample written to {output_file}")
     
     def to_json(self, output_file='erp_historical_data.json'):
-        """Export to JSON with flat structure matching actual table names"""
+        """Export to JSON with flat structure matching actual table names (or publish the streamed shards + manifest)"""
         print(f"\nExporting to JSON...")
         
         # Generate missing data tables
@@ -1179,6 +1200,15 @@ class ERPDataGenerator:
             'erp_mes_sync_log': erp_mes_sync_log
         }
         
+        if self.chunks.window:
+            write_slice(output_file, data, SLICE_PARTITIONS, self.chunks.covered)
+            return
+        
+        shard_dir = self.output.close(data)
+        if shard_dir is not None:
+            print(f"Data exported to {shard_dir} (manifest: {output_file})")
+            return
+        
         with open(output_file, 'w') as f:
             json.dump(data, f, indent=2)
         
@@ -1511,15 +1541,17 @@ if __name__ == "__main__":
     # Load master data from the same folder structure
     master_data_file = script_dir.parent / "01 - Base Data" / "genims_master_data.json"
     
-    generator = ERPDataGenerator(str(master_data_file))
+    # Export to JSON (in same folder as script)
+    json_file = script_dir / "genims_erp_data.json"
+    
+    # Shard output streams to json_file's shards while generating
+    generator = ERPDataGenerator(str(master_data_file), output_file=json_file)
     generator.generate_all_data()
     
     # Export to SQL (in same folder as script)
     sql_file = script_dir / "erp_historical_data_inserts.sql"
     generator.to_sql_inserts(str(sql_file))
     
-    # Export to JSON (in same folder as script)
-    json_file = script_dir / "genims_erp_data.json"
     generator.to_json(str(json_file))
     
     # Validate data consistency
@@ -1531,10 +1563,13 @@ if __name__ == "__main__":
     material_ids = set(m['material_id'] for m in generator.materials)
     supplier_ids = set(s['supplier_id'] for s in generator.suppliers)
     
-    # Validate sales order lines reference valid products
+    # Validate sales order lines reference valid products (read back from the shards when they were streamed)
+    product_ids = set(p['product_id'] for p in generator.products)
     invalid_products = 0
-    for so_line in generator.sales_order_lines:
-        if so_line['product_id'] not in [p['product_id'] for p in generator.products]:
+    so_line_count = 0
+    for so_line in generator.output.records('sales_order_lines', generator.sales_order_lines):
+        so_line_count += 1
+        if so_line['product_id'] not in product_ids:
             invalid_products += 1
     
     # Validate purchase orders reference valid suppliers
@@ -1550,7 +1585,7 @@ if __name__ == "__main__":
             invalid_po_materials += 1
             print(f"Invalid PO line material: {po_line['material_id']}")
     
-    print(f"✓ Product references in SO lines: {len(generator.sales_order_lines) - invalid_products}/{len(generator.sales_order_lines)} valid")
+    print(f"✓ Product references in SO lines: {so_line_count - invalid_products}/{so_line_count} valid")
     print(f"✓ Material references in PO lines: {len(generator.purchase_order_lines) - invalid_po_materials}/{len(generator.purchase_order_lines)} valid")
     print(f"✓ Supplier references: {len(generator.purchase_orders) - invalid_suppliers}/{len(generator.purchase_orders)} valid")
     
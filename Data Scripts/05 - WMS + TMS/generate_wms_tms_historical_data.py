@@ -14,11 +14,15 @@ from pathlib import Path
 import logging
 import multiprocessing
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 from generator_helper import get_helper
+from columnar_store import load_dataset, select_columns
+from scale_factor import history_days, scaled, scaled_range
+from chunk_executor import ChunkExecutor, chunk_days, day_windows, id_blocks, spans
+from history_slice import as_of, write_slice
+from table_writer import TableSink
 
 # ULTRA-FAST PARALLEL Configuration
 cpu_count = multiprocessing.cpu_count()
@@ -26,16 +30,45 @@ WORKER_COUNT = min(8, max(4, cpu_count - 2))  # Use 8 workers or available CPUs
 BATCH_SIZE = 150000  # Large batch size for optimal performance
 
 # Enhanced configuration for bottleneck handling
-WMS_DAYS_OF_HISTORY = 180
-TMS_DAYS_OF_HISTORY = 180
-WAREHOUSES_TO_CREATE = 12  # 3 warehouses per factory (4 factories)
+WMS_DAYS_OF_HISTORY = history_days(180)
+TMS_DAYS_OF_HISTORY = history_days(180)
+WAREHOUSES_TO_CREATE = scaled(12)  # 3 warehouses per factory (4 factories)
 CARRIERS_TO_CREATE = 40   # More carriers for enterprise logistics
+RECEIVING_TASKS_PER_DAY = scaled_range((80, 150))
+PICK_WAVES_PER_DAY = scaled_range((60, 120))
+SHIPMENTS_PER_DAY = scaled_range((200, 400))
 
 # Performance optimization settings
 BATCH_SIZE_LIMIT = 10000
-MAX_WAVE_CONCURRENCY = 50  # Limit concurrent waves to prevent bottlenecks
+MAX_WAVE_CONCURRENCY = scaled(50)  # Limit concurrent waves to prevent bottlenecks
 INVENTORY_CHECK_INTERVAL = 1000  # Check inventory consistency every N records
 
+# IDs one day chunk may mint per counter (scale 1, 10-day chunks; ChunkExecutor reserves the ranges)
+WAREHOUSE_CHUNK_IDS = {'receiving': 50000, 'putaway': 50000, 'wave': 30000,
+                       'picking': 100000, 'packing': 100000, 'shipping': 100000}
+LOGISTICS_CHUNK_IDS = {'shipment': 100000, 'tracking': 500000, 'route': 50000,
+                       'delivery': 100000, 'pod': 100000, 'return': 20000}
+
+# Day-partitioned tables for history slices (chunk table -> {table: date column or (key, parent table)})
+WMS_SLICE_PARTITIONS = {
+    'warehouse_operations': {
+        'receiving_tasks': 'scheduled_date',
+        'putaway_tasks': ('receiving_task_id', 'receiving_tasks'),
+        'pick_waves': 'created_date',
+        'picking_tasks': ('wave_id', 'pick_waves'),
+        'packing_tasks': 'packed_at',
+        'shipping_tasks': 'shipped_at',
+    },
+}
+TMS_SLICE_PARTITIONS = {
+    'logistics_operations': {
+        'shipments': 'ship_date',
+        'tracking_events': ('shipment_id', 'shipments'),
+        'deliveries': ('shipment_id', 'shipments'),
+        'proof_of_delivery': ('shipment_id', 'shipments'),
+    },
+}
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -48,8 +81,9 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class WMSTMSDataGenerator:
-    def __init__(self, master_data_file=None, erp_data_file=None):
-        """Initialize with master data, ERP data, FK validation, and registry"""
+    def __init__(self, master_data_file=None, erp_data_file=None, output_file_wms=None, output_file_tms=None):
+        """Initialize with master data, ERP data, FK validation, and registry (output files: WMS / TMS JSON data
+        file or shard manifest to write)"""
         from pathlib import Path
         
         if master_data_file is None:
@@ -61,11 +95,9 @@ class WMSTMSDataGenerator:
         logger.info(f"Loading master data from {master_data_file}...")
         logger.info(f"Loading ERP data from {erp_data_file}...")
         
-        with open(master_data_file, 'r') as f:
-            self.master_data = json.load(f)
+        self.master_data = load_dataset(master_data_file)
         
-        with open(erp_data_file, 'r') as f:
-            self.erp_data = json.load(f)
+        self.erp_data = load_dataset(erp_data_file)
         
         # Load helper for FK validation and time coordination
         self.helper = get_helper()
@@ -74,6 +106,9 @@ class WMSTMSDataGenerator:
         self.factories = self.master_data['factories']
         self.customers = self.master_data['customers']
         self.materials = self.erp_data['materials']
+        # Orders are only drawn from for their IDs, so just those columns are kept
+        self.sales_orders = select_columns(self.erp_data, 'sales_orders', ['sales_order_id', 'customer_id'])
+        self.purchase_orders = select_columns(self.erp_data, 'purchase_orders', ['purchase_order_id'])
         
         # FK validation sets for bottleneck prevention
         self.valid_material_ids: Set[str] = set()
@@ -93,6 +128,7 @@ class WMSTMSDataGenerator:
         self._initialize_fk_validation()
         
         # Initialize data structures
+        self.output_files = (output_file_wms, output_file_tms)
         self._initialize_data_structures()
         
         logger.info(f"FK Validation initialized: {len(self.valid_material_ids)} materials, "
@@ -106,7 +142,7 @@ class WMSTMSDataGenerator:
         
         # Sales Order IDs from ERP (assuming they exist)
         if 'sales_orders' in self.erp_data:
-            for order in self.erp_data['sales_orders']:
+            for order in self.sales_orders:
                 self.valid_sales_order_ids.add(order['sales_order_id'])
         else:
             # Generate valid sales order IDs if not present
@@ -143,12 +179,12 @@ class WMSTMSDataGenerator:
                 return last_run
             else:
                 # Start from 6 months ago
-                start_time = datetime.now() - timedelta(days=180)
+                start_time = as_of() - timedelta(days=180)
                 logger.info(f"Time coordination: Starting fresh simulation from {start_time}")
                 return start_time
         except Exception as e:
             logger.warning(f"Time coordination failed: {e}, using default start time")
-            return datetime.now() - timedelta(days=180)
+            return as_of() - timedelta(days=180)
     
     def check_inventory_consistency(self, material_id: str, warehouse_id: str, quantity_change: int) -> bool:
         """Check if inventory operation would create negative stock"""
@@ -175,20 +211,18 @@ class WMSTMSDataGenerator:
     
     def _initialize_data_structures(self):
         """Initialize all data structure lists"""
-        self.sales_orders = self.erp_data['sales_orders']
-        self.purchase_orders = self.erp_data['purchase_orders']
-        self.sales_order_lines = self.erp_data.get('sales_order_lines', [])
-        
-        # Build material_id -> sales_order_lines map for return order linking
+        # Build material_id -> sales_order_line_ids map for return order linking (the lines themselves are not kept)
+        sales_order_lines = select_columns(self.erp_data, 'sales_order_lines', ['sales_order_line_id', 'material_id'])
+        self.sales_order_line_count = len(sales_order_lines)
         self.material_to_sales_lines = {}
         self.materials_with_sales = []
-        for sol in self.sales_order_lines:
+        for sol in sales_order_lines:
             mat_id = sol.get('material_id')
             if mat_id:
                 if mat_id not in self.material_to_sales_lines:
                     self.material_to_sales_lines[mat_id] = []
                     self.materials_with_sales.append(mat_id)
-                self.material_to_sales_lines[mat_id].append(sol)
+                self.material_to_sales_lines[mat_id].append(sol.get('sales_order_line_id'))
         
         # WMS Data structures
         self.warehouses = []
@@ -225,7 +259,7 @@ class WMSTMSDataGenerator:
             'route': 1, 'delivery': 1, 'pod': 1, 'return': 1, 'aisle': 1, 'slot': 1
         }
         
-        logger.info(f"Loaded: {len(self.materials)} materials, {len(self.sales_orders)} sales orders, {len(self.sales_order_lines)} sales order lines")
+        logger.info(f"Loaded: {len(self.materials)} materials, {len(self.sales_orders)} sales orders, {self.sales_order_line_count} sales order lines")
         
         # ULTRA-FAST PARALLEL Configuration
         self.worker_count = WORKER_COUNT
@@ -233,7 +267,16 @@ class WMSTMSDataGenerator:
         self.parallel_enabled = True
         self.data_lock = threading.Lock()
         
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.worker_count)
+        
+        # GENERATOR_OUTPUT=ndjson|tsv: task, wave, shipment, tracking and delivery tables stream to the WMS / TMS
+        # shards chunk by chunk; to_json reads pick waves and shipments back for wave lines, packages and returns
+        self.wms_output = TableSink(self.output_files[0], stream=not self.chunks.window)
+        self.tms_output = TableSink(self.output_files[1], stream=not self.chunks.window)
+        
         print(f"🚀 ULTRA-FAST WMS+TMS PARALLEL MODE: {self.worker_count} workers, batch_size={self.batch_size:,}")
+        print(f"   Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
         print(f"   CPU cores available: {cpu_count}, Using {self.worker_count} for generation")
     
     def generate_id(self, prefix: str, counter_key: str) -> str:
@@ -401,59 +444,27 @@ class WMSTMSDataGenerator:
         if not self.parallel_enabled or days < 20:
             return self._generate_warehouse_operations_sequential(start_date, days)
         
-        # Parallel processing for large datasets
-        chunk_size = max(5, days // self.worker_count)  # At least 5 days per chunk
-        day_chunks = [(i, min(chunk_size, days - i)) for i in range(0, days, chunk_size)]
+        # Parallel processing for large datasets (fixed-size day chunks, independent of the worker count)
+        day_chunks = spans(days, chunk_days())
         
         print(f"  🚀 Processing {len(day_chunks)} day chunks with {self.worker_count} workers...")
         
-        all_receiving_tasks = []
-        all_putaway_tasks = []
-        all_pick_waves = []
-        all_wave_lines = []
-        all_picking_tasks = []
-        all_packing_tasks = []
-        all_shipping_tasks = []
-        
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            # Submit chunk processing tasks
-            futures = {
-                executor.submit(self._generate_warehouse_operations_chunk, 
-                    start_date + timedelta(days=start_day), 
-                    chunk_days, 
-                    chunk_id): chunk_id 
-                for chunk_id, (start_day, chunk_days) in enumerate(day_chunks)
-            }
+        chunk_args = [(start_date + timedelta(days=start_day), chunk_days_count, chunk_id)
+                      for chunk_id, (start_day, chunk_days_count) in enumerate(day_chunks)]
+        # Every chunk mints from its own reserved range per counter; minting past it fails the run
+        self.chunk_ids = dict.fromkeys(WAREHOUSE_CHUNK_IDS, 1)
+        for chunk_id, chunk_results in self.chunks.run(self._generate_warehouse_operations_chunk, chunk_args, 'warehouse_operations',
+                                                       counters=self.chunk_ids, id_ranges=id_blocks(WAREHOUSE_CHUNK_IDS),
+                                                       days=day_windows(start_date, day_chunks)):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            for table in ('receiving_tasks', 'putaway_tasks', 'pick_waves', 'picking_tasks', 'packing_tasks',
+                          'shipping_tasks'):
+                self.wms_output.emit(table, chunk_results[table], getattr(self, table))
             
-            # Collect results as they complete
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_results = future.result()
-                    
-                    all_receiving_tasks.extend(chunk_results['receiving_tasks'])
-                    all_putaway_tasks.extend(chunk_results['putaway_tasks'])
-                    all_pick_waves.extend(chunk_results['pick_waves'])
-                    all_wave_lines.extend(chunk_results['wave_lines'])
-                    all_picking_tasks.extend(chunk_results['picking_tasks'])
-                    all_packing_tasks.extend(chunk_results['packing_tasks'])
-                    all_shipping_tasks.extend(chunk_results['shipping_tasks'])
-                    
-                    print(f"    ✓ Warehouse chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['receiving_tasks'])} receiving, {len(chunk_results['pick_waves'])} waves)")
-                except Exception as e:
-                    print(f"    ✗ Warehouse chunk {chunk_id + 1} failed: {e}")
-        
-        # Store results with thread safety
-        with self.data_lock:
-            self.receiving_tasks.extend(all_receiving_tasks)
-            self.putaway_tasks.extend(all_putaway_tasks)
-            self.pick_waves.extend(all_pick_waves)
-            self.wave_lines.extend(all_wave_lines)
-            self.picking_tasks.extend(all_picking_tasks)
-            self.packing_tasks.extend(all_packing_tasks)
-            self.shipping_tasks.extend(all_shipping_tasks)
-        
-        print(f"✓ Generated warehouse operations: {len(self.receiving_tasks):,} receiving, {len(self.pick_waves):,} waves, {len(self.picking_tasks):,} picks via PARALLEL processing")
+            print(f"    ✓ Warehouse chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['receiving_tasks'])} receiving, {len(chunk_results['pick_waves'])} waves)")
+        
+        rows = self.wms_output.rows
+        print(f"✓ Generated warehouse operations: {rows('receiving_tasks', self.receiving_tasks):,} receiving, {rows('pick_waves', self.pick_waves):,} waves, {rows('picking_tasks', self.picking_tasks):,} picks via PARALLEL processing")
     
     def _generate_warehouse_operations_chunk(self, start_date: datetime, days: int, chunk_id: int) -> Dict:
         """Generate warehouse operations for a chunk of days (parallel worker method)"""
@@ -462,18 +473,18 @@ class WMSTMSDataGenerator:
         chunk_receiving_tasks = []
         chunk_putaway_tasks = []
         chunk_pick_waves = []
-        chunk_wave_lines = []
         chunk_picking_tasks = []
         chunk_packing_tasks = []
         chunk_shipping_tasks = []
         
-        # Local counters to avoid collision
-        local_receiving_counter = chunk_id * 50000 + 1
-        local_putaway_counter = chunk_id * 50000 + 1
-        local_wave_counter = chunk_id * 30000 + 1
-        local_picking_counter = chunk_id * 100000 + 1
-        local_packing_counter = chunk_id * 100000 + 1
-        local_shipping_counter = chunk_id * 100000 + 1
+        # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+        ids = self.chunk_ids
+        local_receiving_counter = ids['receiving']
+        local_putaway_counter = ids['putaway']
+        local_wave_counter = ids['wave']
+        local_picking_counter = ids['picking']
+        local_packing_counter = ids['packing']
+        local_shipping_counter = ids['shipping']
         
         current_date = start_date
         
@@ -481,7 +492,7 @@ class WMSTMSDataGenerator:
             active_waves_today = 0  # Reset daily wave counter
             
             # Inbound: Receiving + Putaway (80-150 per day across all warehouses)
-            num_receiving = random.randint(80, 150)
+            num_receiving = random.randint(*RECEIVING_TASKS_PER_DAY)
             for _ in range(num_receiving):
                 receiving_task = self._create_receiving_task_local(current_date, local_receiving_counter)
                 if receiving_task:
@@ -495,14 +506,13 @@ class WMSTMSDataGenerator:
                         local_putaway_counter += 1
             
             # Outbound: Waves + Picking + Packing + Shipping (60-120 per day with capacity management)
-            planned_waves = random.randint(60, 120)
+            planned_waves = random.randint(*PICK_WAVES_PER_DAY)
             for _ in range(planned_waves):
                 if active_waves_today < MAX_WAVE_CONCURRENCY:
                     wave_data = self._create_pick_wave_local(current_date, active_waves_today, local_wave_counter, 
                                                            local_picking_counter, local_packing_counter, local_shipping_counter)
                     if wave_data:
                         chunk_pick_waves.append(wave_data['wave'])
-                        chunk_wave_lines.extend(wave_data['wave_lines'])
                         chunk_picking_tasks.extend(wave_data['picking_tasks'])
                         chunk_packing_tasks.extend(wave_data['packing_tasks'])
                         chunk_shipping_tasks.extend(wave_data['shipping_tasks'])
@@ -515,12 +525,15 @@ class WMSTMSDataGenerator:
             
             current_date += timedelta(days=1)
         
-        # Return all chunk data
+        # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+        ids.update(receiving=local_receiving_counter, putaway=local_putaway_counter, wave=local_wave_counter,
+                   picking=local_picking_counter, packing=local_packing_counter, shipping=local_shipping_counter)
+        
+        # Return all chunk data (not the waves' own lines: to_json derives the exported wave lines from the pick waves)
         return {
             'receiving_tasks': chunk_receiving_tasks,
             'putaway_tasks': chunk_putaway_tasks,
             'pick_waves': chunk_pick_waves,
-            'wave_lines': chunk_wave_lines,
             'picking_tasks': chunk_picking_tasks,
             'packing_tasks': chunk_packing_tasks,
             'shipping_tasks': chunk_shipping_tasks
@@ -997,63 +1010,31 @@ class WMSTMSDataGenerator:
         valid_customer_ids = list(self.helper.get_valid_customer_ids())
         valid_factory_ids = list(self.helper.get_valid_factory_ids())
         
-        # Parallel processing for large datasets
-        chunk_size = max(5, days // self.worker_count)  # At least 5 days per chunk
-        day_chunks = [(i, min(chunk_size, days - i)) for i in range(0, days, chunk_size)]
+        # Parallel processing for large datasets (fixed-size day chunks, independent of the worker count)
+        day_chunks = spans(days, chunk_days())
         
         print(f"  🚀 Processing {len(day_chunks)} day chunks with {self.worker_count} workers...")
         
-        all_shipments = []
-        all_shipment_lines = []
-        all_tracking_events = []
-        all_routes = []
-        all_route_stops = []
-        all_deliveries = []
-        all_pod = []
-        all_return_orders = []
-        
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            # Submit chunk processing tasks
-            futures = {
-                executor.submit(self._generate_logistics_operations_chunk, 
-                    start_date + timedelta(days=start_day), 
-                    chunk_days, 
-                    chunk_id,
-                    valid_customer_ids, valid_factory_ids): chunk_id 
-                for chunk_id, (start_day, chunk_days) in enumerate(day_chunks)
-            }
+        chunk_args = [(start_date + timedelta(days=start_day), chunk_days_count, chunk_id,
+                       valid_customer_ids, valid_factory_ids)
+                      for chunk_id, (start_day, chunk_days_count) in enumerate(day_chunks)]
+        # Every chunk mints from its own reserved range per counter; minting past it fails the run
+        self.chunk_ids = dict.fromkeys(LOGISTICS_CHUNK_IDS, 1)
+        for chunk_id, chunk_results in self.chunks.run(self._generate_logistics_operations_chunk, chunk_args, 'logistics_operations',
+                                                       counters=self.chunk_ids, id_ranges=id_blocks(LOGISTICS_CHUNK_IDS),
+                                                       days=day_windows(start_date, day_chunks)):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            for table in ('shipments', 'tracking_events', 'deliveries', 'pod'):
+                self.tms_output.emit('proof_of_delivery' if table == 'pod' else table, chunk_results[table],
+                                     getattr(self, table))
+            with self.data_lock:
+                self.routes.extend(chunk_results['routes'])
+                self.route_stops.extend(chunk_results['route_stops'])
+                self.return_orders.extend(chunk_results['return_orders'])
             
-            # Collect results as they complete
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_results = future.result()
-                    
-                    all_shipments.extend(chunk_results['shipments'])
-                    all_shipment_lines.extend(chunk_results['shipment_lines'])
-                    all_tracking_events.extend(chunk_results['tracking_events'])
-                    all_routes.extend(chunk_results['routes'])
-                    all_route_stops.extend(chunk_results['route_stops'])
-                    all_deliveries.extend(chunk_results['deliveries'])
-                    all_pod.extend(chunk_results['pod'])
-                    all_return_orders.extend(chunk_results['return_orders'])
-                    
-                    print(f"    ✓ Logistics chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['shipments'])} shipments)")
-                except Exception as e:
-                    print(f"    ✗ Logistics chunk {chunk_id + 1} failed: {e}")
-        
-        # Store results with thread safety
-        with self.data_lock:
-            self.shipments.extend(all_shipments)
-            self.shipment_lines.extend(all_shipment_lines)
-            self.tracking_events.extend(all_tracking_events)
-            self.routes.extend(all_routes)
-            self.route_stops.extend(all_route_stops)
-            self.deliveries.extend(all_deliveries)
-            self.pod.extend(all_pod)
-            self.return_orders.extend(all_return_orders)
-        
-        print(f"✓ Generated logistics: {len(self.shipments):,} shipments, {len(self.tracking_events):,} tracking events via PARALLEL processing")
+            print(f"    ✓ Logistics chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['shipments'])} shipments)")
+        
+        print(f"✓ Generated logistics: {self.tms_output.rows('shipments', self.shipments):,} shipments, {self.tms_output.rows('tracking_events', self.tracking_events):,} tracking events via PARALLEL processing")
     
     def _generate_logistics_operations_chunk(self, start_date: datetime, days: int, chunk_id: int, 
                                            valid_customer_ids: List[str], valid_factory_ids: List[str]) -> Dict:
@@ -1061,7 +1042,6 @@ class WMSTMSDataGenerator:
         
         # Local data storage for this chunk
         chunk_shipments = []
-        chunk_shipment_lines = []
         chunk_tracking_events = []
         chunk_routes = []
         chunk_route_stops = []
@@ -1069,26 +1049,26 @@ class WMSTMSDataGenerator:
         chunk_pod = []
         chunk_return_orders = []
         
-        # Local counters to avoid collision
-        local_shipment_counter = chunk_id * 100000 + 1
-        local_tracking_counter = chunk_id * 500000 + 1
-        local_route_counter = chunk_id * 50000 + 1
-        local_delivery_counter = chunk_id * 100000 + 1
-        local_pod_counter = chunk_id * 100000 + 1
-        local_return_counter = chunk_id * 20000 + 1
+        # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+        ids = self.chunk_ids
+        local_shipment_counter = ids['shipment']
+        local_tracking_counter = ids['tracking']
+        local_route_counter = ids['route']
+        local_delivery_counter = ids['delivery']
+        local_pod_counter = ids['pod']
+        local_return_counter = ids['return']
         
         current_date = start_date
         
         for day in range(days):
             # Create shipments (200-400 per day across all factories and warehouses)
-            num_shipments = random.randint(200, 400)
+            num_shipments = random.randint(*SHIPMENTS_PER_DAY)
             for _ in range(num_shipments):
                 shipment_data = self._create_shipment_local(current_date, local_shipment_counter, 
                                                           local_tracking_counter, local_delivery_counter, 
                                                           local_pod_counter, valid_customer_ids, valid_factory_ids)
                 if shipment_data:
                     chunk_shipments.append(shipment_data['shipment'])
-                    chunk_shipment_lines.extend(shipment_data['shipment_lines'])
                     chunk_tracking_events.extend(shipment_data['tracking_events'])
                     chunk_deliveries.append(shipment_data['delivery'])
                     chunk_pod.append(shipment_data['pod'])
@@ -1100,10 +1080,14 @@ class WMSTMSDataGenerator:
             
             current_date += timedelta(days=1)
         
-        # Return all chunk data
+        # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+        ids.update({'shipment': local_shipment_counter, 'tracking': local_tracking_counter,
+                    'route': local_route_counter, 'delivery': local_delivery_counter,
+                    'pod': local_pod_counter, 'return': local_return_counter})
+        
+        # Return all chunk data (not the shipments' own lines: to_json derives the exported lines from the shipments)
         return {
             'shipments': chunk_shipments,
-            'shipment_lines': chunk_shipment_lines,
             'tracking_events': chunk_tracking_events,
             'routes': chunk_routes,
             'route_stops': chunk_route_stops,
@@ -1383,15 +1367,15 @@ class WMSTMSDataGenerator:
         lines = []
         
         # Create dummy pick waves if none exist to ensure wave lines are generated
-        if not self.pick_waves:
+        if not self.wms_output.rows('pick_waves', self.pick_waves):
             print("No pick waves found, creating dummy waves for wave lines generation")
             dummy_waves = [
                 {'wave_id': f'WAVE-{i:06d}'} 
                 for i in range(1, 6)  # Create 5 dummy waves
             ]
-            wave_pool = dummy_waves
+            wave_chunks = [dummy_waves]
         else:
-            wave_pool = self.pick_waves
+            wave_chunks = self.wms_output.chunks('pick_waves', self.pick_waves)
         
         # Use dummy sales order IDs if none available
         if not self.sales_orders:
@@ -1407,24 +1391,28 @@ class WMSTMSDataGenerator:
         else:
             material_pool = self.materials
         
-        for wave in wave_pool:
-            num_lines = random.randint(5, 15)
-            for i in range(num_lines):
-                line = {
-                    'wave_line_id': self.generate_id('WL', 'picking'),
-                    'wave_id': wave['wave_id'],
-                    'sales_order_id': random.choice(sales_order_pool).get('sales_order_id'),
-                    'material_id': random.choice(material_pool).get('material_id'),
-                    'line_number': i + 1,
-                    'quantity_required': random.randint(10, 100),
-                    'quantity_picked': random.randint(10, 100),
-                    'pick_location': f"STG-A{random.randint(1, 5):02d}-L{random.randint(1, 3)}-P{random.randint(1, 4):02d}",
-                    'status': random.choice(['pending', 'in_progress', 'completed']),
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                lines.append(line)
+        # Lines are emitted wave chunk by wave chunk, so streamed output never holds the whole table
+        for waves in wave_chunks:
+            chunk_lines = []
+            for wave in waves:
+                num_lines = random.randint(5, 15)
+                for i in range(num_lines):
+                    line = {
+                        'wave_line_id': self.generate_id('WL', 'picking'),
+                        'wave_id': wave['wave_id'],
+                        'sales_order_id': random.choice(sales_order_pool).get('sales_order_id'),
+                        'material_id': random.choice(material_pool).get('material_id'),
+                        'line_number': i + 1,
+                        'quantity_required': random.randint(10, 100),
+                        'quantity_picked': random.randint(10, 100),
+                        'pick_location': f"STG-A{random.randint(1, 5):02d}-L{random.randint(1, 3)}-P{random.randint(1, 4):02d}",
+                        'status': random.choice(['pending', 'in_progress', 'completed']),
+                        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    }
+                    chunk_lines.append(line)
+            self.wms_output.emit('wave_lines', chunk_lines, lines)
         
-        print(f"Generated {len(lines)} wave lines")
+        print(f"Generated {self.wms_output.rows('wave_lines', lines)} wave lines")
         return lines
 
     def _generate_cycle_count_tasks(self):
@@ -1589,54 +1577,60 @@ class WMSTMSDataGenerator:
         return rates
 
     def _generate_shipment_lines(self):
-        """Generate shipment lines"""
+        """Generate shipment lines (emitted shipment chunk by shipment chunk)"""
         print("Generating shipment lines...")
         lines = []
         
-        for shipment in self.shipments:
-            for i in range(random.randint(1, 5)):
-                line = {
-                    'shipment_line_id': self.generate_id('SHL', 'shipment'),
-                    'shipment_id': shipment['shipment_id'],
-                    'sales_order_id': shipment.get('sales_order_id'),
-                    'material_id': random.choice(self.materials).get('material_id') if self.materials else None,
-                    'line_number': i + 1,
-                    'quantity': random.randint(10, 100),
-                    'uom': 'EA',
-                    'weight_kg': round(random.uniform(1, 50), 2),
-                    'volume_cbm': round(random.uniform(0.01, 1), 4),
-                    'status': random.choice(['packed', 'in_transit', 'delivered']),
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                lines.append(line)
+        for shipments in self.tms_output.chunks('shipments', self.shipments):
+            chunk_lines = []
+            for shipment in shipments:
+                for i in range(random.randint(1, 5)):
+                    line = {
+                        'shipment_line_id': self.generate_id('SHL', 'shipment'),
+                        'shipment_id': shipment['shipment_id'],
+                        'sales_order_id': shipment.get('sales_order_id'),
+                        'material_id': random.choice(self.materials).get('material_id') if self.materials else None,
+                        'line_number': i + 1,
+                        'quantity': random.randint(10, 100),
+                        'uom': 'EA',
+                        'weight_kg': round(random.uniform(1, 50), 2),
+                        'volume_cbm': round(random.uniform(0.01, 1), 4),
+                        'status': random.choice(['packed', 'in_transit', 'delivered']),
+                        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    }
+                    chunk_lines.append(line)
+            self.tms_output.emit('shipment_lines', chunk_lines, lines)
         
-        print(f"Generated {len(lines)} shipment lines")
+        print(f"Generated {self.tms_output.rows('shipment_lines', lines)} shipment lines")
         return lines
 
     def _generate_shipment_packages(self):
-        """Generate shipment packages"""
+        """Generate shipment packages (emitted shipment chunk by shipment chunk)"""
         print("Generating shipment packages...")
         packages = []
         
-        for shipment in self.shipments:
-            for i in range(random.randint(1, 3)):
-                pkg = {
-                    'package_id': self.generate_id('PKG', 'shipping'),
-                    'shipment_id': shipment['shipment_id'],
-                    'package_number': i + 1,
-                    'package_type': random.choice(['carton', 'pallet', 'container']),
-                    'length_cm': random.randint(20, 100),
-                    'width_cm': random.randint(20, 100),
-                    'height_cm': random.randint(20, 100),
-                    'weight_kg': round(random.uniform(5, 100), 2),
-                    'contents': json.dumps([f"Item {j+1}" for j in range(random.randint(1, 5))]),
-                    'seal_number': f"SEAL-{random.randint(100000, 999999)}",
-                    'package_status': random.choice(['packed', 'labeled', 'shipped']),
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                packages.append(pkg)
+        for shipments in self.tms_output.chunks('shipments', self.shipments):
+            chunk_packages = []
+            for shipment in shipments:
+                for i in range(random.randint(1, 3)):
+                    pkg = {
+                        'package_id': self.generate_id('PKG', 'shipping'),
+                        'shipment_id': shipment['shipment_id'],
+                        'package_number': i + 1,
+                        'package_type': random.choice(['carton', 'pallet', 'container']),
+                        'length_cm': random.randint(20, 100),
+                        'width_cm': random.randint(20, 100),
+                        'height_cm': random.randint(20, 100),
+                        'weight_kg': round(random.uniform(5, 100), 2),
+                        'contents': json.dumps([f"Item {j+1}" for j in range(random.randint(1, 5))]),
+                        'seal_number': f"SEAL-{random.randint(100000, 999999)}",
+                        'package_status': random.choice(['packed', 'labeled', 'shipped']),
+                        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    }
+                    chunk_packages.append(pkg)
+            self.tms_output.emit('shipment_packages', chunk_packages, packages)
         
-        print(f"Generated {len(packages)} shipment packages")
+        print(f"Generated {self.tms_output.rows('shipment_packages', packages)} shipment packages")
         return packages
 
     def _generate_routes(self):
@@ -1694,12 +1688,14 @@ class WMSTMSDataGenerator:
         print("Generating return orders...")
         returns = []
         start_date = datetime.now() - timedelta(days=90)
+        # Shipments are drawn by position here and their IDs read back in one pass below
+        shipment_count = self.tms_output.rows('shipments', self.shipments)
         
         for i in range(30):
             ret = {
                 'return_order_id': self.generate_id('RET', 'return'),
                 'return_number': f"RET-{datetime.now().strftime('%Y%m%d')}-{i+1:04d}",
-                'original_shipment_id': random.choice(self.shipments)['shipment_id'] if self.shipments else None,
+                'original_shipment_id': random.randrange(shipment_count) if shipment_count else None,
                 'customer_id': random.choice(self.customers).get('customer_id') if self.customers else None,
                 'return_date': (start_date + timedelta(days=random.randint(0, 90))).strftime('%Y-%m-%d'),
                 'return_reason': random.choice(['defective', 'damaged', 'wrong_item', 'customer_request']),
@@ -1709,6 +1705,13 @@ class WMSTMSDataGenerator:
             }
             returns.append(ret)
         
+        positions = {ret['original_shipment_id'] for ret in returns} - {None}
+        shipment_ids = {pos: shipment['shipment_id']
+                        for pos, shipment in enumerate(self.tms_output.records('shipments', self.shipments))
+                        if pos in positions}
+        for ret in returns:
+            ret['original_shipment_id'] = shipment_ids.get(ret['original_shipment_id'])
+        
         print(f"Generated {len(returns)} return orders")
         return returns
 
@@ -1726,7 +1729,7 @@ class WMSTMSDataGenerator:
                 # Pick from materials with sales orders
                 material_id = random.choice(self.materials_with_sales)
                 # Link to an actual sales order line for this material
-                sales_order_line_id = random.choice(self.material_to_sales_lines[material_id]).get('sales_order_line_id')
+                sales_order_line_id = random.choice(self.material_to_sales_lines[material_id])
             elif self.materials:
                 # Fall back to any material
                 material_id = random.choice(self.materials).get('material_id')
@@ -1860,36 +1863,37 @@ class WMSTMSDataGenerator:
         logger.info(f"  ⏰ Time Coordination Events: {self.stats['time_coordination_events']:,}")
         logger.info(f"  📈 Total Records Generated: {self.stats['records_generated']:,}")
         
+        wms_rows, tms_rows = self.wms_output.rows, self.tms_output.rows
         logger.info(f"\n📦 WMS Data Summary:")
         logger.info(f"  Warehouses: {len(self.warehouses):,}")
         logger.info(f"  Zones: {len(self.zones):,}")
         logger.info(f"  Storage Bins: {len(self.bins):,}")
         logger.info(f"  Workers: {len(self.warehouse_workers):,}")
-        logger.info(f"  Receiving Tasks: {len(self.receiving_tasks):,}")
-        logger.info(f"  Putaway Tasks: {len(self.putaway_tasks):,}")
-        logger.info(f"  Pick Waves: {len(self.pick_waves):,}")
-        logger.info(f"  Picking Tasks: {len(self.picking_tasks):,}")
-        logger.info(f"  Packing Tasks: {len(self.packing_tasks):,}")
-        logger.info(f"  Shipping Tasks: {len(self.shipping_tasks):,}")
+        logger.info(f"  Receiving Tasks: {wms_rows('receiving_tasks', self.receiving_tasks):,}")
+        logger.info(f"  Putaway Tasks: {wms_rows('putaway_tasks', self.putaway_tasks):,}")
+        logger.info(f"  Pick Waves: {wms_rows('pick_waves', self.pick_waves):,}")
+        logger.info(f"  Picking Tasks: {wms_rows('picking_tasks', self.picking_tasks):,}")
+        logger.info(f"  Packing Tasks: {wms_rows('packing_tasks', self.packing_tasks):,}")
+        logger.info(f"  Shipping Tasks: {wms_rows('shipping_tasks', self.shipping_tasks):,}")
         
         logger.info(f"\n🚛 TMS Data Summary:")
         logger.info(f"  Carriers: {len(self.carriers):,}")
         logger.info(f"  Carrier Services: {len(self.carrier_services):,}")
-        logger.info(f"  Shipments: {len(self.shipments):,}")
-        logger.info(f"  Tracking Events: {len(self.tracking_events):,}")
-        logger.info(f"  Deliveries: {len(self.deliveries):,}")
-        logger.info(f"  Proof of Delivery: {len(self.pod):,}")
+        logger.info(f"  Shipments: {tms_rows('shipments', self.shipments):,}")
+        logger.info(f"  Tracking Events: {tms_rows('tracking_events', self.tracking_events):,}")
+        logger.info(f"  Deliveries: {tms_rows('deliveries', self.deliveries):,}")
+        logger.info(f"  Proof of Delivery: {tms_rows('proof_of_delivery', self.pod):,}")
         
         # Data quality assessment
         total_wms_records = (len(self.warehouses) + len(self.zones) + len(self.bins) + 
-                           len(self.warehouse_workers) + len(self.receiving_tasks) + 
-                           len(self.putaway_tasks) + len(self.pick_waves) + 
-                           len(self.picking_tasks) + len(self.packing_tasks) + 
-                           len(self.shipping_tasks))
+                           len(self.warehouse_workers) + wms_rows('receiving_tasks', self.receiving_tasks) + 
+                           wms_rows('putaway_tasks', self.putaway_tasks) + wms_rows('pick_waves', self.pick_waves) + 
+                           wms_rows('picking_tasks', self.picking_tasks) + wms_rows('packing_tasks', self.packing_tasks) + 
+                           wms_rows('shipping_tasks', self.shipping_tasks))
         
         total_tms_records = (len(self.carriers) + len(self.carrier_services) + 
-                           len(self.shipments) + len(self.tracking_events) + 
-                           len(self.deliveries) + len(self.pod))
+                           tms_rows('shipments', self.shipments) + tms_rows('tracking_events', self.tracking_events) + 
+                           tms_rows('deliveries', self.deliveries) + tms_rows('proof_of_delivery', self.pod))
         
         error_rate = (self.stats['fk_validation_errors'] / max(1, self.stats['records_generated'])) * 100
         
@@ -1901,7 +1905,7 @@ class WMSTMSDataGenerator:
         logger.info(f"{'='*80}")
     
     def to_json(self, output_file_wms='wms_historical_data.json', output_file_tms='tms_historical_data.json'):
-        """Export to JSON with separate files for WMS and TMS"""
+        """Export to JSON with separate files for WMS and TMS (or publish each file's streamed shards + manifest)"""
         print(f"\nExporting to JSON (separate WMS and TMS files)...")
         
         # Generate WMS empty table data
@@ -1994,6 +1998,19 @@ class WMSTMSDataGenerator:
             'wms_tms_sync_log': wms_tms_sync_log
         }
         
+        if self.chunks.window:
+            write_slice(output_file_wms, wms_data, WMS_SLICE_PARTITIONS, self.chunks.covered)
+            write_slice(output_file_tms, tms_data, TMS_SLICE_PARTITIONS, self.chunks.covered)
+            return
+        
+        # Shards + manifest per file when GENERATOR_OUTPUT=tsv/ndjson
+        wms_shards = self.wms_output.close(wms_data)
+        if wms_shards is not None:
+            tms_shards = self.tms_output.close(tms_data)
+            print(f"WMS data exported to {wms_shards} (manifest: {output_file_wms})")
+            print(f"TMS data exported to {tms_shards} (manifest: {output_file_tms})")
+            return
+        
         # Write WMS JSON with explicit truncation and validation
         import os
         if os.path.exists(output_file_wms):
@@ -2016,12 +2033,14 @@ if __name__ == "__main__":
     # Get the directory of this script (data folder)
     script_dir = Path(__file__).parent
     
-    generator = WMSTMSDataGenerator()
-    generator.generate_all_data()
-    
     # Export to JSON (in same folder as script) - create separate WMS and TMS files
     wms_json_file = script_dir / "genims_wms_data.json"
     tms_json_file = script_dir / "genims_tms_data.json"
+    
+    # Shard output streams to each file's shards while generating
+    generator = WMSTMSDataGenerator(output_file_wms=wms_json_file, output_file_tms=tms_json_file)
+    generator.generate_all_data()
+    
     generator.to_json(str(wms_json_file), str(tms_json_file))
     
     print("\n" + "="*80)
@@ -25,6 +25,10 @@ try:
 except ImportError:
     POSTGRES_AVAILABLE = False
 
+# Scale factor (GENIMS_SCALE_FACTOR) for daily record targets
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled  # type: ignore
+
 # Configuration
 PG_HOST = os.getenv('POSTGRES_HOST', 'localhost')
 PG_PORT = int(os.getenv('POSTGRES_PORT', '5432'))
@@ -40,9 +44,9 @@ WMS_BATCH_SIZE = 5000
 TMS_BATCH_SIZE = 5000
 # Aligned with ERP volume (150-300 sales orders/day) and warehouse capacity (12 warehouses)
 # WMS: Inbound (80-150/day) + Outbound waves (60-120/day) + picking tasks (~200-400/day) = ~400-700 total
-WMS_TOTAL_RECORDS = 550  # Daily WMS operations (receiving + waves + picking tasks)
+WMS_TOTAL_RECORDS = scaled(550)  # Daily WMS operations (receiving + waves + picking tasks)
 # TMS: Shipments (~20-40/day) + Tracking events (~80-160/day) + Routes (~15-30/day) = ~120-240 total  
-TMS_TOTAL_RECORDS = 180  # Daily TMS operations (aligned with sales order volume)
+TMS_TOTAL_RECORDS = scaled(180)  # Daily TMS operations (aligned with sales order volume)
 
 # Logging
 log_dir = os.getenv('DAEMON_LOG_DIR', os.path.join(os.path.dirname(__file__), '..', '..', 'logs'))
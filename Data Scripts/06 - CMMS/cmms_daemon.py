@@ -24,6 +24,10 @@ try:
 except ImportError:
     POSTGRES_AVAILABLE = False
 
+# Scale factor (GENIMS_SCALE_FACTOR) for daily record targets
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled  # type: ignore
+
 # Configuration
 PG_HOST = os.getenv('POSTGRES_HOST', 'localhost')
 PG_PORT = int(os.getenv('POSTGRES_PORT', '5432'))
@@ -40,7 +44,7 @@ PG_MES_DB = os.getenv('DB_MANUFACTURING', 'genims_manufacturing_db')
 BATCH_SIZE = 5000
 # Aligned with historical generator: 150-300 WO/day + maintenance tasks + inspections
 # Daily maintenance operations: ~200 WO + ~400 tasks + ~100 inspections = ~700 total
-TOTAL_RECORDS = 700  # Daily maintenance operations across 4 factories
+TOTAL_RECORDS = scaled(700)  # Daily maintenance operations across 4 factories
 
 # Logging
 log_dir = os.getenv('DAEMON_LOG_DIR', os.path.join(os.path.dirname(__file__), '..', '..', 'logs'))
@@ -17,11 +17,15 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 import multiprocessing
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 from generator_helper import get_helper
+from columnar_store import load_dataset
+from scale_factor import history_days, scaled_range
+from chunk_executor import ChunkExecutor, chunk_days, day_windows, id_blocks, spans
+from history_slice import as_of, write_slice
+from table_writer import TableSink
 
 # ULTRA-FAST PARALLEL Configuration
 cpu_count = multiprocessing.cpu_count()
@@ -29,12 +33,29 @@ WORKER_COUNT = min(8, max(4, cpu_count - 2))  # Use 8 workers or available CPUs
 BATCH_SIZE = 150000  # Large batch size for optimal performance
 
 # Configuration
-DAYS_OF_HISTORY = 180
+DAYS_OF_HISTORY = history_days(180)
 ASSETS_PER_FACTORY = 80   # Increased from 20 to 80 per factory (4x)
 TECHNICIANS_PER_FACTORY = 40  # Increased from 10 to 40 per factory (4x)
 MRO_PARTS_COUNT = 800     # Increased from 200 to 800 (4x parts catalog)
 PM_SCHEDULES_PER_ASSET = 4  # More preventive maintenance schedules per asset
-WORK_ORDERS_PER_DAY = (150, 300)  # Enterprise maintenance volume (37-75 WOs per factory)
+WORK_ORDERS_PER_DAY = scaled_range((150, 300))  # Enterprise maintenance volume (37-75 WOs per factory)
+
+# IDs one maintenance day chunk may mint per counter (scale 1, 10-day chunks; ChunkExecutor reserves the ranges)
+MAINTENANCE_CHUNK_IDS = {
+    'work_order': 100000, 'task': 500000, 'parts_transaction': 300000, 'labor': 200000, 'meter': 100000,
+    'history': 100000,
+}
+
+# Day-partitioned tables for history slices (chunk table -> {table: date column or (key, parent table)})
+SLICE_PARTITIONS = {
+    'maintenance_operations': {
+        'work_orders': 'scheduled_start_date',
+        'work_order_tasks': ('work_order_id', 'work_orders'),
+        'mro_parts_transactions': ('work_order_id', 'work_orders'),
+        'labor_time_entries': ('work_order_id', 'work_orders'),
+        'maintenance_history': ('work_order_id', 'work_orders'),
+    },
+}
 
 # Database configuration
 PG_HOST = os.getenv('POSTGRES_HOST', 'insights-db.postgres.database.azure.com')
@@ -52,8 +73,8 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 class CMMSDataGenerator:
-    def __init__(self, master_data_file=None):
-        """Initialize with master data and registry"""
+    def __init__(self, master_data_file=None, output_file=None):
+        """Initialize with master data and registry (output_file: JSON data file / shard manifest to write)"""
         from pathlib import Path
         
         # Initialize master data
@@ -106,9 +127,17 @@ class CMMSDataGenerator:
         self.parallel_enabled = True
         self.data_lock = threading.Lock()
         
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.worker_count)
+        
+        # GENERATOR_OUTPUT=ndjson|tsv: task, parts, labor and history tables stream to shards chunk by chunk;
+        # work orders stay in memory (to_json derives costs and PM logs from them)
+        self.output = TableSink(output_file, stream=not self.chunks.window)
+        
         logger.info(f"Loaded: {len(self.factories)} factories, {len(self.machines)} machines, {len(self.production_lines)} lines")
         
         print(f"🚀 ULTRA-FAST CMMS PARALLEL MODE: {self.worker_count} workers, batch_size={self.batch_size:,}")
+        print(f"   Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
         print(f"   CPU cores available: {cpu_count}, Using {self.worker_count} for generation")
     
     def load_master_data_from_json(self, master_data_file):
@@ -116,8 +145,7 @@ class CMMSDataGenerator:
         try:
             logger.info(f"Loading master data from JSON: {master_data_file}")
             
-            with open(master_data_file, 'r') as f:
-                master_data = json.load(f)
+            master_data = load_dataset(master_data_file)
             
             # Load core data
             self.factories = master_data.get('factories', [])
@@ -268,7 +296,7 @@ class CMMSDataGenerator:
         self.generate_pm_schedules()
         
         # Historical Operations (90 days)
-        start_date = datetime.now() - timedelta(days=DAYS_OF_HISTORY)
+        start_date = as_of() - timedelta(days=DAYS_OF_HISTORY)
         self.generate_maintenance_operations(start_date, DAYS_OF_HISTORY)
         
         self._print_summary()
@@ -527,57 +555,30 @@ class CMMSDataGenerator:
         if not self.parallel_enabled or days < 20:
             return self._generate_maintenance_operations_sequential(start_date, days, valid_machine_ids, valid_employee_ids)
         
-        # Parallel processing for large datasets
-        chunk_size = max(5, days // self.worker_count)  # At least 5 days per chunk
-        day_chunks = [(i, min(chunk_size, days - i)) for i in range(0, days, chunk_size)]
+        # Parallel processing for large datasets (fixed-size day chunks, independent of the worker count)
+        day_chunks = spans(days, chunk_days())
         
         print(f"  🚀 Processing {len(day_chunks)} day chunks with {self.worker_count} workers...")
         
-        all_work_orders = []
-        all_wo_tasks = []
-        all_parts_transactions = []
-        all_labor_entries = []
-        all_meter_readings = []
-        all_maintenance_history = []
-        
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            # Submit chunk processing tasks
-            futures = {
-                executor.submit(self._generate_maintenance_operations_chunk, 
-                    start_date + timedelta(days=start_day), 
-                    chunk_days, 
-                    chunk_id,
-                    valid_machine_ids, valid_employee_ids): chunk_id 
-                for chunk_id, (start_day, chunk_days) in enumerate(day_chunks)
-            }
+        chunk_args = [(start_date + timedelta(days=start_day), chunk_days_count, chunk_id, valid_machine_ids, valid_employee_ids)
+                      for chunk_id, (start_day, chunk_days_count) in enumerate(day_chunks)]
+        # Every chunk mints from its own reserved range per counter; minting past it fails the run
+        self.chunk_ids = dict.fromkeys(MAINTENANCE_CHUNK_IDS, 1)
+        for chunk_id, chunk_results in self.chunks.run(self._generate_maintenance_operations_chunk, chunk_args, 'maintenance_operations',
+                                                       counters=self.chunk_ids, id_ranges=id_blocks(MAINTENANCE_CHUNK_IDS),
+                                                       days=day_windows(start_date, day_chunks)):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            self.output.emit('work_order_tasks', chunk_results['wo_tasks'], self.wo_tasks)
+            self.output.emit('mro_parts_transactions', chunk_results['parts_transactions'], self.parts_transactions)
+            self.output.emit('labor_time_entries', chunk_results['labor_entries'], self.labor_entries)
+            self.output.emit('maintenance_history', chunk_results['maintenance_history'], self.maintenance_history)
+            with self.data_lock:
+                self.work_orders.extend(chunk_results['work_orders'])
+                self.meter_readings.extend(chunk_results['meter_readings'])
             
-            # Collect results as they complete
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_results = future.result()
-                    
-                    all_work_orders.extend(chunk_results['work_orders'])
-                    all_wo_tasks.extend(chunk_results['wo_tasks'])
-                    all_parts_transactions.extend(chunk_results['parts_transactions'])
-                    all_labor_entries.extend(chunk_results['labor_entries'])
-                    all_meter_readings.extend(chunk_results['meter_readings'])
-                    all_maintenance_history.extend(chunk_results['maintenance_history'])
-                    
-                    print(f"    ✓ CMMS chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['work_orders'])} work orders)")
-                except Exception as e:
-                    print(f"    ✗ CMMS chunk {chunk_id + 1} failed: {e}")
-        
-        # Store results with thread safety
-        with self.data_lock:
-            self.work_orders.extend(all_work_orders)
-            self.wo_tasks.extend(all_wo_tasks)
-            self.parts_transactions.extend(all_parts_transactions)
-            self.labor_entries.extend(all_labor_entries)
-            self.meter_readings.extend(all_meter_readings)
-            self.maintenance_history.extend(all_maintenance_history)
-        
-        print(f"✓ Generated CMMS operations: {len(self.work_orders):,} work orders, {len(self.wo_tasks):,} tasks via PARALLEL processing")
+            print(f"    ✓ CMMS chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['work_orders'])} work orders)")
+        
+        print(f"✓ Generated CMMS operations: {len(self.work_orders):,} work orders, {self.output.rows('work_order_tasks', self.wo_tasks):,} tasks via PARALLEL processing")
     
     def _generate_maintenance_operations_chunk(self, start_date: datetime, days: int, chunk_id: int, 
                                              valid_machine_ids: List[str], valid_employee_ids: List[str]) -> Dict:
@@ -591,13 +592,14 @@ class CMMSDataGenerator:
         chunk_meter_readings = []
         chunk_maintenance_history = []
         
-        # Local counters to avoid collision
-        local_wo_counter = chunk_id * 100000 + 1
-        local_task_counter = chunk_id * 500000 + 1
-        local_trans_counter = chunk_id * 300000 + 1
-        local_labor_counter = chunk_id * 200000 + 1
-        local_meter_counter = chunk_id * 100000 + 1
-        local_history_counter = chunk_id * 100000 + 1
+        # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+        ids = self.chunk_ids
+        local_wo_counter = ids['work_order']
+        local_task_counter = ids['task']
+        local_trans_counter = ids['parts_transaction']
+        local_labor_counter = ids['labor']
+        local_meter_counter = ids['meter']
+        local_history_counter = ids['history']
         
         current_date = start_date
         
@@ -627,6 +629,10 @@ class CMMSDataGenerator:
             
             current_date += timedelta(days=1)
         
+        # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+        ids.update(work_order=local_wo_counter, task=local_task_counter, parts_transaction=local_trans_counter,
+                   labor=local_labor_counter, meter=local_meter_counter, history=local_history_counter)
+        
         # Return all chunk data
         return {
             'work_orders': chunk_work_orders,
@@ -1228,15 +1234,16 @@ class CMMSDataGenerator:
         print(f"  PM Schedules: {len(self.pm_schedules)}")
         print(f"  Failure Codes: {len(self.failure_codes)}")
         
+        rows = self.output.rows
         print(f"\nOperational Data ({DAYS_OF_HISTORY} days):")
         print(f"  Work Orders: {len(self.work_orders)}")
-        print(f"  Work Order Tasks: {len(self.wo_tasks)}")
-        print(f"  Parts Transactions: {len(self.parts_transactions)}")
-        print(f"  Labor Entries: {len(self.labor_entries)}")
-        print(f"  Maintenance History: {len(self.maintenance_history)}")
+        print(f"  Work Order Tasks: {rows('work_order_tasks', self.wo_tasks)}")
+        print(f"  Parts Transactions: {rows('mro_parts_transactions', self.parts_transactions)}")
+        print(f"  Labor Entries: {rows('labor_time_entries', self.labor_entries)}")
+        print(f"  Maintenance History: {rows('maintenance_history', self.maintenance_history)}")
     
     def to_json(self, output_file='cmms_historical_data.json'):
-        """Export to JSON with flat structure matching actual table names"""
+        """Export to JSON with flat structure matching actual table names (or publish the streamed shards + manifest)"""
         logger.info(f"\nExporting to JSON...")
         
         # Generate data for empty tables
@@ -1287,6 +1294,15 @@ class CMMSDataGenerator:
             'asset_reliability_metrics': asset_reliability_metrics
         }
         
+        if self.chunks.window:
+            write_slice(output_file, data, SLICE_PARTITIONS, self.chunks.covered)
+            return
+        
+        shard_dir = self.output.close(data)
+        if shard_dir is not None:
+            logger.info(f"Data exported to {shard_dir} (manifest: {output_file})")
+            return
+        
         with open(output_file, 'w') as f:
             json.dump(data, f, indent=2)
         
@@ -1304,11 +1320,13 @@ if __name__ == "__main__":
         # Load master data from the same folder structure
         master_data_file = script_dir.parent / "01 - Base Data" / "genims_master_data.json"
         
-        generator = CMMSDataGenerator(str(master_data_file))
-        generator.generate_all_data()
-        
         # Export to JSON (in same folder as script)
         json_file = script_dir / "genims_cmms_data.json"
+        
+        # Shard output streams to json_file's shards while generating
+        generator = CMMSDataGenerator(str(master_data_file), output_file=json_file)
+        generator.generate_all_data()
+        
         generator.to_json(str(json_file))
         
         logger.info("\n" + "="*80)
@@ -28,6 +28,7 @@ except ImportError:
 script_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts')
 if script_dir not in sys.path:
     sys.path.insert(0, script_dir)
+from scale_factor import scaled  # type: ignore
 
 try:
     from generator_helper import get_helper
@@ -63,7 +64,7 @@ PG_CRM_DB = os.getenv('DB_CRM', 'genims_crm_db')
 BATCH_SIZE = 5000
 # Aligned with historical generator: 80-200 leads/day + opportunities + activities + cases
 # Daily CRM operations: ~120 leads + ~30 opportunities + ~80 activities + ~40 cases = ~270 total
-TOTAL_RECORDS = 400  # Daily CRM operations across 4 factories
+TOTAL_RECORDS = scaled(400)  # Daily CRM operations across 4 factories
 
 # Logging
 log_dir = os.getenv('DAEMON_LOG_DIR', os.path.join(os.path.dirname(__file__), '..', '..', 'logs'))
@@ -13,11 +13,15 @@ import sys
 from pathlib import Path
 import multiprocessing
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 from generator_helper import get_helper
+from columnar_store import load_dataset
+from scale_factor import history_days, scaled, scaled_range
+from chunk_executor import ChunkExecutor, chunk_days, day_windows, id_blocks, spans
+from history_slice import as_of, write_slice
+from table_writer import TableSink
 
 # ULTRA-FAST PARALLEL Configuration
 cpu_count = multiprocessing.cpu_count()
@@ -25,16 +29,34 @@ WORKER_COUNT = min(8, max(4, cpu_count - 2))  # Use 8 workers or available CPUs
 BATCH_SIZE = 150000  # Large batch size for optimal performance
 
 # Configuration
-DAYS_OF_HISTORY = 180
-SALES_REPS_COUNT = 60      # Increased from 15 to 60 (15 per factory)
-TERRITORIES_COUNT = 20     # Increased from 5 to 20 (5 per factory)
-LEADS_PER_DAY = (80, 200)  # Enterprise lead generation (20-50 per factory)
-OPPORTUNITIES_PER_MONTH = (400, 800)  # Scaled opportunities (100-200 per factory)
-CASES_PER_WEEK = (200, 400)  # Customer service volume (50-100 per factory)
+DAYS_OF_HISTORY = history_days(180)
+SALES_REPS_COUNT = scaled(60)  # Increased from 15 to 60 (15 per factory)
+TERRITORIES_COUNT = scaled(20)  # Increased from 5 to 20 (5 per factory)
+LEADS_PER_DAY = scaled_range((80, 200))  # Enterprise lead generation (20-50 per factory)
+OPPORTUNITIES_PER_MONTH = scaled_range((400, 800))  # Scaled opportunities (100-200 per factory)
+CASES_PER_WEEK = scaled_range((200, 400))  # Customer service volume (50-100 per factory)
+
+# IDs one CRM day chunk may mint per counter (scale 1, 10-day chunks; ChunkExecutor reserves the ranges)
+CRM_CHUNK_IDS = {
+    'lead': 50000, 'lead_activity': 100000, 'opportunity': 30000, 'opportunity_history': 100000,
+    'opportunity_product': 100000, 'quote': 30000, 'quote_line': 100000, 'case': 50000, 'activity': 200000,
+    'task': 100000, 'interaction': 200000,
+}
+
+# Day-partitioned tables for history slices (chunk table -> {table: date column or (key, parent table)})
+SLICE_PARTITIONS = {
+    'crm_operations': {
+        'opportunities': 'created_at',
+        'opportunity_products': ('opportunity_id', 'opportunities'),
+        'quotations': 'quotation_date',
+        'quotation_lines': ('quotation_id', 'quotations'),
+        'cases': 'created_date',
+    },
+}
 
 class CRMDataGenerator:
-    def __init__(self, master_data_file=None, erp_data_file=None):
-        """Initialize with master data, ERP data, and registry"""
+    def __init__(self, master_data_file=None, erp_data_file=None, output_file=None):
+        """Initialize with master data, ERP data, and registry (output_file: JSON data file / shard manifest to write)"""
         from pathlib import Path
         from time_coordinator import TimeCoordinator
         
@@ -47,13 +69,11 @@ class CRMDataGenerator:
         print(f"Loading master data from {master_data_file}...")
         print(f"Loading ERP data from {erp_data_file}...")
         
-        with open(master_data_file, 'r') as f:
-            self.master_data = json.load(f)
+        self.master_data = load_dataset(master_data_file)
         
         # Try to load ERP data, use minimal data if not available
         try:
-            with open(erp_data_file, 'r') as f:
-                self.erp_data = json.load(f)
+            self.erp_data = load_dataset(erp_data_file)
         except FileNotFoundError:
             print(f"Note: {erp_data_file} not found, using minimal product/material data")
             self.erp_data = {'materials': [], 'products': []}
@@ -115,7 +135,15 @@ class CRMDataGenerator:
         self.parallel_enabled = True
         self.data_lock = threading.Lock()
         
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.worker_count)
+        
+        # GENERATOR_OUTPUT=ndjson|tsv: leads, opportunity products and quotations stream to shards chunk by chunk;
+        # opportunities and cases stay in memory (forecasts and case comments are derived from them)
+        self.output = TableSink(output_file, stream=not self.chunks.window)
+        
         print(f"🚀 ULTRA-FAST CRM PARALLEL MODE: {self.worker_count} workers, batch_size={self.batch_size:,}")
+        print(f"   Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
         print(f"   CPU cores available: {cpu_count}, Using {self.worker_count} for generation")
         
         print(f"Loaded: {len(self.customers)} customers, {len(self.materials)} materials")
@@ -140,7 +168,7 @@ class CRMDataGenerator:
         self.generate_accounts_from_customers()
         
         # Historical Operations (180 days)
-        start_date = datetime.now() - timedelta(days=DAYS_OF_HISTORY)
+        start_date = as_of() - timedelta(days=DAYS_OF_HISTORY)
         self.generate_crm_operations(start_date, DAYS_OF_HISTORY)
         
         # Generate forecasts
@@ -345,72 +373,35 @@ class CRMDataGenerator:
         if not self.parallel_enabled or days < 20:
             return self._generate_crm_operations_sequential(start_date, days, valid_employee_ids)
         
-        # Parallel processing for large datasets
-        chunk_size = max(5, days // self.worker_count)  # At least 5 days per chunk
-        day_chunks = [(i, min(chunk_size, days - i)) for i in range(0, days, chunk_size)]
+        # Parallel processing for large datasets (fixed-size day chunks, independent of the worker count)
+        day_chunks = spans(days, chunk_days())
         
         print(f"  🚀 Processing {len(day_chunks)} day chunks with {self.worker_count} workers...")
         
-        all_leads = []
-        all_lead_activities = []
-        all_opportunities = []
-        all_opp_history = []
-        all_opp_products = []
-        all_quotations = []
-        all_quote_lines = []
-        all_cases = []
-        all_activities = []
-        all_tasks = []
-        all_interactions = []
-        
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            # Submit chunk processing tasks
-            futures = {
-                executor.submit(self._generate_crm_operations_chunk, 
-                    start_date + timedelta(days=start_day), 
-                    chunk_days, 
-                    chunk_id,
-                    valid_employee_ids): chunk_id 
-                for chunk_id, (start_day, chunk_days) in enumerate(day_chunks)
-            }
+        chunk_args = [(start_date + timedelta(days=start_day), chunk_days_count, chunk_id, valid_employee_ids)
+                      for chunk_id, (start_day, chunk_days_count) in enumerate(day_chunks)]
+        # Every chunk mints from its own reserved range per counter; minting past it fails the run
+        self.chunk_ids = dict.fromkeys(CRM_CHUNK_IDS, 1)
+        for chunk_id, chunk_results in self.chunks.run(self._generate_crm_operations_chunk, chunk_args, 'crm_operations',
+                                                       counters=self.chunk_ids, id_ranges=id_blocks(CRM_CHUNK_IDS),
+                                                       days=day_windows(start_date, day_chunks)):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            self.output.emit('leads', chunk_results['leads'], self.leads)
+            self.output.emit('opportunity_products', chunk_results['opp_products'], self.opp_products)
+            self.output.emit('quotations', chunk_results['quotations'], self.quotations)
+            self.output.emit('quotation_lines', chunk_results['quote_lines'], self.quote_lines)
+            with self.data_lock:
+                self.lead_activities.extend(chunk_results['lead_activities'])
+                self.opportunities.extend(chunk_results['opportunities'])
+                self.opp_history.extend(chunk_results['opp_history'])
+                self.cases.extend(chunk_results['cases'])
+                self.activities.extend(chunk_results['activities'])
+                self.tasks.extend(chunk_results['tasks'])
+                self.interactions.extend(chunk_results['interactions'])
             
-            # Collect results as they complete
-            for future in as_completed(futures):
-                chunk_id = futures[future]
-                try:
-                    chunk_results = future.result()
-                    
-                    all_leads.extend(chunk_results['leads'])
-                    all_lead_activities.extend(chunk_results['lead_activities'])
-                    all_opportunities.extend(chunk_results['opportunities'])
-                    all_opp_history.extend(chunk_results['opp_history'])
-                    all_opp_products.extend(chunk_results['opp_products'])
-                    all_quotations.extend(chunk_results['quotations'])
-                    all_quote_lines.extend(chunk_results['quote_lines'])
-                    all_cases.extend(chunk_results['cases'])
-                    all_activities.extend(chunk_results['activities'])
-                    all_tasks.extend(chunk_results['tasks'])
-                    all_interactions.extend(chunk_results['interactions'])
-                    
-                    print(f"    ✓ CRM chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['leads'])} leads, {len(chunk_results['opportunities'])} opps)")
-                except Exception as e:
-                    print(f"    ✗ CRM chunk {chunk_id + 1} failed: {e}")
-        
-        # Store results with thread safety
-        with self.data_lock:
-            self.leads.extend(all_leads)
-            self.lead_activities.extend(all_lead_activities)
-            self.opportunities.extend(all_opportunities)
-            self.opp_history.extend(all_opp_history)
-            self.opp_products.extend(all_opp_products)
-            self.quotations.extend(all_quotations)
-            self.quote_lines.extend(all_quote_lines)
-            self.cases.extend(all_cases)
-            self.activities.extend(all_activities)
-            self.tasks.extend(all_tasks)
-            self.interactions.extend(all_interactions)
-        
-        print(f"✓ Generated CRM operations: {len(self.leads):,} leads, {len(self.opportunities):,} opportunities, {len(self.cases):,} cases via PARALLEL processing")
+            print(f"    ✓ CRM chunk {chunk_id + 1}/{len(day_chunks)} completed ({len(chunk_results['leads'])} leads, {len(chunk_results['opportunities'])} opps)")
+        
+        print(f"✓ Generated CRM operations: {self.output.rows('leads', self.leads):,} leads, {len(self.opportunities):,} opportunities, {len(self.cases):,} cases via PARALLEL processing")
     
     def _generate_crm_operations_chunk(self, start_date: datetime, days: int, chunk_id: int, 
                                       valid_employee_ids: List[str]) -> Dict:
@@ -429,18 +420,19 @@ class CRMDataGenerator:
         chunk_tasks = []
         chunk_interactions = []
         
-        # Local counters to avoid collision
-        local_lead_counter = chunk_id * 50000 + 1
-        local_lead_act_counter = chunk_id * 100000 + 1
-        local_opp_counter = chunk_id * 30000 + 1
-        local_opp_hist_counter = chunk_id * 100000 + 1
-        local_opp_prod_counter = chunk_id * 100000 + 1
-        local_quote_counter = chunk_id * 30000 + 1
-        local_quote_line_counter = chunk_id * 100000 + 1
-        local_case_counter = chunk_id * 50000 + 1
-        local_activity_counter = chunk_id * 200000 + 1
-        local_task_counter = chunk_id * 100000 + 1
-        local_interaction_counter = chunk_id * 200000 + 1
+        # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+        ids = self.chunk_ids
+        local_lead_counter = ids['lead']
+        local_lead_act_counter = ids['lead_activity']
+        local_opp_counter = ids['opportunity']
+        local_opp_hist_counter = ids['opportunity_history']
+        local_opp_prod_counter = ids['opportunity_product']
+        local_quote_counter = ids['quote']
+        local_quote_line_counter = ids['quote_line']
+        local_case_counter = ids['case']
+        local_activity_counter = ids['activity']
+        local_task_counter = ids['task']
+        local_interaction_counter = ids['interaction']
         
         current_date = start_date
         
@@ -495,6 +487,12 @@ class CRMDataGenerator:
             
             current_date += timedelta(days=1)
         
+        # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+        ids.update(lead=local_lead_counter, lead_activity=local_lead_act_counter, opportunity=local_opp_counter,
+                   opportunity_history=local_opp_hist_counter, opportunity_product=local_opp_prod_counter,
+                   quote=local_quote_counter, quote_line=local_quote_line_counter, case=local_case_counter,
+                   activity=local_activity_counter, task=local_task_counter, interaction=local_interaction_counter)
+        
         # Return all chunk data
         return {
             'leads': chunk_leads,
@@ -1282,16 +1280,17 @@ class CRMDataGenerator:
         return interactions
 
         
+        rows = self.output.rows
         print(f"\nSales Pipeline:")
-        print(f"  Leads: {len(self.leads)}")
+        print(f"  Leads: {rows('leads', self.leads)}")
         print(f"  Lead Activities: {len(self.lead_activities)}")
         print(f"  Opportunities: {len(self.opportunities)}")
-        print(f"  Opportunity Products: {len(self.opp_products)}")
+        print(f"  Opportunity Products: {rows('opportunity_products', self.opp_products)}")
         print(f"  Stage History: {len(self.opp_history)}")
         
         print(f"\nQuotations:")
-        print(f"  Quotations: {len(self.quotations)}")
-        print(f"  Quote Lines: {len(self.quote_lines)}")
+        print(f"  Quotations: {rows('quotations', self.quotations)}")
+        print(f"  Quote Lines: {rows('quotation_lines', self.quote_lines)}")
         
         print(f"\nCustomer Support:")
         print(f"  Cases: {len(self.cases)}")
@@ -1300,7 +1299,7 @@ class CRMDataGenerator:
         print(f"  Sales Forecasts: {len(self.forecasts)}")
     
     def to_json(self, output_file='crm_historical_data.json'):
-        """Export to JSON with flat structure matching actual table names"""
+        """Export to JSON with flat structure matching actual table names (or publish the streamed shards + manifest)"""
         print(f"\nExporting to JSON...")
         
         # Generate data for empty tables
@@ -1355,6 +1354,15 @@ class CRMDataGenerator:
             'customer_interactions': customer_interactions
         }
         
+        if self.chunks.window:
+            write_slice(output_file, data, SLICE_PARTITIONS, self.chunks.covered)
+            return
+        
+        shard_dir = self.output.close(data)
+        if shard_dir is not None:
+            print(f"Data exported to {shard_dir} (manifest: {output_file})")
+            return
+        
         with open(output_file, 'w') as f:
             json.dump(data, f, indent=2)
         
@@ -1367,11 +1375,13 @@ if __name__ == "__main__":
     # Get the directory of this script (data folder)
     script_dir = Path(__file__).parent
     
-    generator = CRMDataGenerator()
-    generator.generate_all_data()
-    
     # Export to JSON (in same folder as script)
     json_file = script_dir / "genims_crm_data.json"
+    
+    # Shard output streams to json_file's shards while generating
+    generator = CRMDataGenerator(output_file=json_file)
+    generator.generate_all_data()
+    
     generator.to_json(str(json_file))
     
     print("\n" + "="*80)
@@ -10,24 +10,42 @@ from datetime import datetime, timedelta
 from typing import List, Dict
 import sys
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
 import threading
 from multiprocessing import cpu_count
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 from generator_helper import get_helper
+from columnar_store import load_dataset
+from scale_factor import history_days, scaled, scaled_range
+from chunk_executor import ChunkExecutor, chunk_days, day_windows, id_block, id_stride, spans
+from history_slice import as_of, write_slice
+from table_writer import TableSink
 from time_coordinator import TimeCoordinator
 
-DAYS_OF_HISTORY = 180
-SERVICE_AGENTS_COUNT = 80     # Increased from 20 to 80 (20 per factory)
-FIELD_TECHNICIANS_COUNT = 60  # Increased from 15 to 60 (15 per factory)
+DAYS_OF_HISTORY = history_days(180)
+SERVICE_AGENTS_COUNT = scaled(80)  # Increased from 20 to 80 (20 per factory)
+FIELD_TECHNICIANS_COUNT = scaled(60)  # Increased from 15 to 60 (15 per factory)
 KB_ARTICLES_COUNT = 320       # Increased from 80 to 320 (4x knowledge base)
-TICKETS_PER_DAY = (200, 400)  # Enterprise support volume (50-100 per factory)
+TICKETS_PER_DAY = scaled_range((200, 400))  # Enterprise support volume (50-100 per factory)
+
+# Service day chunk ID ranges per counter: (first ID, chunk block, per-day stride) at scale 1 (ChunkExecutor reserves them)
+SERVICE_CHUNK_IDS = {
+    'ticket': (1000, 100000, 300), 'comment': (500, 100000, 150),
+    'attachment': (100, 50000, 50), 'escalation': (50, 25000, 25),
+}
+
+# Day-partitioned tables for history slices (chunk table -> {table: date column | (key, parent table)})
+SLICE_PARTITIONS = {
+    'service_tickets': {'service_tickets': 'created_at',
+                        'ticket_comments': ('ticket_id', 'service_tickets'),
+                        'ticket_attachments': ('ticket_id', 'service_tickets'),
+                        'ticket_escalations': ('ticket_id', 'service_tickets')},
+}
 
 class ServiceDataGenerator:
-    def __init__(self, master_data_file=None, crm_data_file=None):
-        """Initialize with master, CRM data, and registry"""
+    def __init__(self, master_data_file=None, crm_data_file=None, output_file=None):
+        """Initialize with master, CRM data, and registry (output_file: JSON data file / shard manifest to write)"""
         from pathlib import Path
         
         if master_data_file is None:
@@ -35,12 +53,10 @@ class ServiceDataGenerator:
         if crm_data_file is None:
             crm_data_file = Path(__file__).parent.parent / "07 - CRM" / "genims_crm_data.json"
         
-        with open(master_data_file, 'r') as f:
-            self.master_data = json.load(f)
+        self.master_data = load_dataset(master_data_file)
         
         try:
-            with open(crm_data_file, 'r') as f:
-                self.crm_data = json.load(f)
+            self.crm_data = load_dataset(crm_data_file)
         except:
             self.crm_data = {'accounts': [], 'contacts': []}
         
@@ -101,7 +117,15 @@ class ServiceDataGenerator:
         self.batch_size = 150000  # Large batch for high performance
         self.time_coord = TimeCoordinator()
         
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.worker_count)
+        
+        # GENERATOR_OUTPUT=ndjson|tsv: ticket comments, attachments and escalations stream to shards chunk by chunk;
+        # tickets stay in memory (warranty claims and field appointments reference them)
+        self.output = TableSink(output_file, stream=not self.chunks.window)
+        
         print(f"🚀 ULTRA-FAST SERVICE PARALLEL MODE: {self.worker_count} workers, batch_size={self.batch_size:,}")
+        print(f"   Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
         print(f"   CPU cores available: {cpu_count()}, Using {self.worker_count} for generation")
         
     def generate_id(self, prefix: str, counter_key: str) -> str:
@@ -469,40 +493,31 @@ class ServiceDataGenerator:
         start_time = datetime.now()
         
         # Prepare shared data for all workers
-        start_date = datetime.now() - timedelta(days=DAYS_OF_HISTORY)
+        start_date = as_of() - timedelta(days=DAYS_OF_HISTORY)
         valid_customer_ids = list(self.helper.get_valid_customer_ids())
         valid_employee_ids = list(self.helper.get_valid_employee_ids())
         
-        # Calculate days per chunk for parallel processing
-        chunk_size = max(1, DAYS_OF_HISTORY // self.worker_count)
-        chunks = []
-        
-        for i in range(0, DAYS_OF_HISTORY, chunk_size):
-            end_day = min(i + chunk_size, DAYS_OF_HISTORY)
-            chunks.append((i, end_day))
+        # Fixed-size day chunks for parallel processing (independent of the worker count)
+        chunk_size = chunk_days()
+        day_chunks = spans(DAYS_OF_HISTORY, chunk_size)
+        chunks = [(i, i + count) for i, count in day_chunks]
         
         print(f"  🚀 Processing {len(chunks)} day chunks with {self.worker_count} workers...")
         
-        # Thread-safe data collectors
-        all_tickets = []
-        all_comments = []
-        all_attachments = []
-        all_escalations = []
         
-        def process_service_chunk(chunk_info):
+        def process_service_chunk(start_day, end_day):
             """Process a chunk of days for service operations"""
-            start_day, end_day = chunk_info
             chunk_tickets = []
             chunk_comments = []
             chunk_attachments = []
             chunk_escalations = []
             
-            # Local counters to avoid ID collision - use chunk index * large multiplier
-            chunk_index = start_day // chunk_size
-            local_ticket_counter = chunk_index * 100000 + start_day * 300 + 1000
-            local_comment_counter = chunk_index * 100000 + start_day * 150 + 500
-            local_attach_counter = chunk_index * 50000 + start_day * 50 + 100
-            local_esc_counter = chunk_index * 25000 + start_day * 25 + 50
+            # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+            ids = self.chunk_ids
+            local_ticket_counter = ids['ticket']
+            local_comment_counter = ids['comment']
+            local_attach_counter = ids['attachment']
+            local_esc_counter = ids['escalation']
             
             for day_offset in range(start_day, end_day):
                 day_data = self._generate_service_day_data_local(
@@ -523,30 +538,34 @@ class ServiceDataGenerator:
                 local_attach_counter += len(day_data['attachments'])
                 local_esc_counter += len(day_data['escalations'])
             
-            # Thread-safe data collection
-            with self.data_lock:
-                all_tickets.extend(chunk_tickets)
-                all_comments.extend(chunk_comments)
-                all_attachments.extend(chunk_attachments)
-                all_escalations.extend(chunk_escalations)
+            # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+            ids.update(ticket=local_ticket_counter, comment=local_comment_counter,
+                       attachment=local_attach_counter, escalation=local_esc_counter)
+            return {'tickets': chunk_tickets, 'comments': chunk_comments,
+                    'attachments': chunk_attachments, 'escalations': chunk_escalations}
+        
+        # Execute parallel processing (results merged in chunk order); every chunk mints from its own
+        # reserved range per counter (block + its days' strides) and minting past it fails the run
+        self.chunk_ids = {key: first for key, (first, _, _) in SERVICE_CHUNK_IDS.items()}
+        id_ranges = {key: id_block(block) + chunk_size * id_stride(per_day)
+                     for key, (_, block, per_day) in SERVICE_CHUNK_IDS.items()}
+        for chunk_index, chunk_data in self.chunks.run(process_service_chunk, chunks, 'service_tickets',
+                                                       counters=self.chunk_ids, id_ranges=id_ranges,
+                                                       days=day_windows(start_date, day_chunks)):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            self.service_tickets.extend(chunk_data['tickets'])
+            self.output.emit('ticket_comments', chunk_data['comments'], self.ticket_comments)
+            self.output.emit('ticket_attachments', chunk_data['attachments'], self.ticket_attachments)
+            self.output.emit('ticket_escalations', chunk_data['escalations'], self.ticket_escalations)
             
-            print(f"    ✓ Service chunk {start_day+1}-{end_day}/{DAYS_OF_HISTORY} completed ({len(chunk_tickets)} tickets)")
-            return len(chunk_tickets)
-        
-        # Execute parallel processing
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            futures = [executor.submit(process_service_chunk, chunk) for chunk in chunks]
-            total_records = sum(future.result() for future in futures)
-        
-        # Assign to class attributes
-        self.service_tickets = all_tickets
-        self.ticket_comments = all_comments
-        self.ticket_attachments = all_attachments
-        self.ticket_escalations = all_escalations
+            start_day, end_day = chunks[chunk_index]
+            print(f"    ✓ Service chunk {start_day+1}-{end_day}/{DAYS_OF_HISTORY} completed ({len(chunk_data['tickets'])} tickets)")
         
         elapsed = (datetime.now() - start_time).total_seconds()
-        print(f"✓ Generated {len(self.service_tickets)} service tickets, {len(self.ticket_comments)} comments, "
-              f"{len(self.ticket_attachments)} attachments, {len(self.ticket_escalations)} escalations "
+        rows = self.output.rows
+        print(f"✓ Generated {len(self.service_tickets)} service tickets, {rows('ticket_comments', self.ticket_comments)} comments, "
+              f"{rows('ticket_attachments', self.ticket_attachments)} attachments, "
+              f"{rows('ticket_escalations', self.ticket_escalations)} escalations "
               f"via PARALLEL processing in {elapsed:.2f}s")
     
     def _generate_service_day_data_local(self, ticket_date: datetime, ticket_counter: int,
@@ -1282,7 +1301,9 @@ class ServiceDataGenerator:
         print(f"{'='*80}\n")
         
         print(f"Infrastructure: {len(self.service_teams)} teams, {len(self.service_agents)} agents, {len(self.field_technicians)} technicians")
-        print(f"Tickets: {len(self.service_tickets)} tickets, {len(self.ticket_comments)} comments, {len(self.ticket_escalations)} escalations")
+        rows = self.output.rows
+        print(f"Tickets: {len(self.service_tickets)} tickets, {rows('ticket_comments', self.ticket_comments)} comments, "
+              f"{rows('ticket_escalations', self.ticket_escalations)} escalations")
         print(f"Warranty: {len(self.warranty_registrations)} registrations, {len(self.warranty_claims)} claims")
         print(f"RMA: {len(self.rma_requests)} requests, {len(self.rma_line_items)} line items")
         print(f"Field Service: {len(self.field_appointments)} appointments, {len(self.service_parts_usage)} parts used")
@@ -1291,7 +1312,7 @@ class ServiceDataGenerator:
         print(f"Metrics: {len(self.service_metrics_daily)} daily metrics records")
     
     def to_json(self, output_file='service_data.json'):
-        """Export to JSON"""
+        """Export to JSON (or publish the streamed shards + manifest)"""
         print(f"\nExporting to JSON...")
         
         data = {
@@ -1339,6 +1360,15 @@ class ServiceDataGenerator:
             'service_metrics_daily': self.service_metrics_daily
         }
         
+        if self.chunks.window:
+            write_slice(output_file, data, SLICE_PARTITIONS, self.chunks.covered)
+            return
+        
+        shard_dir = self.output.close(data)
+        if shard_dir is not None:
+            print(f"Data exported to {shard_dir} (manifest: {output_file})")
+            return
+        
         with open(output_file, 'w') as f:
             json.dump(data, f, indent=2)
         
@@ -1349,10 +1379,12 @@ if __name__ == "__main__":
     from pathlib import Path
     
     script_dir = Path(__file__).parent
-    generator = ServiceDataGenerator()
+    json_file = script_dir / "genims_service_data.json"
+    
+    # Shard output streams to json_file's shards while generating
+    generator = ServiceDataGenerator(output_file=json_file)
     generator.generate_all_data()
     
-    json_file = script_dir / "genims_service_data.json"
     generator.to_json(str(json_file))
     
     print("\n" + "="*80)
@@ -24,6 +24,10 @@ try:
 except ImportError:
     POSTGRES_AVAILABLE = False
 
+# Scale factor (GENIMS_SCALE_FACTOR) for daily record targets
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled  # type: ignore
+
 # Configuration
 PG_HOST = os.getenv('POSTGRES_HOST', 'localhost')
 PG_PORT = int(os.getenv('POSTGRES_PORT', '5432'))
@@ -36,7 +40,7 @@ PG_SERVICE_DB = os.getenv('DB_SERVICE', 'genims_service_db')
 BATCH_SIZE = 5000
 # Aligned with historical generator: 200-400 tickets/day + comments + escalations + RMA
 # Daily service operations: ~300 tickets + ~600 comments + ~50 escalations + ~30 RMA = ~980 total
-TOTAL_RECORDS = 1000  # Daily service operations across 4 factories
+TOTAL_RECORDS = scaled(1000)  # Daily service operations across 4 factories
 
 # Logging
 log_dir = os.getenv('DAEMON_LOG_DIR', os.path.join(os.path.dirname(__file__), '..', '..', 'logs'))
@@ -10,24 +10,37 @@ from datetime import datetime, timedelta
 from typing import List, Dict
 import sys
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
 import threading
 from multiprocessing import cpu_count
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 from generator_helper import get_helper  # type: ignore
+from columnar_store import load_dataset
+from scale_factor import history_days
+from chunk_executor import ChunkExecutor, chunk_days, day_windows, id_stride, spans
+from history_slice import as_of, write_slice
+from table_writer import TableSink
 from time_coordinator import TimeCoordinator
 
 # Configuration
-DAYS_OF_HISTORY = 180
+DAYS_OF_HISTORY = history_days(180)
 EMPLOYEES_PER_FACTORY = 200   # Increased from 50 to 200 per factory (4x)
 TRAINING_COURSES_COUNT = 120  # Increased from 30 to 120 (4x training catalog)
 DEPARTMENTS_PER_FACTORY = 16  # Increased from 8 to 16 (2x departments)
 
+# HR day chunk ID ranges per counter: (first ID, per-day stride) at scale 1 (ChunkExecutor reserves them)
+HR_CHUNK_IDS = {'attendance': (10000, 1000), 'leave_request': (1000, 20), 'safety_incident': (100, 5)}
+
+# Day-partitioned tables for history slices (chunk table -> {table: date column})
+SLICE_PARTITIONS = {
+    'hr_operations': {'attendance_records': 'attendance_date', 'leave_requests': 'request_date',
+                      'safety_incidents': 'incident_date'},
+}
+
 class HCMDataGenerator:
-    def __init__(self, master_data_file=None):
-        """Initialize with master data and registry"""
+    def __init__(self, master_data_file=None, output_file=None):
+        """Initialize with master data and registry (output_file: JSON data file / shard manifest to write)"""
         from pathlib import Path
         
         if master_data_file is None:
@@ -35,8 +48,7 @@ class HCMDataGenerator:
         
         print(f"Loading master data from {master_data_file}...")
         
-        with open(master_data_file, 'r') as f:
-            self.master_data = json.load(f)
+        self.master_data = load_dataset(master_data_file)
         
         # Load helper for FK validation
         self.helper = get_helper()
@@ -89,7 +101,14 @@ class HCMDataGenerator:
         self.batch_size = 150000  # Large batch for high performance
         self.time_coord = TimeCoordinator()
         
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.worker_count)
+        
+        # GENERATOR_OUTPUT=ndjson|tsv: attendance, leave requests and safety incidents stream to shards chunk by chunk
+        self.output = TableSink(output_file, stream=not self.chunks.window)
+        
         print(f"🚀 ULTRA-FAST HCM PARALLEL MODE: {self.worker_count} workers, batch_size={self.batch_size:,}")
+        print(f"   Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
         print(f"   CPU cores available: {cpu_count()}, Using {self.worker_count} for generation")
         
         print(f"Loaded: {len(self.factories)} factories")
@@ -127,7 +146,7 @@ class HCMDataGenerator:
         self.generate_employee_onboarding()  # Generate and store onboarding records
         
         # Historical Operations (180 days) - PARALLEL PROCESSING
-        start_date = datetime.now() - timedelta(days=DAYS_OF_HISTORY)
+        start_date = as_of() - timedelta(days=DAYS_OF_HISTORY)
         self.generate_hr_operations_parallel(start_date, DAYS_OF_HISTORY)
         
         self._print_summary()
@@ -841,32 +860,23 @@ class HCMDataGenerator:
         print(f"\nGenerating {days} days of HR operations with PARALLEL processing...")
         start_time = datetime.now()
         
-        # Calculate days per chunk for parallel processing
-        chunk_size = max(1, days // self.worker_count)
-        chunks = []
-        
-        for i in range(0, days, chunk_size):
-            end_day = min(i + chunk_size, days)
-            chunks.append((i, end_day))
+        # Fixed-size day chunks for parallel processing (independent of the worker count)
+        day_chunks = spans(days, chunk_days())
+        chunks = [(i, i + count) for i, count in day_chunks]
         
         print(f"  🚀 Processing {len(chunks)} day chunks with {self.worker_count} workers...")
         
-        # Thread-safe data collectors
-        all_attendance = []
-        all_leave_requests = []
-        all_safety_incidents = []
-        
-        def process_hr_chunk(chunk_info):
+        def process_hr_chunk(start_day, end_day):
             """Process a chunk of days for HR operations"""
-            start_day, end_day = chunk_info
             chunk_attendance = []
             chunk_leave_requests = []
             chunk_safety_incidents = []
             
-            # Local counters to avoid ID collision
-            local_attend_counter = start_day * 1000 + 10000
-            local_leave_counter = start_day * 20 + 1000
-            local_incident_counter = start_day * 5 + 100
+            # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+            ids = self.chunk_ids
+            local_attend_counter = ids['attendance']
+            local_leave_counter = ids['leave_request']
+            local_incident_counter = ids['safety_incident']
             
             for day_offset in range(start_day, end_day):
                 current_date = start_date + timedelta(days=day_offset)
@@ -887,31 +897,35 @@ class HCMDataGenerator:
                     local_leave_counter += len(day_data['leave_requests'])
                     local_incident_counter += len(day_data['safety_incidents'])
             
-            # Thread-safe data collection
-            with self.data_lock:
-                all_attendance.extend(chunk_attendance)
-                all_leave_requests.extend(chunk_leave_requests)
-                all_safety_incidents.extend(chunk_safety_incidents)
+            # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+            ids.update(attendance=local_attend_counter, leave_request=local_leave_counter,
+                       safety_incident=local_incident_counter)
+            return {'attendance': chunk_attendance, 'leave_requests': chunk_leave_requests,
+                    'safety_incidents': chunk_safety_incidents}
+        
+        # Execute parallel processing (results merged in chunk order); every chunk mints from its own
+        # reserved range per counter (its days' strides) and minting past it fails the run
+        self.chunk_ids = {key: first for key, (first, _) in HR_CHUNK_IDS.items()}
+        id_ranges = {key: chunk_days() * id_stride(per_day) for key, (_, per_day) in HR_CHUNK_IDS.items()}
+        for chunk_index, chunk_data in self.chunks.run(process_hr_chunk, chunks, 'hr_operations',
+                                                       counters=self.chunk_ids, id_ranges=id_ranges,
+                                                       days=day_windows(start_date, day_chunks)):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            self.output.emit('attendance_records', chunk_data['attendance'], self.attendance_records)
+            self.output.emit('leave_requests', chunk_data['leave_requests'], self.leave_requests)
+            self.output.emit('safety_incidents', chunk_data['safety_incidents'], self.safety_incidents)
             
-            print(f"    ✓ HR chunk {start_day+1}-{end_day}/{days} completed ({len(chunk_attendance)} attendance)")
-            return len(chunk_attendance)
-        
-        # Execute parallel processing
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            futures = [executor.submit(process_hr_chunk, chunk) for chunk in chunks]
-            total_records = sum(future.result() for future in futures)
-        
-        # Assign to class attributes
-        self.attendance_records = all_attendance
-        self.leave_requests.extend(all_leave_requests)
-        self.safety_incidents.extend(all_safety_incidents)
+            start_day, end_day = chunks[chunk_index]
+            print(f"    ✓ HR chunk {start_day+1}-{end_day}/{days} completed ({len(chunk_data['attendance'])} attendance)")
         
         # Generate performance reviews (non-time based)
         self.generate_performance_reviews()
         
         elapsed = (datetime.now() - start_time).total_seconds()
-        print(f"✓ Generated {len(self.attendance_records)} attendance records, {len(all_leave_requests)} leave requests, "
-              f"{len(all_safety_incidents)} safety incidents via PARALLEL processing in {elapsed:.2f}s")
+        rows = self.output.rows
+        print(f"✓ Generated {rows('attendance_records', self.attendance_records)} attendance records, "
+              f"{rows('leave_requests', self.leave_requests)} leave requests, "
+              f"{rows('safety_incidents', self.safety_incidents)} safety incidents via PARALLEL processing in {elapsed:.2f}s")
     
     def _generate_hr_day_data_local(self, current_date: datetime, attend_counter: int,
                                    leave_counter: int, incident_counter: int) -> Dict:
@@ -1537,14 +1551,15 @@ class HCMDataGenerator:
         print(f"  Training Enrollments: {len(self.training_enrollments)}")
         print(f"  Certifications: {len(self.certifications)}")
         
+        rows = self.output.rows
         print(f"\nOperational Data:")
-        print(f"  Attendance Records: {len(self.attendance_records)}")
-        print(f"  Leave Requests: {len(self.leave_requests)}")
+        print(f"  Attendance Records: {rows('attendance_records', self.attendance_records)}")
+        print(f"  Leave Requests: {rows('leave_requests', self.leave_requests)}")
         print(f"  Performance Reviews: {len(self.performance_reviews)}")
-        print(f"  Safety Incidents: {len(self.safety_incidents)}")
+        print(f"  Safety Incidents: {rows('safety_incidents', self.safety_incidents)}")
     
     def to_json(self, output_file='hcm_historical_data.json'):
-        """Export to JSON with flat structure matching actual table names"""
+        """Export to JSON with flat structure matching actual table names (or publish the streamed shards + manifest)"""
         print(f"\nExporting to JSON...")
         
         # Generate data for missing/empty tables (those not populated in generate_all_data)
@@ -1614,6 +1629,15 @@ class HCMDataGenerator:
             'hcm_integration_log': hcm_integration_log
         }
         
+        if self.chunks.window:
+            write_slice(output_file, data, SLICE_PARTITIONS, self.chunks.covered)
+            return
+        
+        shard_dir = self.output.close(data)
+        if shard_dir is not None:
+            print(f"Data exported to {shard_dir} (manifest: {output_file})")
+            return
+        
         with open(output_file, 'w') as f:
             json.dump(data, f, indent=2)
         
@@ -1626,11 +1650,13 @@ if __name__ == "__main__":
     # Get the directory of this script (data folder)
     script_dir = Path(__file__).parent
     
-    generator = HCMDataGenerator()
-    generator.generate_all_data()
-    
     # Export to JSON (in same folder as script)
     json_file = script_dir / "genims_hcm_data.json"
+    
+    # Shard output streams to json_file's shards while generating
+    generator = HCMDataGenerator(output_file=json_file)
+    generator.generate_all_data()
+    
     generator.to_json(str(json_file))
     
     print("\n" + "="*80)
@@ -19,6 +19,7 @@ if os.path.exists(env_file):
 
 # Add scripts to path for helper access
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled  # type: ignore
 
 try:
     from data_registry import get_helper
@@ -45,7 +46,7 @@ PG_HR_DB = os.getenv('DB_HR', 'genims_hr_db')
 
 BATCH_SIZE = 5000
 # Daily HR operations: ~11,000 attendance + ~50 leave requests + ~20 reviews + ~30 incidents = ~11,100 total
-TOTAL_RECORDS = 11200  # Daily HR operations for 10,984 employees across 4 factories
+TOTAL_RECORDS = scaled(11200)  # Daily HR operations for 10,984 employees across 4 factories
 
 # Logging
 log_dir = os.getenv('DAEMON_LOG_DIR', os.path.join(os.path.dirname(__file__), '..', '..', 'logs'))
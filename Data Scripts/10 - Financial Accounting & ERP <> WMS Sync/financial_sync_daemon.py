@@ -16,6 +16,7 @@ from dotenv import load_dotenv
 
 # Add scripts to path for helper access
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled  # type: ignore
 
 env_file = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'config.env')
 if os.path.exists(env_file):
@@ -47,7 +48,7 @@ PG_FINANCIAL_DB = os.getenv('DB_FINANCIAL', 'genims_financial_db')
 
 BATCH_SIZE = 5000
 # Daily financial operations: ~800 journal entries + ~400 balances + ~200 inter-company + ~300 sync items = ~1700 total
-TOTAL_RECORDS = 1700  # Daily financial operations for enterprise manufacturing across 4 factories
+TOTAL_RECORDS = scaled(1700)  # Daily financial operations for enterprise manufacturing across 4 factories
 
 # Logging
 log_dir = os.getenv('DAEMON_LOG_DIR', os.path.join(os.path.dirname(__file__), '..', '..', 'logs'))
@@ -10,12 +10,15 @@ from datetime import datetime, timedelta
 from typing import List, Dict
 from pathlib import Path
 import sys
-from concurrent.futures import ThreadPoolExecutor
 import threading
 from multiprocessing import cpu_count
 
 # Add scripts to path for helper access
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
+from chunk_executor import ChunkExecutor, chunk_days, id_stride, spans
+from history_slice import as_of, write_slice
+from table_writer import TableSink, write_tables
+from scale_factor import history_days
 
 try:
     from generator_helper import get_helper
@@ -32,9 +35,38 @@ except ImportError:
         def get_current_time(self):
             return datetime.now()
 
+# Sync day chunk ID ranges per counter: (first ID, per-day stride) at scale 1 (ChunkExecutor reserves them);
+# strides cover a day's maximum (recon lines: 2 headers x 15 lines)
+SYNC_CHUNK_IDS = {
+    'cycle_count': (1000, 10), 'adjustment': (2000, 15), 'allocation': (500, 8), 'recon_header': (100, 5),
+    'recon_line': (3000, 30), 'sync_error': (1500, 12), 'sync_metric': (200, 6), 'sync_queue': (4000, 25),
+    'transaction_log': (5000, 30),
+}
+
+# Day-partitioned tables for history slices (chunk table -> {table: date column | (key, parent table)})
+SLICE_PARTITIONS = {
+    'inventory_sync': {'cycle_count_integration': 'integration_timestamp',
+                       'inventory_adjustments_sync': 'adjustment_date',
+                       'inventory_allocations': 'allocation_date',
+                       'inventory_reconciliation_headers': 'reconciliation_date',
+                       'inventory_reconciliation_lines': ('reconciliation_id', 'inventory_reconciliation_headers'),
+                       'inventory_sync_errors': 'occurred_at',
+                       'inventory_sync_metrics': 'metric_date',
+                       'inventory_sync_queue': 'queued_at',
+                       'inventory_transaction_log': 'transaction_date'},
+}
+
+# Inventory sync table <- process_sync_chunk result key
+SYNC_CHUNK_TABLES = {'cycle_count_integration': 'cycle_counts', 'inventory_adjustments_sync': 'adjustments',
+                     'inventory_allocations': 'allocations', 'inventory_reconciliation_headers': 'recon_headers',
+                     'inventory_reconciliation_lines': 'recon_lines', 'inventory_sync_errors': 'sync_errors',
+                     'inventory_sync_metrics': 'sync_metrics', 'inventory_sync_queue': 'sync_queue',
+                     'inventory_transaction_log': 'transaction_logs'}
+
 class FinancialSyncDataGenerator:
-    def __init__(self):
-        """Initialize data generator with registry helper"""
+    def __init__(self, inventory_sync_file=None):
+        """Initialize data generator with registry helper (inventory_sync_file: inventory sync JSON data file /
+        shard manifest to write)"""
         print("Initializing Financial & Sync Data Generator...")
         
         # Load registry helper for FK validation
@@ -94,7 +126,14 @@ class FinancialSyncDataGenerator:
         self.batch_size = 150000  # Large batch for high performance
         self.time_coord = TimeCoordinator()
         
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.worker_count)
+        
+        # GENERATOR_OUTPUT=ndjson|tsv: the day-chunked inventory sync tables stream to shards chunk by chunk
+        self.inventory_output = TableSink(inventory_sync_file, stream=not self.chunks.window)
+        
         print(f"🚀 ULTRA-FAST FINANCIAL PARALLEL MODE: {self.worker_count} workers, batch_size={self.batch_size:,}")
+        print(f"   Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
         print(f"   CPU cores available: {cpu_count()}, Using {self.worker_count} for generation")
     
     def generate_id(self, prefix: str, counter_key: str) -> str:
@@ -931,30 +970,15 @@ class FinancialSyncDataGenerator:
         self.generate_inventory_snapshot()
         
         # Generate time-based sync operations in parallel
-        days_to_process = 30  # Last 30 days of sync operations
-        chunk_size = max(1, days_to_process // self.worker_count)
-        chunks = []
-        
-        for i in range(0, days_to_process, chunk_size):
-            end_day = min(i + chunk_size, days_to_process)
-            chunks.append((i, end_day))
+        days_to_process = history_days(30)  # Last 30 days of sync operations
+        day_chunks = spans(days_to_process, chunk_days())
+        chunks = [(i, i + count) for i, count in day_chunks]
+        end_date = as_of()  # Day offsets count back from here
         
         print(f"  🚀 Processing {len(chunks)} day chunks with {self.worker_count} workers...")
         
-        # Thread-safe data collectors
-        all_cycle_counts = []
-        all_adjustments = []
-        all_allocations = []
-        all_recon_headers = []
-        all_recon_lines = []
-        all_sync_errors = []
-        all_sync_metrics = []
-        all_sync_queue = []
-        all_transaction_logs = []
-        
-        def process_sync_chunk(chunk_info):
+        def process_sync_chunk(start_day, end_day):
             """Process a chunk of days for sync operations"""
-            start_day, end_day = chunk_info
             chunk_cycle_counts = []
             chunk_adjustments = []
             chunk_allocations = []
@@ -965,19 +989,20 @@ class FinancialSyncDataGenerator:
             chunk_sync_queue = []
             chunk_transaction_logs = []
             
-            # Local counters to avoid ID collision
-            local_cycle_counter = start_day * 10 + 1000
-            local_adj_counter = start_day * 15 + 2000
-            local_alloc_counter = start_day * 8 + 500
-            local_recon_header_counter = start_day * 5 + 100
-            local_recon_line_counter = start_day * 20 + 3000
-            local_error_counter = start_day * 12 + 1500
-            local_metric_counter = start_day * 6 + 200
-            local_queue_counter = start_day * 25 + 4000
-            local_txn_counter = start_day * 30 + 5000
+            # Local counters start at this chunk's reserved ranges (self.chunk_ids, set by ChunkExecutor)
+            ids = self.chunk_ids
+            local_cycle_counter = ids['cycle_count']
+            local_adj_counter = ids['adjustment']
+            local_alloc_counter = ids['allocation']
+            local_recon_header_counter = ids['recon_header']
+            local_recon_line_counter = ids['recon_line']
+            local_error_counter = ids['sync_error']
+            local_metric_counter = ids['sync_metric']
+            local_queue_counter = ids['sync_queue']
+            local_txn_counter = ids['transaction_log']
             
             for day_offset in range(start_day, end_day):
-                current_date = datetime.now() - timedelta(days=day_offset)
+                current_date = end_date - timedelta(days=day_offset)
                 
                 day_data = self._generate_sync_day_data_local(
                     current_date, local_cycle_counter, local_adj_counter,
@@ -1007,40 +1032,37 @@ class FinancialSyncDataGenerator:
                 local_queue_counter += len(day_data['sync_queue'])
                 local_txn_counter += len(day_data['transaction_logs'])
             
-            # Thread-safe data collection
-            with self.data_lock:
-                all_cycle_counts.extend(chunk_cycle_counts)
-                all_adjustments.extend(chunk_adjustments)
-                all_allocations.extend(chunk_allocations)
-                all_recon_headers.extend(chunk_recon_headers)
-                all_recon_lines.extend(chunk_recon_lines)
-                all_sync_errors.extend(chunk_sync_errors)
-                all_sync_metrics.extend(chunk_sync_metrics)
-                all_sync_queue.extend(chunk_sync_queue)
-                all_transaction_logs.extend(chunk_transaction_logs)
+            # Hand the counters back: ChunkExecutor checks them against the reserved ranges
+            ids.update(cycle_count=local_cycle_counter, adjustment=local_adj_counter, allocation=local_alloc_counter,
+                       recon_header=local_recon_header_counter, recon_line=local_recon_line_counter,
+                       sync_error=local_error_counter, sync_metric=local_metric_counter,
+                       sync_queue=local_queue_counter, transaction_log=local_txn_counter)
+            return {'cycle_counts': chunk_cycle_counts, 'adjustments': chunk_adjustments,
+                    'allocations': chunk_allocations, 'recon_headers': chunk_recon_headers,
+                    'recon_lines': chunk_recon_lines, 'sync_errors': chunk_sync_errors,
+                    'sync_metrics': chunk_sync_metrics, 'sync_queue': chunk_sync_queue,
+                    'transaction_logs': chunk_transaction_logs}
+        
+        # Execute parallel processing (results merged in chunk order); every chunk mints from its own
+        # reserved range per counter (its days' strides) and minting past it fails the run
+        days = [(end_date - timedelta(days=start + count - 1), count) for start, count in day_chunks]
+        self.chunk_ids = {key: first for key, (first, _) in SYNC_CHUNK_IDS.items()}
+        id_ranges = {key: chunk_days() * id_stride(per_day) for key, (_, per_day) in SYNC_CHUNK_IDS.items()}
+        for chunk_index, chunk_data in self.chunks.run(process_sync_chunk, chunks, 'inventory_sync',
+                                                       counters=self.chunk_ids, id_ranges=id_ranges, days=days):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            for table, key in SYNC_CHUNK_TABLES.items():
+                self.inventory_output.emit(table, chunk_data[key], getattr(self, table))
             
-            print(f"    ✓ Sync chunk {start_day+1}-{end_day}/{days_to_process} completed ({len(chunk_transaction_logs)} transactions)")
-            return len(chunk_transaction_logs)
-        
-        # Execute parallel processing
-        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
-            futures = [executor.submit(process_sync_chunk, chunk) for chunk in chunks]
-            total_records = sum(future.result() for future in futures)
-        
-        # Assign to class attributes
-        self.cycle_count_integration = all_cycle_counts
-        self.inventory_adjustments_sync = all_adjustments
-        self.inventory_allocations = all_allocations
-        self.inventory_reconciliation_headers = all_recon_headers
-        self.inventory_reconciliation_lines = all_recon_lines
-        self.inventory_sync_errors = all_sync_errors
-        self.inventory_sync_metrics = all_sync_metrics
-        self.inventory_sync_queue = all_sync_queue
-        self.inventory_transaction_log = all_transaction_logs
+            start_day, end_day = chunks[chunk_index]
+            print(f"    ✓ Sync chunk {start_day+1}-{end_day}/{days_to_process} completed ({len(chunk_data['transaction_logs'])} transactions)")
         
         elapsed = (datetime.now() - start_time).total_seconds()
-        print(f"✓ Generated {len(all_transaction_logs)} transaction logs, {len(all_cycle_counts)} cycle counts, "
-              f"{len(all_adjustments)} adjustments via PARALLEL processing in {elapsed:.2f}s")
+        rows = self.inventory_output.rows
+        print(f"✓ Generated {rows('inventory_transaction_log', self.inventory_transaction_log)} transaction logs, "
+              f"{rows('cycle_count_integration', self.cycle_count_integration)} cycle counts, "
+              f"{rows('inventory_adjustments_sync', self.inventory_adjustments_sync)} adjustments "
+              f"via PARALLEL processing in {elapsed:.2f}s")
     
     def _generate_sync_day_data_local(self, current_date: datetime, cycle_counter: int,
                                      adj_counter: int, alloc_counter: int, recon_header_counter: int,
@@ -1255,23 +1277,32 @@ class FinancialSyncDataGenerator:
         print(f"  GL Audit Trail: {len(self.gl_audit_trail)}")
         print(f"  Period Close Tasks: {len(self.period_close_tasks)}")
         
+        rows = self.inventory_output.rows
         print(f"\nInventory Sync:")
         print(f"  Sync Mappings: {len(self.sync_mappings)}")
         print(f"  Inventory Snapshots: {len(self.inventory_snapshot)}")
-        print(f"  Cycle Count Integration: {len(self.cycle_count_integration)}")
-        print(f"  Adjustment Sync: {len(self.inventory_adjustments_sync)}")
-        print(f"  Inventory Allocations: {len(self.inventory_allocations)}")
-        print(f"  Reconciliation Headers: {len(self.inventory_reconciliation_headers)}")
-        print(f"  Reconciliation Lines: {len(self.inventory_reconciliation_lines)}")
-        print(f"  Sync Errors: {len(self.inventory_sync_errors)}")
-        print(f"  Sync Metrics: {len(self.inventory_sync_metrics)}")
-        print(f"  Sync Queue: {len(self.inventory_sync_queue)}")
-        print(f"  Transaction Log: {len(self.inventory_transaction_log)}")    
+        print(f"  Cycle Count Integration: {rows('cycle_count_integration', self.cycle_count_integration)}")
+        print(f"  Adjustment Sync: {rows('inventory_adjustments_sync', self.inventory_adjustments_sync)}")
+        print(f"  Inventory Allocations: {rows('inventory_allocations', self.inventory_allocations)}")
+        print(f"  Reconciliation Headers: {rows('inventory_reconciliation_headers', self.inventory_reconciliation_headers)}")
+        print(f"  Reconciliation Lines: {rows('inventory_reconciliation_lines', self.inventory_reconciliation_lines)}")
+        print(f"  Sync Errors: {rows('inventory_sync_errors', self.inventory_sync_errors)}")
+        print(f"  Sync Metrics: {rows('inventory_sync_metrics', self.inventory_sync_metrics)}")
+        print(f"  Sync Queue: {rows('inventory_sync_queue', self.inventory_sync_queue)}")
+        print(f"  Transaction Log: {rows('inventory_transaction_log', self.inventory_transaction_log)}")    
     def to_json(self, output_file=None):
-        """Export to JSON - TWO separate files for TWO databases"""
+        """Export to JSON - TWO separate files for TWO databases (or shards + manifest per file; the inventory sync
+        tables were streamed while generating)"""
         if output_file is None:
             output_file = Path(__file__).parent / 'genims_financial_data.json'
         
+        if self.chunks.window:
+            # History slices only regenerate the day-chunked inventory sync tables
+            inventory_sync_data = {table: getattr(self, table) for table in SLICE_PARTITIONS['inventory_sync']}
+            write_slice(Path(__file__).parent / 'genims_inventory_sync_data.json', inventory_sync_data,
+                        SLICE_PARTITIONS, self.chunks.covered)
+            return
+        
         print(f"\nExporting financial data to separate JSON files...")
         
         # FILE 1: Financial data (for genims_financial_db)
@@ -1290,9 +1321,13 @@ class FinancialSyncDataGenerator:
         }
         
         financial_file = Path(__file__).parent / 'genims_financial_data.json'
-        with open(financial_file, 'w') as f:
-            json.dump(financial_data, f, indent=2)
-        print(f"✓ Financial data exported to {financial_file.name}")
+        shard_dir = write_tables(financial_file, financial_data)
+        if shard_dir is not None:
+            print(f"✓ Financial data exported to {shard_dir.name} (manifest: {financial_file.name})")
+        else:
+            with open(financial_file, 'w') as f:
+                json.dump(financial_data, f, indent=2)
+            print(f"✓ Financial data exported to {financial_file.name}")
         
         # FILE 2: Inventory sync data (for genims_erp_wms_sync_db)
         inventory_sync_data = {
@@ -1310,13 +1345,18 @@ class FinancialSyncDataGenerator:
         }
         
         inventory_file = Path(__file__).parent / 'genims_inventory_sync_data.json'
+        shard_dir = self.inventory_output.close(inventory_sync_data)
+        if shard_dir is not None:
+            print(f"✓ Inventory sync data exported to {shard_dir.name} (manifest: {inventory_file.name})")
+            return
         with open(inventory_file, 'w') as f:
             json.dump(inventory_sync_data, f, indent=2)
         print(f"✓ Inventory sync data exported to {inventory_file.name}")
 
 
 if __name__ == "__main__":
-    generator = FinancialSyncDataGenerator()
+    # Shard output streams to the inventory sync file's shards while generating
+    generator = FinancialSyncDataGenerator(inventory_sync_file=Path(__file__).parent / 'genims_inventory_sync_data.json')
     generator.generate_all_data()
     generator.to_json()
     
@@ -13,7 +13,6 @@ from pathlib import Path
 from decimal import Decimal
 import time
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import multiprocessing
 import math
@@ -21,6 +20,11 @@ import math
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 from generator_helper import get_helper
+from columnar_store import load_dataset
+from scale_factor import history_days, scaled
+from chunk_executor import ChunkExecutor, chunk_days, id_stride, spans
+from history_slice import write_slice
+from table_writer import TableSink
 from data_registry import get_registry
 from time_coordinator import TimeCoordinator as SharedTimeCoordinator
 
@@ -28,6 +32,25 @@ from time_coordinator import TimeCoordinator as SharedTimeCoordinator
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# IDs one portal day may mint per counter (scale 1; ChunkExecutor reserves each day chunk's ranges from 1000)
+PORTAL_DAY_IDS = {
+    'rfq': 10, 'rfq_line': 50, 'rfq_supplier': 50, 'rfq_response': 20, 'response_line': 100, 'contract': 5,
+    'pricing': 30, 'metric': 15, 'scorecard': 15, 'invoice': 8, 'inv_line': 40, 'match': 8, 'qual': 2, 'doc': 8,
+    'audit': 2, 'user': 3, 'req': 12, 'req_line': 60, 'finding': 5, 'comparison': 3, 'history': 5,
+}
+
+# Day-partitioned tables for history slices (chunk table -> {table: date column | (key, parent table)})
+SLICE_PARTITIONS = {
+    'supplier_portal_operations': {'purchase_requisitions': 'requisition_date',
+                                   'purchase_requisition_lines': ('requisition_id', 'purchase_requisitions'),
+                                   'rfq_headers': 'rfq_date',
+                                   'rfq_lines': ('rfq_id', 'rfq_headers'),
+                                   'rfq_suppliers': ('rfq_id', 'rfq_headers'),
+                                   'rfq_responses': ('rfq_id', 'rfq_headers'),
+                                   'supplier_contracts': 'start_date',
+                                   'contract_pricing': ('contract_id', 'supplier_contracts')},
+}
+
 class TimeCoordinator:
     """Enterprise Time Coordinator with parallel processing support"""
     def __init__(self):
@@ -69,8 +92,9 @@ class TimeCoordinator:
         logger.debug(f"Time coordination for {operation_name}")
 
 class SupplierPortalDataGenerator:
-    def __init__(self, master_data_file=None, erp_data_file=None):
-        """Initialize data generator with TimeCoordinator and registry"""
+    def __init__(self, master_data_file=None, erp_data_file=None, output_file=None):
+        """Initialize data generator with TimeCoordinator and registry (output_file: JSON data file / shard manifest
+        to write)"""
         from pathlib import Path
         
         # Initialize TimeCoordinator for current-date enforcement
@@ -86,12 +110,10 @@ class SupplierPortalDataGenerator:
         logger.info(f"Loading master data from {master_data_file}...")
         logger.info(f"Loading ERP data from {erp_data_file}...")
         
-        with open(master_data_file, 'r') as f:
-            master_data = json.load(f)
+        master_data = load_dataset(master_data_file)
         
         try:
-            with open(erp_data_file, 'r') as f:
-                erp_data = json.load(f)
+            erp_data = load_dataset(erp_data_file)
         except FileNotFoundError:
             logger.warning(f"ERP data not found, using minimal data")
             erp_data = {'materials': [], 'suppliers': [], 'purchase_orders': []}
@@ -160,7 +182,13 @@ class SupplierPortalDataGenerator:
         # Parallel processing configuration
         self.max_workers = min(8, multiprocessing.cpu_count() - 2)
         self.data_lock = threading.Lock()
+        # Process-pool chunks, seeded per (run seed, table, chunk) - same output for any worker count
+        self.chunks = ChunkExecutor(self.max_workers)
+        # GENERATOR_OUTPUT=ndjson|tsv: requisitions, RFQ headers/invitations and contract pricing stream to shards
+        # chunk by chunk; the tables the supplementary pass reads or extends stay in memory
+        self.output = TableSink(output_file, stream=not self.chunks.window)
         logger.info(f"Parallel processing configured with {self.max_workers} workers")
+        logger.info(f"Chunk executor: {self.chunks.mode}, seed={self.chunks.seed}")
     
     def validate_rfq_response_compliance(self, response_data):
         """Validate RFQ response compliance"""
@@ -288,21 +316,14 @@ class SupplierPortalDataGenerator:
         
         start_time = time.time()
         
-        # Execute all data generation operations in parallel
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all data generation tasks
-            futures = {
-                executor.submit(self.generate_supplier_portal_operations_parallel): "supplier_portal_operations"
-            }
-            
-            # Process completed futures
-            for future in as_completed(futures):
-                operation = futures[future]
-                try:
-                    result = future.result()
-                    logger.info(f"✓ Completed {operation}: {result}")
-                except Exception as e:
-                    logger.error(f"✗ Failed {operation}: {e}")
+        # Chunks fan out to worker processes inside; run from the main thread (no fork from a pool thread)
+        operation = "supplier_portal_operations"
+        try:
+            result = self.generate_supplier_portal_operations_parallel()
+            logger.info(f"✓ Completed {operation}: {result}")
+        except Exception as e:
+            logger.error(f"✗ Failed {operation}: {e}")
+            raise
         
         elapsed = time.time() - start_time
         logger.info(f"\n🚀 Ultra-fast parallel processing completed in {elapsed:.3f} seconds")
@@ -313,25 +334,15 @@ class SupplierPortalDataGenerator:
         logger.info("Starting parallel supplier portal data generation...")
         
         # Calculate day-based chunks for parallel processing
-        total_days = 90  # 3 months of historical data
-        chunk_size = max(1, total_days // self.max_workers)
-        day_chunks = [
-            (day_start, min(day_start + chunk_size - 1, total_days - 1))
-            for day_start in range(0, total_days, chunk_size)
-        ]
+        total_days = history_days(90)  # 3 months of historical data
+        day_chunks = [(day_start, day_start + count - 1) for day_start, count in spans(total_days, chunk_days())]
         
         logger.info(f"Processing {total_days} days across {len(day_chunks)} chunks with {self.max_workers} workers")
         
-        # Thread-safe data collectors
-        all_purchase_requisitions = []
-        all_req_lines = []
-        all_rfq_headers = []
         all_rfq_lines = []
-        all_rfq_suppliers = []
         all_rfq_responses = []
         all_rfq_response_lines = []
         all_supplier_contracts = []
-        all_contract_pricing = []
         all_performance_metrics = []
         all_scorecards = []
         all_supplier_invoices = []
@@ -342,10 +353,8 @@ class SupplierPortalDataGenerator:
         all_supplier_audits = []
         all_portal_users = []
         
-        def process_chunk(chunk_info):
+        def process_chunk(day_start, day_end):
             """Process a chunk of days for supplier portal operations"""
-            day_start, day_end = chunk_info
-            chunk_id = f"{day_start}-{day_end}"
             
             # Local data for this chunk
             local_data = {
@@ -359,19 +368,8 @@ class SupplierPortalDataGenerator:
                 'portal_users': []
             }
             
-            # Local counters for thread safety
-            local_counters = {
-                'rfq': 1000 + day_start * 10, 'rfq_line': 1000 + day_start * 50,
-                'rfq_supplier': 1000 + day_start * 50, 'rfq_response': 1000 + day_start * 20, 'response_line': 1000 + day_start * 100,
-                'contract': 1000 + day_start * 5, 'pricing': 1000 + day_start * 30,
-                'metric': 1000 + day_start * 15, 'scorecard': 1000 + day_start * 15,
-                'invoice': 1000 + day_start * 8, 'inv_line': 1000 + day_start * 40,
-                'match': 1000 + day_start * 8, 'qual': 1000 + day_start * 2,
-                'doc': 1000 + day_start * 8, 'audit': 1000 + day_start * 2,
-                'user': 1000 + day_start * 3, 'req': 1000 + day_start * 12,
-                'req_line': 1000 + day_start * 60,
-                'finding': 1000 + day_start * 5, 'comparison': 1000 + day_start * 3, 'history': 1000 + day_start * 5
-            }
+            # Local counters are this chunk's reserved ranges (self.chunk_ids, set and checked by ChunkExecutor)
+            local_counters = self.chunk_ids
             
             # Helper methods for this chunk
             def local_generate_id(prefix: str, counter_key: str) -> str:
@@ -405,7 +403,7 @@ class SupplierPortalDataGenerator:
             
             # Process each day in this chunk
             records_per_day = {
-                'requisitions': 7, 'rfqs': 3, 'contracts': 1, 'metrics': 5,
+                'requisitions': scaled(7), 'rfqs': scaled(3), 'contracts': 1, 'metrics': 5,
                 'invoices': 2, 'qualifications': 0.3, 'portal_users': 0.2
             }
             
@@ -566,51 +564,45 @@ class SupplierPortalDataGenerator:
                         }
                         local_data['contract_pricing'].append(pricing)
             
-            # Collect thread-safe data
-            with self.data_lock:
-                all_purchase_requisitions.extend(local_data['purchase_requisitions'])
-                all_req_lines.extend(local_data['req_lines'])
-                all_rfq_headers.extend(local_data['rfq_headers'])
-                all_rfq_lines.extend(local_data['rfq_lines'])
-                all_rfq_suppliers.extend(local_data['rfq_suppliers'])
-                all_rfq_responses.extend(local_data['rfq_responses'])
-                all_rfq_response_lines.extend(local_data['rfq_response_lines'])
-                all_supplier_contracts.extend(local_data['supplier_contracts'])
-                all_contract_pricing.extend(local_data['contract_pricing'])
-                all_performance_metrics.extend(local_data['performance_metrics'])
-                all_scorecards.extend(local_data['scorecards'])
-                all_supplier_invoices.extend(local_data['supplier_invoices'])
-                all_invoice_lines.extend(local_data['invoice_lines'])
-                all_three_way_matches.extend(local_data['three_way_matches'])
-                all_qualification_records.extend(local_data['qualification_records'])
-                all_supplier_documents.extend(local_data['supplier_documents'])
-                all_supplier_audits.extend(local_data['supplier_audits'])
-                all_portal_users.extend(local_data['portal_users'])
-            
-            return f"Chunk {chunk_id}: Generated {len(local_data['purchase_requisitions'])} requisitions, {len(local_data['rfq_headers'])} RFQs, {len(local_data['supplier_contracts'])} contracts"
+            return local_data
         
-        # Execute parallel processing
+        # Execute parallel processing (results merged in chunk order)
         start_time = time.time()
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {executor.submit(process_chunk, chunk): chunk for chunk in day_chunks}
+        anchor = self.time_coordinator.current_date  # Day offsets count back from here
+        days = [(anchor - timedelta(days=day_end), day_end - day_start + 1) for day_start, day_end in day_chunks]
+        # Every chunk mints from its own reserved range per counter; minting past it fails the run
+        self.chunk_ids = dict.fromkeys(PORTAL_DAY_IDS, 1000)
+        id_ranges = {key: chunk_days() * id_stride(per_day) for key, per_day in PORTAL_DAY_IDS.items()}
+        for index, local_data in self.chunks.run(process_chunk, day_chunks, 'supplier_portal_operations',
+                                                 counters=self.chunk_ids, id_ranges=id_ranges, days=days):
+            # Each chunk is written (or kept for the JSON dump) as soon as it is merged, in chunk order
+            self.output.emit('purchase_requisitions', local_data['purchase_requisitions'], self.purchase_requisitions)
+            self.output.emit('purchase_requisition_lines', local_data['req_lines'], self.req_lines)
+            self.output.emit('rfq_headers', local_data['rfq_headers'], self.rfq_headers)
+            self.output.emit('rfq_suppliers', local_data['rfq_suppliers'], self.rfq_suppliers)
+            self.output.emit('contract_pricing', local_data['contract_pricing'], self.contract_pricing)
+            all_rfq_lines.extend(local_data['rfq_lines'])
+            all_rfq_responses.extend(local_data['rfq_responses'])
+            all_rfq_response_lines.extend(local_data['rfq_response_lines'])
+            all_supplier_contracts.extend(local_data['supplier_contracts'])
+            all_performance_metrics.extend(local_data['performance_metrics'])
+            all_scorecards.extend(local_data['scorecards'])
+            all_supplier_invoices.extend(local_data['supplier_invoices'])
+            all_invoice_lines.extend(local_data['invoice_lines'])
+            all_three_way_matches.extend(local_data['three_way_matches'])
+            all_qualification_records.extend(local_data['qualification_records'])
+            all_supplier_documents.extend(local_data['supplier_documents'])
+            all_supplier_audits.extend(local_data['supplier_audits'])
+            all_portal_users.extend(local_data['portal_users'])
             
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    logger.info(f"  ✓ {result}")
-                except Exception as e:
-                    logger.error(f"  ✗ Chunk failed: {e}")
+            day_start, day_end = day_chunks[index]
+            logger.info(f"  ✓ Chunk {day_start}-{day_end}: Generated {len(local_data['purchase_requisitions'])} requisitions, {len(local_data['rfq_headers'])} RFQs, {len(local_data['supplier_contracts'])} contracts")
         
         # Assign collected data to instance variables
-        self.purchase_requisitions = all_purchase_requisitions
-        self.req_lines = all_req_lines
-        self.rfq_headers = all_rfq_headers
         self.rfq_lines = all_rfq_lines
-        self.rfq_suppliers = all_rfq_suppliers
         self.rfq_responses = all_rfq_responses
         self.rfq_response_lines = all_rfq_response_lines
         self.supplier_contracts = all_supplier_contracts
-        self.contract_pricing = all_contract_pricing
         self.performance_metrics = all_performance_metrics
         self.scorecards = all_scorecards
         self.supplier_invoices = all_supplier_invoices
@@ -625,9 +617,11 @@ class SupplierPortalDataGenerator:
         self._generate_additional_supplier_data()
         
         elapsed = time.time() - start_time
-        total_records = (len(self.purchase_requisitions) + len(self.req_lines) + 
-                        len(self.rfq_headers) + len(self.rfq_lines) +
-                        len(self.supplier_contracts) + len(self.contract_pricing))
+        rows = self.output.rows
+        total_records = (rows('purchase_requisitions', self.purchase_requisitions) +
+                        rows('purchase_requisition_lines', self.req_lines) +
+                        rows('rfq_headers', self.rfq_headers) + len(self.rfq_lines) +
+                        len(self.supplier_contracts) + rows('contract_pricing', self.contract_pricing))
         
         return f"Generated {total_records:,} supplier portal records in {elapsed:.3f}s"
     
@@ -1507,20 +1501,21 @@ class SupplierPortalDataGenerator:
         logger.info(f"\n{'='*80}")
         logger.info(f"Supplier Portal Data Generation Complete!")
         logger.info(f"{'='*80}")
+        rows = self.output.rows
         logger.info(f"\nPurchase Requisitions:")
-        logger.info(f"  Requisitions: {len(self.purchase_requisitions)}")
-        logger.info(f"  Requisition Lines: {len(self.req_lines)}")
+        logger.info(f"  Requisitions: {rows('purchase_requisitions', self.purchase_requisitions)}")
+        logger.info(f"  Requisition Lines: {rows('purchase_requisition_lines', self.req_lines)}")
         
         logger.info(f"\nRFQ Management:")
-        logger.info(f"  RFQs: {len(self.rfq_headers)}")
+        logger.info(f"  RFQs: {rows('rfq_headers', self.rfq_headers)}")
         logger.info(f"  RFQ Lines: {len(self.rfq_lines)}")
-        logger.info(f"  Supplier Invitations: {len(self.rfq_suppliers)}")
+        logger.info(f"  Supplier Invitations: {rows('rfq_suppliers', self.rfq_suppliers)}")
         logger.info(f"  Responses: {len(self.rfq_responses)}")
         logger.info(f"  Response Lines: {len(self.rfq_response_lines)}")
         
         logger.info(f"\nContracts & Pricing:")
         logger.info(f"  Supplier Contracts: {len(self.supplier_contracts)}")
-        logger.info(f"  Contract Pricing: {len(self.contract_pricing)}")
+        logger.info(f"  Contract Pricing: {rows('contract_pricing', self.contract_pricing)}")
         
         logger.info(f"\nPerformance Management:")
         logger.info(f"  Performance Metrics: {len(self.performance_metrics)}")
@@ -1540,7 +1535,7 @@ class SupplierPortalDataGenerator:
         logger.info(f"  Portal Users: {len(self.portal_users)}")
     
     def to_json(self, output_file='supplier_portal_data.json'):
-        """Export to JSON with flat structure matching actual table names"""
+        """Export to JSON with flat structure matching actual table names (or publish the streamed shards + manifest)"""
         logger.info(f"\nExporting to JSON...")
         
         # Generate missing tables
@@ -1596,6 +1591,15 @@ class SupplierPortalDataGenerator:
             'supplier_portal_integration_log': supplier_portal_integration_log
         }
         
+        if self.chunks.window:
+            write_slice(output_file, data, SLICE_PARTITIONS, self.chunks.covered)
+            return
+        
+        shard_dir = self.output.close(data)
+        if shard_dir is not None:
+            logger.info(f"Data exported to {shard_dir} (manifest: {output_file})")
+            return
+        
         with open(output_file, 'w') as f:
             json.dump(data, f, indent=2)
         
@@ -1750,11 +1754,13 @@ if __name__ == "__main__":
     logger.info(f"GenIMS Supplier Portal Data Generator - Enterprise Edition")
     logger.info(f"{'='*80}")
     
-    generator = SupplierPortalDataGenerator()
-    generator.generate_all_data()
-    
     # Export to JSON (in same folder as script)
     json_file = script_dir / "genims_supplier_portal_data.json"
+    
+    # Shard output streams to json_file's shards while generating
+    generator = SupplierPortalDataGenerator(output_file=json_file)
+    generator.generate_all_data()
+    
     generator.to_json(str(json_file))
     
     end_time = time.time()
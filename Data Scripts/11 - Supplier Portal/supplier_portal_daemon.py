@@ -27,6 +27,7 @@ except ImportError:
 
 # Import registry helper
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+from scale_factor import scaled  # type: ignore
 HELPER_AVAILABLE = True
 try:
     from generator_helper import get_helper
@@ -70,7 +71,7 @@ PG_SUPPLIER_DB = os.getenv('DB_SUPPLIER', 'genims_supplier_db')
 
 BATCH_SIZE = 5000
 # Daily supplier portal operations: ~120 requisitions + ~80 RFQs + ~150 invoices + ~250 other activities = ~600 total
-TOTAL_RECORDS = 600  # Daily supplier portal operations for enterprise procurement across 4 factories
+TOTAL_RECORDS = scaled(600)  # Daily supplier portal operations for enterprise procurement across 4 factories
 
 # Logging
 log_dir = os.getenv('DAEMON_LOG_DIR', os.path.join(os.path.dirname(__file__), '..', '..', 'logs'))
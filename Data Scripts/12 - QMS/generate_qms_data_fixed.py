@@ -11,14 +11,18 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import uuid
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import multiprocessing
 import math
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
+from chunk_executor import chunk_seed, run_seed
 from generator_helper import get_helper
+from columnar_store import load_dataset, select_columns
+from history_slice import as_of
+from scale_factor import history_days
+from table_writer import write_tables
 from time_coordinator import TimeCoordinator as SharedTimeCoordinator
 
 
@@ -30,8 +34,8 @@ class TimeCoordinator:
             self.shared_coordinator = SharedTimeCoordinator()
             self.base_time = self.shared_coordinator.get_current_time()
         except Exception:
-            # Fallback to local implementation
-            current_time = datetime.now()
+            # Fallback to local implementation (GENERATOR_AS_OF when pinned)
+            current_time = as_of()
             self.base_time = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
             self.shared_coordinator = None
         
@@ -60,14 +64,17 @@ class TimeCoordinator:
 # Load master data for references
 try:
     master_data_file = Path(__file__).parent.parent / "01 - Base Data" / "genims_master_data.json"
-    with open(master_data_file, 'r') as f:
-        master_data = json.load(f)
+    master_data = load_dataset(master_data_file)
 except:
     print("Warning: Could not load master data")
     master_data = {'products': [], 'factories': [], 'employees': [], 'suppliers': []}
 
 class QMSDataGenerator:
     def __init__(self):
+        # One seeded stream for the whole (unchunked) run, so GENERATOR_SEED reproduces it
+        self.seed = chunk_seed(run_seed(), 'qms', 0)
+        random.seed(self.seed)
+        
         # Load helper for FK validation
         self.helper = get_helper()
         self.registry = self.helper.registry
@@ -75,6 +82,7 @@ class QMSDataGenerator:
         # Initialize TimeCoordinator for consistent enterprise time
         self.time_coordinator = TimeCoordinator()
         self.enterprise_date = self.time_coordinator.get_current_date()
+        self.enterprise_time = self.time_coordinator.get_current_time()
         
         self.products = master_data.get('products', [])
         self.factories = master_data.get('factories', [])
@@ -89,12 +97,13 @@ class QMSDataGenerator:
         try:
             erp_file = Path(__file__).parent.parent / "04 - ERP & MES Integration" / "genims_erp_data.json"
             if erp_file.exists():
-                with open(erp_file, 'r') as f:
-                    erp_data = json.load(f)
-                    self.purchase_orders = erp_data.get('purchase_orders', [])
-                    self.purchase_order_lines = erp_data.get('purchase_order_lines', [])
-                    self.sales_orders = erp_data.get('sales_orders', [])
-                    self.sales_order_lines = erp_data.get('sales_order_lines', [])
+                erp_data = load_dataset(erp_file)
+                # Only the columns that link NCRs to orders are kept
+                self.purchase_orders = select_columns(erp_data, 'purchase_orders', ['purchase_order_id', 'supplier_id'])
+                self.purchase_order_lines = select_columns(erp_data, 'purchase_order_lines',
+                                                           ['purchase_order_id', 'material_id'])
+                self.sales_orders = select_columns(erp_data, 'sales_orders', ['sales_order_id', 'customer_id'])
+                self.sales_order_lines = select_columns(erp_data, 'sales_order_lines', ['sales_order_id', 'material_id'])
         except:
             pass
         
@@ -125,10 +134,11 @@ class QMSDataGenerator:
         # Parallel processing configuration
         self.max_workers = min(8, multiprocessing.cpu_count() - 2)
         self.data_lock = threading.Lock()
-        print(f"Parallel processing configured with {self.max_workers} workers")
+        print(f"Parallel processing configured with {self.max_workers} workers, seed={self.seed}")
     
-    def generate(self, days=90):
+    def generate(self, days=None):
         """Generate all QMS data"""
+        days = days or history_days(90)
         print("="*80)
         print("Generating QMS Data")
         print(f"Days: {days}")
@@ -175,9 +185,8 @@ class QMSDataGenerator:
         try:
             crm_file = Path(__file__).parent.parent / "07 - CRM" / "genims_crm_data.json"
             if crm_file.exists():
-                with open(crm_file, 'r') as f:
-                    crm_data = json.load(f)
-                    customers = crm_data.get('customers', [])
+                crm_data = load_dataset(crm_file)
+                customers = crm_data.get('customers', [])
         except:
             customers = []
         
@@ -286,12 +295,12 @@ class QMSDataGenerator:
                     'risk_level': random.choice(['low', 'medium', 'high']),
                     'corrective_action_required': random.choice([True, False]),
                     'responsible_person': random.choice([e.get('employee_id', 'EMP-000001') for e in self.employees] + ['EMP-000001']),
-                    'target_closure_date': (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d'),
+                    'target_closure_date': (self.enterprise_time + timedelta(days=30)).strftime('%Y-%m-%d'),
                     'finding_status': finding_status,
-                    'closure_date': (datetime.now() + timedelta(days=15+idx*5)).strftime('%Y-%m-%d') if is_closed else None,
+                    'closure_date': (self.enterprise_time + timedelta(days=15+idx*5)).strftime('%Y-%m-%d') if is_closed else None,
                     'closure_verified_by': random.choice([e.get('employee_id', 'EMP-000001') for e in self.employees if e.get('role') == 'manager'] + ['EMP-000001']) if is_closed else random.choice([e.get('employee_id', 'EMP-000001') for e in self.employees if e.get('role') == 'manager'] + ['EMP-000001']),
                     'closure_notes': f"Closure note for finding {idx+1}" if is_closed else f"In progress on finding {idx+1}",
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
                 }
                 self.data['audit_findings'].append(finding)
                 finding_counter += 1
@@ -453,7 +462,7 @@ class QMSDataGenerator:
                     'measurement_method': random.choice(['Caliper', 'Gauge', 'Visual']),
                     'measuring_equipment': f"Equipment-{random.randint(1, 20)}",
                     'defect_location': f"Location {random.randint(1, 10)}",
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
                 }
                 self.data['ncr_defect_details'].append(detail)
         
@@ -537,14 +546,14 @@ class QMSDataGenerator:
                     'action_sequence': seq,
                     'action_description': f"Corrective action {seq} for {capa['problem_description'][:50]}",
                     'assigned_to': random.choice([e.get('employee_id', 'EMP-000001') for e in self.employees] + ['EMP-000001']),
-                    'target_completion_date': (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d'),
-                    'due_date': (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d'),
-                    'actual_completion_date': (datetime.now() + timedelta(days=15+seq*5)).strftime('%Y-%m-%d') if is_completed else None,
+                    'target_completion_date': (self.enterprise_time + timedelta(days=30)).strftime('%Y-%m-%d'),
+                    'due_date': (self.enterprise_time + timedelta(days=30)).strftime('%Y-%m-%d'),
+                    'actual_completion_date': (self.enterprise_time + timedelta(days=15+seq*5)).strftime('%Y-%m-%d') if is_completed else None,
                     'action_status': 'completed' if is_completed else random.choice(['assigned', 'in_progress']),
-                    'effectiveness_check_date': (datetime.now() + timedelta(days=25+seq*5)).strftime('%Y-%m-%d') if is_completed else None,
+                    'effectiveness_check_date': (self.enterprise_time + timedelta(days=25+seq*5)).strftime('%Y-%m-%d') if is_completed else None,
                     'is_effective': random.choice([True, False]) if is_completed else None,
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'updated_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
                 }
                 self.data['capa_actions'].append(action)
                 action_counter += 1
@@ -568,12 +577,12 @@ class QMSDataGenerator:
                 'control_plan_type': 'SPC',
                 'prepared_by': 'QA-001',
                 'approved_by': 'QM-001',
-                'approval_date': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
-                'effective_date': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
-                'revision_date': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
+                'approval_date': (self.enterprise_time - timedelta(days=30)).strftime('%Y-%m-%d'),
+                'effective_date': (self.enterprise_time - timedelta(days=30)).strftime('%Y-%m-%d'),
+                'revision_date': (self.enterprise_time - timedelta(days=30)).strftime('%Y-%m-%d'),
                 'document_url': f'https://docs.company.com/cp-{i+1:06d}.pdf',
-                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'updated_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
             }
             self.data['control_plans'].append(plan)
         
@@ -604,7 +613,7 @@ class QMSDataGenerator:
                     'control_limits_lower': round(random.uniform(42, 62), 2),
                     'control_limits_upper': round(random.uniform(78, 98), 2),
                     'reaction_plan': 'Investigate',
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
                 }
                 self.data['control_plan_characteristics'].append(char)
                 char_counter += 1
@@ -668,10 +677,10 @@ class QMSDataGenerator:
                 'model_number': f"MODEL-{random.randint(100000, 999999)}",
                 'serial_number': f"SN-{random.randint(100000, 999999)}",
                 'manufacturer': random.choice(['Precision Corp', 'Global Tools']),
-                'purchase_date': (datetime.now() - timedelta(days=random.randint(365, 1825))).strftime('%Y-%m-%d'),
+                'purchase_date': (self.enterprise_time - timedelta(days=random.randint(365, 1825))).strftime('%Y-%m-%d'),
                 'calibration_frequency_days': random.choice([90, 180, 365]),
-                'last_calibration_date': (datetime.now() - timedelta(days=random.randint(1, 89))).strftime('%Y-%m-%d'),
-                'next_calibration_due': (datetime.now() + timedelta(days=random.randint(1, 90))).strftime('%Y-%m-%d'),
+                'last_calibration_date': (self.enterprise_time - timedelta(days=random.randint(1, 89))).strftime('%Y-%m-%d'),
+                'next_calibration_due': (self.enterprise_time + timedelta(days=random.randint(1, 90))).strftime('%Y-%m-%d'),
                 'calibration_method': random.choice(['Block Gauge', 'Master Gauge', 'Standard']),
                 'calibration_standard': 'NIST',
                 'measurement_range': f'{random.randint(1, 100)}-{random.randint(101, 200)} mm',
@@ -682,8 +691,8 @@ class QMSDataGenerator:
                 'responsible_person': random.choice([e.get('employee_id', 'EMP-000001') for e in self.employees] + ['EMP-000001']),
                 'locked_out': False,
                 'purchase_cost': round(random.uniform(500, 5000), 2),
-                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'updated_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
             }
             self.data['measuring_equipment'].append(equip)
         
@@ -733,10 +742,10 @@ class QMSDataGenerator:
                     'alert_id': f"ALERT-{alert_counter:06d}",
                     'equipment_id': equipment['equipment_id'],
                     'alert_type': random.choice(['calibration_due', 'overdue']),
-                    'alert_date': datetime.now().strftime('%Y-%m-%d'),
+                    'alert_date': self.enterprise_time.strftime('%Y-%m-%d'),
                     'due_date': equipment['next_calibration_due'],
                     'resolved_date': None,
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
                 }
                 self.data['calibration_alerts'].append(alert)
                 alert_counter += 1
@@ -761,8 +770,8 @@ class QMSDataGenerator:
                 'upper_control_limit': round(random.uniform(90, 100), 2),
                 'sampling_interval': 'daily',
                 'sample_size': random.randint(5, 30),
-                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'updated_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
             }
             self.data['spc_control_charts'].append(chart)
         
@@ -775,7 +784,7 @@ class QMSDataGenerator:
         
         for chart in self.data['spc_control_charts']:
             for i in range(random.randint(20, 50)):
-                sample_date = datetime.now() - timedelta(days=random.randint(1, 30))
+                sample_date = self.enterprise_time - timedelta(days=random.randint(1, 30))
                 point = {
                     'data_point_id': f"SPCPT-{point_counter:06d}",
                     'chart_id': chart['chart_id'],
@@ -788,7 +797,7 @@ class QMSDataGenerator:
                     'subgroup_average': round(random.uniform(chart['center_line']-5, chart['center_line']+5), 2),
                     'subgroup_range': round(random.uniform(5, 15), 2),
                     'notes': None,
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
                 }
                 self.data['spc_data_points'].append(point)
                 point_counter += 1
@@ -862,15 +871,15 @@ class QMSDataGenerator:
                 'document_title': f"Document {i+1}",
                 'document_description': f"Quality document",
                 'current_revision': f"Rev. {i % 5}",
-                'current_revision_date': (datetime.now() - timedelta(days=random.randint(1, 365))).strftime('%Y-%m-%d'),
-                'revision_date': (datetime.now() - timedelta(days=random.randint(1, 180))).strftime('%Y-%m-%d'),
+                'current_revision_date': (self.enterprise_time - timedelta(days=random.randint(1, 365))).strftime('%Y-%m-%d'),
+                'revision_date': (self.enterprise_time - timedelta(days=random.randint(1, 180))).strftime('%Y-%m-%d'),
                 'document_owner': random.choice([e.get('employee_id', 'EMP-000001') for e in self.employees] + ['EMP-000001']),
                 'approval_status': random.choice(['draft', 'approved']),
-                'effective_date': (datetime.now() - timedelta(days=random.randint(1, 180))).strftime('%Y-%m-%d'),
+                'effective_date': (self.enterprise_time - timedelta(days=random.randint(1, 180))).strftime('%Y-%m-%d'),
                 'obsolete_date': None,
                 'document_url': f"https://docs.company.com/qms/doc-{i+1:06d}.pdf",
-                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'updated_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
             }
             self.data['quality_documents'].append(doc)
         
@@ -908,20 +917,20 @@ class QMSDataGenerator:
             for rev_num in range(1, random.randint(2, 4)):
                 # 85% of revisions are approved
                 is_approved = random.random() < 0.85
-                approval_date = (datetime.now() - timedelta(days=random.randint(1, 200))).strftime('%Y-%m-%d') if is_approved else None
+                approval_date = (self.enterprise_time - timedelta(days=random.randint(1, 200))).strftime('%Y-%m-%d') if is_approved else None
                 
                 revision = {
                     'revision_id': f"REV-{rev_counter:06d}",
                     'document_id': doc['document_id'],
                     'revision_number': rev_num,
-                    'revision_date': (datetime.now() - timedelta(days=random.randint(1, 365))).strftime('%Y-%m-%d'),
+                    'revision_date': (self.enterprise_time - timedelta(days=random.randint(1, 365))).strftime('%Y-%m-%d'),
                     'revised_by': random.choice([e.get('employee_id', 'EMP-000001') for e in self.employees] + ['EMP-000001']),
                     'change_description': f"Update to section {random.randint(1, 10)}",
                     'changes_summary': f"Revision {rev_num} updates document content",
                     'approval_status': 'approved' if is_approved else random.choice(['pending', 'in_review']),
                     'approved_by': random.choice([e.get('employee_id', 'EMP-000001') for e in self.employees if e.get('role') in ['manager', 'supervisor']] + ['EMP-000001']) if is_approved else random.choice([e.get('employee_id', 'EMP-000001') for e in self.employees if e.get('role') in ['manager', 'supervisor']] + ['EMP-000001']),  # Now always set
                     'approval_date': approval_date,  # Now always set
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
                 }
                 self.data['document_revisions'].append(revision)
                 rev_counter += 1
@@ -951,21 +960,21 @@ class QMSDataGenerator:
                 'problem_preparation': 'Problem statement prepared',
                 'is_statement': 'Clear IS statement',
                 'is_not_statement': 'Clear IS NOT statement',
-                'team_established_date': (datetime.now() - timedelta(days=random.randint(1, 30))).strftime('%Y-%m-%d'),
+                'team_established_date': (self.enterprise_time - timedelta(days=random.randint(1, 30))).strftime('%Y-%m-%d'),
                 'team_members': team_members,
-                'containment_date': (datetime.now() - timedelta(days=random.randint(1, 20))).strftime('%Y-%m-%d'),
+                'containment_date': (self.enterprise_time - timedelta(days=random.randint(1, 20))).strftime('%Y-%m-%d'),
                 'containment_action': 'Immediate containment action taken',
                 'containment_verified': random.choice([True, False]),
                 'root_cause_analysis': 'Root cause analysis completed',
-                'root_cause_identified': (datetime.now() - timedelta(days=random.randint(1, 15))).strftime('%Y-%m-%d'),
+                'root_cause_identified': (self.enterprise_time - timedelta(days=random.randint(1, 15))).strftime('%Y-%m-%d'),
                 'root_cause_method': random.choice(['5 Why', 'Fishbone', 'FMEA', 'Fault Tree']),
                 'root_cause_verified': random.choice([True, False]),
                 'preventive_actions': 'Preventive actions defined',
                 'permanent_actions': 'Permanent corrective actions implemented',
-                'pca_implementation_date': (datetime.now() - timedelta(days=random.randint(1, 10))).strftime('%Y-%m-%d'),
+                'pca_implementation_date': (self.enterprise_time - timedelta(days=random.randint(1, 10))).strftime('%Y-%m-%d'),
                 'prevention_completed': random.choice([True, False]),
                 'verification_plan': 'Verification plan established',
-                'verification_date': (datetime.now() - timedelta(days=random.randint(1, 5))).strftime('%Y-%m-%d'),
+                'verification_date': (self.enterprise_time - timedelta(days=random.randint(1, 5))).strftime('%Y-%m-%d'),
                 'verification_completed': random.choice([True, False]),
                 'lessons_learned': 'Lessons learned documented',
                 'systems_updated': 'Systems and documentation updated',
@@ -973,8 +982,8 @@ class QMSDataGenerator:
                 'eight_d_status': random.choice(['open', 'in_review', 'closed']),
                 'source_type': 'NCR',
                 'source_document_id': ncr['ncr_id'],
-                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'created_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'updated_at': self.enterprise_time.strftime('%Y-%m-%d %H:%M:%S')
             }
             self.data['eight_d_reports'].append(report)
         
@@ -1006,8 +1015,12 @@ class QMSDataGenerator:
         print(f"Generated {len(self.data['qms_integration_log'])} QMS integration logs")
     
     def save_to_json(self, output_file='genims_qms_data.json'):
-        """Save data to JSON file"""
+        """Save data to JSON file (or shards + manifest when GENERATOR_OUTPUT=tsv/ndjson)"""
         print(f"\nSaving to {output_file}...")
+        shard_dir = write_tables(output_file, self.data)
+        if shard_dir is not None:
+            print(f"QMS data saved to {shard_dir} (manifest: {output_file})")
+            return
         with open(output_file, 'w') as f:
             json.dump(self.data, f, indent=2)
         print(f"QMS data saved to {output_file}")
@@ -1018,7 +1031,7 @@ class QMSDataGenerator:
 
 if __name__ == '__main__':
     generator = QMSDataGenerator()
-    generator.generate(days=90)
+    generator.generate()
     
     output_file = Path(__file__).parent / 'genims_qms_data.json'
     generator.save_to_json(str(output_file))
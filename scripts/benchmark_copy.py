@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+GenIMS COPY Encoding Benchmark
+Compares the text COPY path with the binary COPY path of full_setup.py
+on the wide, timestamp-heavy telemetry tables (sensor_data, scada_machine_data)
+
+Usage:
+  python3 scripts/benchmark_copy.py                      # encode-only, no database needed
+  python3 scripts/benchmark_copy.py --rows 500000
+  python3 scripts/benchmark_copy.py --live genims_operations_db_try   # real COPY into TEMP tables
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from full_setup import GenIMSSetup
+from json_stream import iter_table_chunks
+from table_encoder import TableEncoder
+
+ROOT = Path(__file__).parent.parent
+OPERATIONS_DIR = ROOT / 'Data Scripts' / '02 - Machine data'
+SCHEMA_FILE = OPERATIONS_DIR / 'genims_operational_schema.sql'
+DATA_FILE = OPERATIONS_DIR / 'genims_operational_data.json'
+TABLES = ['sensor_data', 'scada_machine_data']
+
+# SQL type keyword -> (information_schema data_type, udt_name)
+SQL_TYPES = {
+    'BIGSERIAL': ('bigint', 'int8'),
+    'BIGINT': ('bigint', 'int8'),
+    'INTEGER': ('integer', 'int4'),
+    'DECIMAL': ('numeric', 'numeric'),
+    'VARCHAR': ('character varying', 'varchar'),
+    'TEXT': ('text', 'text'),
+    'BOOLEAN': ('boolean', 'bool'),
+    'TIMESTAMP': ('timestamp without time zone', 'timestamp'),
+    'DATE': ('date', 'date'),
+}
+
+
+class DrainCursor:
+    """Stands in for a psycopg2 cursor: consumes the COPY buffer without a server"""
+
+    def __init__(self):
+        self.bytes_sent = 0
+
+    def copy_from(self, buffer, table, columns=None, sep='\t', null='\\N'):
+        self.bytes_sent += len(buffer.read().encode('utf-8'))
+
+    def copy_expert(self, sql, buffer):
+        self.bytes_sent += len(buffer.read())
+
+
+def parse_table_columns(table_name):
+    """Column metadata for a table from the schema file, shaped like information_schema rows"""
+    sql = SCHEMA_FILE.read_text()
+    match = re.search(rf'CREATE TABLE {table_name} \((.*?)\n\);', sql, re.S)
+    if not match:
+        raise ValueError(f"Table {table_name} not found in {SCHEMA_FILE.name}")
+
+    col_info = {}
+    for line in match.group(1).splitlines():
+        line = line.split('--')[0].strip().rstrip(',')
+        parts = line.split()
+        if len(parts) < 2 or parts[0].isupper():
+            continue
+        sql_type = re.sub(r'\(.*', '', parts[1]).upper()
+        if sql_type not in SQL_TYPES:
+            continue
+        data_type, udt_name = SQL_TYPES[sql_type]
+        nullable = 'NO' if 'NOT NULL' in line.upper() or 'PRIMARY KEY' in line.upper() else 'YES'
+        col_info[parts[0]] = (nullable, data_type, udt_name)
+    return col_info
+
+
+def synthesize_rows(col_info, count):
+    """Generator-shaped records (strings for timestamps, floats for decimals)"""
+    start = datetime.now() - timedelta(days=14)
+    rows = []
+    for i in range(count):
+        rec = {}
+        for col, (_, data_type, udt_name) in col_info.items():
+            if udt_name == 'int8' or udt_name == 'int4':
+                rec[col] = i + 1 if col.endswith('_id') else random.randint(0, 5000)
+            elif udt_name == 'numeric':
+                rec[col] = round(random.uniform(0, 1000), 4)
+            elif udt_name == 'bool':
+                rec[col] = random.random() < 0.05
+            elif udt_name == 'timestamp':
+                ts = start + timedelta(seconds=random.randint(0, 14 * 86400))
+                rec[col] = ts.strftime('%Y-%m-%d %H:%M:%S')
+            elif col.endswith('_id'):
+                rec[col] = f"{col[:3].upper()}-{random.randint(1, 999999):06d}"
+            else:
+                rec[col] = random.choice(['normal', 'warning', 'good', 'OPC-UA', 'Modbus', None])
+        rows.append(rec)
+    return rows
+
+
+def sample_rows(table_name, col_info, count):
+    """Rows from the operational data file when present, otherwise synthesized"""
+    if DATA_FILE.exists():
+        rows = []
+        for name, chunk in iter_table_chunks(DATA_FILE, count):
+            if name == table_name:
+                rows.extend(chunk)
+                if len(rows) >= count:
+                    return rows[:count], 'data file'
+            elif rows:
+                break
+        if rows:
+            return rows, 'data file'
+    return synthesize_rows(col_info, count), 'synthetic'
+
+
+def time_path(setup, cursor, table_name, records, encoder, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        setup.copy_records(cursor, table_name, records, encoder)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text vs binary COPY encoding")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per table (default: 100000)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timing repeats, best is reported")
+    parser.add_argument("--live", metavar="DATABASE", default=None,
+                        help="COPY into TEMP copies of the tables in this database instead of draining locally")
+    args = parser.parse_args()
+
+    setup = GenIMSSetup(binary_copy=True)
+    conn = None
+    if args.live:
+        import psycopg2
+        conn = psycopg2.connect(**setup.db_config, dbname=args.live)
+        conn.autocommit = True
+
+    print(f"{'table':<22}{'rows':>10}{'source':>12}{'text s':>10}{'binary s':>10}{'speedup':>9}{'text MB':>9}{'bin MB':>9}")
+    for table_name in TABLES:
+        col_info = parse_table_columns(table_name)
+        records, source = sample_rows(table_name, col_info, args.rows)
+        safe_cols = [c for c in records[0].keys() if c in col_info]
+        text_encoder = TableEncoder(safe_cols, col_info)
+        binary_encoder = TableEncoder(safe_cols, col_info, binary=True)
+        if binary_encoder.binary_encoders is None:
+            print(f"{table_name}: no binary encoder for every column, skipping")
+            continue
+
+        if conn is not None:
+            target = f"bench_{table_name}"
+            with conn.cursor() as cur:
+                cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {target} (LIKE {table_name} INCLUDING DEFAULTS)")
+            text_cursor = binary_cursor = conn.cursor()
+        else:
+            target = table_name
+            text_cursor, binary_cursor = DrainCursor(), DrainCursor()
+
+        text_s = time_path(setup, text_cursor, target, records, text_encoder, args.repeats)
+        binary_s = time_path(setup, binary_cursor, target, records, binary_encoder, args.repeats)
+
+        text_mb = getattr(text_cursor, 'bytes_sent', 0) / args.repeats / 1e6
+        binary_mb = getattr(binary_cursor, 'bytes_sent', 0) / args.repeats / 1e6
+        print(f"{table_name:<22}{len(records):>10}{source:>12}{text_s:>10.2f}{binary_s:>10.2f}"
+              f"{text_s / binary_s:>8.2f}x{text_mb:>9.1f}{binary_mb:>9.1f}")
+
+    if conn is not None:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
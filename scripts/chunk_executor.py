@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+GenIMS Chunk Executor
+Runs a generator's per-chunk work (a day range, a slice of orders, ...) in a process pool instead of
+a GIL-bound ThreadPoolExecutor, with output that does not depend on the number of workers:
+  - chunk boundaries are fixed sizes (GENERATOR_CHUNK_DAYS), never derived from the worker count
+  - every chunk reseeds random / numpy from (run seed, table, chunk index) before it runs
+  - every chunk gets a pre-reserved range of each ID counter it mints from (counter = range start),
+    and the coordinator's counters advance past all ranges once the chunks are merged
+  - results are yielded in chunk order, not completion order, as soon as each is ready (at most 2 x workers
+    chunks are held), so generators can stream every chunk out; any failed chunk fails the whole run
+  - a fixed GENERATOR_SEED also seeds the coordinator, so the setup data generated outside chunks repeats
+  - in a history slice (GENERATOR_SLICE_START/END, see history_slice.py) day-chunked tables run only the
+    chunks overlapping the slice; skipped chunks still hold their index, seed and ID range
+
+Workers are forked per call, so the chunk callable (bound method or closure) and the generator state
+it reads are inherited rather than pickled; only chunk arguments and results cross the pipe.
+CHUNK_EXECUTOR=serial runs the same chunks inline (identical output, handy for debugging).
+"""
+
+import hashlib
+import multiprocessing
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from history_slice import history_slice
+from scale_factor import scale_factor
+
+DEFAULT_CHUNK_DAYS = 10
+
+_task: Optional[Tuple[Callable, Optional[Dict]]] = None  # (chunk callable, counters) inherited by forked workers
+
+
+def run_seed() -> int:
+    """GENERATOR_SEED, or a fresh random seed for this run"""
+    seed = os.getenv('GENERATOR_SEED', '')
+    return int(seed) if seed else random.SystemRandom().randrange(2**63)
+
+
+def chunk_seed(seed: int, table: str, chunk_index: int) -> int:
+    digest = hashlib.sha256(f"{seed}:{table}:{chunk_index}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def chunk_days() -> int:
+    return max(1, int(os.getenv('GENERATOR_CHUNK_DAYS', str(DEFAULT_CHUNK_DAYS))))
+
+
+def id_stride(ids_per_day: int) -> int:
+    """IDs a day-offset counter block holds, sized at scale factor 1 and grown with GENIMS_SCALE_FACTOR"""
+    return int(ids_per_day * max(1.0, scale_factor()) + 0.999999)
+
+
+def id_block(ids_per_chunk: int) -> int:
+    """
+    IDs a chunk-index counter block holds, sized for DEFAULT_CHUNK_DAYS-day chunks at scale factor 1 and
+    grown with GENIMS_SCALE_FACTOR and GENERATOR_CHUNK_DAYS (per-day volumes scale, so fixed blocks overlap)
+    """
+    return id_stride(ids_per_chunk * max(1, -(-chunk_days() // DEFAULT_CHUNK_DAYS)))
+
+
+def id_blocks(ids_per_chunk: Dict[str, int]) -> Dict[str, int]:
+    """ChunkExecutor.run id_ranges from scale-1, DEFAULT_CHUNK_DAYS-day per-chunk ID counts (see id_block)"""
+    return {key: id_block(count) for key, count in ids_per_chunk.items()}
+
+
+def spans(total: int, size: int) -> List[Tuple[int, int]]:
+    """(start, count) pairs covering range(total) in fixed-size steps"""
+    size = max(1, size)
+    return [(start, min(size, total - start)) for start in range(0, total, size)]
+
+
+def day_windows(start_date: datetime, day_spans: Sequence[Tuple[int, int]]) -> List[Tuple[datetime, int]]:
+    """(first day, day count) per chunk of spans(days, ...) from start_date, for ChunkExecutor.run(days=...)"""
+    return [(start_date + timedelta(days=start), count) for start, count in day_spans]
+
+
+def _run_chunk(fn: Callable, counters: Optional[Dict], args: Sequence, seed: int,
+               ranges: Dict[str, Tuple[int, int]]) -> Any:
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    if counters is not None:
+        for key, (start, _) in ranges.items():
+            counters[key] = start
+    result = fn(*args)
+    if counters is not None:
+        for key, (start, end) in ranges.items():
+            if counters[key] > end:
+                raise RuntimeError(f"Chunk minted {counters[key] - start:,} '{key}' IDs, "
+                                   f"over its reserved range of {end - start:,}")
+    return result
+
+
+def _run_forked(args: Sequence, seed: int, ranges: Dict[str, Tuple[int, int]]) -> Any:
+    fn, counters = _task
+    return _run_chunk(fn, counters, args, seed, ranges)
+
+
+class ChunkExecutor:
+    """Deterministic chunk fan-out for one generator (one run seed shared by all of its tables)"""
+
+    def __init__(self, workers: int, seed: Optional[int] = None):
+        self.workers = max(1, workers)
+        self.seed = run_seed() if seed is None else seed
+        self.mode = os.getenv('CHUNK_EXECUTOR', 'process').lower()
+        if self.mode == 'process' and 'fork' not in multiprocessing.get_all_start_methods():
+            self.mode = 'serial'  # Without fork the callable and generator state would have to be pickled
+        if os.getenv('GENERATOR_SEED'):
+            random.seed(self.seed)
+            np.random.seed(self.seed % 2**32)
+        self.window = history_slice()
+        self.covered: Dict[str, Tuple[date, date]] = {}  # chunk table -> first/last day run in a slice
+
+    def select(self, table: str, days: Sequence[Tuple[datetime, int]]) -> List[int]:
+        """Indexes of the day chunks overlapping the history slice (all of them outside a slice)"""
+        if self.window is None:
+            return list(range(len(days)))
+        first, last = self.window
+        selected = [index for index, (day, count) in enumerate(days)
+                    if day.date() <= last and (day + timedelta(days=count - 1)).date() >= first]
+        if selected:
+            start_day, (end_day, count) = days[selected[0]][0], days[selected[-1]]
+            self.covered[table] = (start_day.date(), (end_day + timedelta(days=count - 1)).date())
+        else:
+            self.covered[table] = self.window
+        print(f"    ✂ {table}: {len(selected)}/{len(days)} day chunks in slice "
+              f"({self.covered[table][0]} .. {self.covered[table][1]})")
+        return selected
+
+    def run(self, fn: Callable, chunks: Iterable[Sequence], table: str,
+            counters: Optional[Dict] = None, id_ranges: Optional[Dict[str, int]] = None,
+            days: Optional[Sequence[Tuple[datetime, int]]] = None,
+            count: Optional[int] = None) -> Iterator[Tuple[int, Any]]:
+        """
+        Yield (chunk_index, result) in chunk order for fn(*chunks[i]), each as soon as it and every earlier
+        chunk are done, so callers can write a chunk out before the next one is held in memory.
+        id_ranges: counter key -> IDs reserved per chunk, taken from counters (e.g. the generator's self.counters)
+        days: (first day, day count) per chunk for day-chunked tables, which history slices then cut down
+        count: number of chunks when chunks is a one-pass iterator (e.g. rows read back from shards);
+        each chunk's arguments are then only drawn when it is submitted
+        """
+        global _task
+        id_ranges = id_ranges or {}
+        bases = {key: counters[key] for key in id_ranges} if counters is not None else {}
+        total = len(chunks) if count is None else count
+        pending_args = iter(chunks)
+        drawn = -1
+
+        def plan(index: int) -> Tuple[Sequence, int, Dict[str, Tuple[int, int]]]:
+            # Chunks are planned in index order; arguments of chunks a slice skips are drawn and dropped
+            nonlocal drawn
+            while drawn < index:
+                args = next(pending_args)
+                drawn += 1
+            ranges = {key: (bases[key] + index * size, bases[key] + (index + 1) * size)
+                      for key, size in id_ranges.items() if key in bases}
+            return args, chunk_seed(self.seed, table, index), ranges
+
+        selected = self.select(table, days) if days is not None else list(range(total))
+        # Callers always see the coordinator's counters after every reserved range, whichever chunks ran where
+        final = {key: bases[key] + total * size for key, size in id_ranges.items() if key in bases}
+
+        failures: Dict[int, Exception] = {}
+        if self.mode != 'process' or self.workers == 1 or len(selected) <= 1:
+            # Chunks reseed the global RNGs; hand the coordinator its own state back, as forked workers do
+            states = random.getstate(), np.random.get_state()
+            try:
+                for index in selected:
+                    try:
+                        result = _run_chunk(fn, counters, *plan(index))
+                    except Exception as e:
+                        failures[index] = e
+                        print(f"    ✗ {table} chunk {index + 1} failed: {e}")
+                        break
+                    random.setstate(states[0])
+                    np.random.set_state(states[1])
+                    if counters is not None:
+                        counters.update(final)
+                    yield index, result
+                    states = random.getstate(), np.random.get_state()
+            finally:
+                random.setstate(states[0])
+                np.random.set_state(states[1])
+        else:
+            if counters is not None:
+                counters.update(final)
+            _task = (fn, counters)
+            try:
+                context = multiprocessing.get_context('fork')
+                workers = min(self.workers, len(selected))
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                    # At most 2 x workers chunks are in flight or waiting for an earlier one to finish
+                    pending = list(reversed(selected))
+                    futures: Dict[Any, int] = {}
+                    done: Dict[int, Any] = {}
+                    next_pos = 0
+                    while pending or futures:
+                        while pending and not failures and len(futures) + len(done) < 2 * workers:
+                            index = pending.pop()
+                            futures[pool.submit(_run_forked, *plan(index))] = index
+                        if not futures:
+                            break
+                        finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            index = futures.pop(future)
+                            try:
+                                done[index] = future.result()
+                            except Exception as e:
+                                failures[index] = e
+                                print(f"    ✗ {table} chunk {index + 1} failed: {e}")
+                        while not failures and next_pos < len(selected) and selected[next_pos] in done:
+                            index = selected[next_pos]
+                            next_pos += 1
+                            yield index, done.pop(index)
+            finally:
+                _task = None
+
+        # A missing chunk means missing days/IDs: fail the generator instead of writing (and caching) a gap
+        if failures:
+            first = min(failures)
+            raise RuntimeError(f"{table}: {len(failures)} of {len(selected)} chunks failed "
+                               f"(first: chunk {first + 1}: {failures[first]})") from failures[first]
+        if counters is not None:
+            counters.update(final)
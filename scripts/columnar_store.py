@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+GenIMS Columnar Dataset Store
+One-time conversion of a generator JSON output (genims_master_data.json, genims_erp_data.json, ...)
+into per-table column files under .genims_cache/columnar/<name>/:
+  int / float / bool columns   .npy arrays, memory-mapped on load
+  str columns                  int32 codes (.npy, -1 = null) + string dictionary (.json)
+  anything else                codes into a dictionary of JSON-encoded values
+plus a uint8 mask per column where values are null (1) or the key is absent from the row (2).
+
+load_dataset() returns a read-only mapping: dataset['factories'] decodes that one table into the
+same list of dicts json.load would give (tables nobody touches are never decoded) and
+dataset.table('factories').column('factory_id') gives lazy column access without building rows, and
+select_columns(dataset, 'sales_orders', [...]) keeps a large table around as rows of a few columns only.
+The conversion is redone automatically when the source JSON changes (size + mtime).
+Outputs written as shards (GENERATOR_OUTPUT=tsv/ndjson, see table_writer) are read from their shards instead.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from table_writer import iter_shard_chunks, read_manifest
+
+STORE_VERSION = 1
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / '.genims_cache' / 'columnar'
+
+PRESENT, NULL, ABSENT = 0, 1, 2
+
+
+def _source_fingerprint(json_file: Path) -> List[int]:
+    st = json_file.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _column_kind(values: List[Any]) -> str:
+    """Narrowest lossless storage for a column's non-null values"""
+    kinds = {value.__class__ for value in values}
+    if not kinds or kinds == {str}:
+        return 'str'
+    if kinds == {bool}:
+        return 'bool'
+    if kinds == {int} and all(-2**63 <= value < 2**63 for value in values):
+        return 'int'
+    if kinds == {float}:
+        return 'float'
+    return 'json'  # Mixed int/float, nested dicts/lists, ... (kept exact via JSON text)
+
+
+def _write_column(table_dir: Path, column: str, rows: List[Dict]) -> Dict:
+    mask = np.array([PRESENT if row.get(column) is not None else (NULL if column in row else ABSENT)
+                     for row in rows], dtype=np.uint8)
+    values = [row[column] for row in rows if row.get(column) is not None]
+    kind = _column_kind(values)
+    meta = {'kind': kind, 'masked': bool(mask.any())}
+    if meta['masked']:
+        np.save(table_dir / f"{column}.mask.npy", mask)
+
+    if kind in ('int', 'float', 'bool'):
+        dtype = {'int': np.int64, 'float': np.float64, 'bool': np.bool_}[kind]
+        array = np.zeros(len(rows), dtype=dtype)
+        array[mask == PRESENT] = values
+        np.save(table_dir / f"{column}.npy", array)
+        return meta
+
+    # Dictionary encoding: codes (-1 = null/absent) into the distinct values
+    if kind == 'json':
+        values = [json.dumps(value) for value in values]
+    dictionary, inverse = np.unique(np.array(values, dtype=object), return_inverse=True) if values else ([], [])
+    codes = np.full(len(rows), -1, dtype=np.int32)
+    codes[mask == PRESENT] = inverse
+    np.save(table_dir / f"{column}.codes.npy", codes)
+    with open(table_dir / f"{column}.dict.json", 'w') as f:
+        json.dump(list(dictionary), f)
+    return meta
+
+
+def convert(json_file: Path, out_dir: Path) -> Path:
+    """Convert one JSON dataset into a columnar directory (built aside, then swapped in)"""
+    json_file = Path(json_file)
+    out_dir = Path(out_dir)
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    # One conversion per store at a time (threads and processes): concurrent swaps would
+    # rename each other's new store aside and delete it
+    with open(out_dir.with_name(f"{out_dir.name}.lock"), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            return _convert(json_file, out_dir)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _convert(json_file: Path, out_dir: Path) -> Path:
+    fingerprint = _source_fingerprint(json_file)
+    with open(json_file, 'r') as f:
+        data = json.load(f)
+
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    manifest = {'version': STORE_VERSION, 'source': fingerprint, 'tables': {}, 'values': {}}
+    for key, value in data.items():
+        if not (isinstance(value, list) and value and all(isinstance(row, dict) for row in value)):
+            manifest['values'][key] = value  # Scalars, metadata dicts, empty / non-record lists
+            continue
+        columns = list(dict.fromkeys(column for row in value for column in row))
+        table_dir = tmp_dir / f"t{len(manifest['tables'])}"
+        table_dir.mkdir()
+        manifest['tables'][key] = {
+            'dir': table_dir.name,
+            'rows': len(value),
+            'columns': {column: _write_column(table_dir, column, value) for column in columns},
+        }
+    with open(tmp_dir / 'manifest.json', 'w') as f:
+        json.dump(manifest, f)
+
+    old_dir = out_dir.with_name(f"{out_dir.name}.old")
+    shutil.rmtree(old_dir, ignore_errors=True)  # Left by an interrupted conversion
+    if out_dir.exists():
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+
+class ColumnarTable:
+    """Lazy column access to one table; columns are loaded (memory-mapped) on first use"""
+
+    def __init__(self, table_dir: Path, meta: Dict):
+        self.table_dir = table_dir
+        self.meta = meta
+        self.lock = threading.Lock()
+        self._cache: Dict[str, Any] = {}
+        self._records: Optional[List[Dict]] = None
+
+    def __len__(self) -> int:
+        return self.meta['rows']
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.meta['columns'])
+
+    def _load(self, key: str, loader):
+        with self.lock:
+            if key not in self._cache:
+                self._cache[key] = loader()
+            return self._cache[key]
+
+    def mask(self, column: str) -> Optional[np.ndarray]:
+        """uint8 per row: 0 present, 1 null, 2 key absent (None if every row has a value)"""
+        if not self.meta['columns'][column]['masked']:
+            return None
+        return self._load(f"{column}.mask", lambda: np.load(self.table_dir / f"{column}.mask.npy", mmap_mode='r'))
+
+    def codes(self, column: str) -> Tuple[np.ndarray, List]:
+        """Dictionary-encoded column: int32 codes (-1 = null) and the dictionary"""
+        codes = self._load(f"{column}.codes", lambda: np.load(self.table_dir / f"{column}.codes.npy", mmap_mode='r'))
+        dictionary = self._load(f"{column}.dict", lambda: self._read_dictionary(column))
+        return codes, dictionary
+
+    def _read_dictionary(self, column: str) -> List:
+        with open(self.table_dir / f"{column}.dict.json", 'r') as f:
+            dictionary = json.load(f)
+        if self.meta['columns'][column]['kind'] == 'json':
+            dictionary = [json.loads(value) for value in dictionary]
+        return dictionary
+
+    def column(self, column: str) -> np.ndarray:
+        """Column values: memory-mapped numeric array (nulls as 0 - see mask) or decoded object array"""
+        kind = self.meta['columns'][column]['kind']
+        if kind in ('int', 'float', 'bool'):
+            return self._load(column, lambda: np.load(self.table_dir / f"{column}.npy", mmap_mode='r'))
+        codes, dictionary = self.codes(column)
+        lookup = np.empty(len(dictionary) + 1, dtype=object)
+        for code, value in enumerate(dictionary):  # Item-wise: list values must not broadcast
+            lookup[code] = value
+        return lookup[codes]  # code -1 picks the trailing None
+
+    def values(self, column: str) -> List:
+        """Column as a Python list, None for null/absent values"""
+        values = self.column(column).tolist()
+        mask = self.mask(column)
+        if mask is not None and self.meta['columns'][column]['kind'] in ('int', 'float', 'bool'):
+            for row in np.flatnonzero(mask).tolist():
+                values[row] = None
+        return values
+
+    def select(self, columns: Sequence[str]) -> List[Dict]:
+        """Rows cut down to columns (not cached): only those columns are decoded"""
+        present = [column for column in columns if column in self.meta['columns']]
+        if not present:
+            return [{} for _ in range(len(self))]
+        records = [dict(zip(present, row)) for row in zip(*(self.values(column) for column in present))]
+        for column in present:
+            mask = self.mask(column)
+            if mask is not None:
+                for row in np.flatnonzero(mask == ABSENT).tolist():
+                    del records[row][column]
+        return records
+
+    def records(self) -> List[Dict]:
+        """Rows as dicts - identical to the JSON table - built once and cached"""
+        with self.lock:
+            if self._records is not None:
+                return self._records
+        columns = self.columns
+        records = [dict(zip(columns, row)) for row in zip(*(self.values(column) for column in columns))]
+        # Drop keys that were absent (not null) in the source rows
+        for column in columns:
+            mask = self.mask(column)
+            if mask is not None:
+                for row in np.flatnonzero(mask == ABSENT).tolist():
+                    del records[row][column]
+        with self.lock:
+            if self._records is None:
+                self._records = records
+            return self._records
+
+
+class ColumnarDataset(Mapping):
+    """Read-only dataset: tables decode to lists of dicts on first access, other values come from the manifest"""
+
+    def __init__(self, store_dir: Path, manifest: Dict):
+        self.store_dir = store_dir
+        self.manifest = manifest
+        self.tables = {name: ColumnarTable(store_dir / meta['dir'], meta)
+                       for name, meta in manifest['tables'].items()}
+
+    def table(self, name: str) -> ColumnarTable:
+        return self.tables[name]
+
+    def __getitem__(self, key: str):
+        if key in self.tables:
+            return self.tables[key].records()
+        return self.manifest['values'][key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.tables
+        yield from self.manifest['values']
+
+    def __len__(self) -> int:
+        return len(self.tables) + len(self.manifest['values'])
+
+
+class ShardDataset(Mapping):
+    """Read-only dataset over a table_writer shard manifest: tables decode to lists of dicts on first access"""
+
+    def __init__(self, data_file: Path, manifest: Dict):
+        self.data_file = data_file
+        self.manifest = manifest
+        self._records: Dict[str, List[Dict]] = {}
+        self.lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> List[Dict]:
+        if key not in self.manifest['tables']:
+            raise KeyError(key)
+        with self.lock:
+            if key not in self._records:
+                self._records[key] = [rec for _, chunk in iter_shard_chunks(self.data_file, self.manifest, tables=[key])
+                                      for rec in chunk]
+            return self._records[key]
+
+    def select(self, key: str, columns: Sequence[str]) -> List[Dict]:
+        """One table's rows cut down to columns, decoded shard chunk by shard chunk (not cached)"""
+        if key not in self.manifest['tables']:
+            return []
+        with self.lock:
+            cached = self._records.get(key)
+        chunks = ([cached] if cached is not None else
+                  (chunk for _, chunk in iter_shard_chunks(self.data_file, self.manifest, tables=[key])))
+        return [{column: rec[column] for column in columns if column in rec} for chunk in chunks for rec in chunk]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.manifest['tables'])
+
+    def __len__(self) -> int:
+        return len(self.manifest['tables'])
+
+
+def select_columns(dataset: Mapping, table: str, columns: Sequence[str]) -> List[Dict]:
+    """
+    Rows of one dataset table holding only the given columns ([] if the table is missing): for large upstream
+    tables a generator keeps but reads a few columns of, without ever holding their full rows
+    """
+    if isinstance(dataset, ShardDataset):
+        return dataset.select(table, columns)
+    if isinstance(dataset, ColumnarDataset):
+        return dataset.table(table).select(columns) if table in dataset.tables else []
+    return [{column: rec[column] for column in columns if column in rec} for rec in dataset.get(table, [])]
+
+
+def open_store(json_file: Path, cache_dir: Optional[Path] = None) -> Optional[ColumnarDataset]:
+    """Columnar store for json_file if one exists and is current, else None"""
+    json_file = Path(json_file)
+    store_dir = Path(cache_dir or DEFAULT_CACHE_DIR) / json_file.stem
+    try:
+        with open(store_dir / 'manifest.json', 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != STORE_VERSION or manifest.get('source') != _source_fingerprint(json_file):
+            return None
+    except (OSError, ValueError):
+        return None
+    return ColumnarDataset(store_dir, manifest)
+
+
+def load_dataset(json_file: Path, cache_dir: Optional[Path] = None) -> Mapping:
+    """
+    Generator JSON output as a mapping: from the columnar store (converting once if missing or stale),
+    or plain json.load when COLUMNAR_DATASETS=false or the conversion fails; shard manifests read their shards
+    """
+    json_file = Path(json_file)
+    manifest = read_manifest(json_file)
+    if manifest is not None:
+        return ShardDataset(json_file, manifest)
+    if os.getenv('COLUMNAR_DATASETS', 'true').lower() != 'true':
+        with open(json_file, 'r') as f:
+            return json.load(f)
+    dataset = open_store(json_file, cache_dir)
+    if dataset is None:
+        try:
+            convert(json_file, Path(cache_dir or DEFAULT_CACHE_DIR) / json_file.stem)
+        except (OSError, ValueError, TypeError):
+            with open(json_file, 'r') as f:
+                return json.load(f)
+        dataset = open_store(json_file, cache_dir)
+    if dataset is None:  # Source rewritten while converting
+        with open(json_file, 'r') as f:
+            return json.load(f)
+    return dataset
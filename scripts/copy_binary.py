@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+GenIMS Binary COPY Encoder
+Encodes generator records into PostgreSQL COPY ... (FORMAT binary) streams
+Per-column encoders are chosen once per table from information_schema udt_name
+"""
+
+import io
+import json
+import struct
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# File header: signature, flags field, header extension length
+COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+COPY_TRAILER = struct.pack('!h', -1)
+NULL_FIELD = struct.pack('!i', -1)
+
+PG_EPOCH = datetime(2000, 1, 1)
+PG_EPOCH_UTC = datetime(2000, 1, 1, tzinfo=timezone.utc)
+PG_EPOCH_ORDINAL = date(2000, 1, 1).toordinal()
+
+TEXT_OID = 25
+VARCHAR_OID = 1043
+
+_pack_i16 = struct.Struct('!h').pack
+_pack_i32 = struct.Struct('!i').pack
+_pack_i64 = struct.Struct('!q').pack
+_pack_f32 = struct.Struct('!f').pack
+_pack_f64 = struct.Struct('!d').pack
+
+NUMERIC_POS = 0x0000
+NUMERIC_NEG = 0x4000
+NUMERIC_NAN = 0xC000
+
+
+def _to_datetime(val) -> datetime:
+    if isinstance(val, datetime):
+        return val
+    if isinstance(val, date):
+        return datetime(val.year, val.month, val.day)
+    return datetime.fromisoformat(val)
+
+
+def _to_int(val) -> int:
+    # int() would truncate 2.5 silently; text COPY rejects it, so binary COPY does too
+    as_int = int(val)
+    if as_int != val and not isinstance(val, str):
+        raise ValueError(f"Cannot encode {val} as integer")
+    return as_int
+
+
+def encode_int2(val) -> bytes:
+    return _pack_i16(_to_int(val))
+
+
+def encode_int4(val) -> bytes:
+    return _pack_i32(_to_int(val))
+
+
+def encode_int8(val) -> bytes:
+    return _pack_i64(_to_int(val))
+
+
+def encode_float4(val) -> bytes:
+    return _pack_f32(float(val))
+
+
+def encode_float8(val) -> bytes:
+    return _pack_f64(float(val))
+
+
+def encode_bool(val) -> bytes:
+    if isinstance(val, str):
+        val = val.strip().lower() in ('t', 'true', 'y', 'yes', 'on', '1')
+    return b'\x01' if val else b'\x00'
+
+
+def encode_text(val) -> bytes:
+    if not isinstance(val, str):
+        val = json.dumps(val) if isinstance(val, (dict, list)) else str(val)
+    return val.encode('utf-8')
+
+
+def encode_json(val) -> bytes:
+    if not isinstance(val, str):
+        val = json.dumps(val)
+    return val.encode('utf-8')
+
+
+def encode_jsonb(val) -> bytes:
+    # jsonb binary format is a version byte followed by the JSON text
+    return b'\x01' + encode_json(val)
+
+
+# 'YYYY-MM-DD' -> days since the PostgreSQL epoch; generator timestamps repeat dates heavily
+_day_offsets: Dict[str, int] = {}
+
+
+def _day_offset(day: str) -> int:
+    offset = _day_offsets.get(day)
+    if offset is None:
+        offset = date.fromisoformat(day).toordinal() - PG_EPOCH_ORDINAL
+        _day_offsets[day] = offset
+    return offset
+
+
+def encode_timestamp(val) -> bytes:
+    # Fast path for the 'YYYY-MM-DD HH:MM:SS' strings every generator emits
+    if isinstance(val, str) and len(val) == 19 and val[13] == ':':
+        seconds = int(val[11:13]) * 3600 + int(val[14:16]) * 60 + int(val[17:19])
+        return _pack_i64((_day_offset(val[:10]) * 86400 + seconds) * 1000000)
+    delta = _to_datetime(val).replace(tzinfo=None) - PG_EPOCH
+    return _pack_i64(delta // timedelta(microseconds=1))
+
+
+def encode_timestamptz(val) -> bytes:
+    # Naive values are taken as UTC (GenIMS generators emit naive UTC-ish wall clock times)
+    dt = _to_datetime(val)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return _pack_i64((dt - PG_EPOCH_UTC) // timedelta(microseconds=1))
+
+
+def encode_date(val) -> bytes:
+    if isinstance(val, datetime):
+        val = val.date()
+    elif not isinstance(val, date):
+        val = date.fromisoformat(val[:10])
+    return _pack_i32(val.toordinal() - PG_EPOCH_ORDINAL)
+
+
+def encode_time(val) -> bytes:
+    if isinstance(val, datetime):
+        val = val.time()
+    elif not isinstance(val, time):
+        val = time.fromisoformat(val)
+    micros = ((val.hour * 60 + val.minute) * 60 + val.second) * 1000000 + val.microsecond
+    return _pack_i64(micros)
+
+
+def _numeric_from_parts(negative: bool, int_part: str, frac_part: str) -> bytes:
+    """Pack decimal digit strings as base-10000 numeric (ndigits, weight, sign, dscale, digits...)"""
+    dscale = len(frac_part)
+    int_part = int_part.lstrip('0')
+    int_part = '0' * (-len(int_part) % 4) + int_part
+    frac_part = frac_part + '0' * (-len(frac_part) % 4)
+
+    groups = [int(int_part[i:i + 4]) for i in range(0, len(int_part), 4)]
+    weight = len(groups) - 1
+    groups += [int(frac_part[i:i + 4]) for i in range(0, len(frac_part), 4)]
+
+    # Strip leading/trailing zero groups (leading ones shift the weight)
+    lead = 0
+    while lead < len(groups) and groups[lead] == 0:
+        lead += 1
+    if lead:
+        groups = groups[lead:]
+        weight -= lead
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+        negative = False
+
+    return struct.pack(f'!hhHh{len(groups)}H', len(groups), weight,
+                       NUMERIC_NEG if negative else NUMERIC_POS, dscale, *groups)
+
+
+_pack_numeric_header = struct.Struct('!hhHh').pack
+
+
+def _numeric_from_plain(text: str) -> bytes:
+    """Fast path for plain '[-]digits[.digits]' text: base-10000 groups via integer divmod"""
+    negative = text[0] == '-'
+    int_part, _, frac_part = text.lstrip('-').partition('.')
+    dscale = len(frac_part)
+    pad = -dscale % 4
+    n = int(int_part + frac_part + '0' * pad)
+    groups = []
+    while n:
+        n, group = divmod(n, 10000)
+        groups.append(group)
+    weight = len(groups) - ((dscale + pad) >> 2) - 1
+    while groups and groups[0] == 0:
+        groups.pop(0)
+    if not groups:
+        return _pack_numeric_header(0, 0, NUMERIC_POS, dscale)
+    groups.reverse()
+    return (_pack_numeric_header(len(groups), weight, NUMERIC_NEG if negative else NUMERIC_POS, dscale)
+            + struct.pack(f'!{len(groups)}H', *groups))
+
+
+def encode_numeric(val) -> bytes:
+    if isinstance(val, (int, float)) and not isinstance(val, bool):
+        # str() is the shortest round-trip repr, i.e. exactly what the text COPY path sends
+        text = str(val)
+        if 'e' not in text and 'n' not in text:
+            return _numeric_from_plain(text)
+    if not isinstance(val, Decimal):
+        val = Decimal(val if isinstance(val, str) else str(val))
+
+    sign, digit_tuple, exponent = val.as_tuple()
+    if not isinstance(exponent, int):
+        if exponent == 'n' or exponent == 'N':
+            return struct.pack('!hhHh', 0, 0, NUMERIC_NAN, 0)
+        raise ValueError(f"Cannot encode {val} as numeric")
+
+    digits = ''.join(map(str, digit_tuple))
+    if exponent >= 0:
+        return _numeric_from_parts(bool(sign), digits + '0' * exponent, '')
+    point = len(digits) + exponent  # digits before the decimal point
+    if point > 0:
+        return _numeric_from_parts(bool(sign), digits[:point], digits[point:])
+    return _numeric_from_parts(bool(sign), '', '0' * (-point) + digits)
+
+
+def _array_encoder(elem_oid: int) -> Callable:
+    def encode_array(val) -> bytes:
+        if isinstance(val, str):
+            val = json.loads(val)  # generators store lists as JSON text; PG literals are rejected
+        if not isinstance(val, (list, tuple)):
+            raise ValueError(f"Expected list for array column, got {type(val).__name__}")
+        has_null = any(v is None for v in val)
+        parts = [struct.pack('!iiiii', 1, 1 if has_null else 0, elem_oid, len(val), 1)]
+        for v in val:
+            if v is None:
+                parts.append(NULL_FIELD)
+            else:
+                b = encode_text(v)
+                parts.append(_pack_i32(len(b)))
+                parts.append(b)
+        return b''.join(parts)
+    return encode_array
+
+
+# udt_name -> encoder
+BINARY_ENCODERS: Dict[str, Callable] = {
+    'int2': encode_int2,
+    'int4': encode_int4,
+    'int8': encode_int8,
+    'float4': encode_float4,
+    'float8': encode_float8,
+    'numeric': encode_numeric,
+    'bool': encode_bool,
+    'text': encode_text,
+    'varchar': encode_text,
+    'bpchar': encode_text,
+    'json': encode_json,
+    'jsonb': encode_jsonb,
+    'timestamp': encode_timestamp,
+    'timestamptz': encode_timestamptz,
+    'date': encode_date,
+    'time': encode_time,
+    '_text': _array_encoder(TEXT_OID),
+    '_varchar': _array_encoder(VARCHAR_OID),
+}
+
+
+def build_binary_encoders(columns: Sequence[str],
+                          db_col_info: Dict[str, Tuple[str, str, str]]) -> Optional[Tuple[Callable, ...]]:
+    """Pick one encoder per column; returns None if any column type has no binary encoder"""
+    encoders = []
+    for col in columns:
+        info = db_col_info.get(col)
+        if info is None:
+            return None
+        encoder = BINARY_ENCODERS.get(info[2])
+        if encoder is None:
+            return None
+        encoders.append(encoder)
+    return tuple(encoders)
+
+
+def encode_binary_copy(rows: List[Sequence], encoders: Tuple[Callable, ...]) -> io.BytesIO:
+    """Encode rows (value sequences in column order) into a binary COPY stream"""
+    out = bytearray(COPY_HEADER)
+    field_count = _pack_i16(len(encoders))
+    pack_len = _pack_i32
+
+    for row in rows:
+        out += field_count
+        for val, encoder in zip(row, encoders):
+            if val is None:
+                out += NULL_FIELD
+            else:
+                data = encoder(val)
+                out += pack_len(len(data))
+                out += data
+
+    out += COPY_TRAILER
+    return io.BytesIO(bytes(out))
@@ -6,14 +6,321 @@ Ensures: no NULLs in FKs, consistent formats, referential integrity across all 1
 """
 
 import json
+import os
 import pickle
+import random
+import struct
+import threading
 from pathlib import Path
-from typing import Dict, List, Set, Any, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Set, Any, Optional, Sequence, Tuple
 from datetime import datetime
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Guards lazy ID index builds (module level: the registry itself is pickled)
+_index_lock = threading.Lock()
+
+
+class IdPool:
+    """
+    Registered IDs of one type: append-only list + value -> position dict
+    Set-like (add, in, len, iteration) with O(1) random picks
+    """
+    
+    def __init__(self, ids: Iterable[str] = ()):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._array = None  # numpy view of ids for sample_array, extended lazily
+        for id_val in ids:
+            self.add(id_val)
+    
+    def add(self, id_val: str):
+        if id_val not in self.index:
+            self.index[id_val] = len(self.ids)
+            self.ids.append(id_val)
+    
+    def __contains__(self, id_val) -> bool:
+        return id_val in self.index
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+    
+    def copy(self) -> Set[str]:
+        return set(self.ids)
+    
+    def __getstate__(self):
+        return {'ids': self.ids}
+    
+    def __setstate__(self, state):
+        self.__init__(state['ids'])
+    
+    def sample(self, k: int = 1) -> List[str]:
+        """k random IDs, with replacement (FK picks may repeat)"""
+        if not self.ids:
+            return []
+        return random.choices(self.ids, k=k)
+    
+    def sample_array(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """n random IDs at once as an object array of str, with replacement"""
+        if not self.ids:
+            return np.array([], dtype=object)
+        if self._array is None or len(self._array) != len(self.ids):
+            array = np.empty(len(self.ids), dtype=object)
+            array[:] = self.ids
+            self._array = array
+        rng = rng or np.random.default_rng()
+        return self._array[rng.integers(0, len(self._array), size=n)]
+
+
+INVALID_CODE = np.iinfo(np.int32).min  # encode result for an unknown non-canonical ID (lookup only)
+
+# Registry snapshot: MAGIC, format version, header length, JSON header, then 64-byte aligned
+# fixed-width ID arrays in registration order, each followed by its sorting permutation (int32),
+# that every process memory-maps read-only
+SNAPSHOT_FILE = 'genims_registry.snapshot'
+SNAPSHOT_MAGIC = b'GENIMSRS'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_ALIGN = 64
+
+
+class IdCodec:
+    """
+    Lossless str <-> int32 codes for one ID type, driven by id_formats:
+    'MCH-000123' -> 123; IDs not of the form PREFIX-<width digits> are interned as negative codes
+    """
+    
+    def __init__(self, prefix: str, width: int):
+        self.prefix = f"{prefix}-"
+        self.width = width
+        self.length = len(self.prefix) + width
+        self.canonical = width <= 9  # Wider numbers do not fit int32: intern everything
+        self.interned: Dict[str, int] = {}
+        self.interned_ids: List[str] = []
+    
+    def encode(self, id_val: Any, intern: bool = True) -> int:
+        if self.canonical and id_val.__class__ is str and len(id_val) == self.length \
+                and id_val.startswith(self.prefix):
+            digits = id_val[len(self.prefix):]
+            if digits.isascii() and digits.isdigit():
+                return int(digits)
+        id_val = str(id_val)
+        code = self.interned.get(id_val)
+        if code is None:
+            if not intern:
+                return INVALID_CODE
+            self.interned_ids.append(id_val)
+            code = self.interned[id_val] = -len(self.interned_ids)
+        return code
+    
+    def decode(self, code: int) -> str:
+        if code >= 0:
+            return f"{self.prefix}{code:0{self.width}d}"
+        return self.interned_ids[-code - 1]
+    
+    def encode_array(self, values: Iterable, intern: bool = False) -> np.ndarray:
+        """int32 codes; without intern, unknown non-canonical IDs become INVALID_CODE"""
+        values = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=object)
+        codes = np.full(len(values), INVALID_CODE, dtype=np.int32)
+        if not len(values):
+            return codes
+        
+        # Canonical IDs decoded column-wise from the fixed-width code points of a str array
+        strings = values.astype(str)
+        max_len = strings.dtype.itemsize // 4
+        canonical = np.zeros(len(values), dtype=bool)
+        if self.canonical and max_len >= self.length:
+            points = strings.view(np.uint32).reshape(len(strings), max_len)
+            prefix = np.frombuffer(self.prefix.encode('utf-32-le'), dtype=np.uint32)
+            digits = points[:, len(self.prefix):self.length].astype(np.int64) - ord('0')
+            canonical = ((points[:, :len(self.prefix)] == prefix).all(axis=1)
+                         & ((digits >= 0) & (digits <= 9)).all(axis=1)
+                         & (points[:, self.length:] == 0).all(axis=1))
+            codes[canonical] = digits[canonical] @ (10 ** np.arange(self.width - 1, -1, -1, dtype=np.int64))
+        
+        encode = self.encode
+        for i in np.flatnonzero(~canonical):
+            codes[i] = encode(values[i], intern)
+        return codes
+    
+    def decode_array(self, codes: Iterable[int]) -> np.ndarray:
+        decode = self.decode
+        decoded = [decode(int(code)) for code in codes]
+        array = np.empty(len(decoded), dtype=object)
+        array[:] = decoded
+        return array
+
+
+class IntIdPool:
+    """
+    IdPool storing int32 codes (IdCodec): ~5 bytes per ID instead of a str + dict entry.
+    Membership is a bitmap over canonical codes (+ a small set of interned ones),
+    so FK checks are integer array lookups.
+    """
+    
+    def __init__(self, codec: IdCodec):
+        self.codec = codec
+        self._codes = np.empty(0, dtype=np.int32)
+        self._size = 0
+        self._member = np.zeros(0, dtype=bool)  # canonical code -> registered
+        self._interned = set()                   # registered negative (interned) codes
+    
+    def add(self, id_val: str):
+        code = self.codec.encode(id_val)
+        if code >= 0:
+            if code >= len(self._member):
+                member = np.zeros(max(code + 1, 2 * len(self._member)), dtype=bool)
+                member[:len(self._member)] = self._member
+                self._member = member
+            elif self._member[code]:
+                return
+            self._member[code] = True
+        elif code in self._interned:
+            return
+        else:
+            self._interned.add(code)
+        if self._size == len(self._codes):
+            codes = np.empty(max(1024, 2 * self._size), dtype=np.int32)
+            codes[:self._size] = self._codes[:self._size]
+            self._codes = codes
+        self._codes[self._size] = code
+        self._size += 1
+    
+    def extend(self, values: Iterable[str]):
+        """Bulk add (vectorized encode), keeping first-seen order"""
+        codes = self.codec.encode_array(values, intern=True)
+        _, first = np.unique(codes, return_index=True)
+        codes = codes[np.sort(first)]
+        codes = codes[~self.contains_codes(codes)]
+        if not len(codes):
+            return
+        canonical = codes[codes >= 0]
+        if len(canonical) and canonical.max() >= len(self._member):
+            member = np.zeros(max(int(canonical.max()) + 1, 2 * len(self._member)), dtype=bool)
+            member[:len(self._member)] = self._member
+            self._member = member
+        self._member[canonical] = True
+        self._interned.update(codes[codes < 0].tolist())
+        merged = np.empty(max(1024, 2 * (self._size + len(codes))), dtype=np.int32)
+        merged[:self._size] = self._codes[:self._size]
+        merged[self._size:self._size + len(codes)] = codes
+        self._codes = merged
+        self._size += len(codes)
+    
+    def codes(self) -> np.ndarray:
+        """Registered codes in registration order (a view: do not modify)"""
+        return self._codes[:self._size]
+    
+    def contains_codes(self, codes: np.ndarray) -> np.ndarray:
+        """Vectorized membership of int32 codes"""
+        found = np.zeros(len(codes), dtype=bool)
+        canonical = (codes >= 0) & (codes < len(self._member))
+        found[canonical] = self._member[codes[canonical]]
+        interned = codes < 0
+        if self._interned and interned.any():
+            found[interned] = np.isin(codes[interned], np.fromiter(self._interned, dtype=np.int32))
+        return found
+    
+    def __contains__(self, id_val) -> bool:
+        code = self.codec.encode(id_val, intern=False)
+        if code >= 0:
+            return code < len(self._member) and bool(self._member[code])
+        return code in self._interned
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __iter__(self) -> Iterator[str]:
+        return map(self.codec.decode, self.codes().tolist())
+    
+    def copy(self) -> Set[str]:
+        return set(self)
+    
+    def sample_codes(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """n random registered codes, with replacement"""
+        if not self._size:
+            return np.array([], dtype=np.int32)
+        rng = rng or np.random.default_rng()
+        return self.codes()[rng.integers(0, self._size, size=n)]
+    
+    def sample(self, k: int = 1) -> List[str]:
+        if not self._size:
+            return []
+        # Same draws as IdPool.sample (random.choices over positions): seeded picks match either pool
+        return [self.codec.decode(int(self._codes[pos])) for pos in random.choices(range(self._size), k=k)]
+    
+    def sample_array(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        return self.codec.decode_array(self.sample_codes(n, rng))
+
+
+class SnapshotIdPool:
+    """
+    Read-only IdPool over a memory-mapped ID array from a registry snapshot
+    (pages shared by every process mapping the file); IDs added later go to an in-memory overlay.
+    IDs keep the registration order of the IdPool the snapshot was written from, so seeded picks
+    match the registry rebuilt from JSON; membership searches through the sorting permutation.
+    """
+    
+    def __init__(self, base: np.ndarray, order: Optional[np.ndarray] = None):
+        self.base = base  # fixed-width bytes ('S<n>') in registration order, memory-mapped
+        self.order = np.argsort(base, kind='stable') if order is None else order  # base[order] is sorted
+        self.overlay = IdPool()
+    
+    def __reduce__(self):
+        # Pickles (registry.save) hold plain IdPools, not a reference to the mapped file
+        return IdPool, (list(self),)
+    
+    def _in_base(self, id_val) -> bool:
+        if not len(self.base) or id_val.__class__ is not str:
+            return False
+        key = id_val.encode('utf-8')
+        if len(key) > self.base.dtype.itemsize:
+            return False
+        pos = int(np.searchsorted(self.base, key, sorter=self.order))
+        return pos < len(self.base) and self.base[self.order[pos]] == key
+    
+    def add(self, id_val: str):
+        if not self._in_base(id_val):
+            self.overlay.add(id_val)
+    
+    def __contains__(self, id_val) -> bool:
+        return self._in_base(id_val) or id_val in self.overlay
+    
+    def __len__(self) -> int:
+        return len(self.base) + len(self.overlay)
+    
+    def __iter__(self) -> Iterator[str]:
+        for key in self.base.tolist():
+            yield key.decode('utf-8')
+        yield from self.overlay
+    
+    def copy(self) -> Set[str]:
+        return set(self)
+    
+    def _decode(self, positions: np.ndarray) -> np.ndarray:
+        decoded = np.empty(len(positions), dtype=object)
+        in_base = positions < len(self.base)
+        decoded[in_base] = [key.decode('utf-8') for key in self.base[positions[in_base]].tolist()]
+        decoded[~in_base] = [self.overlay.ids[pos - len(self.base)] for pos in positions[~in_base].tolist()]
+        return decoded
+    
+    def sample(self, k: int = 1) -> List[str]:
+        if not len(self):
+            return []
+        # Same draws as IdPool.sample (random.choices over positions): seeded picks match either pool
+        return self._decode(np.array(random.choices(range(len(self)), k=k), dtype=np.int64)).tolist()
+    
+    def sample_array(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        if not len(self):
+            return np.array([], dtype=object)
+        rng = rng or np.random.default_rng()
+        return self._decode(rng.integers(0, len(self), size=n))
+
 
 class DataRegistry:
     """
@@ -21,10 +328,15 @@ class DataRegistry:
     Coordinates ID generation, format consistency, and referential integrity
     """
     
-    def __init__(self, root_path: Optional[Path] = None):
+    def __init__(self, root_path: Optional[Path] = None, int_ids: Optional[bool] = None):
         self.root_path = Path(root_path or Path(__file__).parent.parent)
         self.master_dir = self.root_path / "Data Scripts" / "01 - Base Data"
         
+        # Integer-interned IDs: registered IDs kept as int32 codes (REGISTRY_INT_IDS=true)
+        if int_ids is None:
+            int_ids = os.getenv('REGISTRY_INT_IDS', 'false').lower() == 'true'
+        self.int_ids = int_ids
+        
         # ID counters for all entities
         self.id_counters = {
             'factory': 0,
@@ -46,25 +358,25 @@ class DataRegistry:
             'quality_check': 0,
         }
         
-        # Registered IDs (master data source of truth)
+        # Registered IDs (master data source of truth), append-only pools for O(1) random FK picks
         self.registered_ids = {
-            'factory_id': set(),
-            'line_id': set(),
-            'machine_id': set(),
-            'sensor_id': set(),
-            'employee_id': set(),
-            'shift_id': set(),
-            'product_id': set(),
-            'customer_id': set(),
-            'supplier_id': set(),
-            'material_id': set(),
-            'bom_id': set(),
-            'work_order_id': set(),
-            'sales_order_id': set(),
-            'purchase_order_id': set(),
-            'maintenance_event_id': set(),
-            'service_request_id': set(),
-            'quality_check_id': set(),
+            'factory_id': IdPool(),
+            'line_id': IdPool(),
+            'machine_id': IdPool(),
+            'sensor_id': IdPool(),
+            'employee_id': IdPool(),
+            'shift_id': IdPool(),
+            'product_id': IdPool(),
+            'customer_id': IdPool(),
+            'supplier_id': IdPool(),
+            'material_id': IdPool(),
+            'bom_id': IdPool(),
+            'work_order_id': IdPool(),
+            'sales_order_id': IdPool(),
+            'purchase_order_id': IdPool(),
+            'maintenance_event_id': IdPool(),
+            'service_request_id': IdPool(),
+            'quality_check_id': IdPool(),
         }
         
         # ID format definitions
@@ -88,6 +400,11 @@ class DataRegistry:
             'quality_check_id': ('QC', 6),      # QC-000001
         }
         
+        # str <-> int32 codecs per ID type; int mode swaps the registered pools for code pools
+        self.codecs = {id_column: IdCodec(prefix, width) for id_column, (prefix, width) in self.id_formats.items()}
+        if self.int_ids:
+            self.registered_ids = {id_column: IntIdPool(self.codecs[id_column]) for id_column in self.registered_ids}
+        
         # FK relationships: (source_table, source_col) -> (target_col, required)
         self.fk_mappings = {
             'genims_master_db': {
@@ -169,6 +486,35 @@ class DataRegistry:
         # Master data cache
         self.master_data_cache = {}
         self.is_finalized = False
+        
+        # Sorted ID arrays for bulk FK checks: id_column -> (set size when built, array)
+        self._id_indexes = {}
+        
+        # Schema-derived FK graph (fk_graph.FKGraph) and the IDs of the tables its edges point at:
+        # 'db.table.column' -> sorted unique array
+        self.fk_graph = None
+        self.table_ids = {}
+        self.fk_target_dbs = set()
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Derived data, rebuilt on demand
+        for attr in ('_id_indexes', 'fk_graph', 'table_ids', 'fk_target_dbs'):
+            state.pop(attr, None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Registries pickled before IdPool hold plain sets
+        self.registered_ids = {id_column: ids if isinstance(ids, (IdPool, IntIdPool, SnapshotIdPool)) else IdPool(sorted(ids))
+                               for id_column, ids in self.registered_ids.items()}
+        self.__dict__.setdefault('int_ids', False)
+        if 'codecs' not in self.__dict__:
+            self.codecs = {id_column: IdCodec(prefix, width) for id_column, (prefix, width) in self.id_formats.items()}
+        self._id_indexes = {}
+        self.fk_graph = None
+        self.table_ids = {}
+        self.fk_target_dbs = set()
     
     def generate_id(self, id_type: str) -> str:
         """Generate next ID for given type"""
@@ -222,11 +568,50 @@ class DataRegistry:
             self.registered_ids[id_column].add(id_val)
     
     def get_registered_ids(self, id_type: str) -> Set[str]:
-        """Get all registered IDs of given type"""
+        """Get all registered IDs of given type (a copy - use sample/sample_array for random picks)"""
+        return self.id_pool(id_type).copy()
+    
+    def id_pool(self, id_type: str):
+        """The registry's own pool of an ID type (not copied: do not modify)"""
         id_column = f"{id_type}_id"
         if id_column not in self.registered_ids:
             raise ValueError(f"Unknown ID type: {id_type}")
-        return self.registered_ids[id_column].copy()
+        return self.registered_ids[id_column]
+    
+    def sample(self, id_type: str, k: int = 1) -> List[str]:
+        """k random registered IDs of a type, O(1) per pick"""
+        return self.id_pool(id_type).sample(k)
+    
+    def sample_array(self, id_type: str, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """n random registered IDs of a type in one vectorized draw"""
+        return self.id_pool(id_type).sample_array(n, rng)
+    
+    def sample_codes(self, id_type: str, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """n random registered IDs as int32 codes (decode_ids turns them back into ID strings)"""
+        pool = self.id_pool(id_type)
+        if isinstance(pool, IntIdPool):
+            return pool.sample_codes(n, rng)
+        return self.encode_ids(id_type, pool.sample_array(n, rng))
+    
+    def codec(self, id_type: str) -> IdCodec:
+        id_column = f"{id_type}_id"
+        if id_column not in self.codecs:
+            raise ValueError(f"Unknown ID type: {id_type}")
+        return self.codecs[id_column]
+    
+    def encode_id(self, id_type: str, id_val: str) -> int:
+        return self.codec(id_type).encode(id_val)
+    
+    def decode_id(self, id_type: str, code: int) -> str:
+        return self.codec(id_type).decode(code)
+    
+    def encode_ids(self, id_type: str, values: Iterable[str]) -> np.ndarray:
+        """int32 codes for ID strings (non-canonical IDs are interned)"""
+        return self.codec(id_type).encode_array(values, intern=True)
+    
+    def decode_ids(self, id_type: str, codes: Iterable[int]) -> np.ndarray:
+        """ID strings for int32 codes, as an object array"""
+        return self.codec(id_type).decode_array(codes)
     
     def validate_fk(self, db_name: str, table_name: str, column_name: str, value: Any) -> bool:
         """Check if FK value is valid"""
@@ -244,17 +629,127 @@ class DataRegistry:
             return True  # No mapping for this column
         
         target_id_type = self.fk_mappings[db_name][table_name][column_name][0]
-        target_id_type_base = target_id_type.replace('_id', '')
+        if target_id_type not in self.registered_ids:
+            raise ValueError(f"Unknown ID type: {target_id_type}")
+        
+        return value in self.registered_ids[target_id_type]
+    
+    def fk_rules(self, db_name: str) -> Dict[str, Dict[str, Tuple[str, bool]]]:
+        """
+        FK rules for a database: the hand-listed fk_mappings (also matching suffixed deployments,
+        genims_erp_db_try -> genims_erp_db) plus every fk_graph edge they do not already cover.
+        Graph targets are keyed 'db.table.column' (see register_table_ids).
+        """
+        rules = self.fk_mappings.get(db_name)
+        if rules is None:
+            rules = next((mapped for mapped_db, mapped in self.fk_mappings.items()
+                          if db_name.startswith(f"{mapped_db}_")), {})
+        if self.fk_graph is None:
+            return rules
+        
+        rules = {table_name: dict(columns) for table_name, columns in rules.items()}
+        for table_name, columns in self.fk_graph.rules(db_name).items():
+            table_rules = rules.setdefault(table_name, {})
+            for column, target in columns.items():
+                table_rules.setdefault(column, (self.table_key(target['db'], target['table'], target['column']),
+                                                target['required']))
+        return rules
+    
+    @staticmethod
+    def table_key(db_name: str, table_name: str, column: str) -> str:
+        return f"{db_name}.{table_name}.{column}"
+    
+    def register_table_ids(self, db_name: str, table_name: str, column: str, values: Sequence):
+        """Register the key values of a table that schema FKs point at"""
+        column_values = np.asarray(values, dtype=object)
+        present = column_values[~np.equal(column_values, None)].astype(str)
+        with _index_lock:
+            self.table_ids[self.table_key(db_name, table_name, column)] = np.unique(present)
+    
+    def has_ids(self, id_column: str) -> bool:
+        """True if FK values can be checked against this target (registered type or registered table)"""
+        return id_column in self.registered_ids or id_column in self.table_ids
+    
+    def id_index(self, id_column: str) -> np.ndarray:
+        """Sorted array of registered IDs for bulk membership checks (rebuilt when IDs are added)"""
+        table_index = self.table_ids.get(id_column)
+        if table_index is not None:
+            return table_index
+        ids = self.registered_ids[id_column]
+        with _index_lock:
+            cached = self._id_indexes.get(id_column)
+            if cached is None or cached[0] != len(ids):
+                index = np.sort(np.array(list(ids), dtype=object).astype(str)) if ids else np.array([], dtype=str)
+                cached = (len(ids), index)
+                self._id_indexes[id_column] = cached
+        return cached[1]
+    
+    def check_fk_column(self, values: Sequence, id_column: str, required: bool,
+                        sample_size: int = 5) -> Dict[str, Any]:
+        """
+        Vectorized check of one FK column against the registered IDs
+        Returns counts plus a few sample offenders as (row, value)
+        """
+        column = np.asarray(values, dtype=object)
+        nulls = np.equal(column, None)
+        null_rows = np.flatnonzero(nulls) if required else np.array([], dtype=np.intp)
+        
+        present_rows = np.flatnonzero(~nulls)
+        pool = self.registered_ids.get(id_column)
+        if isinstance(pool, IntIdPool):
+            # Integer mode: encode once, then pure int32 bitmap lookups
+            present = column[present_rows]
+            invalid = ~pool.contains_codes(pool.codec.encode_array(present))
+        else:
+            present = column[present_rows].astype(str)
+            index = self.id_index(id_column)
+            if len(index):
+                pos = np.minimum(np.searchsorted(index, present), len(index) - 1)
+                invalid = index[pos] != present
+            else:
+                invalid = np.ones(len(present), dtype=bool)
+        invalid_rows = present_rows[invalid]
+        
+        # First occurrence of each distinct offender, in row order
+        _, first = np.unique(present[invalid].astype(str), return_index=True)
+        sample_rows = np.sort(invalid_rows[first])[:sample_size]
         
-        return value in self.get_registered_ids(target_id_type_base)
+        return {
+            'rows': len(column),
+            'nulls': len(null_rows),
+            'invalid': len(invalid_rows),
+            'null_samples': null_rows[:sample_size].tolist(),
+            'samples': [(int(row), column[row]) for row in sample_rows],
+        }
+    
+    def validate_table_columns(self, db_name: str, table_name: str,
+                               columns: Dict[str, Sequence], sample_size: int = 5) -> List[Dict[str, Any]]:
+        """Check a table's FK columns (column name -> values); returns one report per violating column"""
+        violations = []
+        for fk_col, (target_col, is_required) in self.fk_rules(db_name).get(table_name, {}).items():
+            if fk_col not in columns or not self.has_ids(target_col):
+                continue
+            result = self.check_fk_column(columns[fk_col], target_col, is_required, sample_size)
+            if result['nulls'] or result['invalid']:
+                violations.append(dict(result, table=table_name, column=fk_col, target=target_col))
+        return violations
+    
+    @staticmethod
+    def format_violation(db_name: str, violation: Dict[str, Any]) -> str:
+        """One-line summary of a validate_table_columns report"""
+        where = f"{db_name}.{violation['table']}.{violation['column']}"
+        parts = []
+        if violation['nulls']:
+            parts.append(f"{violation['nulls']} NULL (required FK, rows {violation['null_samples']})")
+        if violation['invalid']:
+            samples = ', '.join(f"[{row}]={value}" for row, value in violation['samples'])
+            parts.append(f"{violation['invalid']} not in registered {violation['target']} values (e.g. {samples})")
+        return f"{where}: {'; '.join(parts)} of {violation['rows']} rows"
     
     def get_random_fk(self, id_type: str) -> Optional[str]:
         """Get random valid FK value"""
-        import random
-        registered = self.get_registered_ids(id_type)
-        if not registered:
-            return None
-        return random.choice(list(registered))
+        picked = self.sample(id_type)
+        return picked[0] if picked else None
     
     def ensure_no_null_fk(self, record: Dict, db_name: str, table_name: str) -> Dict:
         """
@@ -291,6 +786,120 @@ class DataRegistry:
         logger.info(f"Registry finalized with {len(self.registered_ids)} ID types")
         logger.info(f"Total registered IDs: {sum(len(ids) for ids in self.registered_ids.values())}")
     
+    def next_ids(self) -> Dict[str, int]:
+        """Next free number per ID prefix (e.g. {'FAC': 5}), above both the counters and every registered ID"""
+        next_ids = {}
+        for id_column, (prefix, _) in self.id_formats.items():
+            pool = self.registered_ids.get(id_column)
+            if isinstance(pool, IntIdPool):
+                codes = pool.codes()
+            elif isinstance(pool, SnapshotIdPool) and not len(pool.overlay):
+                codes = self.codecs[id_column].encode_array(np.char.decode(pool.base, 'utf-8').astype(object))
+            else:
+                codes = self.codecs[id_column].encode_array(list(pool or ()))
+            highest = int(codes.max()) if len(codes) else 0
+            next_ids[prefix] = max(highest, self.id_counters.get(id_column[:-3], 0)) + 1
+        return next_ids
+    
+    # ------------------------------------------------------------------
+    # Memory-mapped snapshot: finalized once, mapped read-only by every generator process
+    # ------------------------------------------------------------------
+    
+    def snapshot_sources(self) -> Dict[str, Optional[List[int]]]:
+        """[size, mtime_ns] of the files the registry is derived from (None if missing)"""
+        sources = {}
+        for path in (self.master_dir / 'genims_master_data.json',
+                     self.root_path / 'Data Scripts' / '04 - ERP & MES Integration' / 'genims_erp_data.json'):
+            try:
+                st = path.stat()
+                sources[str(path.relative_to(self.root_path))] = [st.st_size, st.st_mtime_ns]
+            except OSError:
+                sources[str(path.relative_to(self.root_path))] = None
+        return sources
+    
+    def write_snapshot(self, snapshot_file: Optional[Path] = None) -> Path:
+        """Write ID arrays per type (registration order + sorting permutation) and counters into a
+        versioned binary snapshot (atomic)"""
+        snapshot_file = Path(snapshot_file or self.master_dir / SNAPSHOT_FILE)
+        arrays, types = [], {}
+        for id_column, pool in self.registered_ids.items():
+            keys = [id_val.encode('utf-8') for id_val in map(str, pool)]
+            array = np.array(keys, dtype=f"S{max(1, max(map(len, keys), default=1))}")
+            arrays.append((id_column, array, np.argsort(array, kind='stable').astype(np.int32)))
+        
+        header = {
+            'version': SNAPSHOT_VERSION,
+            'sources': self.snapshot_sources(),
+            'id_counters': self.id_counters,
+            'next_ids': self.next_ids(),
+            'types': types,
+        }
+        # Offsets depend on the header size; a fixed-point pass settles them
+        header_len = 0
+        while True:
+            offset = self._align(len(SNAPSHOT_MAGIC) + 8 + header_len)
+            for id_column, array, order in arrays:
+                types[id_column] = {'offset': offset, 'count': len(array), 'itemsize': array.dtype.itemsize}
+                offset = self._align(offset + array.nbytes)
+                types[id_column]['order_offset'] = offset
+                offset = self._align(offset + order.nbytes)
+            encoded = json.dumps(header).encode('utf-8')
+            if len(encoded) == header_len:
+                break
+            header_len = len(encoded)
+        
+        tmp_file = snapshot_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack('<II', SNAPSHOT_VERSION, header_len) + encoded)
+            for id_column, array, order in arrays:
+                f.write(b'\0' * (types[id_column]['offset'] - f.tell()))
+                f.write(array.tobytes())
+                f.write(b'\0' * (types[id_column]['order_offset'] - f.tell()))
+                f.write(order.tobytes())
+        os.replace(tmp_file, snapshot_file)
+        logger.info(f"Registry snapshot written to {snapshot_file}")
+        return snapshot_file
+    
+    @staticmethod
+    def _align(offset: int) -> int:
+        return -(-offset // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+    
+    @classmethod
+    def open_snapshot(cls, root_path: Optional[Path] = None, snapshot_file: Optional[Path] = None,
+                      int_ids: Optional[bool] = None) -> Optional['DataRegistry']:
+        """Registry backed by a memory-mapped snapshot; None if missing, another version or stale"""
+        registry = cls(root_path, int_ids=int_ids)
+        snapshot_file = Path(snapshot_file or registry.master_dir / SNAPSHOT_FILE)
+        try:
+            with open(snapshot_file, 'rb') as f:
+                preamble = f.read(len(SNAPSHOT_MAGIC) + 8)
+                if preamble[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                    return None
+                version, header_len = struct.unpack('<II', preamble[len(SNAPSHOT_MAGIC):])
+                if version != SNAPSHOT_VERSION:
+                    return None
+                header = json.loads(f.read(header_len))
+        except (OSError, ValueError, struct.error):
+            return None
+        if header.get('sources') != registry.snapshot_sources():
+            return None
+        
+        mapped = np.memmap(snapshot_file, dtype=np.uint8, mode='r')
+        for id_column, info in header['types'].items():
+            if id_column not in registry.registered_ids:
+                continue
+            end = info['offset'] + info['count'] * info['itemsize']
+            base = mapped[info['offset']:end].view(f"S{info['itemsize']}")
+            if registry.int_ids:
+                registry.registered_ids[id_column].extend(np.char.decode(base, 'utf-8').astype(object))
+            else:
+                order_end = info['order_offset'] + info['count'] * 4
+                order = mapped[info['order_offset']:order_end].view(np.int32)
+                registry.registered_ids[id_column] = SnapshotIdPool(base, order)
+        registry.id_counters.update(header.get('id_counters', {}))
+        registry.is_finalized = True
+        return registry
+    
     def _load_from_json_files(self):
         """Load and register all master data from JSON files.
         
@@ -322,26 +931,31 @@ class DataRegistry:
                     self.register_master_ids(entity_type, master_data[json_key])
         
         # Load ERP generated data (suppliers, materials, BOMs)
-        erp_file = self.root_path / 'Data Scripts' / '04 - ERP & MES Integration' / 'genims_erp_data.json'
-        if erp_file.exists():
-            try:
-                with open(erp_file, 'r') as f:
-                    erp_data = json.load(f)
-                
-                if erp_data.get('suppliers'):
-                    self.register_master_ids('supplier', erp_data['suppliers'])
-                if erp_data.get('materials'):
-                    self.register_master_ids('material', erp_data['materials'])
-                
-                # BOMs can be under 'boms' or 'bill_of_materials' key
-                boms = erp_data.get('boms') or erp_data.get('bill_of_materials', [])
-                if boms:
-                    self.register_master_ids('bom', boms)
-            except Exception as e:
-                logger.warning(f"Could not load ERP data for registry: {e}")
+        self.register_erp_data()
         
         self.finalize()
     
+    def register_erp_data(self, erp_file: Optional[Path] = None):
+        """(Re-)register the ERP master pools (suppliers, materials, BOMs) from the ERP generator's output"""
+        erp_file = erp_file or self.root_path / 'Data Scripts' / '04 - ERP & MES Integration' / 'genims_erp_data.json'
+        if not Path(erp_file).exists():
+            return
+        try:
+            from columnar_store import load_dataset  # Also reads GENERATOR_OUTPUT shard manifests
+            erp_data = load_dataset(erp_file)
+            
+            # BOMs can be under 'boms' or 'bill_of_materials' key
+            tables = {'supplier': erp_data.get('suppliers'), 'material': erp_data.get('materials'),
+                      'bom': erp_data.get('boms') or erp_data.get('bill_of_materials')}
+            for entity_type, records in tables.items():
+                id_column = f"{entity_type}_id"
+                # Replace the pool: a registry built before this ERP run holds the previous run's IDs
+                self.registered_ids[id_column] = IntIdPool(self.codecs[id_column]) if self.int_ids else IdPool()
+                self._id_indexes.pop(id_column, None)
+                self.register_master_ids(entity_type, records)
+        except Exception as e:
+            logger.warning(f"Could not load ERP data for registry: {e}")
+    
     def save(self):
         """Save registry to pickle file (DEPRECATED - kept for backward compatibility)"""
         registry_file = self.master_dir / 'genims_data_registry.pkl'
@@ -365,38 +979,20 @@ class DataRegistry:
     def validate_dataset(self, db_name: str, data: Dict[str, List[Dict]]) -> List[str]:
         """
         Validate entire dataset for FK integrity
-        Returns list of validation errors (empty if valid)
+        Returns list of validation errors (empty if valid), one per violating FK column
         """
         errors = []
         
-        if db_name not in self.fk_mappings:
-            return errors
-        
-        db_fk_rules = self.fk_mappings[db_name]
-        
-        for table_name, fk_rules in db_fk_rules.items():
-            if table_name not in data:
+        for table_name, fk_rules in self.fk_rules(db_name).items():
+            records = data.get(table_name)
+            if not isinstance(records, list) or not records:
                 continue
             
-            records = data[table_name]
-            if not isinstance(records, list):
-                continue
-            
-            for idx, record in enumerate(records):
-                for fk_col, (_, is_required) in fk_rules.items():
-                    fk_value = record.get(fk_col)
-                    
-                    if fk_value is None and is_required:
-                        errors.append(
-                            f"{db_name}.{table_name}[{idx}].{fk_col} is NULL (required FK)"
-                        )
-                    elif fk_value is not None:
-                        target_id_type = fk_col.replace('_id', '')
-                        if not self.validate_fk(db_name, table_name, fk_col, fk_value):
-                            errors.append(
-                                f"{db_name}.{table_name}[{idx}].{fk_col}={fk_value} is invalid "
-                                f"(not in registered {target_id_type}_id values)"
-                            )
+            # Only columns the generator actually emits for this table are checked
+            columns = {fk_col: [record.get(fk_col) for record in records]
+                       for fk_col in fk_rules if fk_col in records[0]}
+            for violation in self.validate_table_columns(db_name, table_name, columns):
+                errors.append(self.format_violation(db_name, violation))
         
         return errors
 
@@ -408,13 +1004,21 @@ _registry_instance = None
 def get_registry(root_path: Optional[Path] = None) -> DataRegistry:
     """Get or create global registry instance.
     
-    Registry is always built fresh from master data JSON files to avoid cache invalidation.
-    No pickle persistence needed since registry is stateless (derived from data files).
+    Maps the registry snapshot when it is current (same size + mtime of the master and ERP
+    JSON files it was built from); otherwise builds fresh from those files and rewrites the snapshot.
     """
     global _registry_instance
     if _registry_instance is None:
-        _registry_instance = DataRegistry(root_path)
-        _registry_instance._load_from_json_files()
+        registry = DataRegistry.open_snapshot(root_path)
+        if registry is None:
+            registry = DataRegistry(root_path)
+            registry._load_from_json_files()
+            if any(registry.snapshot_sources().values()):
+                try:
+                    registry.write_snapshot()
+                except OSError as e:
+                    logger.warning(f"Could not write registry snapshot: {e}")
+        _registry_instance = registry
     return _registry_instance
 
 
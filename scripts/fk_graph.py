@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+GenIMS FK Graph
+Compiles every foreign-key relationship across the GenIMS databases from
+  - the schema files: inline/table-level REFERENCES clauses and the
+    '-- FK to <table>' column comments the schemas use instead
+  - Ontologies & Relationships/ATTRIBUTE_RELATIONSHIPS.json
+into edges db -> table -> column -> target {db, table, column, required}.
+Ontology relationships naming a table or column no schema has are skipped and counted.
+The compiled graph is cached on disk and recompiled when any source file's hash changes.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from generator_cache import FileDigests
+
+ONTOLOGY_RELATIONSHIPS = 'Ontologies & Relationships/ATTRIBUTE_RELATIONSHIPS.json'
+GRAPH_VERSION = 2  # Bump when the parser changes so cached graphs are recompiled
+
+_TABLE_RE = re.compile(r'CREATE TABLE (?:IF NOT EXISTS )?(\w+)\s*\((.*?)\n\);', re.S | re.I)
+_COLUMN_RE = re.compile(r'^(\w+)\s+\w+')
+_INLINE_REF_RE = re.compile(r'REFERENCES\s+(\w+)\s*\(\s*(\w+)\s*\)', re.I)
+_TABLE_FK_RE = re.compile(r'FOREIGN KEY\s*\(\s*(\w+)\s*\)\s*REFERENCES\s+(\w+)\s*\(\s*(\w+)\s*\)', re.I)
+_TABLE_PK_RE = re.compile(r'^PRIMARY KEY\s*\(\s*(\w+)\s*\)', re.I)
+_FK_COMMENT_RE = re.compile(r'--\s*FK to (\w+)(?:\s*\([^)]*\))?\s*$', re.I)
+_CONSTRAINT_WORDS = {'PRIMARY', 'FOREIGN', 'UNIQUE', 'CONSTRAINT', 'CHECK', 'EXCLUDE'}
+
+
+def parse_schema(sql: str) -> Dict[str, Dict]:
+    """
+    Tables of one schema file:
+    table -> {'pk': column or None, 'columns': {column: not_null}, 'refs': [(column, table, column or None)]}
+    """
+    tables = {}
+    for table_name, body in _TABLE_RE.findall(sql):
+        table = {'pk': None, 'columns': {}, 'refs': []}
+        for raw_line in body.splitlines():
+            code, _, comment = raw_line.partition('--')
+            line = code.strip().rstrip(',')
+            if not line:
+                continue
+            if line.split()[0].upper() in _CONSTRAINT_WORDS:
+                fk = _TABLE_FK_RE.search(line)
+                if fk:
+                    table['refs'].append((fk.group(1), fk.group(2), fk.group(3)))
+                pk = _TABLE_PK_RE.match(line)
+                if pk and table['pk'] is None:
+                    table['pk'] = pk.group(1)
+                continue
+            match = _COLUMN_RE.match(line)
+            if not match:
+                continue
+            column = match.group(1)
+            upper = line.upper()
+            table['columns'][column] = 'NOT NULL' in upper or 'PRIMARY KEY' in upper
+            if 'PRIMARY KEY' in upper and table['pk'] is None:
+                table['pk'] = column
+            ref = _INLINE_REF_RE.search(line)
+            if ref:
+                table['refs'].append((column, ref.group(1), ref.group(2)))
+            else:
+                # '-- FK to factories/warehouses' is ambiguous and does not match
+                fk_comment = _FK_COMMENT_RE.search(f"--{comment}") if comment else None
+                if fk_comment:
+                    table['refs'].append((column, fk_comment.group(1), None))
+        tables[table_name] = table
+    return tables
+
+
+class FKGraph:
+    """Compiled FK edges for a set of databases (schema_files is ordered; the first database is the master)"""
+
+    def __init__(self, edges: Dict[str, Dict[str, Dict[str, Dict]]], skipped: Optional[Dict[str, int]] = None):
+        self.edges = edges
+        self.skipped = skipped or {}  # Ontology relationships not applied: reason -> count
+
+    def rules(self, db_name: str) -> Dict[str, Dict[str, Dict]]:
+        """table -> column -> target for one database"""
+        return self.edges.get(db_name, {})
+
+    def target_columns(self, db_name: str) -> Dict[str, str]:
+        """Tables of db_name that FKs anywhere point at: table -> referenced column"""
+        targets = {}
+        for tables in self.edges.values():
+            for columns in tables.values():
+                for target in columns.values():
+                    if target['db'] == db_name:
+                        targets[target['table']] = target['column']
+        return targets
+
+    def edge_count(self) -> int:
+        return sum(len(columns) for tables in self.edges.values() for columns in tables.values())
+
+    def skipped_count(self) -> int:
+        return sum(self.skipped.values())
+
+    @staticmethod
+    def compile(schemas: Dict[str, Dict[str, Dict]], relationships: List[Dict]) -> Tuple[Dict, Dict[str, int]]:
+        """
+        Resolve parsed schemas + ontology relationships into (edges, skipped): skipped counts the
+        ontology relationships whose tables ('missing_table') or columns ('missing_column') no schema has
+        """
+        dbs = list(schemas)
+        owners = {}
+        for db_name, tables in schemas.items():
+            for table_name in tables:
+                owners.setdefault(table_name, []).append(db_name)
+
+        def resolve(db_name: str, table_name: str) -> Optional[str]:
+            """Owning database of a referenced table: same db, else master, else the only owner"""
+            candidates = owners.get(table_name, [])
+            if db_name in candidates:
+                return db_name
+            if dbs and dbs[0] in candidates:
+                return dbs[0]
+            return candidates[0] if len(candidates) == 1 else None
+
+        edges = {}
+        skipped = {'missing_table': 0, 'missing_column': 0}
+
+        def add_edge(db_name, table_name, column, target_table, target_column, source) -> Optional[str]:
+            """Add one edge; the reason it was not added, if it could not be resolved"""
+            target_db = resolve(db_name, target_table)
+            if target_db is None:
+                return 'missing_table'
+            target = schemas[target_db][target_table]
+            target_column = target_column or target['pk']
+            if target_column not in target['columns']:
+                return 'missing_column'
+            if (target_db, target_table, target_column) == (db_name, table_name, column):
+                return None
+            columns = edges.setdefault(db_name, {}).setdefault(table_name, {})
+            columns.setdefault(column, {
+                'db': target_db,
+                'table': target_table,
+                'column': target_column,
+                'required': schemas[db_name][table_name]['columns'].get(column, False),
+                'source': source,
+            })
+            return None
+
+        for db_name, tables in schemas.items():
+            for table_name, table in tables.items():
+                for column, target_table, target_column in table['refs']:
+                    add_edge(db_name, table_name, column, target_table, target_column, 'schema')
+
+        # Ontology relationships name tables only: apply them wherever the source table has the column
+        for rel in relationships:
+            source_dbs = owners.get(rel.get('source_table'), [])
+            if not source_dbs:
+                skipped['missing_table'] += 1
+                continue
+            reasons = []
+            for db_name in source_dbs:
+                if rel.get('source_field') not in schemas[db_name][rel['source_table']]['columns']:
+                    reasons.append('missing_column')
+                    continue
+                reasons.append(add_edge(db_name, rel['source_table'], rel['source_field'],
+                                        rel.get('target_table'), rel.get('target_field'), 'ontology'))
+            if None not in reasons:
+                skipped[reasons[0]] += 1
+
+        return edges, skipped
+
+    @classmethod
+    def load(cls, root_path: Path, schema_files: Dict[str, str],
+             cache_file: Optional[Path] = None) -> 'FKGraph':
+        """Compiled graph from cache if no source file changed, otherwise parse, compile and cache"""
+        root_path = Path(root_path)
+        cache_file = Path(cache_file or root_path / '.genims_cache' / 'fk_graph.json')
+        relationships_file = root_path / ONTOLOGY_RELATIONSHIPS
+
+        cached, memo = {}, {}
+        if cache_file.exists():
+            try:
+                with open(cache_file, 'r') as f:
+                    cached = json.load(f)
+                memo = cached.get('digests', {})
+            except (OSError, ValueError):
+                cached = {}
+        digests = FileDigests(memo)
+
+        h = hashlib.sha256(f"v{GRAPH_VERSION}\n".encode())
+        for db_name, schema_file in schema_files.items():
+            h.update(f"schema:{db_name}:{schema_file}:{digests.digest(root_path / schema_file)}\n".encode())
+        h.update(f"ontology:{digests.digest(relationships_file)}\n".encode())
+        key = h.hexdigest()
+        if cached.get('key') == key:
+            return cls(cached['edges'], cached.get('skipped'))
+
+        schemas = {}
+        for db_name, schema_file in schema_files.items():
+            schema_path = root_path / schema_file
+            schemas[db_name] = parse_schema(schema_path.read_text()) if schema_path.exists() else {}
+        relationships = []
+        if relationships_file.exists():
+            with open(relationships_file, 'r') as f:
+                relationships = json.load(f)
+        edges, skipped = cls.compile(schemas, relationships)
+
+        # Atomic cache write (tmp file + rename)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump({'key': key, 'edges': edges, 'skipped': skipped, 'digests': digests.snapshot()}, f, indent=2)
+        os.replace(tmp_file, cache_file)
+        return cls(edges, skipped)
@@ -8,6 +8,7 @@ Ensures referential integrity across all 13 databases and 268 tables
 
 import os
 import sys
+import io
 import json
 import psycopg2
 import subprocess
@@ -16,14 +17,24 @@ from datetime import datetime
 import logging
 from dotenv import load_dotenv
 import asyncio
+import argparse
 import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import threading
+from functools import partial
 
 # Import registry for validation
 sys.path.insert(0, str(Path(__file__).parent))
 from data_registry import DataRegistry, get_registry
+from json_stream import iter_table_chunks
+from copy_binary import BINARY_ENCODERS
+from table_encoder import TableEncoder, format_text
+from table_writer import read_manifest, iter_shard_chunks, iter_shard_records, shard_paths, open_shard
+from generator_cache import GeneratorCache
+from setup_checkpoint import SetupCheckpoint
+from fk_graph import FKGraph
+from history_slice import SLICE_KEY, delete_statements, read_slice, slice_path
 
 # Load config.env file from scripts directory
 env_path = Path(__file__).parent / 'config.env'
@@ -51,6 +62,8 @@ DB_PASSWORD = os.getenv('POSTGRES_PASSWORD', 'postgres')
 DB_ADMIN_DB = 'postgres'  # Admin database name (not user)
 
 # Database configurations with generators for all 13 databases
+# 'depends_on': databases whose generator output this database's generator reads
+# (master data is always generated first, in step 3a, so it is not listed)
 DATABASES = {
     'genims_master_db_try': {
         'schema_file': 'Data Scripts/01 - Base Data/genims_schema.sql',
@@ -85,7 +98,8 @@ DATABASES = {
         'generators': [
             ('Data Scripts/04 - ERP & MES Integration/generate_erp_historical_data.py', 'Data Scripts/04 - ERP & MES Integration/genims_erp_data.json'),
         ],
-        'data_file': 'Data Scripts/04 - ERP & MES Integration/genims_erp_data.json'
+        'data_file': 'Data Scripts/04 - ERP & MES Integration/genims_erp_data.json',
+        'depends_on': ['genims_manufacturing_db_try']  # reads genims_mes_data.json
     },
     'genims_financial_db_try': {
         'schema_file': 'Data Scripts/10 - Financial Accounting & ERP <> WMS Sync/genims_financial_enhanced.sql',
@@ -106,28 +120,32 @@ DATABASES = {
         'generators': [
             ('Data Scripts/05 - WMS + TMS/generate_wms_tms_historical_data.py', 'Data Scripts/05 - WMS + TMS/genims_wms_data.json'),
         ],
-        'data_file': 'Data Scripts/05 - WMS + TMS/genims_wms_data.json'
+        'data_file': 'Data Scripts/05 - WMS + TMS/genims_wms_data.json',
+        'depends_on': ['genims_erp_db_try']
     },
     'genims_tms_db_try': {
         'schema_file': 'Data Scripts/05 - WMS + TMS/genims_tms_schema.sql',
         'generators': [
             ('Data Scripts/05 - WMS + TMS/generate_wms_tms_historical_data.py', 'Data Scripts/05 - WMS + TMS/genims_tms_data.json'),
         ],
-        'data_file': 'Data Scripts/05 - WMS + TMS/genims_tms_data.json'
+        'data_file': 'Data Scripts/05 - WMS + TMS/genims_tms_data.json',
+        'depends_on': ['genims_erp_db_try']
     },
     'genims_crm_db_try': {
         'schema_file': 'Data Scripts/07 - CRM/genims_crm_schema.sql',
         'generators': [
             ('Data Scripts/07 - CRM/generate_crm_historical_data.py', 'Data Scripts/07 - CRM/genims_crm_data.json'),
         ],
-        'data_file': 'Data Scripts/07 - CRM/genims_crm_data.json'
+        'data_file': 'Data Scripts/07 - CRM/genims_crm_data.json',
+        'depends_on': ['genims_erp_db_try']
     },
     'genims_service_db_try': {
         'schema_file': 'Data Scripts/08 - Support & Service/genims_service_schema.sql',
         'generators': [
             ('Data Scripts/08 - Support & Service/generate_service_historical_data_updated.py', 'Data Scripts/08 - Support & Service/genims_service_data.json'),
         ],
-        'data_file': 'Data Scripts/08 - Support & Service/genims_service_data.json'
+        'data_file': 'Data Scripts/08 - Support & Service/genims_service_data.json',
+        'depends_on': ['genims_crm_db_try']
     },
     'genims_hr_db_try': {
         'schema_file': 'Data Scripts/09 - HR-HCM/genims_hcm_schema.sql',
@@ -141,23 +159,86 @@ DATABASES = {
         'generators': [
             ('Data Scripts/12 - QMS/generate_qms_data_fixed.py', 'Data Scripts/12 - QMS/genims_qms_data.json'),
         ],
-        'data_file': 'Data Scripts/12 - QMS/genims_qms_data.json'
+        'data_file': 'Data Scripts/12 - QMS/genims_qms_data.json',
+        'depends_on': ['genims_erp_db_try', 'genims_crm_db_try']
     },
     'genims_supplier_db_try': {
         'schema_file': 'Data Scripts/11 - Supplier Portal/genims_supplier_portal.sql',
         'generators': [
             ('Data Scripts/11 - Supplier Portal/generate_supplier_portal_data.py', 'Data Scripts/11 - Supplier Portal/genims_supplier_portal_data.json'),
         ],
-        'data_file': 'Data Scripts/11 - Supplier Portal/genims_supplier_portal_data.json'
+        'data_file': 'Data Scripts/11 - Supplier Portal/genims_supplier_portal_data.json',
+        'depends_on': ['genims_erp_db_try']
     }
 }
 
+# Generators whose day-chunked tables can be regenerated for a date range (full_setup.py --slice)
+SLICE_GENERATORS = [
+    'Data Scripts/03 - MES Data/generate_mes_historical_data.py',
+    'Data Scripts/04 - ERP & MES Integration/generate_erp_historical_data.py',
+    'Data Scripts/06 - CMMS/generate_cmms_historical_data.py',
+    'Data Scripts/10 - Financial Accounting & ERP <> WMS Sync/generate_financial_sync_data.py',
+    'Data Scripts/05 - WMS + TMS/generate_wms_tms_historical_data.py',
+    'Data Scripts/07 - CRM/generate_crm_historical_data.py',
+    'Data Scripts/08 - Support & Service/generate_service_historical_data_updated.py',
+    'Data Scripts/09 - HR-HCM/generate_hcm_historical_data.py',
+    'Data Scripts/11 - Supplier Portal/generate_supplier_portal_data.py',
+]
+
 class GenIMSSetup:
     """Master setup orchestrator"""
     
-    def __init__(self, root_path=None):
+    def __init__(self, root_path=None, streaming_load=False, stream_chunk_size=50000, binary_copy=False,
+                 copy_shards=1, shard_threshold=500000, defer_indexes=False, index_rebuild_workers=8,
+                 unlogged_load=False, generator_workers=None, pipelined=False,
+                 generator_cache=True, cache_max_age_hours=0, resume=False,
+                 template_clone=False, verify_fks=False, fk_report_file=None):
         self.root_path = Path(root_path or Path(__file__).parent.parent)
         self.start_time = datetime.now()
+        
+        # Streaming load: parse data files incrementally, COPY in bounded chunks
+        self.streaming_load = streaming_load
+        self.stream_chunk_size = stream_chunk_size
+        
+        # Binary COPY: per-column encoders from information_schema instead of text escaping
+        self.binary_copy = binary_copy
+        
+        # Sharded COPY: tables with >= shard_threshold rows load over copy_shards connections
+        self.copy_shards = max(1, copy_shards)
+        self.shard_threshold = shard_threshold
+        
+        # Index/FK deferral: drop secondary indexes + FKs per database, load, rebuild in parallel
+        self.defer_indexes = defer_indexes
+        self.index_rebuild_workers = max(1, index_rebuild_workers)
+        
+        # UNLOGGED load: no per-row WAL; SET LOGGED / staging swap-in after the row count validates
+        self.unlogged_load = unlogged_load
+        
+        # DAG generator scheduler: concurrent generator subprocesses
+        self.generator_workers = max(1, generator_workers or os.cpu_count() or 1)
+        
+        # Pipelined setup: validate + load each database as soon as its generator finishes
+        self.pipelined = pipelined
+        
+        # Generator output cache: skip generators whose source, inputs and env knobs are unchanged
+        self.generator_cache = GeneratorCache(self.root_path, max_age_hours=cache_max_age_hours) if generator_cache else None
+        
+        # Checkpoint manifest: completed databases/schemas/generators/tables; --resume skips them
+        self.resume = resume
+        self.checkpoint = SetupCheckpoint(self.root_path / '.genims_cache' / 'setup_checkpoint.json', resume=resume)
+        
+        # Template cloning: CREATE DATABASE ... TEMPLATE <db>_template instead of replaying schema DDL
+        self.template_clone = template_clone
+        self.cloned_dbs = set()
+        
+        # Schema FK graph validation: one lock per database whose table IDs FK checks need
+        self.fk_target_locks = {db_name: threading.Lock() for db_name in DATABASES}
+        self.data_ready = None  # Databases whose data file is final while generators still run (None = all)
+        
+        # In-database FK verification after loading (replaces the pre-load Python validation)
+        self.verify_fks = verify_fks
+        self.fk_report_file = Path(fk_report_file or self.root_path / 'genims_fk_report.json')
+        self.fk_target_ids = {}  # 'db.table.column' -> IDs fetched for cross-database checks
         self.stats = {
             'databases_created': 0,
             'schemas_loaded': 0,
@@ -186,6 +267,16 @@ class GenIMSSetup:
         logger.info("="*80)
         if "Loading Data" in title:
             logger.info("  🚀 ULTRA-FAST MODE: COPY FROM STDIN + Parallel Table Loading")
+            if self.streaming_load:
+                logger.info(f"  🌊 STREAMING MODE: incremental JSON parsing, {self.stream_chunk_size:,}-row COPY chunks")
+            if self.binary_copy:
+                logger.info("  🧬 BINARY COPY: typed per-column encoders (text COPY for unsupported types)")
+            if self.copy_shards > 1:
+                logger.info(f"  🔀 SHARDED COPY: tables with {self.shard_threshold:,}+ rows split across {self.copy_shards} connections")
+            if self.defer_indexes:
+                logger.info(f"  ⏸ DEFERRED INDEXES: secondary indexes + FKs rebuilt after load ({self.index_rebuild_workers} workers)")
+            if self.unlogged_load:
+                logger.info("  📝 UNLOGGED LOAD: no per-row WAL, SET LOGGED / staging swap-in after validation")
             logger.info("  📈 Expected 5-10x speed improvement over INSERT statements")
     
     # ========================================================================
@@ -233,6 +324,12 @@ class GenIMSSetup:
     
     def create_single_database(self, db_name):
         """Create a single database (thread-safe)"""
+        if self.checkpoint.is_done('database', db_name):
+            with self.progress_lock:
+                logger.info(f"  ⏭ Kept (resume): {db_name}")
+                self.stats['databases_created'] += 1
+            return True
+        
         try:
             # Each worker gets its own connection to avoid thread conflicts
             conn = psycopg2.connect(
@@ -272,12 +369,24 @@ class GenIMSSetup:
                     with self.progress_lock:
                         logger.warning(f"  ⚠ Drop failed for {db_name}: {str(e)[:80]}")
             
-            # Step 3: Create fresh database
+            # Step 3: Create fresh database (cloned from its schema template when enabled)
+            template = self.ensure_template_database(cursor, db_name) if self.template_clone else None
             try:
-                cursor.execute(f"CREATE DATABASE {db_name};")
+                if template:
+                    try:
+                        cursor.execute(f"CREATE DATABASE {db_name} TEMPLATE {template};")
+                        with self.progress_lock:
+                            self.cloned_dbs.add(db_name)
+                    except psycopg2.Error as e:
+                        with self.progress_lock:
+                            logger.warning(f"  ⚠ Clone from {template} failed, creating empty: {str(e)[:80]}")
+                        template = None
+                if not template:
+                    cursor.execute(f"CREATE DATABASE {db_name};")
                 with self.progress_lock:
-                    logger.info(f"  ✓ Created: {db_name}")
+                    logger.info(f"  ✓ Created: {db_name}" + (f" (from template {template})" if template else ""))
                     self.stats['databases_created'] += 1
+                self.checkpoint.mark_done('database', db_name)
             except psycopg2.Error as e:
                 if 'already exists' in str(e):
                     with self.progress_lock:
@@ -297,6 +406,56 @@ class GenIMSSetup:
                 self.stats['errors'].append(f"Database {db_name}: {str(e)[:100]}")
             return False
     
+    def ensure_template_database(self, cursor, db_name):
+        """Schema-only template for db_name, rebuilt when its schema file hash changed; None if unusable.
+        
+        The schema hash is kept as the template's database comment, so the check needs no local state.
+        """
+        schema_file = DATABASES[db_name].get('schema_file')
+        if not schema_file or not (self.root_path / schema_file).exists():
+            return None
+        template = f"{db_name}_template"
+        schema_hash = self.checkpoint.file_digest(self.root_path / schema_file)
+        marker = f"genims-schema:{schema_hash}"
+        
+        try:
+            cursor.execute("""
+                SELECT shobj_description(oid, 'pg_database')
+                FROM pg_database WHERE datname = %s
+            """, (template,))
+            row = cursor.fetchone()
+            if row and row[0] == marker:
+                return template
+            
+            with self.progress_lock:
+                logger.info(f"  🧱 Building template {template} ({'schema changed' if row else 'new'})")
+            if row:
+                cursor.execute(f"ALTER DATABASE {template} WITH IS_TEMPLATE false ALLOW_CONNECTIONS true;")
+                cursor.execute("""
+                    SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+                    WHERE datname = %s AND pid <> pg_backend_pid();
+                """, (template,))
+                cursor.execute(f"DROP DATABASE IF EXISTS {template};")
+            cursor.execute(f"CREATE DATABASE {template};")
+            
+            # Always closed: a leftover session would block the DROP/IS_TEMPLATE steps on the next run
+            tpl_conn = psycopg2.connect(**self.db_config, dbname=template)
+            try:
+                with tpl_conn.cursor() as tpl_cursor, open(self.root_path / schema_file, 'r') as f:
+                    tpl_cursor.execute(f.read())
+                tpl_conn.commit()
+            finally:
+                tpl_conn.close()
+            
+            # No connections allowed: CREATE DATABASE ... TEMPLATE fails while anyone is connected
+            cursor.execute(f"COMMENT ON DATABASE {template} IS %s;", (marker,))
+            cursor.execute(f"ALTER DATABASE {template} WITH IS_TEMPLATE true ALLOW_CONNECTIONS false;")
+            return template
+        except Exception as e:
+            with self.progress_lock:
+                logger.warning(f"  ⚠ Template {template} unavailable, replaying DDL instead: {str(e)[:100]}")
+            return None
+    
     # ========================================================================
     # STEP 2: LOAD SCHEMAS (ASYNC/PARALLEL)
     # ========================================================================
@@ -316,6 +475,20 @@ class GenIMSSetup:
                 self.stats['errors'].append(f"Schema file missing: {schema_file}")
             return False
         
+        schema_hash = self.checkpoint.file_digest(schema_path)
+        if self.checkpoint.is_done('schema', db_name, schema_hash=schema_hash):
+            with self.progress_lock:
+                logger.info(f"  ⏭ Schema already loaded (resume): {db_name}")
+                self.stats['schemas_loaded'] += 1
+            return True
+        
+        if db_name in self.cloned_dbs:
+            with self.progress_lock:
+                logger.info(f"  ✓ Schema from template: {db_name}")
+                self.stats['schemas_loaded'] += 1
+            self.checkpoint.mark_done('schema', db_name, schema_hash=schema_hash)
+            return True
+        
         try:
             conn = psycopg2.connect(
                 host=DB_HOST,
@@ -341,6 +514,7 @@ class GenIMSSetup:
             with self.progress_lock:
                 logger.info(f"  ✓ Loaded schema: {db_name}")
                 self.stats['schemas_loaded'] += 1
+            self.checkpoint.mark_done('schema', db_name, schema_hash=schema_hash)
             return True
             
         except Exception as e:
@@ -389,6 +563,23 @@ class GenIMSSetup:
             self.stats['errors'].append(f"Generator missing: {gen_script}")
             return False
         
+        # Master data has no upstream inputs: the key is source + env knobs only
+        master_outputs = ['Data Scripts/01 - Base Data/genims_master_data.json',
+                          'Data Scripts/01 - Base Data/genims_master_data_inserts.sql']
+        if self.generator_checkpointed(gen_script, master_outputs):
+            logger.info(f"  ⏭ Master data already generated (resume), reusing {master_outputs[0]}")
+            self.stats['data_generated'] += 1
+            return True
+        
+        cache_key = None
+        if self.generator_cache:
+            cache_key = self.generator_cache.compute_key(gen_script, [], os.environ)
+            if self.generator_cache.lookup(gen_script, cache_key, master_outputs):
+                logger.info(f"  ⚡ Master data unchanged (cache key {cache_key[:12]}), reusing {master_outputs[0]}")
+                self.stats['data_generated'] += 1
+                self.checkpoint_generator(gen_script, master_outputs)
+                return True
+        
         try:
             logger.info(f"  → Running master data generator: {gen_script}")
             
@@ -404,6 +595,9 @@ class GenIMSSetup:
                 output = result.stdout + result.stderr
                 logger.info(f"    ✓ Master data generated successfully")
                 self.stats['data_generated'] += 1
+                if cache_key:
+                    self.generator_cache.store(gen_script, cache_key, master_outputs)
+                self.checkpoint_generator(gen_script, master_outputs)
                 return True
             else:
                 logger.warning(f"    ✗ Master data generator failed: {result.stderr[:200]}")
@@ -456,6 +650,7 @@ class GenIMSSetup:
             
             registry.finalize()
             registry.save()
+            registry.write_snapshot()  # Generator processes memory-map this instead of re-parsing JSON
             logger.info(f"  ✓ Registry finalized and saved")
             return True
         
@@ -464,6 +659,20 @@ class GenIMSSetup:
             self.stats['errors'].append(f"Registry: {str(e)[:100]}")
             return False
     
+    def refresh_registry_snapshot(self):
+        """
+        Re-register the ERP pools (supplier/material/BOM) once ERP's output is final and rewrite the
+        registry snapshot, before any ERP-dependent generator starts. A snapshot left at the master
+        data would be stale for every dependent: each would re-parse the JSON and rewrite it at once.
+        """
+        registry = get_registry(self.root_path)
+        registry.register_erp_data(self.root_path / DATABASES['genims_erp_db_try']['data_file'])
+        try:
+            registry.write_snapshot()
+            logger.info("  ✓ Registry snapshot refreshed with the ERP pools")
+        except OSError as e:
+            logger.warning(f"  ⚠ Could not refresh the registry snapshot: {e}")
+    
     def run_single_generator(self, db_name, gen_script, expected_output):
         """Run single data generator (thread-safe) with dynamic timeout"""
         gen_path = self.root_path / gen_script
@@ -545,20 +754,96 @@ class GenIMSSetup:
                 self.stats['errors'].append(f"Generator {gen_script}: {str(e)[:100]}")
             return False
     
-    def pre_flight_check(self, db_name, gen_script, expected_output):
-        """Pre-flight checks to avoid unnecessary work - DISABLED FOR FRESH GENERATION"""
+    def generator_outputs(self, gen_script):
+        """Data files written by a generator script (incl. databases fed via depends_on_data_from)"""
+        dbs = [db_name for db_name, config in DATABASES.items()
+               if any(script == gen_script for script, _ in config.get('generators', []))]
+        outputs = [DATABASES[db]['data_file'] for db in dbs if DATABASES[db].get('data_file')]
+        for db_name, config in DATABASES.items():
+            if config.get('depends_on_data_from') in dbs and config.get('data_file'):
+                outputs.append(config['data_file'])
+        return outputs
+    
+    def generator_inputs(self, gen_script):
+        """Upstream files a generator reads: master data + data files of its 'depends_on' databases"""
+        inputs = {DATABASES['genims_master_db_try']['data_file']}
+        for db_name, config in DATABASES.items():
+            if any(script == gen_script for script, _ in config.get('generators', [])):
+                for dep_db in config.get('depends_on', []):
+                    inputs.update(self.generator_outputs(DATABASES[dep_db]['generators'][0][0])
+                                  if DATABASES[dep_db].get('generators') else [])
+        return sorted(inputs)
+    
+    def checkpoint_generator(self, gen_script, outputs):
+        """Record a finished generator with the hashes of the output files it left behind"""
+        hashes = {rel_path: self.checkpoint.file_digest(self.root_path / rel_path) for rel_path in outputs}
+        if None not in hashes.values():
+            self.checkpoint.mark_done('generator', gen_script, outputs=hashes)
+    
+    def generator_checkpointed(self, gen_script, outputs):
+        """True if the generator completed in the checkpointed run and its outputs are unchanged"""
+        unit = self.checkpoint.get('generator', gen_script)
+        if unit is None:
+            return False
+        return all(unit['outputs'].get(rel_path) == self.checkpoint.file_digest(self.root_path / rel_path)
+                   for rel_path in outputs)
+    
+    def pre_flight_check(self, db_name, gen_script, expected_output, cache_key=None):
+        """Pre-flight checks to avoid unnecessary work (generator present, cached output still current)"""
         gen_path = self.root_path / gen_script
         
         # Check if generator exists
         if not gen_path.exists():
             return False, f"Generator missing: {gen_script}"
         
+        if self.generator_checkpointed(gen_script, self.generator_outputs(gen_script)):
+            return False, "Recent output exists (completed before resume)"
+        
+        if cache_key and self.generator_cache.lookup(gen_script, cache_key, self.generator_outputs(gen_script)):
+            return False, f"Recent output exists (cache key {cache_key[:12]})"
+        
         return True, "Ready"
     
+    def generator_env(self, complexity):
+        """Subprocess environment for a generator of the given complexity"""
+        # Performance optimizations for ALL generators (COMPLETE data volume - no compromises)
+        env = os.environ.copy()
+        
+        # Apply ONLY parallel processing optimizations (NO data volume reduction)
+        env['PARALLEL_WORKERS'] = '8'          # Maximum parallel processing within generators
+        env['CONNECTION_POOL_SIZE'] = '15'      # Larger connection pool for performance
+        env['BULK_INSERT_MODE'] = '1'           # Use bulk inserts for performance
+        env['ASYNC_WRITES'] = '1'               # Asynchronous database writes for speed
+        if env.get('GENERATOR_SEED'):
+            # Registry ID sets are listed before sampling: seeded runs (and history slices) need a fixed set order
+            env.setdefault('PYTHONHASHSEED', '0')
+        # This run coordinates the generators: ID allocator spaces restart at the registry counters
+        # (assigned, not defaulted: config.env exports false for standalone generator runs)
+        env['ID_ALLOCATOR_RESET'] = 'true'
+        
+        # Large batch sizes for performance optimization (FULL data volume maintained)
+        if complexity == 'heavy':
+            env['BATCH_SIZE'] = '150000'        # Maximum batch size for heavy generators
+            env['OPTIMIZE_QUERIES'] = '1'       # Database query optimization
+            env['PARALLEL_GENERATION'] = '1'    # Enable internal parallel data generation
+        elif complexity == 'medium':
+            env['BATCH_SIZE'] = '100000'        # Large batches for medium generators
+            env['OPTIMIZE_QUERIES'] = '1'       # Database query optimization
+            env['PARALLEL_GENERATION'] = '1'    # Enable internal parallel data generation
+        else:  # light
+            env['BATCH_SIZE'] = '50000'         # Large batches for light generators
+            env['PARALLEL_GENERATION'] = '1'    # Enable internal parallel data generation
+        return env
+    
     def run_single_generator_optimized(self, db_name, gen_script, expected_output, complexity, timeout):
         """Optimized generator runner with complexity awareness"""
+        env = self.generator_env(complexity)
+        cache_key = None
+        if self.generator_cache and (self.root_path / gen_script).exists():
+            cache_key = self.generator_cache.compute_key(gen_script, self.generator_inputs(gen_script), env)
+        
         # Pre-flight check
-        can_run, reason = self.pre_flight_check(db_name, gen_script, expected_output)
+        can_run, reason = self.pre_flight_check(db_name, gen_script, expected_output, cache_key)
         if not can_run and "Recent output exists" in reason:
             with self.progress_lock:
                 logger.info(f"  ⚡ Skipping {db_name}: {reason}")
@@ -579,28 +864,6 @@ class GenIMSSetup:
             
             start_time = time.time()
             
-            # Performance optimizations for ALL generators (COMPLETE data volume - no compromises)
-            env = os.environ.copy()
-            
-            # Apply ONLY parallel processing optimizations (NO data volume reduction)
-            env['PARALLEL_WORKERS'] = '8'          # Maximum parallel processing within generators
-            env['CONNECTION_POOL_SIZE'] = '15'      # Larger connection pool for performance
-            env['BULK_INSERT_MODE'] = '1'           # Use bulk inserts for performance
-            env['ASYNC_WRITES'] = '1'               # Asynchronous database writes for speed
-            
-            # Large batch sizes for performance optimization (FULL data volume maintained)
-            if complexity == 'heavy':
-                env['BATCH_SIZE'] = '150000'        # Maximum batch size for heavy generators
-                env['OPTIMIZE_QUERIES'] = '1'       # Database query optimization
-                env['PARALLEL_GENERATION'] = '1'    # Enable internal parallel data generation
-            elif complexity == 'medium':
-                env['BATCH_SIZE'] = '100000'        # Large batches for medium generators
-                env['OPTIMIZE_QUERIES'] = '1'       # Database query optimization
-                env['PARALLEL_GENERATION'] = '1'    # Enable internal parallel data generation
-            else:  # light
-                env['BATCH_SIZE'] = '50000'         # Large batches for light generators
-                env['PARALLEL_GENERATION'] = '1'    # Enable internal parallel data generation
-            
             with self.progress_lock:
                 batch_size = env['BATCH_SIZE']
                 logger.info(f"      🚀 Parallel mode: batch={batch_size}, COMPLETE data volume guaranteed")
@@ -626,10 +889,14 @@ class GenIMSSetup:
                                 logger.info(f"      {line.strip()}")
                     logger.info(f"    ✓ [{complexity.upper()}] {db_name} completed ({elapsed:.1f}s)")
                     self.stats['data_generated'] += 1
+                if cache_key:
+                    self.generator_cache.store(gen_script, cache_key, self.generator_outputs(gen_script))
                 return True
             else:
-                # Enhanced output validation
+                # Enhanced output validation (outputs of a failed run are never served from cache)
                 output = result.stdout + result.stderr
+                if self.generator_cache:
+                    self.generator_cache.invalidate(gen_script)
                 
                 # Multiple fallback checks for success
                 json_indicators = [
@@ -724,139 +991,181 @@ class GenIMSSetup:
             # Fallback if psutil not available
             return {'can_scale_up': True}
     
-    def adaptive_worker_count(self, base_workers, generator_count, complexity):
-        """Adaptively scale worker count based on resources and load"""
-        resources = self.monitor_system_resources()
-        
-        if not resources.get('can_scale_up', True):
-            return max(1, base_workers - 1)  # Scale down if resources constrained
-        
-        # Scale up for light generators if resources available
-        if complexity == 'light' and generator_count > 3:
-            return min(base_workers + 2, 6)
-        elif complexity == 'medium' and generator_count > 2:
-            return min(base_workers + 1, 4)
-        
-        return base_workers
-    
-    def generate_dependent_data(self):
-        """Generate DEPENDENT data with SMART SCHEDULING and optimization"""
-        self.log_section("STEP 3c: Generating Dependent Data (SMART PARALLEL)")
-        
-        # Collect and classify all generators with dependency ordering
-        heavy_generators = []
-        medium_generators = []
-        light_generators = []
-        
+    def build_generator_graph(self):
+        """Generator DAG from DATABASES: one node per generator script, edges from 'depends_on'.
+        
+        Scripts shared by several databases (WMS + TMS) become a single node.
+        Databases without a generator ('depends_on_data_from') map to the node that writes their data.
+        Returns {gen_script: node} with node = {'dbs', 'expected_output', 'complexity', 'timeout', 'deps'}.
+        """
+        nodes = {}
+        db_to_node = {}
         for db_name, config in DATABASES.items():
             if db_name == 'genims_master_db_try':
                 continue  # Already generated in step 3a
-            
-            generators = config.get('generators', [])
-            for gen_script, expected_output in generators:
-                complexity, timeout = self.classify_generator_complexity(gen_script, db_name)
-                dependency_order = self.get_generator_dependencies(db_name)
-                gen_item = (db_name, gen_script, expected_output, complexity, timeout, dependency_order)
-                
-                if complexity == 'heavy':
-                    heavy_generators.append(gen_item)
-                elif complexity == 'medium':
-                    medium_generators.append(gen_item)
-                else:
-                    light_generators.append(gen_item)
+            for gen_script, expected_output in config.get('generators', []):
+                if gen_script not in nodes:
+                    complexity, timeout = self.classify_generator_complexity(gen_script, db_name)
+                    nodes[gen_script] = {
+                        'dbs': [],
+                        'expected_output': expected_output,
+                        'complexity': complexity,
+                        'timeout': timeout,
+                        'deps': set()
+                    }
+                nodes[gen_script]['dbs'].append(db_name)
+                db_to_node.setdefault(db_name, gen_script)
         
-        # Sort by dependency order within each complexity tier
-        heavy_generators.sort(key=lambda x: x[5])  # Sort by dependency_order
-        medium_generators.sort(key=lambda x: x[5])
-        light_generators.sort(key=lambda x: x[5])
-        
-        # Smart scheduling strategy
-        logger.info(f"  📊 Generator distribution: {len(heavy_generators)} heavy, {len(medium_generators)} medium, {len(light_generators)} light")
+        for db_name, config in DATABASES.items():
+            source_db = config.get('depends_on_data_from')
+            if source_db in db_to_node:
+                db_to_node.setdefault(db_name, db_to_node[source_db])
         
-        total_generators = len(heavy_generators) + len(medium_generators) + len(light_generators)
+        for db_name, config in DATABASES.items():
+            for gen_script, _ in config.get('generators', []):
+                if gen_script not in nodes:
+                    continue
+                for dep_db in config.get('depends_on', []):
+                    dep_node = db_to_node.get(dep_db)
+                    if dep_node is None:
+                        raise ValueError(f"{db_name} depends on {dep_db}, which has no generator")
+                    if dep_node != gen_script:
+                        nodes[gen_script]['deps'].add(dep_node)
+        
+        # Reject cycles up front - they would deadlock the scheduler
+        visiting, done = set(), set()
+        
+        def visit(gen_script):
+            if gen_script in done:
+                return
+            if gen_script in visiting:
+                raise ValueError(f"Generator dependency cycle through {gen_script}")
+            visiting.add(gen_script)
+            for dep in nodes[gen_script]['deps']:
+                visit(dep)
+            visiting.discard(gen_script)
+            done.add(gen_script)
+        
+        for gen_script in nodes:
+            visit(gen_script)
+        return nodes
+    
+    def generate_dependent_data(self, on_generated=None):
+        """Generate DEPENDENT data with a DAG scheduler: each generator starts as soon as its inputs exist.
+        
+        on_generated(node, success) is called as each generator finishes (its output files are final).
+        """
+        self.log_section("STEP 3c: Generating Dependent Data (DAG SCHEDULER)")
+        
+        nodes = self.build_generator_graph()
+        
+        # Priority: longest chain of estimated work still behind a node (critical path first)
+        weight = {'heavy': 3, 'medium': 2, 'light': 1}
+        dependents = {gen_script: [] for gen_script in nodes}
+        for gen_script, node in nodes.items():
+            for dep in node['deps']:
+                dependents[dep].append(gen_script)
+        
+        chain = {}
+        
+        def chain_weight(gen_script):
+            if gen_script not in chain:
+                chain[gen_script] = weight[nodes[gen_script]['complexity']] + max(
+                    (chain_weight(d) for d in dependents[gen_script]), default=0)
+            return chain[gen_script]
+        
+        for gen_script in nodes:
+            chain_weight(gen_script)
+        
+        workers = min(self.generator_workers, len(nodes)) or 1
+        edges = sum(len(node['deps']) for node in nodes.values())
+        logger.info(f"  📊 Generator graph: {len(nodes)} generators, {edges} dependencies, {workers} workers")
+        
+        pending = {gen_script: set(node['deps']) for gen_script, node in nodes.items()}
+        timings = {}   # gen_script -> (start, end) relative to scheduler start
+        failed = set()
+        running = {}
+        total = len(nodes)
         completed = 0
-        
-        # Phase 1: Start heavy generators first with adaptive scaling
-        if heavy_generators:
-            workers = self.adaptive_worker_count(2, len(heavy_generators), 'heavy')
-            logger.info(f"  🏗️  Phase 1: Processing {len(heavy_generators)} heavy generators (dependency-ordered, {workers} workers)...")
-            
-            with ThreadPoolExecutor(max_workers=workers) as executor:
-                future_to_gen = {executor.submit(self.run_single_generator_optimized, 
-                                               db_name, gen_script, expected_output, complexity, timeout): 
-                               (db_name, gen_script) for db_name, gen_script, expected_output, complexity, timeout, _ in heavy_generators}
-                
-                for future in concurrent.futures.as_completed(future_to_gen):
-                    db_name, gen_script = future_to_gen[future]
-                    completed += 1
-                    try:
-                        result = future.result()
-                        if not result:
-                            with self.progress_lock:
-                                logger.warning(f"  Heavy generator failed: {db_name}")
-                    except Exception as exc:
-                        with self.progress_lock:
-                            logger.warning(f"  ✗ Heavy generator exception for {db_name}: {exc}")
-                            self.stats['errors'].append(f"Heavy generator exception {db_name}: {str(exc)[:100]}")
-                    
-                    with self.progress_lock:
-                        logger.info(f"  📈 Progress: {completed}/{total_generators} ({completed/total_generators*100:.1f}%) - Heavy phase")
-        
-        # Phase 2: Process medium generators with adaptive scaling
-        if medium_generators:
-            workers = self.adaptive_worker_count(3, len(medium_generators), 'medium')
-            logger.info(f"  ⚙️  Phase 2: Processing {len(medium_generators)} medium generators (dependency-ordered, {workers} workers)...")
-            
-            with ThreadPoolExecutor(max_workers=workers) as executor:
-                future_to_gen = {executor.submit(self.run_single_generator_optimized, 
-                                               db_name, gen_script, expected_output, complexity, timeout): 
-                               (db_name, gen_script) for db_name, gen_script, expected_output, complexity, timeout, _ in medium_generators}
-                
-                for future in concurrent.futures.as_completed(future_to_gen):
-                    db_name, gen_script = future_to_gen[future]
-                    completed += 1
-                    try:
-                        result = future.result()
-                        if not result:
-                            with self.progress_lock:
-                                logger.warning(f"  Medium generator failed: {db_name}")
-                    except Exception as exc:
-                        with self.progress_lock:
-                            logger.warning(f"  ✗ Medium generator exception for {db_name}: {exc}")
-                            self.stats['errors'].append(f"Medium generator exception {db_name}: {str(exc)[:100]}")
-                    
+        scheduler_start = time.time()
+        
+        def submit_ready(executor):
+            ready = sorted((g for g, deps in pending.items() if not deps), key=lambda g: -chain[g])
+            for gen_script in ready:
+                if len(running) >= workers:
+                    break
+                # Keep cores busy, but do not start more generators into memory pressure
+                if running and self.monitor_system_resources().get('memory_percent', 0) > 85:
+                    break
+                node = nodes[gen_script]
+                del pending[gen_script]
+                failed_inputs = [d for d in node['deps'] if d in failed]
+                if failed_inputs:
                     with self.progress_lock:
-                        logger.info(f"  📈 Progress: {completed}/{total_generators} ({completed/total_generators*100:.1f}%) - Medium phase")
-        
-        # Phase 3: Process light generators rapidly with maximum adaptive scaling
-        if light_generators:
-            workers = self.adaptive_worker_count(5, len(light_generators), 'light')
-            logger.info(f"  ⚡ Phase 3: Processing {len(light_generators)} light generators (dependency-ordered, {workers} workers)...")
-            
-            with ThreadPoolExecutor(max_workers=workers) as executor:
-                future_to_gen = {executor.submit(self.run_single_generator_optimized, 
-                                               db_name, gen_script, expected_output, complexity, timeout): 
-                               (db_name, gen_script) for db_name, gen_script, expected_output, complexity, timeout, _ in light_generators}
-                
-                for future in concurrent.futures.as_completed(future_to_gen):
-                    db_name, gen_script = future_to_gen[future]
+                        logger.warning(f"  ⚠ {', '.join(node['dbs'])}: input generator failed "
+                                       f"({', '.join(Path(d).name for d in failed_inputs)}), running with existing files")
+                timings[gen_script] = (time.time() - scheduler_start, None)
+                future = executor.submit(self.run_single_generator_optimized, ', '.join(node['dbs']), gen_script,
+                                         node['expected_output'], node['complexity'], node['timeout'])
+                running[future] = gen_script
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            submit_ready(executor)
+            while running:
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    gen_script = running.pop(future)
+                    node = nodes[gen_script]
+                    timings[gen_script] = (timings[gen_script][0], time.time() - scheduler_start)
                     completed += 1
                     try:
-                        result = future.result()
-                        if not result:
+                        if not future.result():
+                            failed.add(gen_script)
                             with self.progress_lock:
-                                logger.warning(f"  Light generator failed: {db_name}")
+                                logger.warning(f"  Generator failed: {', '.join(node['dbs'])}")
                     except Exception as exc:
+                        failed.add(gen_script)
                         with self.progress_lock:
-                            logger.warning(f"  ✗ Light generator exception for {db_name}: {exc}")
-                            self.stats['errors'].append(f"Light generator exception {db_name}: {str(exc)[:100]}")
+                            logger.warning(f"  ✗ Generator exception for {', '.join(node['dbs'])}: {exc}")
+                            self.stats['errors'].append(f"Generator exception {gen_script}: {str(exc)[:100]}")
                     
+                    for deps in pending.values():
+                        deps.discard(gen_script)
+                    if gen_script not in failed:
+                        self.checkpoint_generator(gen_script, self.generator_outputs(gen_script))
+                        if 'genims_erp_db_try' in node['dbs']:
+                            self.refresh_registry_snapshot()
+                    if on_generated is not None:
+                        on_generated(node, gen_script not in failed)
                     with self.progress_lock:
-                        logger.info(f"  📈 Progress: {completed}/{total_generators} ({completed/total_generators*100:.1f}%) - Light phase")
+                        logger.info(f"  📈 Progress: {completed}/{total} ({completed/total*100:.1f}%) - {len(running)} running")
+                submit_ready(executor)
         
-        logger.info(f"\n✓ Generated data for {self.stats['data_generated']} databases using smart scheduling")
+        self.report_critical_path(nodes, timings, time.time() - scheduler_start)
+        logger.info(f"\n✓ Generated data for {self.stats['data_generated']} databases using DAG scheduling")
         return True
     
+    def report_critical_path(self, nodes, timings, wall_time):
+        """Log the chain of generators that determined the wall time of step 3c"""
+        if not timings:
+            return
+        # Walk back from the last generator to finish, always through the input that finished last
+        path = []
+        current = max(timings, key=lambda g: timings[g][1])
+        while current is not None:
+            path.append(current)
+            deps = [d for d in nodes[current]['deps'] if d in timings]
+            current = max(deps, key=lambda g: timings[g][1]) if deps else None
+        path.reverse()
+        
+        busy = sum(end - start for start, end in timings.values())
+        logger.info(f"  🧭 Critical path ({wall_time:.1f}s wall, {busy:.1f}s generator time, "
+                    f"{busy / wall_time if wall_time else 0:.1f}x parallelism):")
+        for gen_script in path:
+            start, end = timings[gen_script]
+            logger.info(f"      {', '.join(nodes[gen_script]['dbs'])}: {end - start:.1f}s "
+                        f"(started {start:.1f}s, finished {end:.1f}s)")
+    
     def validate_single_database(self, db_name, config, registry):
         """Validate single database in parallel (thread-safe)"""
         data_file = config.get('data_file')
@@ -875,23 +1184,48 @@ class GenIMSSetup:
                 return True, 0, "File too small"
             
             start_time = time.time()
-            with open(data_path, 'r') as f:
-                data = json.load(f)
-            
-            errors = registry.validate_dataset(db_name, data)
+            fk_rules = registry.fk_rules(db_name)
+            if not fk_rules:
+                return True, 0, "No FK rules"
+            
+            # IDs of other databases' tables this database points at must be registered first
+            target_dbs = {target.split('.', 1)[0] for columns in fk_rules.values()
+                          for target, _ in columns.values() if '.' in target}
+            # Targets still generating (pipelined) or unreadable stay unregistered: their FK edges are skipped
+            pending = [target_db for target_db in sorted(target_dbs - {db_name})
+                       if not self.register_fk_targets(target_db, registry)]
+            if pending:
+                with self.progress_lock:
+                    logger.info(f"  ⏳ {db_name}: FKs into {', '.join(pending)} not checked (data not final)")
+            
+            # One pass over the file: FK columns plus this database's own FK target columns
+            own_targets = registry.fk_graph.target_columns(db_name) if registry.fk_graph else {}
+            wanted = {table_name: set(columns) for table_name, columns in fk_rules.items()}
+            for table_name, column in own_targets.items():
+                wanted.setdefault(table_name, set()).add(column)
+            fk_columns = self.read_id_columns(data_path, wanted)
+            self.register_fk_targets(db_name, registry, fk_columns)
+            
+            violations = []
+            for table_name, columns in fk_columns.items():
+                if table_name in fk_rules:
+                    violations.extend(registry.validate_table_columns(db_name, table_name, columns))
+            error_count = sum(v['nulls'] + v['invalid'] for v in violations)
             elapsed = time.time() - start_time
             
-            if errors:
+            if violations:
                 with self.progress_lock:
-                    logger.warning(f"  ✗ {db_name}: {len(errors)} FK validation errors ({elapsed:.1f}s)")
-                    for err in errors[:3]:  # Show fewer errors to reduce log spam
-                        logger.warning(f"      - {err}")
-                    if len(errors) > 3:
-                        logger.warning(f"      ... and {len(errors)-3} more")
-                return False, len(errors), f"{len(errors)} FK errors"
+                    logger.warning(f"  ✗ {db_name}: {error_count} FK validation errors in "
+                                   f"{len(violations)} columns ({elapsed:.1f}s)")
+                    for violation in violations[:3]:  # Show fewer errors to reduce log spam
+                        logger.warning(f"      - {registry.format_violation(db_name, violation)}")
+                    if len(violations) > 3:
+                        logger.warning(f"      ... and {len(violations)-3} more columns")
+                return False, error_count, f"{error_count} FK errors"
             else:
                 with self.progress_lock:
-                    logger.info(f"  ✓ {db_name}: All FKs valid ({elapsed:.1f}s, {len(data)} tables)")
+                    rows = sum(len(next(iter(cols.values()), ())) for cols in fk_columns.values())
+                    logger.info(f"  ✓ {db_name}: All FKs valid ({elapsed:.1f}s, {len(fk_columns)} tables, {rows:,} rows)")
                 return True, 0, "All valid"
         
         except Exception as e:
@@ -899,6 +1233,75 @@ class GenIMSSetup:
                 logger.warning(f"  ✗ Validation failed for {db_name}: {str(e)[:100]}")
             return False, 1, f"Exception: {str(e)[:100]}"
     
+    def read_id_columns(self, data_path, wanted):
+        """Only the wanted columns of a data file: table -> column -> values (streamed when --streaming-load)"""
+        manifest = read_manifest(data_path)
+        if manifest is not None:
+            tables = iter_shard_chunks(data_path, manifest, self.stream_chunk_size, tables=list(wanted))
+        elif self.streaming_load:
+            tables = iter_table_chunks(data_path, self.stream_chunk_size)
+        else:
+            with open(data_path, 'r') as f:
+                tables = json.load(f).items()
+        
+        columns_by_table = {}
+        for table_name, records in tables:
+            if table_name not in wanted or not isinstance(records, list) or not records:
+                continue
+            # Only columns the generator actually emits for this table
+            columns = columns_by_table.setdefault(
+                table_name, {c: [] for c in wanted[table_name] if c in records[0]})
+            for c, values in columns.items():
+                values.extend([rec.get(c) for rec in records])
+        return columns_by_table
+    
+    def register_fk_targets(self, db_name, registry, columns_by_table=None):
+        """
+        Register the IDs of db_name's tables that schema FKs point at (once per registry).
+        False if they could not be registered: data file still being generated, missing or unreadable.
+        """
+        if registry.fk_graph is None or db_name not in self.fk_target_locks:
+            return False
+        data_ready = self.data_ready
+        if data_ready is not None and db_name not in data_ready:
+            return False
+        with self.fk_target_locks[db_name]:
+            if db_name in registry.fk_target_dbs:
+                return True
+            targets = registry.fk_graph.target_columns(db_name)
+            data_file = DATABASES[db_name].get('data_file')
+            if columns_by_table is None and targets:
+                if not data_file or not (self.root_path / data_file).exists():
+                    return False
+                try:
+                    columns_by_table = self.read_id_columns(
+                        self.root_path / data_file, {table_name: {column} for table_name, column in targets.items()})
+                except Exception as e:
+                    with self.progress_lock:
+                        logger.warning(f"  ⚠ {db_name}: FK target IDs unreadable, edges into it skipped: {str(e)[:100]}")
+                    return False
+            for table_name, column in targets.items():
+                values = (columns_by_table or {}).get(table_name, {}).get(column)
+                if values is not None:
+                    registry.register_table_ids(db_name, table_name, column, values)
+            registry.fk_target_dbs.add(db_name)
+            return True
+    
+    def load_fk_graph(self, registry):
+        """Attach the compiled schema FK graph (cached by file hash) so validation covers every table"""
+        try:
+            registry.fk_graph = FKGraph.load(
+                self.root_path, {db_name: config['schema_file'] for db_name, config in DATABASES.items()})
+            logger.info(f"  🔗 FK graph: {registry.fk_graph.edge_count()} relationships across "
+                        f"{len(registry.fk_graph.edges)} databases")
+            skipped = registry.fk_graph.skipped
+            if registry.fk_graph.skipped_count():
+                logger.warning(f"  ⚠ FK graph: {registry.fk_graph.skipped_count()} ontology relationships skipped "
+                               f"({skipped.get('missing_table', 0)} name tables no schema has, "
+                               f"{skipped.get('missing_column', 0)} name missing columns)")
+        except Exception as e:
+            logger.warning(f"  ⚠ FK graph unavailable, validating registry FKs only: {str(e)[:100]}")
+    
     def validate_referential_integrity(self):
         """Validate all FK relationships with PARALLEL processing"""
         self.log_section("STEP 3d: Validating Referential Integrity (PARALLEL)")
@@ -907,6 +1310,7 @@ class GenIMSSetup:
         from data_registry import reset_registry
         reset_registry()
         registry = get_registry(self.root_path)
+        self.load_fk_graph(registry)
         
         # Filter databases with data files
         databases_to_validate = [(db_name, config) for db_name, config in DATABASES.items() 
@@ -983,18 +1387,14 @@ class GenIMSSetup:
                 return "'" + val.replace("'", "''") + "'"
         return str(val)
     
-    def load_table_ultra_fast(self, cursor, table_name, records):
-        """Load table using COPY FROM STDIN - Ultra fast bulk loading (5-10x faster than INSERT)"""
-        if not records:
-            return 0
-        
+    def prepare_table_load(self, cursor, table_name, cols, clear=True):
+        """Clear table and compile its row encoder from loadable columns + NOT NULL/type metadata"""
         # Delete existing data (more reliable than TRUNCATE with FK constraints)
-        try:
-            cursor.execute(f"DELETE FROM {table_name}")
-        except Exception as e:
-            logger.warning(f"    ⚠ Could not clear {table_name}: {str(e)[:100]}")
-        
-        cols = list(records[0].keys())
+        if clear:
+            try:
+                cursor.execute(f"DELETE FROM {table_name}")
+            except Exception as e:
+                logger.warning(f"    ⚠ Could not clear {table_name}: {str(e)[:100]}")
         
         # Get DB columns including NOT NULL constraints and data types
         try:
@@ -1023,85 +1423,70 @@ class GenIMSSetup:
             safe_cols = cols
             db_col_info = {}
         
-        # Use COPY FROM STDIN for maximum speed
-        import io
+        encoder = TableEncoder(safe_cols, db_col_info, binary=self.binary_copy)
+        if self.binary_copy and encoder.binary_encoders is None:
+            unsupported = [c for c in safe_cols if db_col_info.get(c, (None, None, None))[2] not in BINARY_ENCODERS]
+            logger.info(f"    ⊘ {table_name}: text COPY (no binary encoder for {', '.join(unsupported[:3])})")
+        return encoder
+    
+    def load_table_ultra_fast(self, cursor, table_name, records):
+        """Load table using COPY FROM STDIN - Ultra fast bulk loading (5-10x faster than INSERT)"""
+        if not records:
+            return 0
         
-        # Create CSV-like string buffer for COPY
-        buffer = io.StringIO()
-        loaded = 0
+        cols = list(records[0].keys())
+        encoder = self.prepare_table_load(cursor, table_name, cols)
+        return self.copy_records(cursor, table_name, records, encoder)
+    
+    def copy_records(self, cursor, table_name, records, encoder, row_offset=0, fallback=True):
+        """COPY one batch of records into an already prepared table (row_offset numbers default IDs).
         
-        for rec in records:
-            row_values = []
-            
-            for c in safe_cols:
-                val = rec.get(c)
-                
-                # Check if this column is NOT NULL and value is missing
-                if val is None and c in db_col_info:
-                    is_nullable, data_type, udt_name = db_col_info[c]
-                    if is_nullable == 'NO':
-                        # Generate sensible default based on data type and column name
-                        if c.endswith('_id') or c == 'id':
-                            val = loaded + 1
-                        # Special handling for specific columns
-                        elif c in ['run_start_time', 'run_end_time', 'start_time', 'end_time', 'actual_start_time', 'actual_end_time']:
-                            val = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        elif c in ['planned_start_time', 'planned_end_time']:
-                            val = datetime.now().replace(hour=8, minute=0, second=0).strftime('%Y-%m-%d %H:%M:%S')
-                        elif c in ['transaction_date', 'created_at', 'updated_at']:
-                            val = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        # For date/timestamp columns
-                        elif data_type in ['date', 'timestamp', 'timestamp without time zone', 'timestamp with time zone']:
-                            val = datetime.now().strftime('%Y-%m-%d') if data_type == 'date' else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        # For numeric columns
-                        elif data_type in ['integer', 'bigint', 'smallint', 'numeric', 'decimal', 'real', 'double precision']:
-                            val = 1 if 'frequency' in c.lower() or 'days' in c.lower() else 0
-                        # For boolean columns
-                        elif data_type in ['boolean']:
-                            val = False
-                        # For string/text columns
-                        else:
-                            val = f'{c}_default'
-                
-                # Format value for CSV-style COPY
-                if val is None:
-                    row_values.append('\\N')  # NULL in PostgreSQL COPY format
-                elif isinstance(val, bool):
-                    row_values.append('t' if val else 'f')
-                elif isinstance(val, str):
-                    # Escape special characters for COPY format
-                    escaped = val.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
-                    row_values.append(escaped)
-                else:
-                    row_values.append(str(val))
-            
-            buffer.write('\t'.join(row_values) + '\n')
-            loaded += 1
+        fallback=False raises on the first COPY error instead of retrying as text / INSERT:
+        required inside an explicit transaction, which a failed COPY has already aborted.
+        """
+        if encoder.binary_encoders is not None:
+            try:
+                buffer = encoder.encode_binary(records, row_offset)
+                cursor.copy_expert(
+                    f"COPY {table_name} ({', '.join(encoder.columns)}) FROM STDIN WITH (FORMAT binary)",
+                    buffer
+                )
+                return len(records)
+            except Exception as e:
+                if not fallback:
+                    raise
+                logger.warning(f"    ⚠ Binary COPY failed for {table_name}, retrying as text: {str(e)[:100]}")
+        
+        # Use COPY FROM STDIN for maximum speed (tab separated, \N for NULL)
+        buffer = encoder.encode_text(records, row_offset)
         
         # Execute COPY FROM STDIN
-        buffer.seek(0)
         try:
             cursor.copy_from(
                 buffer, 
                 table_name, 
-                columns=safe_cols,
+                columns=encoder.columns,
                 sep='\t',
                 null='\\N'
             )
-            return loaded
+            return len(records)
         except Exception as e:
+            if not fallback:
+                raise
             error_msg = str(e)
             if len(error_msg) > 200:
                 error_msg = error_msg[:200]
             logger.error(f"    ✗ COPY Error in {table_name}: {error_msg}")
             print(f"ERROR in {table_name}: {error_msg}")
             # Fallback to INSERT method
-            return self.load_table_fallback(cursor, table_name, records, safe_cols, db_col_info)
+            return self.load_table_fallback(cursor, table_name, records, encoder, row_offset)
     
-    def load_table_fallback(self, cursor, table_name, records, safe_cols, db_col_info):
+    def load_table_fallback(self, cursor, table_name, records, encoder, row_offset=0):
         """Fallback INSERT method if COPY fails"""
         loaded = 0
         batch_size = 25000  # Large batch size for maximum performance
+        columns = encoder.columns
+        sql_types = encoder.sql_types
         
         for batch_idx in range(0, len(records), batch_size):
             batch = records[batch_idx:batch_idx+batch_size]
@@ -1109,52 +1494,13 @@ class GenIMSSetup:
             # Build multi-row INSERT
             values_list = []
             
-            for idx, rec in enumerate(batch):
-                row_vals = []
-                
-                for c in safe_cols:
-                    val = rec.get(c)
-                    
-                    # Check if this column is NOT NULL and value is missing
-                    if val is None and c in db_col_info:
-                        is_nullable, data_type, udt_name = db_col_info[c]
-                        if is_nullable == 'NO':
-                            # Generate sensible default based on data type and column name
-                            if c.endswith('_id') or c == 'id':
-                                val = batch_idx + idx + 1
-                            # Special handling for specific columns
-                            elif c in ['run_start_time', 'run_end_time', 'start_time', 'end_time', 'actual_start_time', 'actual_end_time']:
-                                val = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            elif c in ['planned_start_time', 'planned_end_time']:
-                                val = datetime.now().replace(hour=8, minute=0, second=0).strftime('%Y-%m-%d %H:%M:%S')
-                            elif c in ['transaction_date', 'created_at', 'updated_at']:
-                                val = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            # For date/timestamp columns
-                            elif data_type in ['date', 'timestamp', 'timestamp without time zone', 'timestamp with time zone']:
-                                val = datetime.now().strftime('%Y-%m-%d') if data_type == 'date' else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            # For numeric columns
-                            elif data_type in ['integer', 'bigint', 'smallint', 'numeric', 'decimal', 'real', 'double precision']:
-                                val = 1 if 'frequency' in c.lower() or 'days' in c.lower() else 0
-                            # For boolean columns
-                            elif data_type in ['boolean']:
-                                val = False
-                            # For string/text columns
-                            else:
-                                val = f'{c}_default'
-                    
-                    # Get data type for formatting (use udt_name for JSONB)
-                    if c in db_col_info:
-                        is_nullable, data_type, udt_name = db_col_info[c]
-                        # For JSONB columns, PostgreSQL returns data_type='USER-DEFINED' and udt_name='jsonb'
-                        col_data_type = udt_name if data_type == 'USER-DEFINED' else data_type
-                    else:
-                        col_data_type = ''
-                    row_vals.append(self.format_value(val, col_name=c, data_type=col_data_type))
-                
+            for values in encoder.iter_rows(batch, row_offset + batch_idx):
+                row_vals = [self.format_value(val, col_name=c, data_type=data_type)
+                            for val, c, data_type in zip(values, columns, sql_types)]
                 values_list.append(f"({', '.join(row_vals)})")
             
             if values_list:
-                sql = f"INSERT INTO {table_name} ({', '.join(safe_cols)}) VALUES {', '.join(values_list)}"
+                sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES {', '.join(values_list)}"
                 
                 try:
                     cursor.execute(sql)
@@ -1174,10 +1520,260 @@ class GenIMSSetup:
     def load_table(self, cursor, table_name, records):
         return self.load_table_ultra_fast(cursor, table_name, records)
     
+    def begin_unlogged_load(self, cursor, table_name):
+        """Choose where an UNLOGGED load COPYs to: returns (copy_target, mode).
+        
+        mode 'unlogged': empty table switched to UNLOGGED in place.
+        mode 'staging':  populated table - rows go to an UNLOGGED staging copy, the table stays untouched.
+        mode None:       UNLOGGED not possible (e.g. FK to/from a logged table) - regular logged load.
+        """
+        try:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table_name})")
+            if cursor.fetchone()[0]:
+                staging = f"{table_name}__staging"
+                cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+                cursor.execute(f"CREATE UNLOGGED TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS)")
+                return staging, 'staging'
+            cursor.execute(f"ALTER TABLE {table_name} SET UNLOGGED")
+            return table_name, 'unlogged'
+        except Exception as e:
+            with self.progress_lock:
+                logger.warning(f"    ⚠ {table_name}: UNLOGGED load not possible, loading logged: {str(e)[:100]}")
+            return table_name, None
+    
+    def finish_unlogged_load(self, cursor, table_name, target, mode, expected):
+        """Validate an UNLOGGED load (row count) and make it durable, or roll it back"""
+        if mode is None:
+            return
+        cursor.execute(f"SELECT COUNT(*) FROM {target}")
+        actual = cursor.fetchone()[0]
+        
+        if actual != expected:
+            self.abort_unlogged_load(cursor, table_name, target, mode)
+            raise RuntimeError(f"UNLOGGED load rolled back: {actual} of {expected} rows loaded")
+        
+        if mode == 'unlogged':
+            cursor.execute(f"ALTER TABLE {table_name} SET LOGGED")
+            return
+        
+        # Swap in from staging: the staging table becomes the table (no row is copied again)
+        try:
+            self.swap_in_table(cursor, table_name, target, set_logged=True)
+        except Exception:
+            cursor.execute(f"DROP TABLE IF EXISTS {target}")
+            raise
+    
+    def swap_in_table(self, cursor, table_name, staging, set_logged=False):
+        """Replace table_name by staging (a LIKE copy) with ALTER TABLE RENAME, in one transaction.
+        
+        The table's constraints, indexes and owned sequences move to the renamed copy and FKs of other
+        tables that reference it are recreated, so only the new rows' table (and index builds) are
+        written - no DELETE + INSERT SELECT through WAL. Views on the table make the swap fail (rolled back).
+        """
+        conn = cursor.connection
+        conn.autocommit = False
+        try:
+            cursor.execute("""
+                SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+                WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'x', 'c', 'f')
+                ORDER BY CASE contype WHEN 'p' THEN 0 WHEN 'u' THEN 1 WHEN 'x' THEN 2 WHEN 'c' THEN 3 ELSE 4 END, conname
+            """, (table_name,))
+            constraints = cursor.fetchall()
+            cursor.execute("""
+                SELECT pg_get_indexdef(x.indexrelid) FROM pg_index x
+                WHERE x.indrelid = %s::regclass
+                  AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = x.indexrelid AND k.contype IN ('p', 'u', 'x'))
+            """, (table_name,))
+            indexes = [row[0] for row in cursor.fetchall()]
+            cursor.execute("""
+                SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) FROM pg_constraint
+                WHERE confrelid = %s::regclass AND conrelid <> confrelid AND contype = 'f'
+            """, (table_name,))
+            referencing = cursor.fetchall()
+            cursor.execute("""
+                SELECT d.objid::regclass::text, a.attname FROM pg_depend d
+                JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+                JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+                WHERE d.refobjid = %s::regclass AND d.deptype = 'a'
+            """, (table_name,))
+            sequences = cursor.fetchall()
+            
+            if set_logged:
+                cursor.execute(f"ALTER TABLE {staging} SET LOGGED")
+            for ref_table, con_name, _ in referencing:
+                cursor.execute(f'ALTER TABLE {ref_table} DROP CONSTRAINT "{con_name}"')
+            for sequence, column in sequences:
+                cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {staging}."{column}"')
+            cursor.execute(f"DROP TABLE {table_name}")
+            cursor.execute(f"ALTER TABLE {staging} RENAME TO {table_name}")
+            for con_name, definition in constraints:
+                cursor.execute(f'ALTER TABLE {table_name} ADD CONSTRAINT "{con_name}" {definition}')
+            for ddl in indexes:
+                cursor.execute(ddl)
+            for ref_table, con_name, definition in referencing:
+                cursor.execute(f'ALTER TABLE {ref_table} ADD CONSTRAINT "{con_name}" {definition}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+    
+    def abort_unlogged_load(self, cursor, table_name, target, mode):
+        """Roll back an UNLOGGED load: drop the staging copy, or empty the table again (it was empty before)
+        and make it LOGGED. Never raises - a table left behind is logged for manual cleanup."""
+        try:
+            if mode == 'staging':
+                cursor.execute(f"DROP TABLE IF EXISTS {target}")
+            else:
+                cursor.execute(f"DELETE FROM {table_name}")
+                cursor.execute(f"ALTER TABLE {table_name} SET LOGGED")
+        except Exception as e:
+            left = f"staging table {target}" if mode == 'staging' else f"{table_name} (still UNLOGGED)"
+            with self.progress_lock:
+                logger.error(f"    ✗ {table_name}: UNLOGGED rollback failed, {left} left behind: {str(e)[:100]}")
+    
+    def load_table_unlogged(self, cursor, table_name, records):
+        """Load a table without per-row WAL: UNLOGGED in place (empty) or via UNLOGGED staging (populated)"""
+        if not records:
+            return 0
+        
+        target, mode = self.begin_unlogged_load(cursor, table_name)
+        if mode is None:
+            return self.load_table_ultra_fast(cursor, table_name, records)
+        
+        try:
+            encoder = self.prepare_table_load(cursor, table_name, list(records[0].keys()), clear=False)
+            loaded = self.copy_records(cursor, target, records, encoder)
+        except Exception:
+            # Never leave the table UNLOGGED (or a staging copy behind) when the COPY itself fails
+            self.abort_unlogged_load(cursor, table_name, target, mode)
+            raise
+        self.finish_unlogged_load(cursor, table_name, target, mode, len(records))
+        return loaded
+    
+    def copy_record_range(self, cursor, target, encoder, records, row_offset):
+        """COPY a slice of records in stream_chunk_size batches (errors propagate - no INSERT fallback)"""
+        loaded = 0
+        for batch_idx in range(0, len(records), self.stream_chunk_size):
+            batch = records[batch_idx:batch_idx + self.stream_chunk_size]
+            loaded += self.copy_records(cursor, target, batch, encoder, row_offset + batch_idx, fallback=False)
+        return loaded
+    
+    def copy_shard(self, conn, table_name, target, encoder, job, label, shard_idx, shard_count):
+        """Run one shard's COPY job (cursor, target, encoder) -> rows inside the shard's open transaction"""
+        start_time = time.time()
+        cursor = conn.cursor()
+        loaded = job(cursor, target, encoder)
+        cursor.close()
+        with self.progress_lock:
+            logger.info(f"      ↳ {table_name} shard {shard_idx + 1}/{shard_count}: "
+                        f"{loaded} rows ({label}, {time.time() - start_time:.1f}s)")
+        return loaded
+    
+    def load_table_sharded(self, db_name, table_name, records):
+        """Load one large table as row-range shards, each COPYed over its own connection"""
+        shard_count = min(self.copy_shards, len(records))
+        shard_size = -(-len(records) // shard_count)
+        jobs = [(partial(self.copy_record_range, records=records[start:start + shard_size], row_offset=start),
+                 f"from row {start + 1}")
+                for start in range(0, len(records), shard_size)]
+        return self.load_jobs_via_staging(db_name, table_name, list(records[0].keys()), jobs, len(records))
+    
+    def load_jobs_via_staging(self, db_name, table_name, columns, jobs, expected):
+        """Run shard COPY jobs [(job, label)] in parallel connections and swap the result in.
+        
+        The shards never write to the table itself: they fill an index-free staging copy
+        (UNLOGGED with --unlogged-load) that is row-count checked and renamed into place
+        (swap_in_table) in one transaction. A shard that fails, or a commit that fails part-way,
+        only ever leaves rows in the staging copy, which is dropped - the table is untouched.
+        """
+        staging = f"{table_name}__shards"
+        
+        # Compile the encoder once and create the staging copy
+        conn = psycopg2.connect(**self.db_config, dbname=db_name)
+        conn.autocommit = True
+        cursor = conn.cursor()
+        try:
+            encoder = self.prepare_table_load(cursor, table_name, columns, clear=False)
+            unlogged = "UNLOGGED " if self.unlogged_load else ""
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            cursor.execute(f"CREATE {unlogged}TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS)")
+        except Exception:
+            conn.close()
+            raise
+        
+        with self.progress_lock:
+            logger.info(f"    🔀 {db_name}.{table_name}: {expected} rows → {len(jobs)} shards "
+                        f"via {unlogged.lower()}{staging}")
+        
+        try:
+            loaded = self.copy_shards_into(db_name, table_name, staging, encoder, jobs)
+            cursor.execute(f"SELECT COUNT(*) FROM {staging}")
+            actual = cursor.fetchone()[0]
+            if actual != expected:
+                raise RuntimeError(f"sharded COPY rolled back: {actual} of {expected} rows staged")
+            # The shard copy becomes the table
+            self.swap_in_table(cursor, table_name, staging, set_logged=self.unlogged_load)
+            return loaded
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            conn.close()
+    
+    def copy_shards_into(self, db_name, table_name, target, encoder, jobs):
+        """Run shard COPY jobs into a staging target, one connection each; any failed shard rolls back all of them"""
+        shard_count = len(jobs)
+        shard_conns = []
+        try:
+            for _ in range(shard_count):
+                shard_conn = psycopg2.connect(**self.db_config, dbname=db_name)
+                shard_conn.autocommit = False
+                shard_conns.append(shard_conn)
+            
+            errors = []
+            loaded = 0
+            with ThreadPoolExecutor(max_workers=shard_count) as executor:
+                futures = {}
+                for shard_idx, (shard_conn, (job, label)) in enumerate(zip(shard_conns, jobs)):
+                    future = executor.submit(self.copy_shard, shard_conn, table_name, target, encoder,
+                                             job, label, shard_idx, shard_count)
+                    futures[future] = shard_idx
+                
+                for future in as_completed(futures):
+                    try:
+                        loaded += future.result()
+                    except Exception as e:
+                        errors.append(f"shard {futures[future] + 1}/{shard_count}: {str(e)[:100]}")
+            
+            if errors:
+                for shard_conn in shard_conns:
+                    shard_conn.rollback()
+                raise RuntimeError(f"sharded COPY rolled back ({'; '.join(errors)})")
+            
+            # Every shard has finished its COPY; a commit failing part-way only leaves rows in the staging copy
+            for shard_conn in shard_conns:
+                shard_conn.commit()
+            return loaded
+        finally:
+            for shard_conn in shard_conns:
+                shard_conn.close()
+    
     def load_table_worker(self, args):
         """Worker function for parallel table loading"""
         db_name, table_name, records = args
         
+        if self.copy_shards > 1 and len(records) >= self.shard_threshold:
+            try:
+                loaded = self.load_table_sharded(db_name, table_name, records)
+                with self.progress_lock:
+                    logger.info(f"    ✓ {db_name}.{table_name}: {loaded} records (sharded)")
+                return (table_name, loaded, None)
+            except Exception as e:
+                error_msg = str(e)[:200]
+                with self.progress_lock:
+                    logger.error(f"    ✗ {db_name}.{table_name}: {error_msg}")
+                return (table_name, 0, error_msg)
+        
         try:
             # Create separate connection for this worker
             conn = psycopg2.connect(
@@ -1188,7 +1784,10 @@ class GenIMSSetup:
             cursor = conn.cursor()
             
             # Load table using ultra-fast COPY method
-            loaded = self.load_table_ultra_fast(cursor, table_name, records)
+            if self.unlogged_load:
+                loaded = self.load_table_unlogged(cursor, table_name, records)
+            else:
+                loaded = self.load_table_ultra_fast(cursor, table_name, records)
             
             cursor.close()
             conn.close()
@@ -1206,6 +1805,165 @@ class GenIMSSetup:
                 logger.error(f"    ✗ {db_name}.{table_name}: {error_msg}")
             return (table_name, 0, error_msg)
     
+    # ========================================================================
+    # INDEX / FK DEFERRAL: drop secondary indexes and FKs, load, rebuild
+    # ========================================================================
+    
+    def capture_deferred_objects(self, cursor):
+        """Secondary indexes and FK constraints of the public schema, as (table, name, ddl) from pg_catalog"""
+        # Indexes backing PRIMARY KEY / UNIQUE / EXCLUDE constraints stay, and so do standalone
+        # unique indexes: they define the table (duplicates must fail the load, ON CONFLICT needs them)
+        cursor.execute("""
+            SELECT t.relname, i.relname, pg_get_indexdef(x.indexrelid)
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            JOIN pg_class t ON t.oid = x.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = 'public'
+              AND NOT x.indisunique
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_constraint k
+                  WHERE k.conindid = x.indexrelid AND k.contype IN ('p', 'u', 'x')
+              )
+            ORDER BY t.relname, i.relname
+        """)
+        indexes = cursor.fetchall()
+        
+        cursor.execute("""
+            SELECT t.relname, k.conname, pg_get_constraintdef(k.oid)
+            FROM pg_constraint k
+            JOIN pg_class t ON t.oid = k.conrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = 'public' AND k.contype = 'f'
+            ORDER BY t.relname, k.conname
+        """)
+        fks = cursor.fetchall()
+        return indexes, fks
+    
+    def drop_deferred_objects(self, db_name):
+        """Capture and drop secondary indexes + FKs before loading; returns (indexes, fks) to rebuild"""
+        try:
+            conn = psycopg2.connect(**self.db_config, dbname=db_name)
+            conn.autocommit = False
+            cursor = conn.cursor()
+            indexes, fks = self.capture_deferred_objects(cursor)
+            
+            # Checkpoint the DDL first: a run that dies before the rebuild leaves it to --resume
+            self.checkpoint.mark_done('deferred', db_name, indexes=indexes, fks=fks)
+            
+            # One transaction: either everything is dropped (and will be rebuilt) or nothing is
+            for table_name, con_name, _ in fks:
+                cursor.execute(f'ALTER TABLE "{table_name}" DROP CONSTRAINT "{con_name}"')
+            for _, index_name, _ in indexes:
+                cursor.execute(f'DROP INDEX "{index_name}"')
+            conn.commit()
+            cursor.close()
+            conn.close()
+            
+            with self.progress_lock:
+                logger.info(f"  ⏸ {db_name}: deferred {len(indexes)} indexes, {len(fks)} FK constraints")
+            return indexes, fks
+        except Exception as e:
+            self.checkpoint.invalidate('deferred', db_name)
+            with self.progress_lock:
+                logger.warning(f"  ⚠ {db_name}: could not defer indexes/FKs, loading with them in place: {str(e)[:100]}")
+            return None
+    
+    def run_deferred_ddl(self, db_name, kind, name, ddl):
+        """Run one rebuild statement on its own connection; returns (kind, name, ddl, error)"""
+        start_time = time.time()
+        try:
+            conn = psycopg2.connect(**self.db_config, dbname=db_name)
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute(ddl)
+            cursor.close()
+            conn.close()
+            with self.progress_lock:
+                logger.info(f"    ✓ {db_name}: {kind} {name} ({time.time() - start_time:.1f}s)")
+            return kind, name, ddl, None
+        except Exception as e:
+            return kind, name, ddl, str(e)[:200]
+    
+    def run_deferred_ddl_parallel(self, db_name, statements):
+        """Run (kind, name, ddl) statements with one worker each, returns failures"""
+        failures = []
+        if not statements:
+            return failures
+        workers = min(len(statements), self.index_rebuild_workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.run_deferred_ddl, db_name, *stmt) for stmt in statements]
+            for future in as_completed(futures):
+                kind, name, ddl, error = future.result()
+                if error:
+                    failures.append((kind, name, ddl, error))
+        return failures
+    
+    def rebuild_deferred_objects(self, db_name, indexes, fks):
+        """Rebuild dropped indexes in parallel, then re-add FKs (NOT VALID) and validate them in parallel"""
+        start_time = time.time()
+        with self.progress_lock:
+            logger.info(f"  ▶ {db_name}: rebuilding {len(indexes)} indexes, {len(fks)} FK constraints")
+        
+        failures = self.run_deferred_ddl_parallel(
+            db_name, [('index', index_name, ddl) for _, index_name, ddl in indexes]
+        )
+        
+        # ADD CONSTRAINT ... NOT VALID is catalog-only; VALIDATE takes a lock that lets validations run concurrently
+        to_validate = []
+        if fks:
+            conn = psycopg2.connect(**self.db_config, dbname=db_name)
+            conn.autocommit = True
+            cursor = conn.cursor()
+            for table_name, con_name, definition in fks:
+                ddl = f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{con_name}" {definition} NOT VALID'
+                try:
+                    cursor.execute(ddl)
+                    to_validate.append(('FK', con_name,
+                                        f'ALTER TABLE "{table_name}" VALIDATE CONSTRAINT "{con_name}"'))
+                except Exception as e:
+                    failures.append(('FK', con_name, ddl, str(e)[:200]))
+            cursor.close()
+            conn.close()
+        failures += self.run_deferred_ddl_parallel(db_name, to_validate)
+        
+        elapsed = time.time() - start_time
+        with self.progress_lock:
+            if failures:
+                logger.error(f"  ✗ {db_name}: {len(failures)} indexes/FKs failed to rebuild ({elapsed:.1f}s)")
+                for kind, name, ddl, error in failures:
+                    logger.error(f"    ✗ {kind} {name}: {error}")
+                    logger.error(f"      DDL: {ddl}")
+                    self.stats['errors'].append(f"{db_name}: rebuild {kind} {name}: {error[:100]}")
+            else:
+                logger.info(f"  → {db_name}: indexes and FKs rebuilt ({elapsed:.1f}s)")
+        if not failures:
+            self.checkpoint.invalidate('deferred', db_name)
+        return not failures
+    
+    def rebuild_interrupted_deferral(self, db_name):
+        """Rebuild the checkpointed indexes/FKs an interrupted --defer-indexes run dropped and never restored"""
+        unit = self.checkpoint.get('deferred', db_name)
+        try:
+            conn = psycopg2.connect(**self.db_config, dbname=db_name)
+            cursor = conn.cursor()
+            indexes, fks = self.capture_deferred_objects(cursor)
+            cursor.close()
+            conn.close()
+        except Exception as e:
+            with self.progress_lock:
+                logger.warning(f"  ✗ {db_name}: cannot restore deferred indexes/FKs: {str(e)[:100]}")
+                self.stats['errors'].append(f"{db_name}: deferred indexes/FKs not restored")
+            return False
+        
+        # A rebuild cut short may have restored some of them already
+        present = {name for _, name, _ in indexes} | {name for _, name, _ in fks}
+        missing_indexes = [tuple(obj) for obj in unit['indexes'] if obj[1] not in present]
+        missing_fks = [tuple(obj) for obj in unit['fks'] if obj[1] not in present]
+        logger.info(f"  ↻ {db_name}: {len(missing_indexes)} indexes, {len(missing_fks)} FKs still deferred "
+                    f"by the interrupted run")
+        return self.rebuild_deferred_objects(db_name, missing_indexes, missing_fks)
+    
     def load_single_database(self, db_name, config):
         """Load data for single database with PARALLEL table loading"""
         data_file = config.get('data_file')
@@ -1220,6 +1978,27 @@ class GenIMSSetup:
                 logger.warning(f"  ⊘ File not found: {data_path}")
             return True
         
+        deferred = None
+        if self.defer_indexes:
+            deferred = self.drop_deferred_objects(db_name)
+        
+        rebuilt = True
+        manifest = read_manifest(data_path)
+        try:
+            if manifest is not None:
+                success = self.load_single_database_shards(db_name, data_path, manifest)
+            elif self.streaming_load:
+                success = self.load_single_database_streaming(db_name, data_path)
+            else:
+                success = self.load_single_database_json(db_name, data_path)
+        finally:
+            # Rebuild even if the load failed - the schema must not be left without its indexes
+            if deferred:
+                rebuilt = self.rebuild_deferred_objects(db_name, *deferred)
+        return success and rebuilt
+    
+    def load_single_database_json(self, db_name, data_path):
+        """Load a whole JSON data file, tables in parallel"""
         start_time = time.time()
         
         try:
@@ -1234,13 +2013,22 @@ class GenIMSSetup:
             )
             conn.close()  # Just test connection
             
-            # Prepare parallel table loading tasks
+            # Prepare parallel table loading tasks (tables checkpointed from this exact file are kept)
+            file_hash = self.checkpoint.file_digest(data_path)
             table_tasks = []
+            kept = 0
             for table_name in data:
                 records = data[table_name]
                 if records and isinstance(records, list):
+                    if self.checkpoint.is_done('table', f"{db_name}.{table_name}", file_hash=file_hash):
+                        kept += 1
+                        continue
                     table_tasks.append((db_name, table_name, records))
             
+            if kept:
+                with self.progress_lock:
+                    logger.info(f"  ⏭ {db_name}: {kept} tables already loaded (resume)")
+            
             if not table_tasks:
                 with self.progress_lock:
                     logger.info(f"  ⊘ No tables to load for {db_name}")
@@ -1268,6 +2056,7 @@ class GenIMSSetup:
                                 total_loaded += loaded
                                 with self.progress_lock:
                                     self.stats['records_loaded'] += loaded
+                                self.checkpoint_table(db_name, table_name, loaded, len(task[2]), file_hash)
                         except Exception as e:
                             table_name = task[1]
                             errors.append(f"{table_name}: {str(e)[:100]}")
@@ -1284,11 +2073,17 @@ class GenIMSSetup:
                 
                 for db_name_task, table_name, records in table_tasks:
                     try:
-                        loaded = self.load_table_ultra_fast(cursor, table_name, records)
+                        if self.copy_shards > 1 and len(records) >= self.shard_threshold:
+                            loaded = self.load_table_sharded(db_name, table_name, records)
+                        elif self.unlogged_load:
+                            loaded = self.load_table_unlogged(cursor, table_name, records)
+                        else:
+                            loaded = self.load_table_ultra_fast(cursor, table_name, records)
                         total_loaded += loaded
                         with self.progress_lock:
                             logger.info(f"    ✓ {db_name}.{table_name}: {loaded} records")
                             self.stats['records_loaded'] += loaded
+                        self.checkpoint_table(db_name, table_name, loaded, len(records), file_hash)
                     except Exception as e:
                         error_msg = str(e)[:100]
                         errors.append(f"{table_name}: {error_msg}")
@@ -1314,6 +2109,223 @@ class GenIMSSetup:
                 self.stats['errors'].append(f"{db_name}: {str(e)[:100]}")
             return False
     
+    def load_single_database_streaming(self, db_name, data_path):
+        """Load data for single database by streaming table arrays into COPY in bounded chunks"""
+        start_time = time.time()
+        total_loaded = 0
+        tables = 0
+        errors = []
+        
+        try:
+            conn = psycopg2.connect(
+                **self.db_config,
+                dbname=db_name
+            )
+            conn.autocommit = True
+            cursor = conn.cursor()
+            
+            current_table = None
+            encoder = None
+            table_loaded = 0
+            table_records = 0
+            target, unlogged_mode = None, None
+            file_hash = self.checkpoint.file_digest(data_path)
+            kept = set()
+            
+            # Peak memory is one chunk of parsed records + one COPY buffer, regardless of file size
+            for table_name, chunk in iter_table_chunks(data_path, self.stream_chunk_size):
+                if table_name in kept or (table_name != current_table and self.checkpoint.is_done(
+                        'table', f"{db_name}.{table_name}", file_hash=file_hash)):
+                    kept.add(table_name)
+                    continue
+                if table_name != current_table:
+                    if current_table is not None:
+                        self.finish_streamed_table(cursor, db_name, current_table, target, unlogged_mode,
+                                                   encoder, table_records, table_loaded, errors, file_hash)
+                    current_table = table_name
+                    table_loaded = 0
+                    table_records = 0
+                    tables += 1
+                    target, unlogged_mode = table_name, None
+                    if self.unlogged_load:
+                        target, unlogged_mode = self.begin_unlogged_load(cursor, table_name)
+                    encoder = self.prepare_table_load(cursor, table_name, list(chunk[0].keys()),
+                                                      clear=unlogged_mode is None)
+                
+                table_records += len(chunk)
+                try:
+                    loaded = self.copy_records(cursor, target, chunk, encoder, row_offset=table_loaded)
+                    table_loaded += loaded
+                    total_loaded += loaded
+                    with self.progress_lock:
+                        self.stats['records_loaded'] += loaded
+                except Exception as e:
+                    error_msg = str(e)[:100]
+                    errors.append(f"{table_name}: {error_msg}")
+                    with self.progress_lock:
+                        logger.error(f"    ✗ {db_name}.{table_name}: {error_msg}")
+            
+            if current_table is not None:
+                self.finish_streamed_table(cursor, db_name, current_table, target, unlogged_mode,
+                                           encoder, table_records, table_loaded, errors, file_hash)
+            if kept:
+                with self.progress_lock:
+                    logger.info(f"  ⏭ {db_name}: {len(kept)} tables already loaded (resume)")
+            
+            cursor.close()
+            conn.close()
+            
+            elapsed = time.time() - start_time
+            with self.progress_lock:
+                logger.info(f"  → {db_name}: {tables} tables, {total_loaded} records streamed ({elapsed:.1f}s)")
+                self.stats['tables_loaded'] += tables
+                for error in errors:
+                    self.stats['errors'].append(f"{db_name}.{error}")
+            
+            return len(errors) == 0
+        
+        except Exception as e:
+            with self.progress_lock:
+                logger.error(f"  ✗ {db_name}: {str(e)[:100]}")
+                self.stats['errors'].append(f"{db_name}: {str(e)[:100]}")
+            return False
+    
+    def load_single_database_shards(self, db_name, data_path, manifest):
+        """Load a sharded generator output (table_writer manifest), tables in parallel"""
+        start_time = time.time()
+        file_hash = self.checkpoint.file_digest(data_path)
+        tables = [table_name for table_name, meta in manifest['tables'].items() if meta['rows']]
+        pending = [table_name for table_name in tables
+                   if not self.checkpoint.is_done('table', f"{db_name}.{table_name}", file_hash=file_hash)]
+        if len(pending) < len(tables):
+            with self.progress_lock:
+                logger.info(f"  ⏭ {db_name}: {len(tables) - len(pending)} tables already loaded (resume)")
+        if not pending:
+            return True
+        
+        total_loaded = 0
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(4, len(pending))) as executor:
+            futures = {executor.submit(self.load_table_shards, db_name, data_path, manifest, table_name): table_name
+                       for table_name in pending}
+            for future in as_completed(futures):
+                table_name = futures[future]
+                try:
+                    loaded = future.result()
+                except Exception as e:
+                    errors.append(f"{table_name}: {str(e)[:100]}")
+                    with self.progress_lock:
+                        logger.error(f"    ✗ {db_name}.{table_name}: {str(e)[:100]}")
+                    continue
+                total_loaded += loaded
+                with self.progress_lock:
+                    logger.info(f"    ✓ {db_name}.{table_name}: {loaded} records")
+                    self.stats['records_loaded'] += loaded
+                self.checkpoint_table(db_name, table_name, loaded, manifest['tables'][table_name]['rows'], file_hash)
+        
+        elapsed = time.time() - start_time
+        with self.progress_lock:
+            logger.info(f"  → {db_name}: {len(pending)} tables, {total_loaded} records from "
+                        f"{manifest['format']} shards ({elapsed:.1f}s)")
+            self.stats['tables_loaded'] += len(pending)
+            for error in errors:
+                self.stats['errors'].append(f"{db_name}.{error}")
+        return len(errors) == 0
+    
+    def load_table_shards(self, db_name, data_path, manifest, table_name):
+        """Load one table of a shard manifest with the same modes as a JSON table: its shard files are
+        split across --copy-shards connections, and loads go UNLOGGED and binary when enabled"""
+        meta = manifest['tables'][table_name]
+        files = []
+        row_offset = 0
+        for path, shard in zip(shard_paths(data_path, manifest, table_name), meta['shards']):
+            files.append((path, shard['rows'], row_offset))
+            row_offset += shard['rows']
+        
+        shard_count = min(self.copy_shards, len(files))
+        if shard_count > 1 and meta['rows'] >= self.shard_threshold:
+            # Contiguous runs of shard files, one per connection
+            group_size = -(-len(files) // shard_count)
+            jobs = [(partial(self.copy_shard_files, manifest=manifest, meta=meta, files=files[i:i + group_size]),
+                     f"{min(group_size, len(files) - i)} files from {files[i][0].name}")
+                    for i in range(0, len(files), group_size)]
+            return self.load_jobs_via_staging(db_name, table_name, meta['columns'], jobs, meta['rows'])
+        
+        conn = psycopg2.connect(**self.db_config, dbname=db_name)
+        conn.autocommit = True
+        try:
+            cursor = conn.cursor()
+            target, unlogged_mode = table_name, None
+            if self.unlogged_load:
+                target, unlogged_mode = self.begin_unlogged_load(cursor, table_name)
+            encoder = self.prepare_table_load(cursor, table_name, meta['columns'], clear=unlogged_mode is None)
+            try:
+                loaded = self.copy_shard_files(cursor, target, encoder, manifest, meta, files)
+            except Exception:
+                # Never leave the table UNLOGGED (or a staging copy behind) when the COPY itself fails
+                if unlogged_mode is not None:
+                    self.abort_unlogged_load(cursor, table_name, target, unlogged_mode)
+                raise
+            self.finish_unlogged_load(cursor, table_name, target, unlogged_mode, meta['rows'])
+            return loaded
+        finally:
+            conn.close()
+    
+    def copy_shard_files(self, cursor, target, encoder, manifest, meta, files):
+        """COPY shard files [(path, rows, row_offset)] into target: TSV shards go to text COPY as-is,
+        NDJSON shards (and every shard under --binary-copy) through the row encoder"""
+        # Direct COPY needs the shard's columns to be exactly the loadable ones
+        direct = (manifest['format'] == 'tsv' and list(encoder.columns) == meta['columns']
+                  and encoder.binary_encoders is None)
+        copy_sql = f"COPY {target} ({', '.join(encoder.columns)}) FROM STDIN WITH (FORMAT text)"
+        # Inside a shard transaction a failed COPY is undone by a savepoint instead of autocommit
+        in_transaction = not cursor.connection.autocommit
+        loaded = 0
+        for path, rows, row_offset in files:
+            if direct:
+                try:
+                    if in_transaction:
+                        cursor.execute("SAVEPOINT shard_file")
+                    with open_shard(path) as f:
+                        cursor.copy_expert(copy_sql, f)
+                    if in_transaction:
+                        cursor.execute("RELEASE SAVEPOINT shard_file")
+                    loaded += rows
+                    continue
+                except Exception as e:
+                    if in_transaction:
+                        cursor.execute("ROLLBACK TO SAVEPOINT shard_file")
+                    # e.g. NULL in a NOT NULL column: re-encode this shard with the loader's defaults
+                    with self.progress_lock:
+                        logger.warning(f"    ⚠ Direct COPY of {path.name} failed, re-encoding: {str(e)[:100]}")
+            done = 0
+            for records in iter_shard_records(path, manifest['format'], meta['columns'], meta['kinds'],
+                                              self.stream_chunk_size):
+                done += self.copy_records(cursor, target, records, encoder, row_offset=row_offset + done,
+                                          fallback=not in_transaction)
+            loaded += done
+        return loaded
+    
+    def finish_streamed_table(self, cursor, db_name, table_name, target, unlogged_mode,
+                              encoder, table_records, table_loaded, errors, file_hash):
+        """Close out one streamed table: make an UNLOGGED load durable, then report it"""
+        try:
+            self.finish_unlogged_load(cursor, table_name, target, unlogged_mode, table_records)
+        except Exception as e:
+            error_msg = str(e)[:100]
+            errors.append(f"{table_name}: {error_msg}")
+            with self.progress_lock:
+                logger.error(f"    ✗ {db_name}.{table_name}: {error_msg}")
+            return
+        with self.progress_lock:
+            logger.info(f"    ✓ {db_name}.{table_name}: {table_loaded} records")
+        self.checkpoint_table(db_name, table_name, table_loaded, table_records, file_hash)
+    
+    def checkpoint_table(self, db_name, table_name, loaded, expected, file_hash):
+        """Record a table as loaded - only when every record from the data file made it in"""
+        if loaded == expected:
+            self.checkpoint.mark_done('table', f"{db_name}.{table_name}", rows=loaded, file_hash=file_hash)
+    
     def load_data(self):
         """Load all generated data with DEPENDENCY-AWARE parallel processing"""
         self.log_section("STEP 4: Loading Data (DEPENDENCY-AWARE PARALLEL)")
@@ -1426,6 +2438,85 @@ class GenIMSSetup:
         
         return True
     
+    def validate_and_load_database(self, db_name, config, registry):
+        """Pipelined unit of work: FK-validate one database's data file, then load it"""
+        if not self.verify_fks:  # Otherwise verified in the database after loading (step 5)
+            success, errors, message = self.validate_single_database(db_name, config, registry)
+            if not success and errors > 0:
+                with self.progress_lock:
+                    self.stats['errors'].append(f"FK validation {db_name}: {message}")
+        return self.load_single_database(db_name, config)
+    
+    def generate_and_load_pipelined(self):
+        """Steps 3c-4 pipelined: each database validates + loads as soon as its generator finishes"""
+        self.log_section("STEP 3c-4: Pipelined Generation and Loading Data")
+        
+        from data_registry import reset_registry
+        reset_registry()
+        registry = get_registry(self.root_path)
+        self.load_fk_graph(registry)
+        
+        # Databases whose data file is written by another database's generator
+        written_by = {}
+        for db_name, config in DATABASES.items():
+            if config.get('depends_on_data_from'):
+                written_by.setdefault(config['depends_on_data_from'], []).append(db_name)
+        
+        load_futures = {}
+        # Only finished generators' files are read as FK targets; master data is final after step 3a
+        self.data_ready = {'genims_master_db_try'}
+        
+        with ThreadPoolExecutor(max_workers=4) as load_executor:
+            def submit_load(db_name):
+                config = DATABASES[db_name]
+                if not config.get('data_file') or not (self.root_path / config['data_file']).exists():
+                    return
+                with self.progress_lock:
+                    logger.info(f"  ▶ {db_name}: data ready - validating + loading while generators continue")
+                future = load_executor.submit(self.validate_and_load_database, db_name, config, registry)
+                load_futures[future] = db_name
+            
+            def on_generated(node, success):
+                if not success:
+                    # Whatever data file is on disk is a previous run's: never validate or load it
+                    with self.progress_lock:
+                        logger.warning(f"  ⊘ {', '.join(node['dbs'])}: generator failed - not loading")
+                    return
+                with self.progress_lock:
+                    self.data_ready = self.data_ready | set(node['dbs']) | {
+                        written_db for db_name in node['dbs'] for written_db in written_by.get(db_name, [])}
+                for db_name in node['dbs']:
+                    submit_load(db_name)
+                    for written_db in written_by.get(db_name, []):
+                        submit_load(written_db)
+            
+            # Master data is final after step 3a - load it while dependents generate
+            submit_load('genims_master_db_try')
+            
+            generated = self.generate_dependent_data(on_generated=on_generated)
+            
+            completed = 0
+            for future in as_completed(load_futures):
+                db_name = load_futures[future]
+                completed += 1
+                try:
+                    if not future.result():
+                        with self.progress_lock:
+                            logger.warning(f"  Database loading failed: {db_name}")
+                except Exception as exc:
+                    with self.progress_lock:
+                        logger.warning(f"  ✗ Loading exception for {db_name}: {exc}")
+                        self.stats['errors'].append(f"Load exception {db_name}: {str(exc)[:100]}")
+                with self.progress_lock:
+                    logger.info(f"  📈 Load progress: {completed}/{len(load_futures)}")
+        
+        self.data_ready = None
+        logger.info(f"\n✓ Pipelined generation + loading completed: {self.stats['tables_loaded']} tables, {self.stats['records_loaded']:,} records")
+        
+        # Reset sequences after loading to ensure next inserts don't have duplicates
+        self.reset_sequences()
+        return generated
+    
     def reset_sequences(self):
         """Reset all BIGSERIAL sequences with PARALLEL processing"""
         self.log_section("STEP 4.5: Resetting BIGSERIAL Sequences (PARALLEL)")
@@ -1510,6 +2601,273 @@ class GenIMSSetup:
             return False, 0
     
     # ========================================================================
+    # STEP 5: VERIFY FKs IN DATABASE (Set-Based Anti-Joins)
+    # ========================================================================
+    
+    def verify_foreign_keys(self):
+        """Count orphaned FK values of every schema FK relationship with anti-joins in PostgreSQL"""
+        self.log_section("STEP 5: Verifying Foreign Keys in PostgreSQL (PARALLEL)")
+        
+        graph = FKGraph.load(self.root_path, {db_name: config['schema_file'] for db_name, config in DATABASES.items()})
+        databases_to_verify = [db_name for db_name in DATABASES if graph.rules(db_name)]
+        logger.info(f"  📊 Verifying {graph.edge_count()} relationships across {len(databases_to_verify)} databases...")
+        
+        start_time = time.time()
+        report = {}
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            future_to_db = {executor.submit(self.verify_database_fks, db_name, graph): db_name
+                            for db_name in databases_to_verify}
+            for future in as_completed(future_to_db):
+                db_name = future_to_db[future]
+                try:
+                    report[db_name] = future.result()
+                except Exception as exc:
+                    report[db_name] = {'orphans': 0, 'relationships': [], 'errors': [str(exc)[:200]]}
+                    with self.progress_lock:
+                        logger.warning(f"  ✗ FK verification failed for {db_name}: {str(exc)[:100]}")
+        
+        total_orphans = sum(result['orphans'] for result in report.values())
+        self.fk_report_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.fk_report_file, 'w') as f:
+            json.dump({
+                'generated_at': datetime.now().isoformat(timespec='seconds'),
+                'elapsed_seconds': round(time.time() - start_time, 2),
+                'total_orphans': total_orphans,
+                'databases': {db_name: report[db_name] for db_name in databases_to_verify if db_name in report},
+            }, f, indent=2, default=str)
+        
+        failed = sum(len(result['errors']) for result in report.values())
+        logger.info(f"\n{'✓' if not total_orphans else '⚠'} FK verification: {total_orphans:,} orphaned values, "
+                    f"{failed} failed checks ({time.time() - start_time:.1f}s) - report: {self.fk_report_file}")
+        if failed:
+            with self.progress_lock:
+                self.stats['errors'].append(f"FK verification: {failed} checks failed")
+        return total_orphans == 0 and not failed
+    
+    def fetch_fk_target_ids(self, target):
+        """Distinct values of a referenced column in another database (fetched once per run)"""
+        key = f"{target['db']}.{target['table']}.{target['column']}"
+        with self.fk_target_locks[target['db']]:
+            if key not in self.fk_target_ids:
+                conn = psycopg2.connect(**self.db_config, dbname=target['db'])
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute(f"SELECT DISTINCT {target['column']}::text FROM {target['table']} "
+                                       f"WHERE {target['column']} IS NOT NULL")
+                        self.fk_target_ids[key] = [row[0] for row in cursor.fetchall()]
+                finally:
+                    conn.close()
+            return self.fk_target_ids[key]
+    
+    def create_fk_id_table(self, cursor, name, ids):
+        """TEMP table holding another database's ID list, so the anti-join runs server-side"""
+        cursor.execute(f"CREATE TEMP TABLE {name} (id text PRIMARY KEY)")
+        buffer = io.StringIO(''.join(f"{format_text(value)}\n" for value in ids))
+        cursor.copy_from(buffer, name, columns=['id'])
+        cursor.execute(f"ANALYZE {name}")
+    
+    def verify_database_fks(self, db_name, graph):
+        """One anti-join per FK relationship of a database; cross-database targets go through TEMP ID tables"""
+        result = {'orphans': 0, 'relationships': [], 'skipped': 0, 'errors': []}
+        conn = psycopg2.connect(**self.db_config, dbname=db_name)
+        conn.autocommit = True  # A failing check must not abort the ones after it
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT table_name, column_name, data_type
+                FROM information_schema.columns
+                WHERE table_schema = 'public'
+            """)
+            column_types = {(table, column): data_type for table, column, data_type in cursor.fetchall()}
+            id_tables = {}  # target key -> TEMP table name
+            
+            for table_name, columns in graph.rules(db_name).items():
+                for column, target in columns.items():
+                    if (table_name, column) not in column_types:
+                        result['skipped'] += 1  # Table/column not in this database
+                        continue
+                    
+                    cross_db = target['db'] != db_name
+                    if cross_db:
+                        key = f"{target['db']}.{target['table']}.{target['column']}"
+                        try:
+                            if key not in id_tables:
+                                id_tables[key] = f"fk_ids_{len(id_tables)}"
+                                self.create_fk_id_table(cursor, id_tables[key], self.fetch_fk_target_ids(target))
+                        except Exception as e:
+                            id_tables.pop(key, None)
+                            result['errors'].append(f"{table_name}.{column} -> {key}: {str(e)[:150]}")
+                            continue
+                        target_sql, target_col, source_col = id_tables[key], 'id', f"s.{column}::text"
+                    else:
+                        target_type = column_types.get((target['table'], target['column']))
+                        if target_type is None:
+                            result['skipped'] += 1
+                            continue
+                        same_type = target_type == column_types[(table_name, column)]
+                        target_sql = target['table']
+                        target_col = target['column'] if same_type else f"{target['column']}::text"
+                        source_col = f"s.{column}" if same_type else f"s.{column}::text"
+                    
+                    check_start = time.time()
+                    try:
+                        cursor.execute(f"""
+                            WITH orphans AS (
+                                SELECT s.{column}::text AS value
+                                FROM {table_name} s
+                                WHERE s.{column} IS NOT NULL
+                                  AND NOT EXISTS (SELECT 1 FROM {target_sql} t WHERE t.{target_col} = {source_col})
+                            )
+                            SELECT (SELECT count(*) FROM orphans),
+                                   ARRAY(SELECT DISTINCT value FROM orphans LIMIT 5)
+                        """)
+                        orphans, samples = cursor.fetchone()
+                    except Exception as e:
+                        result['errors'].append(f"{table_name}.{column}: {str(e)[:150]}")
+                        continue
+                    
+                    result['orphans'] += orphans
+                    result['relationships'].append({
+                        'table': table_name,
+                        'column': column,
+                        'target': f"{target['db']}.{target['table']}.{target['column']}",
+                        'cross_database': cross_db,
+                        'orphans': orphans,
+                        'samples': samples,
+                        'seconds': round(time.time() - check_start, 3),
+                    })
+            cursor.close()
+        finally:
+            conn.close()
+        
+        with self.progress_lock:
+            status = '✓' if not result['orphans'] else '✗'
+            logger.info(f"  {status} {db_name}: {len(result['relationships'])} relationships checked, "
+                        f"{result['orphans']:,} orphaned values"
+                        + (f", {len(result['errors'])} failed" if result['errors'] else ''))
+            for rel in sorted(result['relationships'], key=lambda r: -r['orphans'])[:3]:
+                if rel['orphans']:
+                    logger.info(f"      - {rel['table']}.{rel['column']} -> {rel['target']}: "
+                                f"{rel['orphans']:,} orphans (e.g. {', '.join(rel['samples'])})")
+        return result
+    
+    # ========================================================================
+    
+    def replace_history_slice(self, start, end):
+        """Regenerate the days start..end (YYYY-MM-DD) of every sliceable generator and swap them into the databases"""
+        self.log_section(f"HISTORY SLICE: Regenerating {start} .. {end}")
+        if not os.getenv('GENERATOR_SEED') or not os.getenv('GENERATOR_AS_OF'):
+            logger.error("  ✗ --slice needs the GENERATOR_SEED and GENERATOR_AS_OF of the full run it replaces")
+            return False
+        
+        # Stale slices of an earlier run must not be loaded if a generator fails this time
+        slice_files = {db_name: self.root_path / slice_path(config['data_file'])
+                       for db_name, config in DATABASES.items() if config.get('data_file')}
+        for path in slice_files.values():
+            if path.exists():
+                path.unlink()
+        
+        env = self.generator_env('heavy')
+        env['GENERATOR_SLICE_START'], env['GENERATOR_SLICE_END'] = start, end
+        
+        def run_slice(gen_script):
+            # Never cached: a slice run leaves the full data files untouched
+            result = subprocess.run(['python3', str(self.root_path / gen_script)], cwd=str(self.root_path),
+                                    capture_output=True, text=True, timeout=3600, env=env)
+            if result.returncode != 0:
+                raise RuntimeError((result.stderr or result.stdout)[-300:])
+        
+        success = True
+        with ThreadPoolExecutor(max_workers=min(self.generator_workers, len(SLICE_GENERATORS))) as executor:
+            futures = {executor.submit(run_slice, gen_script): gen_script for gen_script in SLICE_GENERATORS}
+            for future in as_completed(futures):
+                gen_script = futures[future]
+                try:
+                    future.result()
+                    with self.progress_lock:
+                        logger.info(f"  ✓ Sliced {Path(gen_script).name}")
+                        self.stats['data_generated'] += 1
+                except Exception as e:
+                    success = False
+                    with self.progress_lock:
+                        logger.warning(f"  ✗ Slice of {Path(gen_script).name} failed: {str(e)[:150]}")
+                        self.stats['errors'].append(f"Slice {gen_script}: {str(e)[:100]}")
+        
+        for db_name, path in slice_files.items():
+            if path.exists() and not self.load_history_slice(db_name, path):
+                success = False
+        
+        self.print_summary(success)
+        return success
+    
+    def load_history_slice(self, db_name, path):
+        """Delete the slice's date ranges and COPY its rows back, in one transaction"""
+        data = read_slice(path)
+        if data is None:
+            logger.warning(f"  ⚠ {path.name} is not a history slice file, skipped")
+            return True
+        tables = data.pop(SLICE_KEY)['tables']
+        
+        conn = psycopg2.connect(**self.db_config, dbname=db_name)
+        try:
+            conn.autocommit = False
+            cursor = conn.cursor()
+            deleted = 0
+            for table_name, sql, params in delete_statements(tables):
+                cursor.execute(sql, params)
+                deleted += cursor.rowcount
+            
+            loaded = 0
+            for table_name in tables:
+                records = data.get(table_name) or []
+                if not records:
+                    continue
+                encoder = self.prepare_table_load(cursor, table_name, list(records[0].keys()), clear=False)
+                # No fallback: the transaction is aborted after a COPY error, so roll back the whole slice
+                count = self.copy_records(cursor, table_name, records, encoder, fallback=False)
+                if count != len(records):
+                    raise RuntimeError(f"{table_name}: loaded {count:,} of {len(records):,} rows")
+                loaded += count
+            
+            conn.commit()
+            with self.progress_lock:
+                logger.info(f"  ✓ {db_name}: {len(tables)} tables, {deleted:,} rows replaced by {loaded:,}")
+                self.stats['tables_loaded'] += len(tables)
+                self.stats['records_loaded'] += loaded
+            return True
+        except Exception as e:
+            conn.rollback()
+            with self.progress_lock:
+                logger.warning(f"  ✗ {db_name}: slice rolled back: {str(e)[:150]}")
+                self.stats['errors'].append(f"Slice load {db_name}: {str(e)[:100]}")
+            return False
+        finally:
+            conn.close()
+    
+    def plan_resume(self):
+        """Drop checkpointed units that are no longer valid, then report what the resumed run keeps"""
+        self.log_section("RESUME: Checkpoint from previous run")
+        
+        for db_name, config in DATABASES.items():
+            schema_file = config.get('schema_file')
+            schema_hash = self.checkpoint.file_digest(self.root_path / schema_file) if schema_file else None
+            schema_unit = self.checkpoint.get('schema', db_name)
+            
+            # Changed schema file -> the database is recreated, so nothing inside it survives
+            if schema_unit and schema_unit.get('schema_hash') != schema_hash:
+                logger.info(f"  ↻ {db_name}: schema file changed since checkpoint, recreating")
+                self.checkpoint.invalidate('database', db_name)
+            if not self.checkpoint.is_done('database', db_name):
+                self.checkpoint.invalidate('schema', db_name)
+                self.checkpoint.invalidate('table', f"{db_name}.")
+                self.checkpoint.invalidate('deferred', db_name)  # Recreated from the schema anyway
+            elif self.checkpoint.get('deferred', db_name):
+                self.rebuild_interrupted_deferral(db_name)
+        
+        logger.info(f"  ✓ Databases:  {self.checkpoint.count('database')}/{len(DATABASES)} kept")
+        logger.info(f"  ✓ Schemas:    {self.checkpoint.count('schema')}/{len(DATABASES)} kept")
+        logger.info(f"  ✓ Generators: {self.checkpoint.count('generator')} completed (reused while outputs are unchanged)")
+        logger.info(f"  ✓ Tables:     {self.checkpoint.count('table')} loaded (kept while data files are unchanged)")
     
     def execute(self):
         """Execute full setup pipeline"""
@@ -1523,6 +2881,11 @@ class GenIMSSetup:
         
         success = True
         
+        if self.resume:
+            self.plan_resume()
+        else:
+            self.checkpoint.save()  # A fresh run drops every database: discard the old checkpoint now
+        
         # Step 1: Create databases
         if not self.create_databases():
             success = False
@@ -1539,17 +2902,26 @@ class GenIMSSetup:
         if not self.register_master_ids():
             success = False
         
-        # Step 3c: Generate dependent data using registry
-        if not self.generate_dependent_data():
-            success = False
-        
-        # Step 3d: Validate referential integrity
-        if not self.validate_referential_integrity():
-            logger.warning("  ⚠ Validation warnings - continuing anyway")
+        if self.pipelined:
+            # Steps 3c-4: generate, validate and load overlapped per database
+            if not self.generate_and_load_pipelined():
+                success = False
+        else:
+            # Step 3c: Generate dependent data using registry
+            if not self.generate_dependent_data():
+                success = False
+            
+            # Step 3d: Validate referential integrity (in the database after loading with --verify-fks)
+            if not self.verify_fks and not self.validate_referential_integrity():
+                logger.warning("  ⚠ Validation warnings - continuing anyway")
+            
+            # Step 4: Load data (and reset sequences)
+            if not self.load_data():
+                success = False
         
-        # Step 4: Load data (and reset sequences)
-        if not self.load_data():
-            success = False
+        # Step 5: Set-based FK verification inside PostgreSQL
+        if self.verify_fks and not self.verify_foreign_keys():
+            logger.warning("  ⚠ Orphaned FK values found - see the FK report")
         
         # Summary
         self.print_summary(success)
@@ -1584,8 +2956,151 @@ class GenIMSSetup:
 
 def main():
     """Main entry point"""
-    setup = GenIMSSetup()
-    success = setup.execute()
+    parser = argparse.ArgumentParser(
+        description="GenIMS Full Setup - Database Creation to Data Loading"
+    )
+    
+    parser.add_argument(
+        "--streaming-load",
+        action="store_true",
+        default=os.getenv('STREAMING_LOAD', 'false').lower() == 'true',
+        help="Stream data files into COPY in bounded chunks instead of loading whole JSON files"
+    )
+    
+    parser.add_argument(
+        "--stream-chunk-size",
+        type=int,
+        default=int(os.getenv('STREAM_CHUNK_SIZE', '50000')),
+        help="Records per COPY chunk in streaming mode (default: 50000)"
+    )
+    
+    parser.add_argument(
+        "--binary-copy",
+        action="store_true",
+        default=os.getenv('BINARY_COPY', 'false').lower() == 'true',
+        help="Load tables with COPY ... (FORMAT binary) where every column type has a binary encoder"
+    )
+    
+    parser.add_argument(
+        "--copy-shards",
+        type=int,
+        default=int(os.getenv('COPY_SHARDS', '1')),
+        help="Connections per large table for sharded COPY (default: 1 = no sharding)"
+    )
+    
+    parser.add_argument(
+        "--shard-threshold",
+        type=int,
+        default=int(os.getenv('SHARD_THRESHOLD', '500000')),
+        help="Minimum rows before a table is split into COPY shards (default: 500000)"
+    )
+    
+    parser.add_argument(
+        "--defer-indexes",
+        action="store_true",
+        default=os.getenv('DEFER_INDEXES', 'false').lower() == 'true',
+        help="Drop secondary indexes and FK constraints before loading, rebuild them afterwards"
+    )
+    
+    parser.add_argument(
+        "--index-rebuild-workers",
+        type=int,
+        default=int(os.getenv('INDEX_REBUILD_WORKERS', '8')),
+        help="Parallel connections for index builds / FK validation (default: 8)"
+    )
+    
+    parser.add_argument(
+        "--unlogged-load",
+        action="store_true",
+        default=os.getenv('UNLOGGED_LOAD', 'false').lower() == 'true',
+        help="Load tables as UNLOGGED (populated tables via an UNLOGGED staging copy), then make them durable"
+    )
+    
+    parser.add_argument(
+        "--generator-workers",
+        type=int,
+        default=int(os.getenv('GENERATOR_WORKERS', '0')) or None,
+        help="Concurrent generator processes in the DAG scheduler (default: CPU count)"
+    )
+    
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        default=os.getenv('PIPELINED_SETUP', 'false').lower() == 'true',
+        help="Validate and load each database as soon as its generator finishes, while others still generate"
+    )
+    
+    parser.add_argument(
+        "--no-generator-cache",
+        action="store_true",
+        default=os.getenv('GENERATOR_CACHE', 'true').lower() != 'true',
+        help="Rerun every generator even if its source, inputs and env knobs are unchanged"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue a failed run from its checkpoint (.genims_cache/setup_checkpoint.json) instead of starting over"
+    )
+    
+    parser.add_argument(
+        "--verify-fks",
+        action="store_true",
+        default=os.getenv('VERIFY_FKS', 'false').lower() == 'true',
+        help="Verify schema FK relationships with anti-joins in PostgreSQL after loading (replaces step 3d)"
+    )
+    
+    parser.add_argument(
+        "--verify-fks-only",
+        action="store_true",
+        help="Only run the in-database FK verification against the already loaded databases"
+    )
+    
+    parser.add_argument(
+        "--fk-report",
+        default=os.getenv('FK_REPORT_FILE') or None,
+        help="JSON report of orphaned FK values (default: genims_fk_report.json in the repo root)"
+    )
+    
+    parser.add_argument(
+        "--slice",
+        nargs=2,
+        metavar=("START", "END"),
+        help="Regenerate only the days START..END (YYYY-MM-DD) of the history and replace them in the loaded "
+             "databases (needs the GENERATOR_SEED and GENERATOR_AS_OF of the full run)"
+    )
+    
+    parser.add_argument(
+        "--template-clone",
+        action="store_true",
+        default=os.getenv('TEMPLATE_CLONE', 'false').lower() == 'true',
+        help="Create databases from schema-only template databases (rebuilt when a schema file changes)"
+    )
+    
+    args = parser.parse_args()
+    
+    setup = GenIMSSetup(
+        streaming_load=args.streaming_load,
+        stream_chunk_size=args.stream_chunk_size,
+        binary_copy=args.binary_copy,
+        copy_shards=args.copy_shards,
+        shard_threshold=args.shard_threshold,
+        defer_indexes=args.defer_indexes,
+        index_rebuild_workers=args.index_rebuild_workers,
+        unlogged_load=args.unlogged_load,
+        generator_workers=args.generator_workers,
+        pipelined=args.pipelined,
+        generator_cache=not args.no_generator_cache,
+        cache_max_age_hours=float(os.getenv('GENERATOR_CACHE_MAX_AGE_HOURS', '0')),
+        resume=args.resume,
+        template_clone=args.template_clone,
+        verify_fks=args.verify_fks or args.verify_fks_only,
+        fk_report_file=args.fk_report
+    )
+    if args.slice:
+        success = setup.replace_history_slice(*args.slice)
+    else:
+        success = setup.verify_foreign_keys() if args.verify_fks_only else setup.execute()
     sys.exit(0 if success else 1)
 
 
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+GenIMS Generator Output Cache
+Skips a generator run when nothing that determines its output has changed:
+the key is a hash of the generator source (plus every shared scripts/ module it imports, transitively),
+its upstream input files and the environment knobs it reads. An unpinned GENERATOR_AS_OF keys on the
+run day, so cached output is never reused under history windows anchored to another day.
+Outputs stay where the generator wrote them; the manifest records their fingerprints
+so a hit is only served while those files are still the ones this key produced.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+SCRIPTS_DIR = Path(__file__).parent
+HASH_BLOCK = 1 << 20  # 1 MB
+
+# Environment knobs that change generator output (connection secrets deliberately excluded)
+CACHE_ENV_KNOBS = [
+    'BATCH_SIZE', 'PARALLEL_WORKERS', 'PARALLEL_GENERATION', 'OPTIMIZE_QUERIES',
+    'HISTORICAL_DATA_YEARS', 'GENERATOR_OUTPUT', 'GENERATOR_OUTPUT_GZIP', 'GENERATOR_SHARD_ROWS',
+    'SENSOR_SAMPLES_PER_SENSOR', 'GENERATOR_SEED', 'GENERATOR_CHUNK_DAYS',
+    'ID_ALLOCATOR', 'ID_BLOCK_SIZE', 'ID_ALLOCATOR_RESET',
+    'GENIMS_SCALE_FACTOR', 'GENERATOR_AS_OF', 'GENERATOR_SLICE_START', 'GENERATOR_SLICE_END',
+    'POSTGRES_HOST', 'POSTGRES_PORT', 'POSTGRES_USER',
+    'DB_MASTER', 'DB_ERP', 'DB_WMS', 'DB_MAINTENANCE', 'DB_MANUFACTURING',
+]
+
+
+def effective_as_of(env: Dict[str, str]) -> str:
+    """Day the generators anchor history to: GENERATOR_AS_OF, or today when it is not pinned"""
+    return (env.get('GENERATOR_AS_OF') or '').strip() or date.today().isoformat()
+
+
+_IMPORT_RE = re.compile(r'^\s*(?:from\s+(\w+)\s+import|import\s+(\w+(?:\s*,\s*\w+)*))', re.M)
+
+
+class FileDigests:
+    """sha256 of files, memoized by size + mtime: avoids rehashing unchanged multi-GB data files"""
+
+    def __init__(self, memo: Optional[Dict[str, List]] = None):
+        self.lock = threading.Lock()
+        self.memo: Dict[str, List] = memo or {}  # path -> [size, mtime_ns, sha256]
+
+    def digest(self, path: Path) -> Optional[str]:
+        """sha256 of a file (None if missing)"""
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        key = str(path)
+        with self.lock:
+            memo = self.memo.get(key)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                h.update(block)
+        digest = h.hexdigest()
+        with self.lock:
+            self.memo[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def snapshot(self) -> Dict[str, List]:
+        with self.lock:
+            return dict(self.memo)
+
+
+class GeneratorCache:
+    """Manifest of generator runs: gen_script -> cache key + output fingerprints"""
+
+    def __init__(self, root_path: Path, cache_file: Optional[Path] = None, max_age_hours: float = 0):
+        self.root_path = Path(root_path)
+        self.cache_file = Path(cache_file or self.root_path / '.genims_cache' / 'generators.json')
+        self.max_age_hours = max_age_hours
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        digests = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r') as f:
+                    manifest = json.load(f)
+                self.entries = manifest.get('entries', {})
+                digests = manifest.get('digests', {})
+            except (OSError, ValueError):
+                pass  # Corrupt manifest: start empty, every generator reruns
+        self.digests = FileDigests(digests)
+
+    def file_digest(self, path: Path) -> Optional[str]:
+        return self.digests.digest(path)
+
+    def source_files(self, gen_path: Path) -> List[Path]:
+        """
+        Generator script plus the shared scripts/ modules it imports, followed transitively
+        (generator_helper -> data_registry -> columnar_store, lazy imports inside functions included)
+        """
+        files = [gen_path]
+        pending = [gen_path]
+        while pending:
+            try:
+                source = pending.pop().read_text()
+            except OSError:
+                continue
+            for match in _IMPORT_RE.finditer(source):
+                names = [match.group(1)] if match.group(1) else match.group(2).split(',')
+                for name in names:
+                    module = SCRIPTS_DIR / f"{name.strip()}.py"
+                    if module.exists() and module not in files:
+                        files.append(module)
+                        pending.append(module)
+        return files
+
+    def compute_key(self, gen_script: str, inputs: Iterable[str], env: Dict[str, str]) -> str:
+        """Cache key over generator source, upstream input files and output-relevant env knobs"""
+        h = hashlib.sha256()
+        for path in self.source_files(self.root_path / gen_script):
+            h.update(f"src:{path.name}:{self.file_digest(path)}\n".encode())
+        for rel_path in sorted(inputs):
+            h.update(f"in:{rel_path}:{self.file_digest(self.root_path / rel_path)}\n".encode())
+        for knob in CACHE_ENV_KNOBS:
+            h.update(f"env:{knob}={env.get(knob, '')}\n".encode())
+        h.update(f"as_of:{effective_as_of(env)}\n".encode())
+        return h.hexdigest()
+
+    def lookup(self, gen_script: str, key: str, outputs: Iterable[str]) -> bool:
+        """True if the outputs on disk are exactly what a run with this key produced"""
+        with self.lock:
+            entry = self.entries.get(gen_script)
+        if not entry or entry.get('key') != key:
+            return False
+        if self.max_age_hours and time.time() - entry.get('created', 0) > self.max_age_hours * 3600:
+            return False
+        recorded = entry.get('outputs', {})
+        for rel_path in outputs:
+            digest = self.file_digest(self.root_path / rel_path)
+            if digest is None or recorded.get(rel_path) != digest:
+                return False
+        return True
+
+    def store(self, gen_script: str, key: str, outputs: Iterable[str]):
+        """Record a successful run (outputs that were not written are not recorded -> no future hit)"""
+        fingerprints = {rel_path: self.file_digest(self.root_path / rel_path) for rel_path in outputs}
+        if None in fingerprints.values():
+            return
+        with self.lock:
+            self.entries[gen_script] = {'key': key, 'created': time.time(), 'outputs': fingerprints}
+        self.save()
+
+    def invalidate(self, gen_script: str):
+        with self.lock:
+            self.entries.pop(gen_script, None)
+        self.save()
+
+    def save(self):
+        """Atomic manifest write (tmp file + rename)"""
+        with self.lock:
+            manifest = {'entries': self.entries, 'digests': self.digests.snapshot()}
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_file, self.cache_file)
@@ -96,6 +96,10 @@ class GeneratorHelper:
         """Get random valid supplier ID"""
         return self.registry.get_random_fk('supplier')
     
+    def sample_ids(self, id_type: str, n: int, rng=None):
+        """n random valid IDs of a type in one draw (numpy object array) - for bulk FK assignment"""
+        return self.registry.sample_array(id_type, n, rng)
+    
     def validate_record_fks(self, db_name: str, table_name: str, record: Dict) -> Dict:
         """
         Ensure all FK columns in record have valid values
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+GenIMS History Slices
+Regenerates a date range of the historical window instead of the whole window:
+  - GENERATOR_SLICE_START / GENERATOR_SLICE_END (inclusive YYYY-MM-DD) make the chunk executor run only
+    the day chunks overlapping those dates, widened to whole chunks (GENERATOR_CHUNK_DAYS)
+  - chunks keep their index, seed and ID range, and GENERATOR_AS_OF pins the end of the window, so with
+    the GENERATOR_SEED of the full run the slice rows match that run
+  - a sliced generator writes only its day-partitioned tables, to <data file stem>.slice.json next to
+    the full data file (which downstream generators keep reading)
+  - full_setup.py --slice START END deletes each partition's date range and COPYs the slice rows back,
+    one transaction per database
+Partitions are declared per generator: chunk table (ChunkExecutor.run name) -> {output table: date column},
+with child tables that carry no date of their own given as (parent key column, parent table) after their parent.
+"""
+
+import json
+import os
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+SLICE_KEY = 'genims_slice'
+
+Partition = Union[str, Tuple[str, str]]
+
+
+def _date_env(name: str) -> Optional[date]:
+    value = os.getenv(name, '').strip()
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def as_of() -> datetime:
+    """End of the history window: midnight of GENERATOR_AS_OF, or the current time"""
+    pinned = _date_env('GENERATOR_AS_OF')
+    return datetime.combine(pinned, time()) if pinned else datetime.now()
+
+
+def history_slice() -> Optional[Tuple[date, date]]:
+    """(first, last) day to regenerate, or None for the whole window"""
+    first, last = _date_env('GENERATOR_SLICE_START'), _date_env('GENERATOR_SLICE_END')
+    if first is None and last is None:
+        return None
+    if first is None or last is None or last < first:
+        raise ValueError("GENERATOR_SLICE_START and GENERATOR_SLICE_END must both be set, start <= end")
+    if not os.getenv('GENERATOR_SEED') or not os.getenv('GENERATOR_AS_OF'):
+        raise ValueError("History slices need the GENERATOR_SEED and GENERATOR_AS_OF of the full run they replace")
+    return first, last
+
+
+def slice_path(data_path: Union[str, Path]) -> Path:
+    """genims_hcm_data.json -> genims_hcm_data.slice.json"""
+    path = Path(data_path)
+    return path.with_name(f"{path.stem}.slice{path.suffix}")
+
+
+def _day(value) -> str:
+    return str(value)[:10]
+
+
+def write_slice(data_path: Union[str, Path], data: Dict[str, List[Dict]],
+                partitions: Dict[str, Dict[str, Partition]], covered: Dict[str, Tuple[date, date]]) -> Path:
+    """
+    Write the day-partitioned tables of a slice run next to data_path.
+    covered: chunk table -> first/last day its selected chunks generated (ChunkExecutor.covered)
+    """
+    tables: Dict[str, List[Dict]] = {}
+    meta: Dict[str, Dict] = {}
+    for group, group_tables in partitions.items():
+        if group not in covered:
+            print(f"  ⚠ {group}: not generated in day chunks (sequential path?), left out of the slice")
+            continue
+        start, end = (day.isoformat() for day in covered[group])
+        for table, partition in group_tables.items():
+            rows = data.get(table) or []
+            if isinstance(partition, str):
+                tables[table] = [row for row in rows
+                                 if row.get(partition) is not None and start <= _day(row[partition]) <= end]
+                meta[table] = {'column': partition, 'start': start, 'end': end}
+            else:
+                key, parent = partition
+                keys = {row[key] for row in tables[parent]}
+                tables[table] = [row for row in rows if row.get(key) in keys]
+                meta[table] = {'key': key, 'parent': parent, 'column': meta[parent]['column'],
+                               'start': start, 'end': end}
+
+    output = slice_path(data_path)
+    with open(output, 'w') as f:
+        json.dump({SLICE_KEY: {'as_of': os.getenv('GENERATOR_AS_OF'), 'tables': meta}, **tables}, f, default=str)
+    print(f"  ✂ Slice of {len(tables)} tables ({sum(map(len, tables.values())):,} rows) written to {output}")
+    return output
+
+
+def read_slice(path: Union[str, Path]) -> Optional[Dict]:
+    """Slice file contents, or None if path is missing or not a slice file"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    return data if isinstance(data, dict) and SLICE_KEY in data else None
+
+
+def delete_statements(tables: Dict[str, Dict]) -> List[Tuple[str, str, Tuple[str, str]]]:
+    """(table, DELETE sql, params) clearing every partition of a slice, children before their parents"""
+    statements = []
+    for table, part in reversed(list(tables.items())):
+        in_range = f"{part['column']}::date BETWEEN %s::date AND %s::date"
+        if 'parent' in part:
+            sql = (f"DELETE FROM {table} WHERE {part['key']} IN "
+                   f"(SELECT {part['key']} FROM {part['parent']} WHERE {in_range})")
+        else:
+            sql = f"DELETE FROM {table} WHERE {in_range}"
+        statements.append((table, sql, (part['start'], part['end'])))
+    return statements
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+GenIMS ID Range Allocator
+Hands out contiguous ID ranges per ID type (reserve(id_type, n) -> (start, end), end exclusive)
+for tables whose per-chunk row counts are only known after generation (the operational generator's
+sensor, SCADA, production-run and maintenance-event IDs), so ranges never overlap across runs that
+share a store. Day-chunked tables keep ChunkExecutor's id_ranges (chunk index x fixed size): a history
+slice must give chunk i the same range as the full run, which a shared store cannot promise. Daemons
+keep their MAX(id) counters and database sequences, each daemon being one process per database.
+
+Backends (ID_ALLOCATOR):
+  file      JSON store next to the generator cache, read-modify-written under an flock
+            (processes on one machine / a shared filesystem)
+  postgres  one row per ID type in genims_id_ranges, advanced by an atomic upsert
+            (processes on any machine that reaches the database)
+"""
+
+import abc
+import fcntl
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_BLOCK_SIZE = 1000
+
+RANGE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS genims_id_ranges (
+    id_type VARCHAR(100) PRIMARY KEY,
+    next_id BIGINT NOT NULL
+)
+"""
+
+
+class IdAllocator(abc.ABC):
+    """Base allocator: reserve()/reset() per backend, next_id() serves single IDs from a reserved block"""
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        self._blocks: Dict[str, list] = {}  # id_type -> [next, end) of the block this process holds
+
+    @abc.abstractmethod
+    def reserve(self, id_type: str, n: int, floor: int = 1) -> Tuple[int, int]:
+        """Atomically claim n consecutive IDs, never below floor: returns (start, start + n)"""
+
+    @abc.abstractmethod
+    def reset(self, id_type: str, next_id: int = 1):
+        """Restart an ID type at next_id (run coordinator only - live workers would collide)"""
+
+    def next_id(self, id_type: str, floor: int = 1) -> int:
+        """One ID, taken from a locally held block (one store round trip per block_size IDs)"""
+        with self.lock:
+            block = self._blocks.get(id_type)
+            if block is None or block[0] >= block[1] or block[0] < floor:
+                block = list(self.reserve(id_type, self.block_size, floor))
+                self._blocks[id_type] = block
+            id_val = block[0]
+            block[0] += 1
+            return id_val
+
+    def _drop_block(self, id_type: str):
+        with self.lock:
+            self._blocks.pop(id_type, None)
+
+
+class FileIdAllocator(IdAllocator):
+    """Ranges kept in a JSON file {id_type: next_id}; every reserve holds an exclusive flock"""
+
+    def __init__(self, store_file: Path, block_size: int = DEFAULT_BLOCK_SIZE):
+        super().__init__(block_size)
+        self.store_file = Path(store_file)
+        self.lock_file = self.store_file.with_suffix('.lock')
+        self.store_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def _update(self, id_type: str, advance) -> int:
+        """Apply advance(current next_id or None) -> (result, new next_id) under the file lock"""
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                ranges = {}
+                if self.store_file.exists():
+                    try:
+                        with open(self.store_file, 'r') as f:
+                            ranges = json.load(f)
+                    except ValueError:
+                        ranges = {}  # Torn store cannot happen (atomic rename); tolerate a hand-edited one
+                result, ranges[id_type] = advance(ranges.get(id_type))
+                tmp_file = self.store_file.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_file, 'w') as f:
+                    json.dump(ranges, f, indent=2)
+                os.replace(tmp_file, self.store_file)
+                return result
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def reserve(self, id_type: str, n: int, floor: int = 1) -> Tuple[int, int]:
+        def advance(current):
+            start = max(current or 1, floor)
+            return start, start + n
+        start = self._update(id_type, advance)
+        return start, start + n
+
+    def reset(self, id_type: str, next_id: int = 1):
+        self._update(id_type, lambda current: (None, next_id))
+        self._drop_block(id_type)
+
+
+class PostgresIdAllocator(IdAllocator):
+    """Ranges kept in genims_id_ranges: the upsert row lock serializes concurrent reserves across machines"""
+
+    def __init__(self, db_config: Dict, dbname: str, namespace: str = 'ids',
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        super().__init__(block_size)
+        import psycopg2
+        self.namespace = namespace
+        self.conn = psycopg2.connect(**db_config, dbname=dbname)
+        self.conn.autocommit = True
+        self.db_lock = threading.Lock()  # One connection: serialize this process's statements
+        with self.db_lock, self.conn.cursor() as cursor:
+            cursor.execute(RANGE_TABLE_SQL)
+
+    def reserve(self, id_type: str, n: int, floor: int = 1) -> Tuple[int, int]:
+        with self.db_lock, self.conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO genims_id_ranges (id_type, next_id) VALUES (%s, %s)
+                ON CONFLICT (id_type) DO UPDATE
+                    SET next_id = GREATEST(genims_id_ranges.next_id, %s) + %s
+                RETURNING next_id
+                """,
+                (f"{self.namespace}.{id_type}", floor + n, floor, n)
+            )
+            end = cursor.fetchone()[0]
+        return end - n, end
+
+    def reset(self, id_type: str, next_id: int = 1):
+        with self.db_lock, self.conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO genims_id_ranges (id_type, next_id) VALUES (%s, %s)
+                ON CONFLICT (id_type) DO UPDATE SET next_id = EXCLUDED.next_id
+                """,
+                (f"{self.namespace}.{id_type}", next_id)
+            )
+        self._drop_block(id_type)
+
+    def close(self):
+        self.conn.close()
+
+
+def get_allocator(root_path: Path, namespace: str = 'ids', backend: Optional[str] = None,
+                  db_config: Optional[Dict] = None) -> IdAllocator:
+    """Allocator for ID_ALLOCATOR (file | postgres); namespace separates independent ID spaces"""
+    backend = (backend or os.getenv('ID_ALLOCATOR', 'file')).lower()
+    block_size = int(os.getenv('ID_BLOCK_SIZE', str(DEFAULT_BLOCK_SIZE)))
+    if backend == 'postgres':
+        db_config = db_config or {
+            'host': os.getenv('POSTGRES_HOST', 'localhost'),
+            'port': int(os.getenv('POSTGRES_PORT', '5432')),
+            'user': os.getenv('POSTGRES_USER', 'postgres'),
+            'password': os.getenv('POSTGRES_PASSWORD', 'postgres'),
+        }
+        return PostgresIdAllocator(db_config, os.getenv('DB_MASTER', 'genims_master_db'),
+                                   namespace, block_size)
+    if backend != 'file':
+        raise ValueError(f"Unknown ID_ALLOCATOR backend: {backend}")
+    return FileIdAllocator(Path(root_path) / '.genims_cache' / f"{namespace}_ranges.json", block_size)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+GenIMS Streaming JSON Reader
+Incrementally parses generator output files ({"table": [ {...}, ... ], ...})
+so table arrays can be consumed in bounded chunks without materializing the whole file
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Read granularity and the point at which consumed text is dropped from the buffer
+READ_SIZE = 1 << 20       # 1 MB
+COMPACT_THRESHOLD = 1 << 22  # 4 MB
+
+
+class JSONStreamReader:
+    """Pull parser over a top-level JSON object of table arrays"""
+
+    def __init__(self, fp, read_size: int = READ_SIZE):
+        self.fp = fp
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Read more text into the buffer, returns False at end of file"""
+        if self.eof:
+            return False
+        if self.pos > COMPACT_THRESHOLD:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.fp.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def _skip_ws(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._fill():
+                return
+
+    def _peek(self) -> str:
+        self._skip_ws()
+        if self.pos >= len(self.buf):
+            raise ValueError("Unexpected end of JSON stream")
+        return self.buf[self.pos]
+
+    def _expect(self, ch: str):
+        if self._peek() != ch:
+            raise ValueError(f"Expected '{ch}' at offset {self.pos}, found '{self.buf[self.pos]}'")
+        self.pos += 1
+
+    def _decode(self) -> Any:
+        """Decode one complete JSON value, refilling the buffer until it parses"""
+        self._skip_ws()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A value that ends exactly at the buffer edge may be truncated (e.g. a number)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def iter_tables(self, chunk_size: int) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield (table_name, records) with at most chunk_size records per chunk.
+
+        Large tables are yielded as several consecutive chunks with the same name.
+        Empty arrays and non-array values are skipped.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._decode()
+            self._expect(':')
+            if self._peek() == '[':
+                self.pos += 1
+                chunk = []
+                if self._peek() != ']':
+                    while True:
+                        chunk.append(self._decode())
+                        if len(chunk) >= chunk_size:
+                            yield key, chunk
+                            chunk = []
+                        if self._peek() == ',':
+                            self.pos += 1
+                            continue
+                        break
+                self._expect(']')
+                if chunk:
+                    yield key, chunk
+            else:
+                self._decode()  # scalar/object metadata - not a loadable table
+
+            if self._peek() == ',':
+                self.pos += 1
+                continue
+            self._expect('}')
+            return
+
+
+def iter_table_chunks(path: Union[str, Path], chunk_size: int = 50000) -> Iterator[Tuple[str, List[Dict]]]:
+    """Stream (table_name, records) chunks from a generator output JSON file"""
+    with open(path, 'r') as f:
+        yield from JSONStreamReader(f).iter_tables(chunk_size)
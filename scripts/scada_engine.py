@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+GenIMS Vectorized SCADA Engine
+Simulates machine states (running / idle / setup / fault / maintenance) as a per-machine Markov
+chain over a fixed time grid, stepping all machines at once with NumPy. Everything downstream of
+the state matrix is derived cumulatively per machine and shift: parts and rejects, uptime and
+downtime, OEE, energy, tool and program changes. The engine carries its state between simulate()
+calls, so a daemon can stream an unbounded horizon block by block.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+STATES = ['running', 'idle', 'setup', 'fault', 'maintenance']
+RUNNING, IDLE, SETUP, FAULT, MAINTENANCE = range(len(STATES))
+
+# Mean dwell time per state (seconds); the per-step stay probability is exp(-interval / dwell)
+DWELL_SECONDS = {
+    'day': [2700, 300, 600, 1200, 3600],
+    'night': [300, 3600, 600, 1200, 2400],
+}
+
+# Where a machine goes when it leaves a state (weights per regime; rows = from, cols = to)
+ROUTES = {
+    'day': [
+        # running idle setup fault maint
+        [0, 0.80, 0.15, 0.05, 0],       # running
+        [0.90, 0, 0.10, 0, 0],          # idle
+        [1.0, 0, 0, 0, 0],              # setup
+        [0.70, 0, 0, 0, 0.30],          # fault
+        [0.80, 0.20, 0, 0, 0],          # maintenance
+    ],
+    'night': [  # 2-6 AM maintenance window: wind down, alternate idle / maintenance
+        [0, 0.70, 0, 0, 0.30],
+        [0, 0, 0, 0, 1.0],
+        [0, 1.0, 0, 0, 0],
+        [0, 0, 0, 0, 1.0],
+        [0, 1.0, 0, 0, 0],
+    ],
+}
+NIGHT_HOURS = (2, 6)
+
+FAULT_TYPES = [
+    ('BEAR-001', 'Bearing degradation'),
+    ('THERM-001', 'Motor thermal overload'),
+    ('HYD-001', 'Hydraulic pressure loss'),
+    ('TOOL-001', 'Tool wear detected'),
+]
+
+REJECT_RATE = 0.02
+DAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+SCADA_COLUMNS = [
+    'machine_id', 'line_id', 'factory_id', 'timestamp', 'machine_state', 'operation_mode',
+    'fault_code', 'fault_description', 'parts_produced_cumulative', 'parts_produced_shift',
+    'parts_rejected_shift', 'target_cycle_time_seconds', 'actual_cycle_time_seconds',
+    'availability_percentage', 'performance_percentage', 'quality_percentage', 'oee_percentage',
+    'spindle_speed_rpm', 'feed_rate_mm_min', 'tool_number', 'program_number',
+    'power_consumption_kw', 'energy_consumed_kwh', 'temperature_setpoint_c', 'temperature_actual_c',
+    'pressure_setpoint_bar', 'pressure_actual_bar', 'downtime_seconds_shift',
+    'last_fault_timestamp', 'uptime_seconds_shift', 'active_alarms', 'alarm_codes',
+    'warning_codes', 'shift_id', 'operator_id', 'data_source', 'data_quality', 'created_at',
+]
+
+
+def transition_matrix(regime: str, interval_seconds: int) -> np.ndarray:
+    """Cumulative per-step transition probabilities (rows = current state) for one regime"""
+    stay = np.exp(-interval_seconds / np.array(DWELL_SECONDS[regime], dtype=np.float64))
+    routes = np.array(ROUTES[regime], dtype=np.float64)
+    matrix = routes / routes.sum(axis=1, keepdims=True) * (1 - stay)[:, None]
+    matrix[np.diag_indices(len(STATES))] = stay
+    # States a regime never enters are left at once (e.g. setup at night)
+    return np.cumsum(matrix, axis=1)
+
+
+def shift_table(shifts: Sequence[Dict], factory_id: str) -> np.ndarray:
+    """Shift index (into shifts) for each of the 168 hours of the week (Monday 00:00 = 0)"""
+    default = next((i for i, s in enumerate(shifts) if s.get('shift_code') == 'G'), 0)
+    table = np.full(7 * 24, default, dtype=np.int32)
+    # Earlier shifts take precedence where shifts overlap: fill in reverse order
+    for index in reversed(range(len(shifts))):
+        shift = shifts[index]
+        if shift.get('factory_id') != factory_id:
+            continue
+        start = int(shift['start_time'].split(':')[0])
+        end = int(shift['end_time'].split(':')[0])
+        for day in shift['days_of_week'].split(','):
+            d = DAYS.index(day.strip().lower())
+            if start < end:
+                table[d * 24 + start:d * 24 + end] = index
+            else:  # Overnight: runs into the next day
+                table[d * 24 + start:d * 24 + 24] = index
+                nxt = (d + 1) % 7
+                table[nxt * 24:nxt * 24 + end] = index
+    return table
+
+
+def _segment_cumsum(values: np.ndarray, reset: np.ndarray, carry: np.ndarray) -> np.ndarray:
+    """Running sum down each column that restarts where reset is set; carry continues the first segment"""
+    total = np.cumsum(values, axis=0) + carry
+    base = np.where(reset, total - values, 0)
+    rows = np.maximum.accumulate(np.where(reset, np.arange(len(values))[:, None], -1), axis=0)
+    cols = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    return total - np.where(rows >= 0, base[np.maximum(rows, 0), cols], 0)
+
+
+def _forward_fill(values: np.ndarray, mark: np.ndarray, carry: np.ndarray) -> np.ndarray:
+    """values where mark is set, carried down each column until the next mark (carry before the first)"""
+    rows = np.maximum.accumulate(np.where(mark, np.arange(len(values))[:, None], -1), axis=0)
+    cols = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    return np.where(rows >= 0, values[np.maximum(rows, 0), cols], carry)
+
+
+class ScadaEngine:
+    """Array-based SCADA simulation for a fleet of machines at a fixed sampling interval"""
+
+    def __init__(self, machines: Sequence[Dict], shifts: Sequence[Dict], interval_seconds: int = 10,
+                 rng: Optional[np.random.Generator] = None):
+        self.rng = rng or np.random.default_rng()
+        self.interval = interval_seconds
+        self.machines = list(machines)
+        self.shifts = list(shifts)
+        m = len(self.machines)
+
+        self.machine_ids = np.array([mc['machine_id'] for mc in self.machines], dtype=object)
+        self.line_ids = np.array([mc['line_id'] for mc in self.machines], dtype=object)
+        self.factory_ids = np.array([mc['factory_id'] for mc in self.machines], dtype=object)
+        self.target_cycle = np.array([3600 / (mc.get('design_capacity_units_per_hour') or 60)
+                                      for mc in self.machines], dtype=np.float64)
+        self.rated_power = np.array([mc.get('power_rating_kw') or 50 for mc in self.machines], dtype=np.float64)
+
+        # One 168-hour shift table per factory (replaces a per-reading scan over all shifts)
+        factories = sorted(set(self.factory_ids.tolist()))
+        self.shift_tables = np.stack([shift_table(self.shifts, f) for f in factories]) if factories else \
+            np.zeros((0, 168), dtype=np.int32)
+        self.machine_factory = np.array([factories.index(f) for f in self.factory_ids.tolist()], dtype=np.int32)
+        self.shift_ids = np.array([s['shift_id'] for s in self.shifts] or [None], dtype=object)
+        self.operator_ids = np.array([s.get('operator_id') for s in self.shifts] or [None], dtype=object)
+
+        self.matrices = {regime: transition_matrix(regime, interval_seconds) for regime in DWELL_SECONDS}
+
+        # Carried state (continues across simulate() calls)
+        self.state = np.full(m, RUNNING, dtype=np.int8)
+        self.parts_total = self.rng.integers(100000, 500000, m).astype(np.float64)
+        self.energy_kwh = self.rng.uniform(1000, 50000, m)
+        self.shift_index = np.full(m, -1, dtype=np.int32)
+        self.shift_counters = np.zeros((4, m), dtype=np.float64)  # parts, rejects, uptime, downtime
+        self.tool = self.rng.integers(1, 13, m)
+        self.program = self.rng.integers(1000, 10000, m)
+        self.last_fault = np.full(m, np.datetime64('NaT'), dtype='datetime64[s]')
+        fault_types = self.rng.integers(0, len(FAULT_TYPES), m)
+        self.fault_code = np.array([FAULT_TYPES[i][0] for i in fault_types], dtype=object)
+        self.fault_description = np.array([FAULT_TYPES[i][1] for i in fault_types], dtype=object)
+        self.temperature_setpoint = np.round(self.rng.uniform(40, 70, m), 2)
+        self.pressure_setpoint = np.round(self.rng.uniform(100, 150, m), 2)
+        self.fault_windows: List[Tuple[int, datetime, datetime]] = []
+
+    def inject_fault(self, machine_index: int, fault_code: str, fault_description: str,
+                     start: datetime, duration_seconds: int = 3600):
+        """Force a machine into fault for a time window (overrides the Markov chain)"""
+        self.fault_code[machine_index] = fault_code
+        self.fault_description[machine_index] = fault_description
+        self.fault_windows.append((machine_index, np.datetime64(start, 's'),
+                                   np.datetime64(start, 's') + np.timedelta64(duration_seconds, 's')))
+
+    def simulate(self, start_time: datetime, steps: int) -> Dict[str, np.ndarray]:
+        """
+        steps samples for every machine from start_time, as columns (SCADA_COLUMNS) ordered
+        machine by machine; the carried state advances to the end of the block
+        """
+        rng = self.rng
+        m = len(self.machines)
+        dt = self.interval
+        times = np.datetime64(start_time.replace(microsecond=0, tzinfo=None), 's') + \
+            np.arange(steps).astype('timedelta64[s]') * dt
+        seconds = times.astype(np.int64)
+        hour = (seconds // 3600) % 24
+        hour_of_week = ((seconds // 86400 + 3) % 7) * 24 + hour  # 1970-01-01 was a Thursday
+        night = (hour >= NIGHT_HOURS[0]) & (hour < NIGHT_HOURS[1])
+
+        forced = np.zeros((steps, m), dtype=bool)
+        for machine_index, fault_start, fault_end in self.fault_windows:
+            forced[(times >= fault_start) & (times <= fault_end), machine_index] = True
+
+        # Markov chain: one vectorized draw per time step for all machines
+        states = np.empty((steps, m), dtype=np.int8)
+        draws = rng.random((steps, m))
+        state = self.state
+        for t in range(steps):
+            cumulative = self.matrices['night' if night[t] else 'day'][state]
+            state = (draws[t][:, None] > cumulative).sum(axis=1, dtype=np.int8)
+            np.minimum(state, len(STATES) - 1, out=state)
+            state[forced[t]] = FAULT
+            states[t] = state
+        self.state = state.copy()
+        running = states == RUNNING
+        in_fault = states == FAULT
+
+        # Shifts: table lookup per (step, machine); counters restart where the shift changes
+        shift_index = self.shift_tables[self.machine_factory[None, :], hour_of_week[:, None]] if m else \
+            np.zeros((steps, 0), dtype=np.int32)
+        previous = np.vstack([self.shift_index[None, :], shift_index[:-1]])
+        new_shift = shift_index != previous
+        self.shift_index = shift_index[-1].copy() if steps else self.shift_index
+
+        # Production: fractional parts accumulate so cycles longer than one sample still complete
+        cycle_time = self.target_cycle * rng.uniform(0.95, 1.10, (steps, m))
+        produced = np.cumsum(np.where(running, dt / cycle_time, 0.0), axis=0) + self.parts_total
+        parts = np.diff(np.floor(np.vstack([self.parts_total[None, :], produced])), axis=0)
+        self.parts_total = produced[-1].copy() if steps else self.parts_total
+        rejects = rng.binomial(parts.astype(np.int64), REJECT_RATE).astype(np.float64)
+
+        carry = self.shift_counters
+        parts_shift = _segment_cumsum(parts, new_shift, carry[0])
+        rejects_shift = _segment_cumsum(rejects, new_shift, carry[1])
+        uptime = _segment_cumsum(running * float(dt), new_shift, carry[2])
+        downtime = _segment_cumsum((~running) * float(dt), new_shift, carry[3])
+        if steps:
+            self.shift_counters = np.stack([parts_shift[-1], rejects_shift[-1], uptime[-1], downtime[-1]])
+
+        # Cumulative OEE within the shift
+        elapsed = uptime + downtime
+        availability = np.divide(uptime, elapsed, out=np.zeros_like(uptime), where=elapsed > 0)
+        performance = np.minimum(1.0, np.divide(parts_shift * self.target_cycle, uptime,
+                                                out=np.zeros_like(uptime), where=uptime > 0))
+        quality = np.divide(parts_shift - rejects_shift, parts_shift, out=np.ones_like(uptime), where=parts_shift > 0)
+        oee = availability * performance * quality
+
+        # Energy: load-dependent draw while running, standby otherwise, integrated per sample
+        load = rng.uniform(0.6, 1.0, (steps, m))
+        power = np.where(running, np.clip(self.rated_power * load, 30, 80), rng.uniform(5, 15, (steps, m)))
+        energy = np.cumsum(power * dt / 3600, axis=0) + self.energy_kwh
+        self.energy_kwh = energy[-1].copy() if steps else self.energy_kwh
+
+        # Tool and program change on every setup entry; fault timestamps carry until the next fault
+        setup_entry = (states == SETUP) & (np.vstack([np.full((1, m), -1), states[:-1]]) != SETUP)
+        tool = _forward_fill(rng.integers(1, 13, (steps, m)), setup_entry, self.tool)
+        program = _forward_fill(rng.integers(1000, 10000, (steps, m)), setup_entry, self.program)
+        fault_entry = in_fault & (np.vstack([np.full((1, m), -1), states[:-1]]) != FAULT)
+        fault_times = np.broadcast_to(times[:, None], (steps, m))
+        last_fault = _forward_fill(fault_times, fault_entry, self.last_fault)
+        if steps:
+            self.tool, self.program, self.last_fault = tool[-1].copy(), program[-1].copy(), last_fault[-1].copy()
+
+        temperature = np.clip(self.temperature_setpoint + np.where(running, 2.0, -5.0)
+                              + rng.normal(0, 1.5, (steps, m)), 35, 75)
+        pressure = np.clip(self.pressure_setpoint + rng.normal(0, 2.0, (steps, m)), 95, 155)
+
+        def flat(values) -> np.ndarray:
+            return np.ascontiguousarray(np.asarray(values).T).ravel()
+
+        def per_machine(values) -> np.ndarray:
+            return np.repeat(values, steps)
+
+        def when(mask, values) -> np.ndarray:
+            """values where mask is set, None elsewhere (object array of plain Python values)"""
+            out = np.full(mask.shape, None, dtype=object)
+            out[mask] = values[mask].tolist()
+            return flat(out)
+
+        running_flat = flat(running)
+        fault_flat = flat(in_fault)
+        code = per_machine(self.fault_code)
+        program_text = np.char.add('NC', flat(program).astype(str))
+        shift_flat = flat(shift_index)
+        n = steps * m
+        return {
+            'machine_id': per_machine(self.machine_ids),
+            'line_id': per_machine(self.line_ids),
+            'factory_id': per_machine(self.factory_ids),
+            'timestamp': flat(np.broadcast_to(times[:, None], (steps, m))),
+            'machine_state': np.array(STATES, dtype=object)[flat(states)],
+            'operation_mode': np.full(n, 'auto', dtype=object),
+            'fault_code': np.where(fault_flat, code, None),
+            'fault_description': np.where(fault_flat, per_machine(self.fault_description), None),
+            'parts_produced_cumulative': flat(np.floor(produced)).astype(np.int64),
+            'parts_produced_shift': flat(parts_shift).astype(np.int64),
+            'parts_rejected_shift': flat(rejects_shift).astype(np.int64),
+            'target_cycle_time_seconds': per_machine(self.target_cycle.astype(np.int64)),
+            'actual_cycle_time_seconds': when(running, np.round(cycle_time).astype(np.int64)),
+            'availability_percentage': flat(np.round(availability * 100, 2)),
+            'performance_percentage': flat(np.round(performance * 100, 2)),
+            'quality_percentage': flat(np.round(quality * 100, 2)),
+            'oee_percentage': flat(np.round(oee * 100, 2)),
+            'spindle_speed_rpm': when(running, rng.integers(1000, 4000, (steps, m))),
+            'feed_rate_mm_min': when(running, np.round(rng.uniform(100, 500, (steps, m)), 2)),
+            'tool_number': flat(tool),
+            'program_number': np.where(running_flat, program_text.astype(object), None),
+            'power_consumption_kw': flat(np.round(power, 2)),
+            'energy_consumed_kwh': flat(np.round(energy, 2)),
+            'temperature_setpoint_c': per_machine(self.temperature_setpoint),
+            'temperature_actual_c': flat(np.round(temperature, 2)),
+            'pressure_setpoint_bar': per_machine(self.pressure_setpoint),
+            'pressure_actual_bar': flat(np.round(pressure, 2)),
+            'downtime_seconds_shift': flat(downtime).astype(np.int64),
+            'last_fault_timestamp': flat(last_fault),
+            'uptime_seconds_shift': flat(uptime).astype(np.int64),
+            'active_alarms': fault_flat.astype(np.int64),
+            'alarm_codes': np.where(fault_flat, code, None),
+            'warning_codes': np.full(n, None, dtype=object),
+            'shift_id': self.shift_ids[shift_flat],
+            'operator_id': self.operator_ids[shift_flat],
+            'data_source': np.full(n, 'PLC', dtype=object),
+            'data_quality': np.full(n, 'good', dtype=object),
+            'created_at': np.full(n, np.datetime64(datetime.now().replace(microsecond=0), 's')),
+        }
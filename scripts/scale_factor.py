@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+GenIMS Scale Factor
+GENIMS_SCALE_FACTOR sizes the whole platform TPC-style (default 1 = the reference 4-factory plant):
+  - plant size: factories (and with them lines, machines, sensors, employees), per-factory staff
+    such as sales reps, warehouses or service agents
+  - volumes: per-day transaction ranges in the historical generators and daemon record targets
+  - history length: below 1 the history window shrinks with the factor too (small dev datasets);
+    at 1 and above the window stays fixed and the plant grows, so row counts stay linear in the factor
+Catalogs (products, customers, materials, suppliers, KB articles, ...) are not plant-sized and stay fixed.
+Memory is still not flat in the factor. With GENERATOR_OUTPUT=tsv/ndjson the chunked tables stream to shards and
+are read back from them (sales orders in ERP, pick waves and shipments in WMS/TMS), and upstream order tables are
+loaded as a few ID columns only; what still grows is those ID columns and the in-flight chunk buffers, which hold
+each chunk's days at the scaled per-day volume.
+"""
+
+import os
+from typing import Tuple
+
+DEFAULT_SCALE_FACTOR = 1.0
+
+
+def scale_factor() -> float:
+    factor = float(os.getenv('GENIMS_SCALE_FACTOR', str(DEFAULT_SCALE_FACTOR)) or DEFAULT_SCALE_FACTOR)
+    if factor <= 0:
+        raise ValueError(f"GENIMS_SCALE_FACTOR must be positive, got {factor}")
+    return factor
+
+
+def scaled(count: int, minimum: int = 1) -> int:
+    """count at the current scale factor (never below minimum)"""
+    return max(minimum, int(round(count * scale_factor())))
+
+
+def scaled_range(bounds: Tuple[int, int], minimum: int = 1) -> Tuple[int, int]:
+    """(min, max) volume range at the current scale factor, for random.randint(*range)"""
+    low, high = scaled(bounds[0], minimum), scaled(bounds[1], minimum)
+    return low, max(low, high)
+
+
+def history_days(days: int) -> int:
+    """History window in days: shortened below scale factor 1, unchanged above it"""
+    return max(1, int(round(days * min(1.0, scale_factor()))))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+GenIMS Vectorized Sensor Engine
+Generates sensor_data readings for a whole block of sensors as NumPy columns:
+timestamps, gaussian measurements, anomaly masks, threshold flags and 1-minute stats
+are drawn in a few array operations instead of ~10 random.* calls per reading.
+Rows are only materialized at the output boundary (records() or TableWriter.write_columns()).
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# REALISTIC sensor ranges based on industrial manufacturing equipment
+SENSOR_RANGES = {
+    'temperature': (35, 75),      # Motor/bearing operating range: 35-75°C
+    'vibration': (0.5, 8),        # ISO 10816: 0.5-8 mm/s normal, >8 alarm
+    'pressure': (4, 8),           # Hydraulic systems: 4-8 bar normal
+    'current': (5, 40),           # Motor current: 5-40A depending on load
+    'voltage': (210, 230),        # Single phase supply: ±10% of 220V
+    'flow': (10, 80),             # Flow rate: 10-80 L/min typical
+    'speed': (300, 2500),         # RPM varies by spindle type
+    'torque': (10, 80)            # Torque load: 10-80 Nm typical
+}
+DEFAULT_RANGE = (10, 100)
+
+MEASUREMENT_UNITS = np.array(['°C', 'mm/s', 'bar', 'A', 'V', 'L/min', 'rpm', 'Nm'])
+DATA_SOURCES = np.array(['IoT', 'Edge', 'Gateway'])
+PROTOCOLS = np.array(['OPC-UA', 'Modbus', 'MQTT'])
+
+ANOMALY_RATE = 0.02   # Only 2% true anomalies
+WARNING_RATE = 0.05   # Non-anomalous readings flagged warning / uncertain
+
+SENSOR_DATA_COLUMNS = [
+    'sensor_data_id', 'sensor_id', 'machine_id', 'line_id', 'factory_id', 'timestamp',
+    'measurement_value', 'measurement_unit', 'status', 'quality',
+    'is_below_warning', 'is_above_warning', 'is_below_critical', 'is_above_critical',
+    'min_value_1min', 'max_value_1min', 'avg_value_1min', 'std_dev_1min',
+    'is_anomaly', 'anomaly_score', 'data_source', 'protocol', 'created_at',
+]
+
+
+def format_timestamps(times: np.ndarray) -> np.ndarray:
+    """datetime64 array -> 'YYYY-MM-DD HH:MM:SS' strings, without a per-element strftime"""
+    iso = np.datetime_as_string(times, unit='s').astype('S19')
+    raw = iso.view(np.uint8).reshape(-1, 19)
+    raw[:, 10] = ord(' ')  # ISO 'T' separator -> space
+    return raw.view('S19').ravel().astype('U19')
+
+
+def generate_sensor_block(sensors: Sequence[Dict], samples_per_sensor: int, start_time: datetime,
+                          end_time: datetime, first_id: int = 1,
+                          rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """
+    samples_per_sensor readings for every sensor of the block, as columns (SENSOR_DATA_COLUMNS).
+    Readings are grouped by sensor; sensor_data_id runs from first_id.
+    """
+    rng = rng or np.random.default_rng()
+    n = len(sensors) * samples_per_sensor
+
+    def per_sensor(values) -> np.ndarray:
+        return np.repeat(np.asarray(values), samples_per_sensor)
+
+    ranges = [SENSOR_RANGES.get(sensor['sensor_type'], DEFAULT_RANGE) for sensor in sensors]
+    min_val = per_sensor([r[0] for r in ranges]).astype(np.float64)
+    max_val = per_sensor([r[1] for r in ranges]).astype(np.float64)
+
+    # Naive datetimes stay naive (local wall clock, like strftime on the datetime itself)
+    start = np.datetime64(start_time.replace(microsecond=0, tzinfo=None), 's')
+    span = int((end_time - start_time).total_seconds())
+    timestamps = format_timestamps(start + rng.integers(0, span + 1, size=n).astype('timedelta64[s]'))
+
+    # Normal distribution around midpoint, clamped strictly to range
+    midpoint = (min_val + max_val) / 2
+    sigma = (max_val - min_val) / 8  # Tighter distribution, 98% within range
+    value = np.clip(rng.normal(midpoint, sigma), min_val * 0.95, max_val * 1.05)
+
+    # Rare anomalies are forced out of range
+    is_anomaly = rng.random(n) < ANOMALY_RATE
+    value = np.round(np.where(is_anomaly, rng.uniform(max_val * 1.1, max_val * 1.3), value), 4)
+    anomaly_score = np.round(np.where(is_anomaly, rng.uniform(0.85, 1.0, n), rng.uniform(0, 0.2, n)), 4)
+
+    status = np.where(is_anomaly, 'critical', np.where(rng.random(n) < WARNING_RATE, 'warning', 'normal'))
+    quality = np.where(is_anomaly, 'bad', np.where(rng.random(n) < WARNING_RATE, 'uncertain', 'good'))
+
+    return {
+        'sensor_data_id': np.arange(first_id, first_id + n, dtype=np.int64),
+        'sensor_id': per_sensor([sensor['sensor_id'] for sensor in sensors]),
+        'machine_id': per_sensor([sensor['machine_id'] for sensor in sensors]),
+        'line_id': per_sensor([sensor['line_id'] for sensor in sensors]),
+        'factory_id': per_sensor([sensor['factory_id'] for sensor in sensors]),
+        'timestamp': timestamps,
+        'measurement_value': value,
+        'measurement_unit': rng.choice(MEASUREMENT_UNITS, n),
+        'status': status,
+        'quality': quality,
+        'is_below_warning': value < min_val * 0.95,
+        'is_above_warning': value > max_val * 1.05,
+        'is_below_critical': value < min_val * 0.90,
+        'is_above_critical': value > max_val * 1.10,
+        'min_value_1min': np.round(value - rng.uniform(0.5, 2, n), 4),
+        'max_value_1min': np.round(value + rng.uniform(0.5, 2, n), 4),
+        'avg_value_1min': np.round(value + rng.uniform(-0.5, 0.5, n), 4),
+        'std_dev_1min': np.round(rng.uniform(0.05, 0.5, n), 4),
+        'is_anomaly': is_anomaly,
+        'anomaly_score': anomaly_score,
+        'data_source': rng.choice(DATA_SOURCES, n),
+        'protocol': rng.choice(PROTOCOLS, n),
+        'created_at': np.full(n, datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+    }
+
+
+def records(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """Materialize column arrays as row dicts (plain Python values)"""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(columns[name].tolist() for name in names))]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+GenIMS Setup Checkpoint
+Persisted manifest of completed full_setup units so a failed run can resume
+from the first incomplete unit instead of dropping and regenerating everything.
+
+Units are named '<kind>:<name>':
+  database:<db>           created
+  schema:<db>             schema loaded (schema file hash recorded)
+  generator:<script>      generator finished (output file hashes recorded)
+  table:<db>.<table>      table loaded (row count + data file hash recorded)
+  deferred:<db>           indexes/FKs dropped by --defer-indexes and not yet rebuilt (their DDL recorded)
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from generator_cache import FileDigests
+
+
+class SetupCheckpoint:
+    """Thread-safe checkpoint manifest, rewritten atomically after every completed unit"""
+
+    def __init__(self, checkpoint_file: Path, resume: bool = False):
+        self.checkpoint_file = Path(checkpoint_file)
+        self.lock = threading.Lock()
+        self.units: Dict[str, Dict] = {}
+        digests = {}
+        if resume and self.checkpoint_file.exists():
+            try:
+                with open(self.checkpoint_file, 'r') as f:
+                    manifest = json.load(f)
+                self.units = manifest.get('units', {})
+                digests = manifest.get('digests', {})
+            except (OSError, ValueError):
+                pass  # Unreadable checkpoint: resume degrades to a full run
+        self.digests = FileDigests(digests)
+
+    def file_digest(self, path: Path) -> Optional[str]:
+        return self.digests.digest(path)
+
+    def get(self, kind: str, name: str) -> Optional[Dict]:
+        with self.lock:
+            return self.units.get(f"{kind}:{name}")
+
+    def is_done(self, kind: str, name: str, **expected) -> bool:
+        """True if the unit completed and its recorded info matches (e.g. file_hash=...)"""
+        unit = self.get(kind, name)
+        if unit is None:
+            return False
+        return all(unit.get(field) == value for field, value in expected.items())
+
+    def mark_done(self, kind: str, name: str, **info):
+        with self.lock:
+            self.units[f"{kind}:{name}"] = dict(info, completed=time.time())
+        self.save()
+
+    def invalidate(self, kind: str, name_prefix: str = ''):
+        """Forget units of a kind whose name starts with name_prefix"""
+        with self.lock:
+            for unit in [u for u in self.units if u.startswith(f"{kind}:{name_prefix}")]:
+                del self.units[unit]
+        self.save()
+
+    def count(self, kind: str) -> int:
+        with self.lock:
+            return sum(1 for unit in self.units if unit.startswith(f"{kind}:"))
+
+    def save(self):
+        """Atomic manifest write (tmp file + rename) - a crash never leaves a torn checkpoint"""
+        with self.lock:
+            manifest = {'units': self.units, 'digests': self.digests.snapshot()}
+            self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.checkpoint_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_file, self.checkpoint_file)
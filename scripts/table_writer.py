@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+GenIMS Sharded Table Writer
+Streams generator output table by table, chunk by chunk, into compact shard files
+instead of one indented JSON document held in memory until the end:
+  <data file stem>.shards/<table>.<n>.ndjson[.gz]   one compact JSON record per line
+  <data file stem>.shards/<table>.<n>.tsv[.gz]      COPY text format (tab separated, \\N for NULL)
+The data file itself (e.g. genims_operational_data.json) becomes a small manifest with the
+columns, value kinds, shard files and row counts, so the loader, the FK validator, the generator
+cache and checkpoints keep finding the output where they always did.
+Shards are written to <stem>.shards.tmp and only swapped in by close(): a failed or killed run never
+touches the previous output, and a manifest never points at shards that are not there.
+"""
+
+import gzip
+import itertools
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from table_encoder import COPY_NULL, format_any, format_text
+
+MANIFEST_KEY = 'genims_shards'
+MANIFEST_VERSION = 1
+FORMATS = ('ndjson', 'tsv')
+DEFAULT_SHARD_ROWS = 500000
+MANIFEST_MAX_BYTES = 1 << 20  # Real data files are far larger; only a manifest is read to sniff
+
+_UNESCAPE_RE = re.compile(r'\\(.)')
+_UNESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', '\\': '\\'}
+
+
+def value_kind(val: Any) -> str:
+    if isinstance(val, bool):
+        return 'bool'
+    if isinstance(val, int):
+        return 'int'
+    if isinstance(val, float):
+        return 'float'
+    if isinstance(val, (dict, list)):
+        return 'json'
+    return 'str'
+
+
+def format_tsv(val) -> str:
+    """COPY text for one value; dicts/lists become JSON text (loadable into json/jsonb columns)"""
+    if isinstance(val, (dict, list)):
+        return format_text(json.dumps(val))
+    return format_any(val)
+
+
+def _format_tsv_scalars(values: np.ndarray) -> List[str]:
+    if values.dtype.kind == 'M':
+        texts = np.char.replace(np.datetime_as_string(values.astype('datetime64[s]'), unit='s'), 'T', ' ')
+        return np.where(np.isnat(values), COPY_NULL, texts).tolist()
+    return list(map(repr, values.tolist()))
+
+
+def _format_tsv_column(values: np.ndarray) -> List[str]:
+    """
+    COPY text for a whole column array: bools and timestamps via NumPy, numbers via repr,
+    strings and other hashable values formatted once per distinct value
+    """
+    if values.dtype == np.bool_:
+        return np.where(values, 't', 'f').tolist()
+    if values.dtype.kind in 'iufM':
+        # Readings repeat heavily (rounded percentages, one timestamp per machine): format each once
+        distinct, inverse = np.unique(values, return_inverse=True)
+        if len(distinct) * 2 > len(values):
+            return _format_tsv_scalars(values)
+        return np.array(_format_tsv_scalars(distinct), dtype=object)[inverse].tolist()
+    texts = values.tolist()
+    try:
+        distinct = set(texts)
+    except TypeError:  # dicts / lists
+        return [format_tsv(val) for val in texts]
+    formatted = {val: format_tsv(val) for val in distinct}
+    if values.dtype.kind == 'U' and all(val == text for val, text in formatted.items()):
+        return texts
+    return [formatted[val] for val in texts]
+
+
+def tsv_lines(columns: Dict[str, np.ndarray], start: int = 0, end: Optional[int] = None) -> str:
+    """COPY text lines for rows [start, end) of equal-length column arrays"""
+    cells = [_format_tsv_column(values[start:end]) for values in columns.values()]
+    return ''.join('\t'.join(row) + '\n' for row in zip(*cells))
+
+
+def _to_number(text: str):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+_PARSERS: Dict[str, Callable[[str], Any]] = {
+    'int': _to_number,
+    'float': float,
+    'bool': lambda text: text == 't',
+    'json': json.loads,
+    'str': lambda text: text,
+}
+
+
+def parse_tsv_value(text: str, kind: str):
+    if text == COPY_NULL:
+        return None
+    if '\\' in text:
+        text = _UNESCAPE_RE.sub(lambda m: _UNESCAPES.get(m.group(1), m.group(1)), text)
+    return _PARSERS[kind](text)
+
+
+def _open_shard(path: Path, mode: str):
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', compresslevel=1, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class _TableShards:
+    """Open shard state of one table"""
+
+    def __init__(self, columns: List[str], kinds: Dict[str, str], unknown: List[str]):
+        self.columns = columns
+        self.kinds = kinds
+        self.unknown = set(unknown)  # Columns only NULL so far: kind 'str' until a later chunk has a value
+        self.lock = threading.Lock()
+        self.shards: List[Dict] = []  # {'file', 'rows'}
+        self.fp = None
+        self.rows = 0
+
+
+class TableWriter:
+    """Thread-safe per-table shard writer; close() publishes the manifest at data_file"""
+
+    def __init__(self, data_file: Union[str, Path], fmt: str = 'ndjson', compress: bool = False,
+                 shard_rows: int = DEFAULT_SHARD_ROWS):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format: {fmt} (expected one of {', '.join(FORMATS)})")
+        self.data_file = Path(data_file)
+        self.shard_dir = self.data_file.with_suffix('.shards')  # Published by close()
+        self.build_dir = self.data_file.with_suffix('.shards.tmp')
+        self.fmt = fmt
+        self.compress = compress
+        self.shard_rows = shard_rows
+        self.lock = threading.Lock()
+        self.tables: Dict[str, _TableShards] = {}
+        self.closed = False
+        # Left behind by a killed run; the published shards stay untouched until close()
+        shutil.rmtree(self.build_dir, ignore_errors=True)
+        self.build_dir.mkdir(parents=True)
+
+    def _table(self, table_name: str, records: List[Dict]) -> _TableShards:
+        with self.lock:
+            table = self.tables.get(table_name)
+            if table is None:
+                columns = list(dict.fromkeys(c for rec in records for c in rec))
+                table = self.tables[table_name] = _TableShards(columns, dict.fromkeys(columns, 'str'), columns)
+            return table
+
+    @staticmethod
+    def _sniff_kinds(table: _TableShards, records: List[Dict]):
+        """Kinds of the columns that had no value yet, from this chunk (called under table.lock)"""
+        for c in list(table.unknown):
+            sample = next((rec[c] for rec in records if rec.get(c) is not None), None)
+            if sample is not None:
+                table.kinds[c] = value_kind(sample)
+                table.unknown.discard(c)
+
+    def write(self, table_name: str, records: List[Dict]):
+        """Append one chunk of records (columns are fixed by the first chunk for TSV)"""
+        if not records:
+            return
+        table = self._table(table_name, records)
+        with table.lock:
+            if table.unknown:
+                self._sniff_kinds(table, records)
+            pos = 0
+            while pos < len(records):
+                if table.fp is None or table.shards[-1]['rows'] >= self.shard_rows:
+                    self._rotate(table_name, table)
+                shard = table.shards[-1]
+                batch = records[pos:pos + self.shard_rows - shard['rows']]
+                table.fp.write(self._encode(table, batch))
+                shard['rows'] += len(batch)
+                table.rows += len(batch)
+                pos += len(batch)
+
+    def write_columns(self, table_name: str, columns: Dict[str, np.ndarray]):
+        """
+        Append one chunk given as equal-length column arrays (e.g. from sensor_engine):
+        TSV lines are formatted column-wise, without building a dict per row
+        """
+        names = list(columns)
+        n = len(columns[names[0]]) if names else 0
+        if not n:
+            return
+        if self.fmt == 'ndjson':
+            self.write(table_name, [dict(zip(names, row)) for row in zip(*(columns[c].tolist() for c in names))])
+            return
+        first = [{c: columns[c][0].item() for c in names}]
+        table = self._table(table_name, first)
+        if names != table.columns:
+            raise ValueError(f"Column chunks must match the table's columns: {table.columns}")
+        with table.lock:
+            if table.unknown:
+                self._sniff_kinds(table, first)
+            pos = 0
+            while pos < n:
+                if table.fp is None or table.shards[-1]['rows'] >= self.shard_rows:
+                    self._rotate(table_name, table)
+                shard = table.shards[-1]
+                end = min(n, pos + self.shard_rows - shard['rows'])
+                table.fp.write(tsv_lines(columns, pos, end))
+                shard['rows'] += end - pos
+                table.rows += end - pos
+                pos = end
+
+    def _encode(self, table: _TableShards, records: List[Dict]) -> str:
+        if self.fmt == 'ndjson':
+            dumps = json.JSONEncoder(separators=(',', ':'), default=str).encode
+            lines = [dumps(rec) for rec in records]
+        else:
+            columns = table.columns
+            extra = {c for rec in records for c in rec} - set(columns)
+            if extra:
+                raise ValueError(f"Columns not in the first chunk cannot be written as TSV: {sorted(extra)}")
+            lines = ['\t'.join(format_tsv(rec.get(c)) for c in columns) for rec in records]
+        lines.append('')
+        return '\n'.join(lines)
+
+    def _rotate(self, table_name: str, table: _TableShards):
+        if table.fp is not None:
+            table.fp.close()
+        name = f"{table_name}.{len(table.shards):04d}.{self.fmt}" + ('.gz' if self.compress else '')
+        table.shards.append({'file': name, 'rows': 0})
+        table.fp = _open_shard(self.build_dir / name, 'w')
+
+    def rows(self, table_name: str) -> int:
+        table = self.tables.get(table_name)
+        return table.rows if table else 0
+
+    def read(self, table_name: str, chunk_size: int = 50000) -> Iterator[List[Dict]]:
+        """
+        Record chunks of what was written to a table so far, before or after close(): the open shard is
+        closed to be read, so the table's next write starts a new shard
+        """
+        table = self.tables.get(table_name)
+        if table is None:
+            return
+        with table.lock:
+            if table.fp is not None:
+                table.fp.close()
+                table.fp = None
+            files = [shard['file'] for shard in table.shards]
+        shard_dir = self.shard_dir if self.closed else self.build_dir
+        for name in files:
+            yield from iter_shard_records(shard_dir / name, self.fmt, table.columns, table.kinds, chunk_size)
+
+    def _close_files(self):
+        for table in self.tables.values():
+            with table.lock:
+                if table.fp is not None:
+                    table.fp.close()
+                    table.fp = None
+
+    def close(self) -> Path:
+        """
+        Close every shard and publish them with the manifest: the old manifest is removed first,
+        so a crash while the shard directories are swapped leaves no output rather than a stale one
+        """
+        self._close_files()
+        manifest = {
+            MANIFEST_KEY: MANIFEST_VERSION,
+            'format': self.fmt,
+            'compressed': self.compress,
+            'shard_dir': self.shard_dir.name,
+            'created': time.time(),
+            'tables': {},
+        }
+        for table_name, table in self.tables.items():
+            with table.lock:
+                for shard in table.shards:
+                    shard['bytes'] = (self.build_dir / shard['file']).stat().st_size
+                manifest['tables'][table_name] = {
+                    'rows': table.rows,
+                    'columns': table.columns,
+                    'kinds': table.kinds,
+                    'shards': table.shards,
+                }
+        tmp_file = self.data_file.with_suffix('.manifest.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        if self.data_file.exists():
+            self.data_file.unlink()
+        shutil.rmtree(self.shard_dir, ignore_errors=True)
+        os.replace(self.build_dir, self.shard_dir)
+        os.replace(tmp_file, self.data_file)
+        self.closed = True
+        return self.data_file
+
+    def abort(self):
+        """Discard this run's shards; the previous output (if any) stays as it was"""
+        self._close_files()
+        shutil.rmtree(self.build_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def open_table_writer(data_file: Union[str, Path]) -> Optional[TableWriter]:
+    """Writer configured by GENERATOR_OUTPUT (json = None: keep the monolithic JSON dump)"""
+    fmt = os.getenv('GENERATOR_OUTPUT', 'json').lower()
+    if fmt == 'json':
+        return None
+    return TableWriter(data_file, fmt,
+                       compress=os.getenv('GENERATOR_OUTPUT_GZIP', 'false').lower() == 'true',
+                       shard_rows=int(os.getenv('GENERATOR_SHARD_ROWS', str(DEFAULT_SHARD_ROWS))))
+
+
+class TableSink:
+    """
+    A generator's output while it generates. With GENERATOR_OUTPUT=ndjson|tsv every emitted chunk goes to
+    the shard writer at once and is not kept, so memory holds one chunk instead of whole tables; otherwise
+    (json, or stream=False for history slices) records are appended to the generator's own lists
+    for the JSON dump at the end. Tables the generator derives more rows from are read back with
+    records() / chunks(), from the shards or the lists alike
+    """
+
+    def __init__(self, data_file: Optional[Union[str, Path]] = None, stream: bool = True):
+        self.writer = open_table_writer(data_file) if data_file is not None and stream else None
+
+    @property
+    def streaming(self) -> bool:
+        return self.writer is not None
+
+    def emit(self, table_name: str, records: List[Dict], kept: List[Dict]):
+        """Write one chunk of a table, or append it to kept (the generator's list for that table)"""
+        if self.writer is not None:
+            self.writer.write(table_name, records)
+        else:
+            kept.extend(records)
+
+    def rows(self, table_name: str, kept: List[Dict]) -> int:
+        """Rows of a table so far, streamed or kept"""
+        return len(kept) + (self.writer.rows(table_name) if self.writer is not None else 0)
+
+    def records(self, table_name: str, kept: List[Dict]) -> Iterator[Dict]:
+        """A table's rows so far in emit order: read back from the shards when streamed, then the kept ones"""
+        if self.writer is not None:
+            for chunk in self.writer.read(table_name):
+                yield from chunk
+        yield from kept
+
+    def chunks(self, table_name: str, kept: List[Dict], chunk_size: int = 50000) -> Iterator[List[Dict]]:
+        """A table's rows so far (see records) in chunks of exactly chunk_size rows, the last one shorter"""
+        rows = self.records(table_name, kept)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self, data: Dict[str, List[Dict]]) -> Optional[Path]:
+        """Write the tables still held in data (emitted tables' lists are empty) and publish the shards;
+        None when not streaming - the caller dumps data as JSON"""
+        if self.writer is None:
+            return None
+        try:
+            for table_name, records in data.items():
+                self.writer.write(table_name, records)
+        except Exception:
+            self.writer.abort()
+            raise
+        self.writer.close()
+        return self.writer.shard_dir
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.abort()
+
+
+def write_tables(data_file: Union[str, Path], data: Dict[str, List[Dict]]) -> Optional[Path]:
+    """Write a generator's finished table dict as shards + manifest; None (nothing written) for GENERATOR_OUTPUT=json"""
+    writer = open_table_writer(data_file)
+    if writer is None:
+        return None
+    with writer:
+        for table_name, records in data.items():
+            writer.write(table_name, records)
+    return writer.shard_dir
+
+
+def read_manifest(data_file: Union[str, Path]) -> Optional[Dict]:
+    """The shard manifest if data_file is one (None for a regular JSON data file)"""
+    data_file = Path(data_file)
+    try:
+        if data_file.stat().st_size > MANIFEST_MAX_BYTES:
+            return None
+        with open(data_file, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if isinstance(manifest, dict) and manifest.get(MANIFEST_KEY) == MANIFEST_VERSION:
+        return manifest
+    return None
+
+
+def shard_paths(data_file: Union[str, Path], manifest: Dict, table_name: str) -> List[Path]:
+    shard_dir = Path(data_file).parent / manifest['shard_dir']
+    return [shard_dir / shard['file'] for shard in manifest['tables'][table_name]['shards']]
+
+
+def open_shard(path: Path):
+    """Text stream over one shard (transparently gunzipped)"""
+    return _open_shard(path, 'r')
+
+
+def iter_shard_records(path: Path, fmt: str, columns: List[str], kinds: Dict[str, str],
+                       chunk_size: int = 50000) -> Iterator[List[Dict]]:
+    """Record chunks of one shard file"""
+    parsers = [kinds[c] for c in columns]
+    chunk = []
+    with open_shard(path) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if fmt == 'ndjson':
+                chunk.append(json.loads(line))
+            else:
+                chunk.append({c: parse_tsv_value(text, kind)
+                              for c, kind, text in zip(columns, parsers, line.split('\t'))})
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_shard_chunks(data_file: Union[str, Path], manifest: Dict, chunk_size: int = 50000,
+                      tables: Optional[List[str]] = None) -> Iterator[Tuple[str, List[Dict]]]:
+    """(table_name, records) chunks decoded from the shards - same shape as json_stream.iter_table_chunks"""
+    for table_name, meta in manifest['tables'].items():
+        if tables is not None and table_name not in tables:
+            continue
+        for path in shard_paths(data_file, manifest, table_name):
+            for chunk in iter_shard_records(path, manifest['format'], meta['columns'], meta['kinds'], chunk_size):
+                yield table_name, chunk
@@ -4,12 +4,14 @@ Time coordination utility for data generation
 import time
 from datetime import datetime
 
+from history_slice import as_of
+
 class TimeCoordinator:
     """Synchronizes time across multiple data generators"""
     
     def __init__(self):
         self.start_time = time.time()
-        self.current_timestamp = datetime.now()
+        self.current_timestamp = as_of()  # GENERATOR_AS_OF pins it for reproducible runs
     
     def get_current_time(self) -> datetime:
         """Get current coordinated timestamp"""
@@ -0,0 +1,19 @@
+"""Shared pytest setup: the modules under test live flat in scripts/"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+# Knobs from scripts/config.env that change generator output
+OUTPUT_ENV = ['GENERATOR_SEED', 'GENERATOR_AS_OF', 'GENERATOR_SLICE_START', 'GENERATOR_SLICE_END',
+              'GENERATOR_CHUNK_DAYS', 'GENIMS_SCALE_FACTOR', 'CHUNK_EXECUTOR']
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    """Tests start from the defaults, whatever config.env the shell has sourced"""
+    for name in OUTPUT_ENV:
+        monkeypatch.delenv(name, raising=False)
@@ -0,0 +1,146 @@
+"""chunk_executor: deterministic chunk output, ID range reservation and history slices"""
+
+import multiprocessing
+import random
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from chunk_executor import ChunkExecutor, chunk_seed, day_windows, id_block, id_blocks, id_stride, spans
+
+fork_only = pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='needs fork')
+
+
+class FakeGenerator:
+    """Mints IDs from self.counters and draws from both global RNGs, like the historical generators"""
+
+    def __init__(self):
+        self.counters = {'order': 1, 'line': 1}
+
+    def chunk(self, start_day, days, lines_per_order=3):
+        rows = []
+        for day in range(start_day, start_day + days):
+            for _ in range(random.randint(1, 4)):
+                order_id = self.counters['order']
+                self.counters['order'] += 1
+                for _ in range(lines_per_order):
+                    rows.append((day, order_id, self.counters['line'], random.random(), float(np.random.rand())))
+                    self.counters['line'] += 1
+        return rows
+
+
+def run(mode, workers, monkeypatch, day_count=45, seed=1234, **kwargs):
+    monkeypatch.setenv('CHUNK_EXECUTOR', mode)
+    generator = FakeGenerator()
+    executor = ChunkExecutor(workers, seed=seed)
+    day_spans = spans(day_count, 10)
+    results = list(executor.run(generator.chunk, day_spans, 'orders', counters=generator.counters,
+                                id_ranges={'order': 100, 'line': 1000}, **kwargs))
+    return results, generator.counters
+
+
+@fork_only
+@pytest.mark.parametrize('workers', [2, 4])
+def test_process_and_serial_output_match(monkeypatch, workers):
+    serial, serial_counters = run('serial', 1, monkeypatch)
+    forked, forked_counters = run('process', workers, monkeypatch)
+    assert forked == serial
+    assert forked_counters == serial_counters
+
+
+def test_results_depend_only_on_seed(monkeypatch):
+    first, _ = run('serial', 1, monkeypatch)
+    assert run('serial', 3, monkeypatch)[0] == first
+    assert run('serial', 1, monkeypatch, seed=99)[0] != first
+    assert [index for index, _ in first] == [0, 1, 2, 3, 4]
+    assert chunk_seed(1234, 'orders', 0) != chunk_seed(1234, 'orders', 1) != chunk_seed(1234, 'lines', 1)
+
+
+def test_chunks_mint_from_reserved_ranges(monkeypatch):
+    results, counters = run('serial', 1, monkeypatch)
+    for index, rows in results:
+        orders = {order_id for _, order_id, _, _, _ in rows}
+        lines = [line_id for _, _, line_id, _, _ in rows]
+        assert min(orders) == 1 + index * 100 and max(orders) < 1 + (index + 1) * 100
+        assert min(lines) == 1 + index * 1000 and max(lines) < 1 + (index + 1) * 1000
+    # The coordinator continues after every chunk's range
+    assert counters == {'order': 1 + 5 * 100, 'line': 1 + 5 * 1000}
+
+
+@pytest.mark.parametrize('mode', ['serial', pytest.param('process', marks=fork_only)])
+def test_chunks_are_yielded_as_they_finish(monkeypatch, mode):
+    monkeypatch.setenv('CHUNK_EXECUTOR', mode)
+    generator = FakeGenerator()
+    executor = ChunkExecutor(2, seed=1)
+    chunks = executor.run(generator.chunk, spans(200, 10), 'orders', counters=generator.counters,
+                          id_ranges={'order': 100, 'line': 1000})
+    index, _ = next(chunks)
+    # The caller holds chunk 0 (and sees the final counters) before all 20 chunks are done
+    assert index == 0
+    assert generator.counters == {'order': 1 + 20 * 100, 'line': 1 + 20 * 1000}
+    if mode == 'serial':
+        random.seed(5)
+        expected = random.random()
+        random.seed(5)
+        next(chunks)  # The chunk reseeds the RNGs, the caller gets its own state back
+        assert random.random() == expected
+    assert [index for index, _ in chunks][-1] == 19
+
+
+@pytest.mark.parametrize('mode', ['serial', pytest.param('process', marks=fork_only)])
+def test_one_pass_chunks_match_a_list(monkeypatch, mode):
+    listed, listed_counters = run(mode, 3, monkeypatch)
+    drawn = []
+
+    def day_spans():
+        for span in spans(45, 10):
+            drawn.append(span)
+            yield span
+
+    monkeypatch.setenv('CHUNK_EXECUTOR', mode)
+    generator = FakeGenerator()
+    chunks = ChunkExecutor(3, seed=1234).run(generator.chunk, day_spans(), 'orders', counters=generator.counters,
+                                             id_ranges={'order': 100, 'line': 1000}, count=5)
+    first = next(chunks)
+    # Arguments are drawn as chunks are submitted (at most 2 x workers ahead), not all up front
+    assert len(drawn) <= 6 if mode == 'process' else len(drawn) == 1
+    assert [first] + list(chunks) == listed
+    assert generator.counters == listed_counters
+
+
+@pytest.mark.parametrize('mode', ['serial', pytest.param('process', marks=fork_only)])
+def test_range_overrun_fails_the_run(monkeypatch, mode):
+    monkeypatch.setenv('CHUNK_EXECUTOR', mode)
+    generator = FakeGenerator()
+    executor = ChunkExecutor(2, seed=1)
+    with pytest.raises(RuntimeError, match=r"1 of 3 chunks failed \(first: chunk 2: .*over its reserved range"):
+        list(executor.run(generator.chunk, [(0, 10, 3), (10, 10, 200), (20, 10, 3)], 'orders',
+                          counters=generator.counters, id_ranges={'order': 100, 'line': 1000}))
+
+
+def test_history_slice_reruns_only_overlapping_chunks(monkeypatch):
+    start = datetime(2024, 1, 1)
+    windows = day_windows(start, spans(45, 10))
+    full, full_counters = run('serial', 1, monkeypatch, days=windows)
+
+    monkeypatch.setenv('GENERATOR_SEED', '1234')
+    monkeypatch.setenv('GENERATOR_AS_OF', '2024-02-15')
+    monkeypatch.setenv('GENERATOR_SLICE_START', '2024-01-15')
+    monkeypatch.setenv('GENERATOR_SLICE_END', '2024-01-21')
+    sliced, sliced_counters = run('serial', 1, monkeypatch, days=windows)
+
+    # Day 14..20 lies in chunk 1 (days 10..19) and chunk 2 (days 20..29): same seeds and ID ranges as before
+    assert sliced == [full[1], full[2]]
+    assert sliced_counters == full_counters
+
+
+def test_id_blocks_grow_with_scale_and_chunk_length(monkeypatch):
+    assert id_stride(100) == 100 and id_block(1000) == 1000
+    monkeypatch.setenv('GENIMS_SCALE_FACTOR', '0.1')
+    assert id_stride(100) == 100  # Never below the scale-1 size
+    monkeypatch.setenv('GENIMS_SCALE_FACTOR', '2.5')
+    assert id_stride(100) == 250
+    monkeypatch.setenv('GENERATOR_CHUNK_DAYS', '25')
+    assert id_block(1000) == 7500
+    assert id_blocks({'order': 1000, 'line': 10}) == {'order': 7500, 'line': 75}
@@ -0,0 +1,52 @@
+"""columnar_store: JSON -> column files conversion and lazy datasets"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from columnar_store import convert, load_dataset, open_store, select_columns
+from table_writer import write_tables
+
+DATA = {
+    'machines': [{'machine_id': f'MCH-{i:06d}', 'capacity': i * 1.5, 'active': i % 2 == 0} for i in range(1, 200)],
+    'metadata': {'scale': 1},
+}
+
+
+def test_round_trip(tmp_path):
+    json_file = tmp_path / 'genims_master_data.json'
+    json_file.write_text(json.dumps(DATA))
+    dataset = load_dataset(json_file, tmp_path / 'cache')
+    assert dataset['machines'] == DATA['machines']
+    assert dataset['metadata'] == DATA['metadata']
+    assert dataset.table('machines').column('capacity')[2] == 4.5
+
+
+@pytest.mark.parametrize('source', ['columnar', 'tsv', 'json'])
+def test_select_columns(tmp_path, monkeypatch, source):
+    json_file = tmp_path / 'genims_master_data.json'
+    machines = [dict(machine, note='x') if i % 3 else machine for i, machine in enumerate(DATA['machines'])]
+    if source == 'tsv':
+        monkeypatch.setenv('GENERATOR_OUTPUT', 'tsv')
+        write_tables(json_file, {'machines': machines})
+    else:
+        json_file.write_text(json.dumps({'machines': machines}))
+        monkeypatch.setenv('COLUMNAR_DATASETS', str(source == 'columnar').lower())
+    dataset = load_dataset(json_file, tmp_path / 'cache')
+    selected = select_columns(dataset, 'machines', ['machine_id', 'note', 'missing'])
+    if source == 'tsv':  # Shard rows carry every column, null where a record had no value
+        assert selected == [{'machine_id': m['machine_id'], 'note': m.get('note')} for m in machines]
+    else:
+        assert selected == [{k: v for k, v in m.items() if k in ('machine_id', 'note')} for m in machines]
+    assert select_columns(dataset, 'missing', ['machine_id']) == []
+
+
+def test_concurrent_conversions_leave_one_store(tmp_path):
+    json_file = tmp_path / 'genims_master_data.json'
+    json_file.write_text(json.dumps(DATA))
+    store_dir = tmp_path / 'cache' / json_file.stem
+    with ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(lambda _: convert(json_file, store_dir), range(16))) == [store_dir] * 16
+    assert open_store(json_file, tmp_path / 'cache')['machines'] == DATA['machines']
+    assert sorted(path.name for path in store_dir.parent.iterdir()) == [store_dir.name, f"{store_dir.name}.lock"]
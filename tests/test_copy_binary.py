@@ -0,0 +1,132 @@
+"""copy_binary: binary COPY streams decoded back field by field"""
+
+import json
+import struct
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from copy_binary import (COPY_HEADER, COPY_TRAILER, PG_EPOCH, build_binary_encoders, encode_binary_copy,
+                         encode_date, encode_int2, encode_int4, encode_int8, encode_jsonb, encode_numeric,
+                         encode_time, encode_timestamp, encode_timestamptz)
+
+COL_INFO = {
+    'id': ('NO', 'integer', 'int4'),
+    'big': ('YES', 'bigint', 'int8'),
+    'ratio': ('YES', 'double precision', 'float8'),
+    'active': ('YES', 'boolean', 'bool'),
+    'name': ('YES', 'character varying', 'varchar'),
+    'attrs': ('YES', 'USER-DEFINED', 'jsonb'),
+    'created_at': ('YES', 'timestamp without time zone', 'timestamp'),
+}
+
+
+def decode_numeric(data):
+    """PostgreSQL numeric wire format -> Decimal"""
+    ndigits, weight, sign, dscale = struct.unpack('!hhHh', data[:8])
+    if sign == 0xC000:
+        return Decimal('NaN')
+    digits = struct.unpack(f'!{ndigits}H', data[8:])
+    value = sum((Decimal(d) * Decimal(10000) ** (weight - i) for i, d in enumerate(digits)), Decimal(0))
+    value = value.quantize(Decimal(1).scaleb(-dscale))
+    return -value if sign == 0x4000 else value
+
+
+def split_copy(stream):
+    """Rows of raw field bytes (None for NULL) from a binary COPY stream"""
+    data = stream.getvalue()
+    assert data.startswith(COPY_HEADER) and data.endswith(COPY_TRAILER)
+    pos, rows = len(COPY_HEADER), []
+    while True:
+        (count,) = struct.unpack_from('!h', data, pos)
+        pos += 2
+        if count == -1:
+            assert pos == len(data)
+            return rows
+        row = []
+        for _ in range(count):
+            (length,) = struct.unpack_from('!i', data, pos)
+            pos += 4
+            if length == -1:
+                row.append(None)
+            else:
+                row.append(data[pos:pos + length])
+                pos += length
+        rows.append(row)
+
+
+def test_stream_round_trip():
+    columns = list(COL_INFO)
+    encoders = build_binary_encoders(columns, COL_INFO)
+    rows = [
+        [1, 2**40, 0.25, True, 'Präzision\tline', {'a': [1, 2]}, '2024-03-05 13:45:10'],
+        [2, None, None, False, None, None, None],
+    ]
+    first, second = split_copy(encode_binary_copy(rows, encoders))
+
+    assert struct.unpack('!i', first[0])[0] == 1
+    assert struct.unpack('!q', first[1])[0] == 2**40
+    assert struct.unpack('!d', first[2])[0] == 0.25
+    assert first[3] == b'\x01'
+    assert first[4].decode('utf-8') == 'Präzision\tline'
+    assert first[5][:1] == b'\x01' and json.loads(first[5][1:]) == {'a': [1, 2]}
+    micros = struct.unpack('!q', first[6])[0]
+    assert PG_EPOCH + timedelta(microseconds=micros) == datetime(2024, 3, 5, 13, 45, 10)
+
+    assert second[3] == b'\x00'
+    assert second[1] is None and second[2] is None and second[4:] == [None, None, None]
+
+
+def test_empty_stream():
+    assert split_copy(encode_binary_copy([], build_binary_encoders(['id'], COL_INFO))) == []
+
+
+def test_unsupported_columns_fall_back_to_text():
+    assert build_binary_encoders(['id', 'missing'], COL_INFO) is None
+    assert build_binary_encoders(['id', 'geo'], {**COL_INFO, 'geo': ('YES', 'USER-DEFINED', 'geometry')}) is None
+
+
+@pytest.mark.parametrize('value', [0, 7, -7, 10000, 123456789, 0.5, -12.345, 99.99, 1234.5678, 0.0001,
+                                   123456789.0001, 1e-5, 1.5e20, '00012.50', '-0.000', Decimal('3.14159'),
+                                   Decimal('-1E+8')])
+def test_numeric_matches_decimal_text(value):
+    expected = Decimal(str(value))
+    decoded = decode_numeric(encode_numeric(value))
+    assert decoded == expected
+    # dscale keeps the text representation's digits after the point
+    assert max(0, -decoded.as_tuple().exponent) == max(0, -expected.as_tuple().exponent)
+
+
+def test_numeric_nan():
+    assert decode_numeric(encode_numeric(Decimal('NaN'))).is_nan()
+
+
+@pytest.mark.parametrize('value', ['2024-03-05 13:45:10', '1999-12-31 23:59:59', '2000-01-01 00:00:00'])
+def test_timestamp_fast_path_matches_datetime(value):
+    assert encode_timestamp(value) == encode_timestamp(datetime.fromisoformat(value))
+
+
+def test_temporal_encoders():
+    micros = struct.unpack('!q', encode_timestamp('2024-03-05T13:45:10.250000'))[0]
+    assert PG_EPOCH + timedelta(microseconds=micros) == datetime(2024, 3, 5, 13, 45, 10, 250000)
+    # Naive timestamptz values are taken as UTC
+    assert encode_timestamptz('2024-03-05 13:45:10') == \
+        encode_timestamptz(datetime(2024, 3, 5, 14, 45, 10, tzinfo=timezone(timedelta(hours=1))))
+    assert struct.unpack('!i', encode_date('2000-01-11 08:00:00'))[0] == 10
+    assert struct.unpack('!i', encode_date(date(1999, 12, 31)))[0] == -1
+    assert struct.unpack('!q', encode_time('01:00:02'))[0] == 3602 * 1000000
+    assert encode_time(time(1, 0, 2)) == encode_time(datetime(2020, 1, 1, 1, 0, 2))
+
+
+def test_jsonb_keeps_json_text():
+    assert encode_jsonb('{"a": 1}') == b'\x01{"a": 1}'
+
+
+@pytest.mark.parametrize('encode, fmt', [(encode_int2, '!h'), (encode_int4, '!i'), (encode_int8, '!q')])
+def test_int_encoders_reject_fractions(encode, fmt):
+    for value in (7, 7.0, Decimal('7'), '7', True):
+        assert struct.unpack(fmt, encode(value))[0] == int(value)
+    for value in (7.5, Decimal('7.25'), -0.5, float('nan')):
+        with pytest.raises(ValueError):
+            encode(value)
@@ -0,0 +1,111 @@
+"""data_registry: ID pools, vectorized sampling and int32-coded IDs"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+import generator_helper
+from data_registry import DataRegistry, IdPool, SnapshotIdPool
+
+MACHINES = [f'MCH-{i:06d}' for i in range(1, 51)] + ['MCH-LEGACY-7']
+
+
+def pools():
+    registry = DataRegistry(int_ids=True)
+    int_pool = registry.id_pool('machine')
+    for id_val in MACHINES:
+        int_pool.add(id_val)
+    base = np.array(sorted(id_val.encode('utf-8') for id_val in MACHINES[:40]), dtype='S12')
+    snapshot_pool = SnapshotIdPool(base)
+    for id_val in MACHINES[40:]:
+        snapshot_pool.add(id_val)
+    return {'str': IdPool(MACHINES), 'int': int_pool, 'snapshot': snapshot_pool}
+
+
+@pytest.mark.parametrize('kind', ['str', 'int', 'snapshot'])
+def test_sample_array_draws_registered_ids(kind):
+    pool = pools()[kind]
+    drawn = pool.sample_array(2000, np.random.default_rng(7))
+    assert drawn.dtype == object and len(drawn) == 2000
+    assert set(drawn) == set(MACHINES)  # 2000 draws over 51 IDs reach every one, interned ones included
+    # Same seed, same draw
+    assert pool.sample_array(50, np.random.default_rng(7)).tolist() == drawn[:50].tolist()
+
+
+@pytest.mark.parametrize('kind', ['str', 'int'])
+def test_sample_array_from_empty_pool(kind):
+    pool = IdPool() if kind == 'str' else DataRegistry(int_ids=True).id_pool('machine')
+    assert len(pool.sample_array(5)) == 0
+
+
+def test_sample_matches_the_in_memory_pool():
+    pool_kinds = pools()
+    reference = IdPool(MACHINES)
+    random.seed(11)
+    expected = reference.sample(500)
+    state = random.getstate()
+    for kind in ('int', 'snapshot'):
+        random.seed(11)
+        assert pool_kinds[kind].sample(500) == expected, kind
+        assert random.getstate() == state, kind  # Same RNG calls: later draws line up too
+    for kind in ('int', 'snapshot'):
+        assert (pool_kinds[kind].sample_array(500, np.random.default_rng(4)).tolist()
+                == reference.sample_array(500, np.random.default_rng(4)).tolist()), kind
+
+
+def test_snapshot_keeps_registration_order(tmp_path):
+    registry = DataRegistry(tmp_path, int_ids=False)
+    shuffled = MACHINES[::-1]
+    registry.register_master_ids('machine', [{'machine_id': id_val} for id_val in shuffled])
+    snapshot_file = registry.write_snapshot(tmp_path / 'registry.snapshot')
+    mapped = DataRegistry.open_snapshot(tmp_path, snapshot_file, int_ids=False)
+    pool = mapped.id_pool('machine')
+    assert isinstance(pool, SnapshotIdPool)
+    assert list(pool) == shuffled
+    assert 'MCH-000007' in pool and 'MCH-LEGACY-7' in pool and 'MCH-000999' not in pool
+    random.seed(3)
+    expected = registry.sample('machine', 200)
+    random.seed(3)
+    assert mapped.sample('machine', 200) == expected
+
+
+def test_registry_and_helper_sample_array(monkeypatch):
+    registry = DataRegistry(int_ids=False)
+    registry.register_master_ids('machine', [{'machine_id': id_val} for id_val in MACHINES])
+    drawn = registry.sample_array('machine', 100, np.random.default_rng(1))
+    assert set(drawn) <= set(MACHINES)
+
+    monkeypatch.setattr(generator_helper, 'get_registry', lambda root_path=None: registry)
+    helper = generator_helper.GeneratorHelper()
+    assert helper.sample_ids('machine', 100, np.random.default_rng(1)).tolist() == drawn.tolist()
+
+
+def test_encode_decode_ids_round_trip():
+    registry = DataRegistry(int_ids=True)
+    codes = registry.encode_ids('machine', MACHINES)
+    assert codes.dtype == np.int32
+    assert codes[0] == 1 and codes[-1] < 0  # Canonical IDs keep their number, others are interned
+    assert registry.decode_ids('machine', codes).tolist() == MACHINES
+
+
+@pytest.mark.parametrize('int_ids', [False, True])
+def test_sample_codes_decode_to_registered_ids(int_ids):
+    registry = DataRegistry(int_ids=int_ids)
+    registry.register_master_ids('machine', [{'machine_id': id_val} for id_val in MACHINES])
+    codes = registry.sample_codes('machine', 500, np.random.default_rng(3))
+    assert codes.dtype == np.int32 and len(codes) == 500
+    assert set(registry.decode_ids('machine', codes)) <= set(MACHINES)
+
+
+def test_register_erp_data_replaces_stale_pools(tmp_path):
+    registry = DataRegistry(int_ids=False)
+    registry.register_master_ids('supplier', [{'supplier_id': 'SUP-000999'}])  # An earlier run's ERP output
+    erp_file = tmp_path / 'genims_erp_data.json'
+    erp_file.write_text(json.dumps({'suppliers': [{'supplier_id': 'SUP-000001'}],
+                                    'materials': [{'material_id': 'MAT-000001'}],
+                                    'bill_of_materials': [{'bom_id': 'BOM-000001'}]}))
+    registry.register_erp_data(erp_file)
+    assert registry.get_registered_ids('supplier') == {'SUP-000001'}
+    assert registry.get_registered_ids('bom') == {'BOM-000001'}
@@ -0,0 +1,121 @@
+"""fk_graph: schema/ontology FK parsing, compilation and the digest-keyed cache"""
+
+import json
+
+from fk_graph import ONTOLOGY_RELATIONSHIPS, FKGraph, parse_schema
+
+MASTER_SQL = """
+CREATE TABLE factories (
+    factory_id VARCHAR(50) PRIMARY KEY,
+    company_id VARCHAR(50),
+    factory_name VARCHAR(200) NOT NULL
+);
+
+CREATE TABLE machines (
+    machine_id VARCHAR(50) PRIMARY KEY,
+    factory_id VARCHAR(50) NOT NULL REFERENCES factories(factory_id),
+    line_id VARCHAR(50)
+);
+"""
+
+MES_SQL = """
+CREATE TABLE work_orders (
+    work_order_id VARCHAR(50) NOT NULL,
+    machine_id VARCHAR(50) NOT NULL, -- FK to machines
+    factory_id VARCHAR(50), -- FK to factories (plant)
+    site_id VARCHAR(50), -- FK to factories/warehouses
+    operator_id VARCHAR(50),
+    PRIMARY KEY (work_order_id)
+);
+
+CREATE TABLE downtime_events (
+    event_id VARCHAR(50) PRIMARY KEY,
+    work_order_id VARCHAR(50),
+    FOREIGN KEY (work_order_id) REFERENCES work_orders(work_order_id)
+);
+"""
+
+RELATIONSHIPS = [
+    {'source_table': 'work_orders', 'source_field': 'operator_id', 'target_table': 'factories',
+     'target_field': 'factory_name'},
+    {'source_table': 'work_orders', 'source_field': 'machine_id', 'target_table': 'machines',
+     'target_field': 'machine_id'},
+    {'source_table': 'shipments', 'source_field': 'factory_id', 'target_table': 'factories',
+     'target_field': 'factory_id'},
+    {'source_table': 'factories', 'source_field': 'company_id', 'target_table': 'companies',
+     'target_field': 'company_id'},
+    {'source_table': 'machines', 'source_field': 'plant_id', 'target_table': 'factories',
+     'target_field': 'factory_id'},
+    {'source_table': 'machines', 'source_field': 'line_id', 'target_table': 'factories',
+     'target_field': 'line_id'},
+]
+
+SCHEMA_FILES = {'master_db': 'master.sql', 'mes_db': 'mes.sql'}
+
+
+def write_sources(root, relationships=RELATIONSHIPS):
+    (root / 'master.sql').write_text(MASTER_SQL)
+    (root / 'mes.sql').write_text(MES_SQL)
+    ontology = root / ONTOLOGY_RELATIONSHIPS
+    ontology.parent.mkdir(parents=True, exist_ok=True)
+    ontology.write_text(json.dumps(relationships))
+
+
+def test_parse_schema_references_and_fk_comments():
+    tables = parse_schema(MES_SQL)
+    work_orders = tables['work_orders']
+    assert work_orders['pk'] == 'work_order_id'
+    assert work_orders['columns']['machine_id'] is True
+    assert work_orders['columns']['factory_id'] is False
+    # '-- FK to machines' and '-- FK to factories (plant)' count; an ambiguous 'a/b' target does not
+    assert work_orders['refs'] == [('machine_id', 'machines', None), ('factory_id', 'factories', None)]
+    assert tables['downtime_events']['refs'] == [('work_order_id', 'work_orders', 'work_order_id')]
+    assert parse_schema(MASTER_SQL)['machines']['refs'] == [('factory_id', 'factories', 'factory_id')]
+
+
+def test_compile_resolves_targets_and_merges_the_ontology():
+    schemas = {'master_db': parse_schema(MASTER_SQL), 'mes_db': parse_schema(MES_SQL)}
+    edges, skipped = FKGraph.compile(schemas, RELATIONSHIPS)
+    mes = edges['mes_db']
+    # Comment FKs resolve to the master database and its primary key
+    assert mes['work_orders']['machine_id'] == {'db': 'master_db', 'table': 'machines', 'column': 'machine_id',
+                                                'required': True, 'source': 'schema'}
+    assert mes['work_orders']['factory_id']['column'] == 'factory_id'
+    assert mes['downtime_events']['work_order_id']['db'] == 'mes_db'
+    # The ontology adds edges the schemas lack; it never overrides a schema edge
+    assert mes['work_orders']['operator_id'] == {'db': 'master_db', 'table': 'factories', 'column': 'factory_name',
+                                                 'required': False, 'source': 'ontology'}
+    assert mes['work_orders']['machine_id']['source'] == 'schema'
+    assert skipped == {'missing_table': 2, 'missing_column': 2}
+    graph = FKGraph(edges, skipped)
+    assert graph.edge_count() == 5
+    assert graph.skipped_count() == 4
+    assert graph.target_columns('master_db') == {'machines': 'machine_id', 'factories': 'factory_name'}
+
+
+def test_load_caches_until_a_source_changes(tmp_path):
+    write_sources(tmp_path)
+    cache_file = tmp_path / 'fk_graph.json'
+    graph = FKGraph.load(tmp_path, SCHEMA_FILES, cache_file)
+    assert graph.edge_count() == 5
+    assert graph.skipped == {'missing_table': 2, 'missing_column': 2}
+
+    # A cache hit is served from the cache file, skipped counts included
+    cached = json.loads(cache_file.read_text())
+    cached['edges'] = {}
+    cache_file.write_text(json.dumps(cached))
+    hit = FKGraph.load(tmp_path, SCHEMA_FILES, cache_file)
+    assert hit.edge_count() == 0
+    assert hit.skipped_count() == 4
+
+    # Any changed source file recompiles
+    write_sources(tmp_path, RELATIONSHIPS[:2])
+    recompiled = FKGraph.load(tmp_path, SCHEMA_FILES, cache_file)
+    assert recompiled.edge_count() == 5
+    assert recompiled.skipped_count() == 0
+
+
+def test_missing_sources_compile_to_an_empty_graph(tmp_path):
+    graph = FKGraph.load(tmp_path, SCHEMA_FILES, tmp_path / 'fk_graph.json')
+    assert graph.edge_count() == 0
+    assert graph.skipped_count() == 0
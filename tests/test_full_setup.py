@@ -0,0 +1,54 @@
+"""full_setup: what the run coordinator hands its generators (environment, registry snapshot)"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+from dotenv import dotenv_values
+
+CONFIG_ENV = Path(__file__).resolve().parent.parent / 'scripts' / 'config.env'
+
+
+@pytest.fixture
+def full_setup():
+    # Importing full_setup loads config.env into os.environ; keep that out of the other tests
+    saved = dict(os.environ)
+    import full_setup
+    os.environ.clear()
+    os.environ.update(saved)
+    return full_setup
+
+
+def test_generator_env_resets_id_spaces_over_config_env(full_setup, monkeypatch):
+    config = dotenv_values(CONFIG_ENV)
+    assert config['ID_ALLOCATOR_RESET'] == 'false'
+    for name, value in config.items():
+        monkeypatch.setenv(name, value)
+    setup = object.__new__(full_setup.GenIMSSetup)
+    for complexity in ('heavy', 'medium', 'light'):
+        assert setup.generator_env(complexity)['ID_ALLOCATOR_RESET'] == 'true'
+
+
+def test_erp_output_refreshes_the_registry_snapshot(full_setup, tmp_path):
+    import data_registry
+    master_dir = tmp_path / 'Data Scripts' / '01 - Base Data'
+    master_dir.mkdir(parents=True)
+    (master_dir / 'genims_master_data.json').write_text(json.dumps({'factories': [{'factory_id': 'FAC-000001'}]}))
+    data_registry.reset_registry()
+    data_registry.get_registry(tmp_path)  # Snapshot of the master data only
+    erp_file = tmp_path / full_setup.DATABASES['genims_erp_db_try']['data_file']
+    erp_file.parent.mkdir(parents=True)
+    erp_file.write_text(json.dumps({'suppliers': [{'supplier_id': 'SUP-000001'}]}))
+    # ERP's output makes the master-only snapshot stale
+    assert data_registry.DataRegistry.open_snapshot(tmp_path) is None
+
+    setup = object.__new__(full_setup.GenIMSSetup)
+    setup.root_path = tmp_path
+    try:
+        setup.refresh_registry_snapshot()
+    finally:
+        data_registry.reset_registry()
+    mapped = data_registry.DataRegistry.open_snapshot(tmp_path)
+    assert mapped.get_registered_ids('supplier') == {'SUP-000001'}
+    assert mapped.get_registered_ids('factory') == {'FAC-000001'}
@@ -0,0 +1,104 @@
+"""generator_cache: source/input/env cache keys and output fingerprints"""
+
+from datetime import date
+
+import pytest
+
+import generator_cache
+from generator_cache import FileDigests, GeneratorCache
+
+
+class _FixedDate(date):
+    day = date(2025, 1, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.day
+
+
+@pytest.fixture
+def scripts_dir(tmp_path, monkeypatch):
+    scripts = tmp_path / 'scripts'
+    scripts.mkdir()
+    monkeypatch.setattr(generator_cache, 'SCRIPTS_DIR', scripts)
+    (scripts / 'helper.py').write_text('import os\nfrom registry import Registry\n')
+    (scripts / 'registry.py').write_text('def load():\n    from store import Store\n    return Store\n')
+    (scripts / 'store.py').write_text('class Store:\n    pass\n')
+    (scripts / 'unused.py').write_text('')
+    gen_dir = tmp_path / 'gen'
+    gen_dir.mkdir()
+    (gen_dir / 'generate.py').write_text('import json, helper\n')
+    return scripts
+
+
+def test_source_files_follow_imports_transitively(tmp_path, scripts_dir):
+    cache = GeneratorCache(tmp_path)
+    names = [path.name for path in cache.source_files(tmp_path / 'gen' / 'generate.py')]
+    assert names[0] == 'generate.py'
+    assert sorted(names[1:]) == ['helper.py', 'registry.py', 'store.py']
+
+
+def test_key_changes_with_an_indirect_import(tmp_path, scripts_dir):
+    cache = GeneratorCache(tmp_path)
+    key = cache.compute_key('gen/generate.py', [], {})
+    assert cache.compute_key('gen/generate.py', [], {}) == key
+    (scripts_dir / 'store.py').write_text('class Store:\n    version = 2\n')
+    assert cache.compute_key('gen/generate.py', [], {}) != key
+
+
+def test_key_covers_inputs_and_env(tmp_path, scripts_dir):
+    (tmp_path / 'input.json').write_text('{}')
+    cache = GeneratorCache(tmp_path)
+    key = cache.compute_key('gen/generate.py', ['input.json'], {})
+    assert cache.compute_key('gen/generate.py', ['input.json'], {'GENERATOR_SEED': '7'}) != key
+    assert cache.compute_key('gen/generate.py', ['input.json'], {'UNRELATED': '7'}) == key
+    (tmp_path / 'input.json').write_text('{"a": 1}')
+    assert cache.compute_key('gen/generate.py', ['input.json'], {}) != key
+
+
+def test_unpinned_key_follows_the_run_day(tmp_path, scripts_dir, monkeypatch):
+    cache = GeneratorCache(tmp_path)
+    monkeypatch.setattr(generator_cache, 'date', _FixedDate)
+    _FixedDate.day = date(2025, 3, 10)
+    key = cache.compute_key('gen/generate.py', [], {})
+    pinned = cache.compute_key('gen/generate.py', [], {'GENERATOR_AS_OF': '2025-03-10'})
+    _FixedDate.day = date(2025, 3, 11)
+    assert cache.compute_key('gen/generate.py', [], {}) != key
+    # A pinned as-of keeps its key from one day to the next
+    assert cache.compute_key('gen/generate.py', [], {'GENERATOR_AS_OF': '2025-03-10'}) == pinned
+
+
+def test_key_covers_the_id_allocator(tmp_path, scripts_dir):
+    cache = GeneratorCache(tmp_path)
+    key = cache.compute_key('gen/generate.py', [], {})
+    assert cache.compute_key('gen/generate.py', [], {'ID_ALLOCATOR': 'true'}) != key
+    assert cache.compute_key('gen/generate.py', [], {'ID_BLOCK_SIZE': '500'}) != key
+
+
+def test_lookup_only_hits_unchanged_outputs(tmp_path, scripts_dir):
+    (tmp_path / 'out.json').write_text('[1]')
+    cache = GeneratorCache(tmp_path)
+    cache.store('gen/generate.py', 'k1', ['out.json'])
+    assert cache.lookup('gen/generate.py', 'k1', ['out.json'])
+    assert not cache.lookup('gen/generate.py', 'k2', ['out.json'])
+    # The manifest survives a reload
+    assert GeneratorCache(tmp_path).lookup('gen/generate.py', 'k1', ['out.json'])
+    (tmp_path / 'out.json').write_text('[1, 2]')
+    assert not cache.lookup('gen/generate.py', 'k1', ['out.json'])
+
+
+def test_missing_output_is_not_stored(tmp_path, scripts_dir):
+    cache = GeneratorCache(tmp_path)
+    cache.store('gen/generate.py', 'k1', ['missing.json'])
+    assert not cache.lookup('gen/generate.py', 'k1', ['missing.json'])
+
+
+def test_file_digests_memoize_by_size_and_mtime(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'abc')
+    digests = FileDigests()
+    first = digests.digest(path)
+    assert digests.snapshot()[str(path)][2] == first
+    path.write_bytes(b'abcd')
+    assert digests.digest(path) != first
+    assert digests.digest(tmp_path / 'missing') is None
@@ -0,0 +1,105 @@
+"""history_slice: window end, slice validation, slice files and the DELETE statements that replace them"""
+
+from datetime import date, datetime
+
+import pytest
+
+from history_slice import as_of, delete_statements, history_slice, read_slice, slice_path, write_slice
+
+PARTITIONS = {
+    'work_orders': {
+        'work_orders': 'planned_start_date',
+        'work_order_operations': ('work_order_id', 'work_orders'),
+    },
+    'downtime': {'downtime_events': 'event_date'},
+}
+
+
+def test_as_of_is_midnight_of_the_pinned_date(monkeypatch):
+    monkeypatch.setenv('GENERATOR_AS_OF', '2025-03-10')
+    assert as_of() == datetime(2025, 3, 10)
+
+
+def test_as_of_defaults_to_the_current_time():
+    before = datetime.now()
+    assert before <= as_of() <= datetime.now()
+
+
+def test_no_slice_without_bounds():
+    assert history_slice() is None
+
+
+def test_slice_needs_seed_and_as_of(monkeypatch):
+    monkeypatch.setenv('GENERATOR_SLICE_START', '2025-03-01')
+    monkeypatch.setenv('GENERATOR_SLICE_END', '2025-03-05')
+    with pytest.raises(ValueError, match='GENERATOR_SEED'):
+        history_slice()
+    monkeypatch.setenv('GENERATOR_SEED', '7')
+    monkeypatch.setenv('GENERATOR_AS_OF', '2025-03-10')
+    assert history_slice() == (date(2025, 3, 1), date(2025, 3, 5))
+
+
+@pytest.mark.parametrize('start, end', [('2025-03-01', ''), ('', '2025-03-05'), ('2025-03-05', '2025-03-01')])
+def test_slice_bounds_must_be_ordered_pairs(monkeypatch, start, end):
+    monkeypatch.setenv('GENERATOR_SLICE_START', start)
+    monkeypatch.setenv('GENERATOR_SLICE_END', end)
+    with pytest.raises(ValueError, match='start <= end'):
+        history_slice()
+
+
+def test_slice_path_sits_next_to_the_data_file(tmp_path):
+    assert slice_path(tmp_path / 'genims_mes_data.json') == tmp_path / 'genims_mes_data.slice.json'
+
+
+def test_write_slice_keeps_covered_days_and_their_children(tmp_path, monkeypatch):
+    monkeypatch.setenv('GENERATOR_AS_OF', '2025-03-10')
+    data = {
+        'work_orders': [
+            {'work_order_id': 'WO-1', 'planned_start_date': '2025-02-28 08:00:00'},
+            {'work_order_id': 'WO-2', 'planned_start_date': '2025-03-01 09:30:00'},
+            {'work_order_id': 'WO-3', 'planned_start_date': datetime(2025, 3, 5, 14)},
+            {'work_order_id': 'WO-4', 'planned_start_date': None},
+        ],
+        'work_order_operations': [
+            {'operation_id': 'OP-1', 'work_order_id': 'WO-1'},
+            {'operation_id': 'OP-2', 'work_order_id': 'WO-2'},
+            {'operation_id': 'OP-3', 'work_order_id': 'WO-3'},
+        ],
+        'downtime_events': [{'event_id': 'DT-1', 'event_date': '2025-03-02'}],
+    }
+    covered = {'work_orders': (date(2025, 3, 1), date(2025, 3, 5))}
+    output = write_slice(tmp_path / 'genims_mes_data.json', data, PARTITIONS, covered)
+
+    sliced = read_slice(output)
+    assert [row['work_order_id'] for row in sliced['work_orders']] == ['WO-2', 'WO-3']
+    assert [row['operation_id'] for row in sliced['work_order_operations']] == ['OP-2', 'OP-3']
+    # A chunk table the run did not cover is left out rather than written empty
+    assert 'downtime_events' not in sliced
+    meta = sliced['genims_slice']
+    assert meta['as_of'] == '2025-03-10'
+    assert meta['tables']['work_order_operations'] == {
+        'key': 'work_order_id', 'parent': 'work_orders', 'column': 'planned_start_date',
+        'start': '2025-03-01', 'end': '2025-03-05'}
+
+
+def test_read_slice_ignores_missing_and_full_data_files(tmp_path):
+    assert read_slice(tmp_path / 'missing.slice.json') is None
+    full = tmp_path / 'genims_mes_data.json'
+    full.write_text('{"work_orders": []}')
+    assert read_slice(full) is None
+
+
+def test_delete_statements_clear_children_first():
+    tables = {
+        'work_orders': {'column': 'planned_start_date', 'start': '2025-03-01', 'end': '2025-03-05'},
+        'work_order_operations': {'key': 'work_order_id', 'parent': 'work_orders',
+                                  'column': 'planned_start_date', 'start': '2025-03-01', 'end': '2025-03-05'},
+    }
+    statements = delete_statements(tables)
+    assert [table for table, _, _ in statements] == ['work_order_operations', 'work_orders']
+    child_sql = statements[0][1]
+    assert child_sql == ("DELETE FROM work_order_operations WHERE work_order_id IN (SELECT work_order_id "
+                         "FROM work_orders WHERE planned_start_date::date BETWEEN %s::date AND %s::date)")
+    assert statements[1][1] == ("DELETE FROM work_orders "
+                                "WHERE planned_start_date::date BETWEEN %s::date AND %s::date")
+    assert all(params == ('2025-03-01', '2025-03-05') for _, _, params in statements)
@@ -0,0 +1,66 @@
+"""id_allocator: file-backed range reservation"""
+
+import multiprocessing
+
+import pytest
+
+from id_allocator import FileIdAllocator, IdAllocator, get_allocator
+
+
+def reserve_many(store_file, count, queue):
+    allocator = FileIdAllocator(store_file)
+    queue.put([allocator.reserve('work_order', 5) for _ in range(count)])
+
+
+def test_ranges_are_consecutive(tmp_path):
+    allocator = FileIdAllocator(tmp_path / 'ranges.json')
+    assert allocator.reserve('machine', 10) == (1, 11)
+    assert allocator.reserve('machine', 5) == (11, 16)
+    assert allocator.reserve('sensor', 3) == (1, 4)
+    # A second allocator on the same store continues where the first stopped
+    assert FileIdAllocator(tmp_path / 'ranges.json').reserve('machine', 1) == (16, 17)
+
+
+def test_floor_and_reset(tmp_path):
+    allocator = FileIdAllocator(tmp_path / 'ranges.json')
+    assert allocator.reserve('ticket', 10, floor=500) == (500, 510)
+    assert allocator.reserve('ticket', 10, floor=100) == (510, 520)
+    allocator.reset('ticket', 42)
+    assert allocator.reserve('ticket', 1) == (42, 43)
+
+
+def test_next_id_serves_from_blocks(tmp_path):
+    allocator = FileIdAllocator(tmp_path / 'ranges.json', block_size=4)
+    other = FileIdAllocator(tmp_path / 'ranges.json', block_size=4)
+    assert [allocator.next_id('employee') for _ in range(3)] == [1, 2, 3]
+    assert other.next_id('employee') == 5  # Its own block, after the one still held by allocator
+    assert [allocator.next_id('employee') for _ in range(2)] == [4, 9]
+    # A floor above the held block skips straight to a fresh one
+    assert allocator.next_id('employee', floor=100) == 100
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='needs fork')
+def test_concurrent_processes_get_disjoint_ranges(tmp_path):
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    workers = [context.Process(target=reserve_many, args=(tmp_path / 'ranges.json', 50, queue)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    ranges = [r for _ in workers for r in queue.get(timeout=60)]
+    for worker in workers:
+        worker.join()
+    ids = [i for start, end in ranges for i in range(start, end)]
+    assert sorted(ids) == list(range(1, 4 * 50 * 5 + 1))
+
+
+def test_get_allocator_backends(tmp_path, monkeypatch):
+    monkeypatch.delenv('ID_ALLOCATOR', raising=False)
+    allocator = get_allocator(tmp_path, namespace='test')
+    assert allocator.store_file == tmp_path / '.genims_cache' / 'test_ranges.json'
+    with pytest.raises(ValueError):
+        get_allocator(tmp_path, backend='redis')
+
+
+def test_base_allocator_is_abstract():
+    with pytest.raises(TypeError):
+        IdAllocator()
@@ -0,0 +1,69 @@
+"""json_stream: chunked table reads must match json.load of the same file"""
+
+import io
+import json
+
+import pytest
+
+from json_stream import JSONStreamReader, iter_table_chunks
+
+DOCUMENT = {
+    'metadata': {'generated': '2025-01-01 00:00:00', 'tables': ['machines', 'readings']},
+    'machines': [
+        {'machine_id': 'MCH-000001', 'name': 'Press "A" [line 1]', 'specs': {'tons': 200, 'axes': [1, 2]}},
+        {'machine_id': 'MCH-000002', 'name': 'Lathe\\B\n{2}', 'specs': None},
+        {'machine_id': 'MCH-000003', 'name': 'Mill, ümlaut', 'specs': {}},
+    ],
+    'empty': [],
+    'count': 12345678901234567890,
+    'readings': [{'sensor_id': f'SEN-{i:06d}', 'value': i * 1.25, 'ok': i % 3 == 0} for i in range(250)],
+}
+
+
+def read_tables(text, chunk_size, read_size):
+    tables = {}
+    sizes = {}
+    for name, chunk in JSONStreamReader(io.StringIO(text), read_size=read_size).iter_tables(chunk_size):
+        assert 0 < len(chunk) <= chunk_size
+        tables.setdefault(name, []).extend(chunk)
+        sizes.setdefault(name, []).append(len(chunk))
+    return tables, sizes
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+@pytest.mark.parametrize('read_size', [1, 7, 64, 1 << 20])
+def test_tables_match_json_load(indent, read_size):
+    tables, _ = read_tables(json.dumps(DOCUMENT, indent=indent), 100, read_size)
+    # Non-array values and empty arrays are not tables
+    assert tables == {'machines': DOCUMENT['machines'], 'readings': DOCUMENT['readings']}
+
+
+def test_large_tables_come_in_consecutive_chunks():
+    _, sizes = read_tables(json.dumps(DOCUMENT), 100, 1 << 20)
+    assert sizes == {'machines': [3], 'readings': [100, 100, 50]}
+
+
+def test_number_at_buffer_edge_is_not_truncated():
+    # Every read boundary falls inside or right after a number
+    text = json.dumps({'t': [{'v': 1234567}, {'v': 89}]}, separators=(',', ':'))
+    for read_size in range(1, len(text) + 1):
+        tables, _ = read_tables(text, 10, read_size)
+        assert tables == {'t': [{'v': 1234567}, {'v': 89}]}
+
+
+@pytest.mark.parametrize('text', ['{}', '  {\n}\n', '{"a": 1, "b": "x"}'])
+def test_documents_without_tables(text):
+    assert read_tables(text, 10, 3)[0] == {}
+
+
+@pytest.mark.parametrize('text', ['{"t": [{"a": 1}, {"a":', '{"t": [1, 2', '[1, 2]'])
+def test_malformed_documents_raise(text):
+    with pytest.raises(ValueError):
+        read_tables(text, 10, 4)
+
+
+def test_iter_table_chunks_reads_files(tmp_path):
+    path = tmp_path / 'genims_test_data.json'
+    path.write_text(json.dumps(DOCUMENT, indent=2))
+    chunks = list(iter_table_chunks(path, chunk_size=200))
+    assert [(name, len(chunk)) for name, chunk in chunks] == [('machines', 3), ('readings', 200), ('readings', 50)]
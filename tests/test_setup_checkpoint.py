@@ -0,0 +1,59 @@
+"""setup_checkpoint: persisted manifest of completed full_setup units"""
+
+import json
+
+from setup_checkpoint import SetupCheckpoint
+
+
+def test_mark_done_and_match_info(tmp_path):
+    checkpoint = SetupCheckpoint(tmp_path / 'checkpoint.json')
+    assert not checkpoint.is_done('table', 'genims_mes_db.work_orders')
+    checkpoint.mark_done('table', 'genims_mes_db.work_orders', rows=10, file_hash='abc')
+    assert checkpoint.is_done('table', 'genims_mes_db.work_orders')
+    assert checkpoint.is_done('table', 'genims_mes_db.work_orders', file_hash='abc', rows=10)
+    # A different data file (or row count) means the table has to be loaded again
+    assert not checkpoint.is_done('table', 'genims_mes_db.work_orders', file_hash='def')
+    assert checkpoint.get('table', 'genims_mes_db.work_orders')['rows'] == 10
+
+
+def test_resume_reads_the_saved_manifest(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    SetupCheckpoint(path).mark_done('database', 'genims_erp_db')
+    assert SetupCheckpoint(path, resume=True).is_done('database', 'genims_erp_db')
+    # Without --resume the previous run's units are ignored
+    assert not SetupCheckpoint(path).is_done('database', 'genims_erp_db')
+    assert not path.with_suffix('.tmp').exists()
+
+
+def test_unreadable_checkpoint_resumes_as_a_full_run(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    path.write_text('{ torn')
+    checkpoint = SetupCheckpoint(path, resume=True)
+    assert checkpoint.count('database') == 0
+
+
+def test_invalidate_by_prefix_and_count(tmp_path):
+    checkpoint = SetupCheckpoint(tmp_path / 'checkpoint.json')
+    checkpoint.mark_done('table', 'genims_mes_db.work_orders')
+    checkpoint.mark_done('table', 'genims_mes_db.downtime_events')
+    checkpoint.mark_done('table', 'genims_erp_db.materials')
+    checkpoint.mark_done('schema', 'genims_mes_db')
+    assert checkpoint.count('table') == 3
+    checkpoint.invalidate('table', 'genims_mes_db.')
+    assert checkpoint.count('table') == 1
+    assert checkpoint.is_done('table', 'genims_erp_db.materials')
+    assert checkpoint.is_done('schema', 'genims_mes_db')
+    with open(tmp_path / 'checkpoint.json') as f:
+        assert sorted(json.load(f)['units']) == ['schema:genims_mes_db', 'table:genims_erp_db.materials']
+
+
+def test_file_digests_are_persisted(tmp_path):
+    data_file = tmp_path / 'data.json'
+    data_file.write_text('{}')
+    path = tmp_path / 'checkpoint.json'
+    checkpoint = SetupCheckpoint(path)
+    digest = checkpoint.file_digest(data_file)
+    checkpoint.save()
+    resumed = SetupCheckpoint(path, resume=True)
+    assert resumed.digests.snapshot()[str(data_file)][2] == digest
+    assert resumed.file_digest(data_file) == digest
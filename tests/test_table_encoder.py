@@ -0,0 +1,67 @@
+"""table_encoder: compiled text COPY rows and NOT NULL defaults"""
+
+from datetime import datetime
+
+import pytest
+
+from table_encoder import TableEncoder, format_any, text_formatter
+
+NOW = datetime(2024, 3, 5, 13, 45, 10)
+
+COL_INFO = {
+    'order_id': ('NO', 'integer', 'int4'),
+    'customer': ('NO', 'character varying', 'varchar'),
+    'quantity': ('NO', 'integer', 'int4'),
+    'unit_price': ('YES', 'numeric', 'numeric'),
+    'rush': ('YES', 'boolean', 'bool'),
+    'created_at': ('NO', 'timestamp without time zone', 'timestamp'),
+    'notes': ('YES', 'text', 'text'),
+}
+
+
+def text_rows(encoder, records, row_offset=0):
+    text = encoder.encode_text(records, row_offset).getvalue()
+    assert text.endswith('\n')
+    return [line.split('\t') for line in text[:-1].split('\n')] if records else []
+
+
+def test_text_rows_escape_and_null():
+    encoder = TableEncoder(list(COL_INFO), COL_INFO, now=NOW)
+    rows = text_rows(encoder, [{
+        'order_id': 7, 'customer': 'Tab\there', 'quantity': 3, 'unit_price': 12.5,
+        'rush': True, 'created_at': '2024-01-02 03:04:05', 'notes': 'line1\nline2\\end\r',
+    }])
+    assert rows == [['7', 'Tab\\there', '3', '12.5', 't', '2024-01-02 03:04:05', 'line1\\nline2\\\\end\\r']]
+
+
+def test_not_null_defaults():
+    encoder = TableEncoder(list(COL_INFO), COL_INFO, now=NOW)
+    rows = text_rows(encoder, [{'notes': None}, {'order_id': 99, 'quantity': 0}], row_offset=10)
+    # IDs take the 1-based row number within the load, other NOT NULL columns a per-type default
+    assert rows[0] == ['11', 'customer_default', '0', '\\N', '\\N', '2024-03-05 13:45:10', '\\N']
+    assert rows[1][:3] == ['99', 'customer_default', '0']
+
+
+def test_unknown_columns_use_generic_formatting():
+    encoder = TableEncoder(['extra', 'order_id'], COL_INFO, now=NOW)
+    assert encoder.sql_types == ('', 'integer')
+    assert text_rows(encoder, [{'extra': False, 'order_id': 1}]) == [['f', '1']]
+
+
+def test_empty_batch():
+    assert TableEncoder(list(COL_INFO), COL_INFO).encode_text([]).getvalue() == ''
+
+
+@pytest.mark.parametrize('data_type', ['integer', 'numeric', 'boolean', 'text', 'character varying',
+                                       'timestamp without time zone', 'date', 'jsonb'])
+@pytest.mark.parametrize('value', [None, 0, -3, 2.5, True, False, 'plain', 'a\tb\\c', '2024-01-02 03:04:05',
+                                   'x\x07y', {'k': 'v'}, [1, 2]])
+def test_typed_formatters_match_generic(data_type, value):
+    # Fast paths per column type must never change the text the generic path would send
+    assert text_formatter(data_type)(value) == format_any(value)
+
+
+def test_binary_encoders_follow_columns():
+    assert TableEncoder(list(COL_INFO), COL_INFO, binary=True).binary_encoders is not None
+    assert TableEncoder(['extra'], COL_INFO, binary=True).binary_encoders is None
+    assert TableEncoder(list(COL_INFO), COL_INFO).binary_encoders is None
@@ -0,0 +1,176 @@
+"""table_writer: TSV formatting and parsing round trips, and shard manifests"""
+
+import numpy as np
+import pytest
+
+from columnar_store import load_dataset
+from table_writer import (TableSink, TableWriter, format_tsv, iter_shard_chunks, parse_tsv_value, read_manifest,
+                          tsv_lines, value_kind, write_tables)
+
+RECORDS = [
+    {'reading_id': i, 'sensor_id': f'SEN-{i % 7:06d}', 'value': round(i * 0.1, 3), 'alarm': i % 5 == 0,
+     'note': ['plain', 'tab\there', 'new\nline', 'back\\slash', None, r'literal \N'][i % 6],
+     'attrs': {'unit': 'bar', 'raw': [i, None]} if i % 4 else None}
+    for i in range(1, 41)
+]
+
+
+def parse_lines(text, kinds):
+    return [[parse_tsv_value(cell, kind) for cell, kind in zip(line.split('\t'), kinds)]
+            for line in text.splitlines()]
+
+
+@pytest.mark.parametrize('value', [None, 0, -12, 3.25, 1e-07, True, False, '', 'x', 'tab\there',
+                                   'cr\rlf\n', 'back\\slash', '\\N', 'ümlaut', {'a': [1, None]}, [1, 'b']])
+def test_value_round_trip(value):
+    kind = value_kind(value)
+    text = format_tsv(value)
+    assert '\t' not in text and '\n' not in text
+    assert parse_tsv_value(text, kind) == value
+
+
+def test_int_kind_accepts_floats():
+    # A column sniffed as int from its first value may still carry floats later on
+    assert parse_tsv_value('2.5', 'int') == 2.5
+
+
+def test_column_arrays_round_trip():
+    n = 300  # Long enough for the format-each-distinct-value path
+    ids = np.arange(n, dtype=np.int64)
+    values = np.round(np.linspace(-5, 5, n), 1)
+    flags = ids % 3 == 0
+    times = np.datetime64('2024-03-05T00:00:00') + (ids % 4).astype('timedelta64[h]')
+    times[5] = np.datetime64('NaT')
+    names = np.array([f'M\t{i % 3}' for i in range(n)])
+    columns = {'id': ids, 'value': values, 'flag': flags, 'ts': times, 'name': names}
+
+    rows = parse_lines(tsv_lines(columns), ['int', 'float', 'bool', 'str', 'str'])
+    assert [row[0] for row in rows] == ids.tolist()
+    assert [row[1] for row in rows] == values.tolist()
+    assert [row[2] for row in rows] == flags.tolist()
+    assert rows[0][3] == '2024-03-05 00:00:00' and rows[3][3] == '2024-03-05 03:00:00'
+    assert rows[5][3] is None
+    assert [row[4] for row in rows] == names.tolist()
+
+    assert tsv_lines(columns, 10, 12).count('\n') == 2
+    assert tsv_lines(columns, 10, 12) == ''.join(tsv_lines(columns).splitlines(True)[10:12])
+
+
+@pytest.mark.parametrize('fmt', ['tsv', 'ndjson'])
+@pytest.mark.parametrize('compress', [False, True])
+def test_writer_round_trip(tmp_path, fmt, compress):
+    data_file = tmp_path / 'genims_test_data.json'
+    with TableWriter(data_file, fmt, compress=compress, shard_rows=16) as writer:
+        writer.write('readings', RECORDS[:25])
+        writer.write('readings', RECORDS[25:])
+        writer.write('empty', [])
+
+    manifest = read_manifest(data_file)
+    table = manifest['tables']['readings']
+    assert table['rows'] == len(RECORDS)
+    assert [shard['rows'] for shard in table['shards']] == [16, 16, 8]
+    assert 'empty' not in manifest['tables']
+
+    read = [rec for name, chunk in iter_shard_chunks(data_file, manifest, chunk_size=7) for rec in chunk]
+    assert read == RECORDS
+
+
+def test_tsv_write_columns_matches_write(tmp_path):
+    columns = {'id': np.arange(1, 6), 'value': np.array([0.5, 1.0, 1.5, 2.0, 2.5]), 'ok': np.arange(5) > 2}
+    records = [{'id': i, 'value': v, 'ok': o}
+               for i, v, o in zip(*(values.tolist() for values in columns.values()))]
+    with TableWriter(tmp_path / 'cols.json', 'tsv') as writer:
+        writer.write_columns('t', columns)
+    manifest = read_manifest(tmp_path / 'cols.json')
+    assert [rec for _, chunk in iter_shard_chunks(tmp_path / 'cols.json', manifest) for rec in chunk] == records
+
+
+def test_regular_json_is_not_a_manifest(tmp_path):
+    data_file = tmp_path / 'genims_test_data.json'
+    data_file.write_text('{"readings": []}')
+    assert read_manifest(data_file) is None
+    assert read_manifest(tmp_path / 'missing.json') is None
+
+
+@pytest.mark.parametrize('fmt', ['json', 'tsv'])
+def test_write_tables_follows_generator_output(tmp_path, monkeypatch, fmt):
+    monkeypatch.setenv('GENERATOR_OUTPUT', fmt)
+    data_file = tmp_path / 'genims_test_data.json'
+    shard_dir = write_tables(data_file, {'readings': RECORDS, 'notes': RECORDS[:3]})
+    if fmt == 'json':
+        assert shard_dir is None and not data_file.exists()
+        return
+    assert shard_dir == tmp_path / 'genims_test_data.shards'
+    # Downstream generators read the manifest through load_dataset like any JSON output
+    dataset = load_dataset(data_file, cache_dir=tmp_path / 'cache')
+    assert sorted(dataset) == ['notes', 'readings']
+    assert dataset['readings'] == RECORDS and dataset.get('notes') == RECORDS[:3]
+    assert dataset.get('missing', []) == []
+
+
+@pytest.mark.parametrize('fmt', ['json', 'tsv'])
+def test_table_sink_streams_emitted_chunks(tmp_path, monkeypatch, fmt):
+    monkeypatch.setenv('GENERATOR_OUTPUT', fmt)
+    data_file = tmp_path / 'genims_test_data.json'
+    # The first chunk has no value for 'value' and 'attrs': their TSV kinds come from a later chunk
+    chunks = [[dict(rec, value=None, attrs=None) for rec in RECORDS[:10]], RECORDS[10:30], RECORDS[30:]]
+    sink, kept = TableSink(data_file), []
+    for chunk in chunks:
+        sink.emit('readings', chunk, kept)
+    assert sink.rows('readings', kept) == len(RECORDS)
+    shard_dir = sink.close({'readings': kept, 'notes': RECORDS[:3]})
+    expected = [rec for chunk in chunks for rec in chunk]
+    if fmt == 'json':
+        # Not streaming: the generator keeps the records and dumps them itself
+        assert shard_dir is None and kept == expected
+        return
+    assert kept == []
+    manifest = read_manifest(data_file)
+    assert manifest['tables']['readings']['rows'] == len(RECORDS)
+    dataset = load_dataset(data_file, cache_dir=tmp_path / 'cache')
+    assert dataset['readings'] == expected and dataset['notes'] == RECORDS[:3]
+
+
+@pytest.mark.parametrize('fmt, compress', [('json', False), ('tsv', False), ('ndjson', True)])
+def test_table_sink_reads_emitted_rows_back(tmp_path, monkeypatch, fmt, compress):
+    monkeypatch.setenv('GENERATOR_OUTPUT', fmt)
+    monkeypatch.setenv('GENERATOR_OUTPUT_GZIP', str(compress).lower())
+    monkeypatch.setenv('GENERATOR_SHARD_ROWS', '16')
+    data_file = tmp_path / 'genims_test_data.json'
+    sink, kept = TableSink(data_file), []
+    sink.emit('readings', RECORDS[:25], kept)
+    # Fixed-size chunks across shard boundaries, from an open shard too
+    assert [len(chunk) for chunk in sink.chunks('readings', kept, 10)] == [10, 10, 5]
+    assert list(sink.records('readings', kept)) == RECORDS[:25]
+    sink.emit('readings', RECORDS[25:], kept)
+    assert [rec for chunk in sink.chunks('readings', kept, 10) for rec in chunk] == RECORDS
+    assert list(sink.records('missing', [])) == []
+    sink.close({'readings': kept})
+    assert list(sink.records('readings', kept)) == RECORDS
+    if fmt != 'json':
+        assert load_dataset(data_file, cache_dir=tmp_path / 'cache')['readings'] == RECORDS
+
+
+def test_failed_run_keeps_the_previous_output(tmp_path):
+    data_file = tmp_path / 'genims_test_data.json'
+    with TableWriter(data_file, 'tsv', shard_rows=16) as writer:
+        writer.write('readings', RECORDS)
+
+    with pytest.raises(RuntimeError):
+        with TableWriter(data_file, 'tsv', shard_rows=16) as writer:
+            writer.write('readings', RECORDS[:5])
+            raise RuntimeError('generator failed')
+    # A killed run never reaches close() or abort()
+    TableWriter(data_file, 'tsv').write('readings', RECORDS[:5])
+
+    manifest = read_manifest(data_file)
+    assert manifest['tables']['readings']['rows'] == len(RECORDS)
+    assert [rec for _, chunk in iter_shard_chunks(data_file, manifest) for rec in chunk] == RECORDS
+
+    # The next successful run replaces the output and clears what the killed one left behind
+    with TableWriter(data_file, 'tsv') as writer:
+        writer.write('notes', RECORDS[:3])
+    manifest = read_manifest(data_file)
+    assert list(manifest['tables']) == ['notes']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['genims_test_data.json', 'genims_test_data.shards']
+    assert [p.name for p in (tmp_path / 'genims_test_data.shards').iterdir()] == ['notes.0000.tsv']